@@ -1,47 +1,98 @@
 """
 Initializing the Flask application with its configurations and components.
+
+The application is built by create_app(); importing this package does no
+database work and constructs no services. `from app import app` still works
+and builds the default application on first access. Tables, migrations and
+seed data are set up separately with `flask --app app init-db`.
 """
 import os
 import logging
+import threading
 from datetime import timedelta
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Database extension, bound to the application in create_app()
+db = SQLAlchemy()
+
+# Default application, built on first access to app.app
+_default_app = None
+_default_app_lock = threading.Lock()
+
+def create_app(config=None):
+    """
+    Create and configure the Flask application.
+
+    Args:
+        config: Optional dictionary of settings overriding app/config.py
+
+    Returns:
+        Flask application with database and routes registered
+    """
+    app = Flask(__name__)
+    app.config.from_pyfile('config.py')
+
+    # Set secret key from environment with fallback
+    app.config['SECRET_KEY'] = os.environ.get('SESSION_SECRET', app.config['SECRET_KEY'])
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)
+    app.config.update(config or {})
+
+    # Configure logging; does nothing if the caller already configured it
+    logging.basicConfig(level=getattr(logging, str(app.config['LOG_LEVEL']).upper(), logging.INFO))
+
+    # Initialize database: PostgreSQL via DATABASE_URL, or a local SQLite file
+    database_url = app.config.get('SQLALCHEMY_DATABASE_URI') or os.environ.get('DATABASE_URL')
+    if not database_url:
+        os.makedirs(os.path.dirname(os.path.abspath(app.config['DATABASE_PATH'])), exist_ok=True)
+        database_url = f"sqlite:///{os.path.abspath(app.config['DATABASE_PATH'])}"
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if database_url.startswith('sqlite'):
+        # Pragmas are set per connection in app.models.database
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            "connect_args": {"timeout": app.config['SQLITE_BUSY_TIMEOUT'] / 1000, "check_same_thread": False},
+        }
+    else:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            "pool_recycle": 300,
+            "pool_pre_ping": True,
+        }
+
+    db.init_app(app)
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config.from_pyfile('config.py')
+    # Ensure data directories exist
+    os.makedirs('data', exist_ok=True)
+    os.makedirs('data/exports', exist_ok=True)
+    os.makedirs('data/images', exist_ok=True)
+    os.makedirs('data/logs', exist_ok=True)
 
-# Set secret key from environment with fallback
-app.config['SECRET_KEY'] = os.environ.get('SESSION_SECRET', app.config['SECRET_KEY'])
-app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)
+    # Register routes and commands
+    from app.routes import register_routes
+    register_routes(app)
 
-# Initialize PostgreSQL database
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+    from app.models.database import register_commands
+    register_commands(app)
 
-# Initialize database
-db = SQLAlchemy(app)
+    return app
 
-# Ensure data directories exist
-os.makedirs('data', exist_ok=True)
-os.makedirs('data/exports', exist_ok=True)
-os.makedirs('data/images', exist_ok=True)
-os.makedirs('data/logs', exist_ok=True)
+def get_app():
+    """
+    Get the default application, creating it on first use.
 
-# Import models to create tables
-from app.models.database import init_db
+    Returns:
+        Flask application shared by scripts importing `app.app`
+    """
+    global _default_app
 
-# Initialize database tables
-with app.app_context():
-    init_db()
+    if _default_app is None:
+        with _default_app_lock:
+            if _default_app is None:
+                _default_app = create_app()
+    return _default_app
 
-# Register routes
-from app.routes import register_routes
-register_routes(app)
+def __getattr__(name):
+    """Build the default application lazily for `from app import app`."""
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,6 +6,7 @@ import os
 import json
 import logging
 from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 from app import db
@@ -13,25 +14,25 @@ from app.models.website import Website
 from app.models.product import Product
 from app.models.category import Category
 from app.models.scrape_log import ScrapeLog
-from app.services.ai_service import AIService
-from app.services.image_service import ImageService
-from app.services.direct_scraper import DirectScraper
+from app.models.scrape_event import ScrapeEvent
+from app.models.exchange_rate import ExchangeRate
+from app.models.host_circuit import HostCircuit
+from app.services import get_direct_scraper, get_search_service, get_price_history_service
+from app.services.currency_service import currency_service
+from app.config import BASE_CURRENCY
+from app.utils.pagination import keyset_paginate, encode_cursor, approximate_count
 
 # Create blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# Initialize services
-ai_service = AIService()
-image_service = ImageService()
-direct_scraper = DirectScraper(ai_service, image_service)
-
 @api_bp.route('/websites', methods=['GET'])
 def get_websites():
     """Get all websites."""
     websites = Website.query.all()
+    product_counts = Product.count_by(Product.website_id)
     return jsonify({
         'success': True,
-        'websites': [w.to_dict() for w in websites]
+        'websites': [w.to_dict(product_count=product_counts.get(w.id, 0)) for w in websites]
     })
 
 @api_bp.route('/websiteStatusSummary', methods=['GET'])
@@ -58,9 +59,10 @@ def get_website_status_summary():
     categories = Category.query.all()
     categories_with_products = 0
     categories_data = []
+    category_counts = Product.count_by(Product.category_id)
     
     for category in categories:
-        product_count_in_category = Product.query.filter_by(category_id=category.id).count()
+        product_count_in_category = category_counts.get(category.id, 0)
         categories_data.append({
             'name': category.name,
             'product_count': product_count_in_category
@@ -163,7 +165,7 @@ def scrape_website():
     
     # Start scraping
     try:
-        result = direct_scraper.scrape_website(website_url, max_products)
+        result = get_direct_scraper().scrape_website(website_url, max_products)
         return jsonify(result)
     except Exception as e:
         logging.error(f"Error scraping website: {str(e)}")
@@ -185,11 +187,37 @@ def get_products():
     # Get query parameters
     category_id = request.args.get('category_id')
     website_id = request.args.get('website_id')
-    limit = int(request.args.get('limit', 20))
-    offset = int(request.args.get('offset', 0))
+    search_query = request.args.get('q')
+    # Malformed numbers are ignored rather than failing the request
+    limit = max(request.args.get('limit', 20, type=int), 1)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    
+    # Ranked full-text search
+    if search_query:
+        results = get_search_service().search(
+            search_query,
+            category_id=category_id,
+            website_id=website_id,
+            min_price=min_price,
+            max_price=max_price,
+            offset=offset,
+            per_page=limit
+        )
+        return jsonify({
+            'success': True,
+            'products': [p.to_dict() for p in results.items],
+            'pagination': {
+                'total': results.total,
+                'limit': limit,
+                'offset': results.offset,
+                'has_more': results.has_next
+            }
+        })
     
     # Build query
-    query = Product.query
+    query = Product.query.options(joinedload(Product.website), joinedload(Product.category))
     
     if category_id:
         query = query.filter_by(category_id=category_id)
@@ -197,30 +225,173 @@ def get_products():
     if website_id:
         query = query.filter_by(website_id=website_id)
     
-    # Get total count for pagination
-    total_count = query.count()
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
     
-    # Apply pagination
-    products = query.order_by(Product.created_at.desc()).limit(limit).offset(offset).all()
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
     
-    return jsonify({
-        'success': True,
-        'products': [p.to_dict() for p in products],
-        'pagination': {
-            'total': total_count,
+    cursor = request.args.get('cursor')
+    before = request.args.get('before')
+    legacy = 'offset' in request.args and not (cursor or before)
+    
+    if legacy:
+        # Legacy offset pagination, kept for existing clients
+        rows = query.order_by(Product.created_at.desc(), Product.id.desc())\
+                    .limit(limit + 1).offset(offset).all()
+        products = rows[:limit]
+        pagination = {
             'limit': limit,
             'offset': offset,
-            'has_more': (offset + limit) < total_count
+            'has_more': len(rows) > limit,
+            'next_cursor': encode_cursor(products[-1].created_at, products[-1].id)
+                           if len(rows) > limit else None
         }
+    else:
+        # Keyset pagination: every page costs the same regardless of depth
+        try:
+            page = keyset_paginate(query, Product, limit=limit, after=cursor, before=before)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        products = page.items
+        pagination = {
+            'limit': limit,
+            'has_more': page.has_next,
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor
+        }
+    
+    # Offset clients get an exact total; keyset pages don't pay for a COUNT(*)
+    # and get the table's estimated size when unfiltered, otherwise null
+    pagination['offset'] = None if cursor or before else offset
+    if legacy:
+        pagination['total'] = query.with_entities(db.func.count(Product.id)).scalar()
+        pagination['total_is_estimate'] = False
+    else:
+        filtered = bool(category_id or website_id) or min_price is not None or max_price is not None
+        pagination['total'] = None if filtered else approximate_count(db.session, Product.__tablename__)
+        pagination['total_is_estimate'] = pagination['total'] is not None
+    
+    return jsonify({
+        'success': True,
+        'products': [p.to_dict() for p in products],
+        'pagination': pagination
+    })
+
+@api_bp.route('/products/<hash_id>/prices', methods=['GET'])
+def get_product_prices(hash_id):
+    """Get a product's price history, downsampled for charts."""
+    product = Product.find_by_hash_id(hash_id)
+    if not product:
+        return jsonify({
+            'success': False,
+            'error': f'Product not found: {hash_id}'
+        }), 404
+    
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        history = get_price_history_service().history(
+            product.id,
+            interval=request.args.get('interval', 'day'),
+            since=datetime.fromisoformat(since) if since else None,
+            until=datetime.fromisoformat(until) if until else None
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    latest = get_price_history_service().latest_prices([product.id]).get(product.id)
+    
+    return jsonify({
+        'success': True,
+        'product': product.hash_id,
+        'latest': latest.to_dict() if latest else None,
+        'history': history
+    })
+
+@api_bp.route('/exchangeRates', methods=['GET'])
+def get_exchange_rates():
+    """Get the stored exchange rates."""
+    return jsonify({
+        'success': True,
+        'base_currency': BASE_CURRENCY,
+        'rates': [rate.to_dict() for rate in ExchangeRate.find_all()]
+    })
+
+@api_bp.route('/refreshExchangeRates', methods=['POST'])
+def refresh_exchange_rates():
+    """Reload exchange rates from the configured source and backfill ZAR prices."""
+    data = request.json or {}
+    try:
+        changed = currency_service.refresh(force_backfill=bool(data.get('backfill')))
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error refreshing exchange rates: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'changed': changed,
+        'message': f'{len(changed)} exchange rates changed'
+    })
+
+@api_bp.route('/transportStats', methods=['GET'])
+def get_transport_stats():
+    """Get connection reuse, DNS cache and retry statistics of the shared HTTP transport."""
+    from app.utils.http_transport import http_transport
+    from app.utils.retry_policy import retry_policy
+    
+    return jsonify({
+        'success': True,
+        **http_transport.report(),
+        'retries': retry_policy.snapshot()
+    })
+
+@api_bp.route('/hostCircuits', methods=['GET'])
+def get_host_circuits():
+    """Get the circuit breaker state of every host that has tripped."""
+    return jsonify({
+        'success': True,
+        'circuits': [circuit.to_dict() for circuit in HostCircuit.find_all()]
+    })
+
+@api_bp.route('/scrapeLogs/<hash_id>/events', methods=['GET'])
+def get_scrape_events(hash_id):
+    """Get the per-request trace of a scrape, oldest request first."""
+    scrape_log = ScrapeLog.find_by_hash_id(hash_id)
+    if not scrape_log:
+        return jsonify({
+            'success': False,
+            'error': f'Scrape log not found: {hash_id}'
+        }), 404
+    
+    limit = min(request.args.get('limit', 500, type=int), 5000)
+    events = ScrapeEvent.find_by_scrape_log_id(scrape_log.id, limit=limit)
+    
+    return jsonify({
+        'success': True,
+        'scrape_log': scrape_log.hash_id,
+        'events': [event.to_dict() for event in events]
     })
 
 @api_bp.route('/categories', methods=['GET'])
 def get_categories():
     """Get all categories."""
     categories = Category.query.all()
+    product_counts = Product.count_by(Product.category_id)
     return jsonify({
         'success': True,
-        'categories': [c.to_dict() for c in categories]
+        'categories': [c.to_dict(product_counts) for c in categories]
     })
 
 def register_api_routes(app):
@@ -0,0 +1,360 @@
+"""
+Command-line entry point for running crawls (python -m app.cli).
+
+Every site runs through the shared scraper engine in this one process;
+sites differ only by their profile in app.services.site_profiles.
+
+Examples:
+    python -m app.cli sites
+    python -m app.cli crawl --all --concurrency 4
+    python -m app.cli crawl ultimateexotics reptilegarden --budget 20
+    python -m app.cli crawl "Reptile Garden" --dry-run --output products.jsonl
+    python -m app.cli crawl --all --warc-capture data/warc
+    python -m app.cli crawl --all --warc-replay data/warc --dry-run
+    python -m app.cli train-dictionaries --all
+    python -m app.cli reextract --all --workers 4 --dry-run
+"""
+import sys
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+def select_websites(selectors):
+    """
+    Find the websites matching command-line selectors.
+
+    A selector matches a website by hash ID, name (case-insensitive),
+    profile name or a substring of its URL.
+
+    Args:
+        selectors: List of selector strings; empty selects every website
+
+    Returns:
+        List of Website instances in priority order
+
+    Raises:
+        ValueError: If a selector matches no website
+    """
+    from app.models.website import Website
+    from app.services.site_profiles import profile_for_url
+
+    websites = Website.query.order_by(Website.priority, Website.id).all()
+    if not selectors:
+        return websites
+
+    selected = []
+    for selector in selectors:
+        needle = selector.lower()
+        matches = [
+            website for website in websites
+            if needle in (website.hash_id.lower(), website.name.lower())
+            or profile_for_url(website.url).name == needle
+            or needle in website.url.lower()
+        ]
+        if not matches:
+            raise ValueError(f"No website matches '{selector}'")
+        selected.extend(website for website in matches if website not in selected)
+    return selected
+
+def crawl_site(app, website_id, budget=None, deadline=None, sink=None, dry_run=False):
+    """
+    Crawl one website in its own app context and scraper.
+
+    Args:
+        app: Flask application
+        website_id: ID of the website
+        budget: Maximum product pages (default: the website's limit)
+        deadline: time.monotonic() value after which the crawl stops
+        sink: Product sink shared by the run (default: the database)
+        dry_run: Do not record the run in the database
+
+    Returns:
+        Crawl result dictionary from ScraperService.crawl
+    """
+    from app import db
+    from app.models.website import Website
+    from app.services import get_ai_service, get_image_service
+    from app.services.scraper_service import ScraperService
+
+    with app.app_context():
+        website = db.session.get(Website, website_id)
+        if deadline is not None and time.monotonic() >= deadline:
+            return {'success': False, 'website': website.name, 'error': 'Time budget used up before start'}
+
+        # One scraper per site: each has its own HTTP session and throttle
+        scraper = ScraperService(get_ai_service(), get_image_service())
+        result = scraper.crawl(website, max_products=budget, sink=sink, deadline=deadline, dry_run=dry_run)
+        result.pop('scrape_log', None)
+        return result
+
+def open_sink(output):
+    """
+    Open the product sink for an --output value.
+
+    Args:
+        output: 'db', '-' for JSON lines on stdout, or a JSON lines file path
+
+    Returns:
+        Tuple of (sink or None for the database, file to close or None)
+    """
+    from app.services.crawl_sinks import JsonLinesSink
+
+    if output == 'db':
+        return None, None
+    if output == '-':
+        return JsonLinesSink(sys.stdout), None
+    stream = open(output, 'a', encoding='utf-8')
+    return JsonLinesSink(stream), stream
+
+def run_crawl(args):
+    """Run the crawl command."""
+    from app import create_app
+
+    if not args.sites and not args.all:
+        print("Error: name the sites to crawl, or pass --all", file=sys.stderr)
+        return 2
+
+    output = args.output or ('-' if args.dry_run else 'db')
+    if args.dry_run and output == 'db':
+        print("Error: --dry-run cannot write to the database; use --output - or a file", file=sys.stderr)
+        return 2
+
+    from app.utils.http_transport import http_transport
+
+    if args.warc_replay:
+        http_transport.start_replay(args.warc_replay)
+    elif args.warc_capture:
+        http_transport.start_capture(args.warc_capture)
+
+    app = create_app()
+    with app.app_context():
+        try:
+            websites = select_websites(args.sites)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        targets = [(website.id, website.name) for website in websites]
+
+    if not targets:
+        print("No websites to crawl", file=sys.stderr)
+        return 1
+
+    deadline = time.monotonic() + args.time_budget if args.time_budget is not None else None
+    sink, stream = open_sink(output)
+    start = time.monotonic()
+    logging.info(f"Crawling {len(targets)} site(s) with concurrency {args.concurrency}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            futures = [
+                (name, executor.submit(crawl_site, app, website_id, args.budget, deadline, sink, args.dry_run))
+                for website_id, name in targets
+            ]
+            results = []
+            for name, future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logging.error(f"Crawl of {name} failed: {str(e)}")
+                    results.append({'success': False, 'website': name, 'error': str(e)})
+    finally:
+        if stream:
+            stream.close()
+        if http_transport.capture is not None:
+            http_transport.capture.close()
+
+    # Summary goes to stderr so JSON lines on stdout stay clean
+    for result in results:
+        if result.get('success'):
+            skipped = f", {result['products_skipped']} skipped" if result.get('products_skipped') else ''
+            print(f"{result['website']}: {result['products_scraped']} new, {result['products_updated']} updated, "
+                  f"{result['products_failed']} failed{skipped} of {result['products_processed']} processed "
+                  f"({result['products_found']} found), {result['price_changes']} price changes",
+                  file=sys.stderr)
+        else:
+            print(f"{result['website']}: FAILED - {result.get('error')}", file=sys.stderr)
+    print(f"Finished in {time.monotonic() - start:.1f}s", file=sys.stderr)
+    print_transport_report()
+
+    return 0 if all(result.get('success') for result in results) else 1
+
+def print_transport_report():
+    """Print connection reuse per host and DNS cache use to stderr."""
+    from app.utils.http_transport import http_transport
+
+    report = http_transport.report()
+    for host, counters in sorted(report['hosts'].items()):
+        reuse = f"{counters['reuse_rate']:.0%}" if counters['reuse_rate'] is not None else '-'
+        print(f"  {host}: {counters['requests']} requests over {counters['connections']} connections "
+              f"({reuse} reused, {counters['connect_seconds']:.2f}s connecting)", file=sys.stderr)
+    dns = report['dns_cache']
+    print(f"  {report['protocol']}, DNS cache {dns['hits']} hits / {dns['misses']} misses", file=sys.stderr)
+    if 'replay' in report:
+        replay = report['replay']
+        print(f"  Replayed from {replay['directory']}: {replay['hits']} archived, {replay['misses']} not archived "
+              f"({replay['urls']} URLs)", file=sys.stderr)
+    if 'capture' in report:
+        print(f"  Archived {report['capture']['records']} WARC records to {report['capture']['directory']}",
+              file=sys.stderr)
+
+def run_sites(args):
+    """Run the sites command."""
+    from app import create_app
+    from app.services.site_profiles import profile_for_url
+
+    app = create_app()
+    with app.app_context():
+        for website in select_websites([]):
+            print(f"{website.hash_id[:12]}  {profile_for_url(website.url).name:<16} "
+                  f"priority={website.priority:<3} max={website.max_products:<5} "
+                  f"{website.status:<10} {website.name}  {website.url}")
+    return 0
+
+def print_raw_page_stats():
+    """Print the stored page sizes per codec to stderr."""
+    from app.models.raw_page import RawPage
+
+    for row in RawPage.stats():
+        ratio = row['size'] / row['compressed_size'] if row['compressed_size'] else 0
+        print(f"  {row['codec']:<5} {'with' if row['dictionary'] else 'without'} dictionary: "
+              f"{row['pages']} pages, {row['size'] / 1024:.0f} KB -> {row['compressed_size'] / 1024:.0f} KB "
+              f"({ratio:.1f}x)", file=sys.stderr)
+
+def run_train_dictionaries(args):
+    """Run the train-dictionaries command."""
+    from app import create_app, db
+    from app.models.product import Product
+    from app.models.raw_page import RawPage
+    from app.services.raw_page_store import raw_page_store
+    from app.config import RAW_PAGE_DICTIONARY_SAMPLES
+
+    if not args.sites and not args.all:
+        print("Error: name the sites to train dictionaries for, or pass --all", file=sys.stderr)
+        return 2
+
+    app = create_app()
+    with app.app_context():
+        try:
+            websites = select_websites(args.sites)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+
+        # Pages are stored under the host of the product URL, which may differ from the website's
+        hosts = [host for host, in db.session.query(RawPage.host).distinct()
+                 .join(Product, Product.raw_page_id == RawPage.id)
+                 .filter(Product.website_id.in_([website.id for website in websites]))
+                 .order_by(RawPage.host)]
+        if not hosts:
+            print("No stored pages to train on", file=sys.stderr)
+            return 1
+
+        for host in hosts:
+            dictionary = raw_page_store.train_dictionary(host, args.samples or RAW_PAGE_DICTIONARY_SAMPLES)
+            if dictionary:
+                print(f"{host}: {len(dictionary.data)} byte {dictionary.codec} dictionary "
+                      f"from {dictionary.sample_count} pages", file=sys.stderr)
+            else:
+                print(f"{host}: no dictionary", file=sys.stderr)
+        print_raw_page_stats()
+    return 0
+
+def run_reextract(args):
+    """Run the reextract command."""
+    from app import create_app
+    from app.services.reextract_service import ReextractService
+
+    if not args.sites and not args.all:
+        print("Error: name the sites to re-extract, or pass --all", file=sys.stderr)
+        return 2
+
+    app = create_app()
+    with app.app_context():
+        try:
+            website_ids = [website.id for website in select_websites(args.sites)]
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+
+        kwargs = {key: value for key, value in (('workers', args.workers), ('batch_size', args.batch_size))
+                  if value is not None}
+        stats = ReextractService(**kwargs).run(None if args.all else website_ids, dry_run=args.dry_run)
+
+    fields = ', '.join(f"{field} {count}" for field, count in stats['fields'].most_common()) or 'none'
+    print(f"Re-extracted {stats['products']} products in {stats['seconds']:.1f}s: {stats['changed']} changed, "
+          f"{stats['unchanged']} unchanged, {stats['failed']} failed{' (dry run)' if args.dry_run else ''}",
+          file=sys.stderr)
+    print(f"  Changed fields: {fields}", file=sys.stderr)
+    if not args.dry_run:
+        print(f"  {stats['price_changes']} price changes, {stats['identity_conflicts']} SKU changes skipped "
+              f"because another product has that identity", file=sys.stderr)
+    return 0
+
+def run_init_db(args):
+    """Run the init-db command."""
+    from app import create_app
+    from app.models.database import init_db
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+    print("Database initialized.")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description='Reptile product scraper')
+    parser.add_argument('--verbose', action='store_true', help='Log debug messages')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    crawl_parser = subparsers.add_parser('crawl', help='Crawl websites')
+    crawl_parser.add_argument('sites', nargs='*',
+                              help='Websites by hash ID, name, profile name or URL substring')
+    crawl_parser.add_argument('--all', action='store_true', help='Crawl every website')
+    crawl_parser.add_argument('--concurrency', type=int, default=1, help='Sites crawled in parallel')
+    crawl_parser.add_argument('--budget', type=int,
+                              help="Maximum product pages per site (default: each website's limit)")
+    crawl_parser.add_argument('--time-budget', type=float, help='Stop scraping products after this many seconds')
+    crawl_parser.add_argument('--dry-run', action='store_true',
+                              help='Scrape without writing to the database (implies --output -)')
+    crawl_parser.add_argument('--output',
+                              help="'db' (default), '-' for JSON lines on stdout, or a JSON lines file")
+    warc_group = crawl_parser.add_mutually_exclusive_group()
+    warc_group.add_argument('--warc-capture', metavar='DIR',
+                            help='Archive every response to WARC files in DIR')
+    warc_group.add_argument('--warc-replay', metavar='DIR',
+                            help='Serve every fetch from the WARC files in DIR instead of the network')
+
+    dictionary_parser = subparsers.add_parser('train-dictionaries',
+                                              help="Train compression dictionaries on sites' stored pages")
+    dictionary_parser.add_argument('sites', nargs='*',
+                                   help='Websites by hash ID, name, profile name or URL substring')
+    dictionary_parser.add_argument('--all', action='store_true', help='Every website')
+    dictionary_parser.add_argument('--samples', type=int, help='Newest pages per host to train on (default: 500)')
+
+    reextract_parser = subparsers.add_parser('reextract',
+                                             help='Re-run the extractors over stored pages and update products')
+    reextract_parser.add_argument('sites', nargs='*',
+                                  help='Websites by hash ID, name, profile name or URL substring')
+    reextract_parser.add_argument('--all', action='store_true', help='Every website')
+    reextract_parser.add_argument('--workers', type=int, help='Extraction processes (default: CPU count)')
+    reextract_parser.add_argument('--batch-size', type=int, help='Products per batch')
+    reextract_parser.add_argument('--dry-run', action='store_true', help='Count changes without writing them')
+
+    subparsers.add_parser('sites', help='List websites and their profiles')
+    subparsers.add_parser('init-db', help='Create tables, apply migrations and seed default data')
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    commands = {'crawl': run_crawl, 'sites': run_sites, 'init-db': run_init_db,
+                'train-dictionaries': run_train_dictionaries, 'reextract': run_reextract}
+    return commands[args.command](args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,7 @@ from datetime import timedelta
 APP_NAME = "Reptile Products Scraper"
 DEBUG = True
 SECRET_KEY = os.environ.get("SECRET_KEY")  # Required environment variable
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "DEBUG")  # Root log level set by create_app
 
 # Authentication settings
 ADMIN_USERNAME = os.environ.get("ADMIN_USERNAME", "dasijoe")  # Default admin username
@@ -16,7 +17,10 @@ ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "B@ng1234")  # Default admin p
 SESSION_LIFETIME = timedelta(hours=8)
 
 # Database settings
-DATABASE_PATH = "data/sqlite.db"
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "data/sqlite.db")  # SQLite database used when DATABASE_URL is not set
+SQLITE_BUSY_TIMEOUT = 5000  # ms a connection waits for a lock before failing
+SQLITE_CACHE_SIZE_KB = 64 * 1024  # page cache per connection
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # bytes of the database file memory-mapped for reads
 
 # Scraping settings
 DEFAULT_USER_AGENTS = [
@@ -28,14 +32,84 @@ DEFAULT_USER_AGENTS = [
 # Default throttling settings
 DEFAULT_REQUEST_DELAY = 2  # seconds between requests
 DEFAULT_SPRINT_SIZE = 20  # products per sprint
-MAX_REQUESTS_PER_MINUTE = 20
-RETRY_ATTEMPTS = 3
+RETRY_ATTEMPTS = 3  # attempts per URL after network errors
+
+# Retry policy; statuses not listed here are not retried
+RETRY_STATUS_RULES = {403: 1, 408: 2, 429: 3, 500: 1, 502: 2, 503: 3, 504: 2}  # status -> retries allowed
+RETRY_BACKOFF_BASE = 1.0  # seconds; retry n waits a random time up to base * 2**n
+RETRY_BACKOFF_CAP = 60.0  # seconds; longest backoff ceiling
+RETRY_MAX_RETRY_AFTER = 300  # seconds; a longer Retry-After means giving up on the URL
+RETRY_BUDGET_RATIO = 0.2  # retries allowed per request sent to a host
+RETRY_BUDGET_MIN = 10  # retries a host may always use
+
+# Per-host circuit breaker, shared between processes through the host_circuits table
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failed requests that open a host's circuit
+CIRCUIT_FAILURE_STATUSES = (403, 429, 500, 502, 503, 504)  # network errors also count as failures
+CIRCUIT_COOLDOWN = 60.0  # seconds before an open circuit lets a probe through
+CIRCUIT_MAX_COOLDOWN = 1800.0  # seconds; the cooldown doubles after each failed probe up to this
+CIRCUIT_SYNC_INTERVAL = 5.0  # seconds between reads of a host's shared circuit state
+
+# Per-host adaptive concurrency (AIMD); a website's request_delay seeds the interval of a new host
+HOST_MAX_CONCURRENCY = 4  # requests in flight per host at most
+HOST_INTERVAL_STEP = 0.25  # seconds taken off the interval per healthy response
+HOST_MAX_INTERVAL = 30.0  # seconds between requests at most, after repeated overload
+HOST_LATENCY_SPIKE_FACTOR = 3.0  # response time above this multiple of the baseline counts as overload
+HOST_OVERLOAD_STATUSES = CIRCUIT_FAILURE_STATUSES  # other 4xx leave the pace unchanged
+
+# Politeness: robots.txt rules and the crawl worker pool shared by all hosts
+ROBOTS_USER_AGENT = "ReptileProductsScraper"  # token matched against robots.txt User-agent lines
+ROBOTS_TTL = 24 * 3600  # seconds a host's robots.txt is reused
+ROBOTS_ERROR_TTL = 300  # seconds a host is treated as disallowed after its robots.txt failed with 5xx or no response
+CRAWL_WORKERS = 16  # threads fetching product pages, taking whichever host is ready next
+
+# Per-request trace of each scrape (scrape_events table)
+SCRAPE_EVENT_BATCH_SIZE = 200  # events buffered before they are written in one insert
+SCRAPE_EVENT_RETENTION_DAYS = 30  # older events are deleted by init-db
+SCRAPE_EVENT_VIEW_DAYS = 7  # days covered by the slow-URL and error-rate views
+
+# Shared HTTP transport; each host's pool keeps HOST_MAX_CONCURRENCY connections alive
+HTTP_POOL_HOSTS = 32  # hosts whose connection pools are kept open at once
+HTTP_DNS_CACHE_TTL = 300  # seconds a resolved host address is reused
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "false").lower() == "true"  # needs httpx[http2]
+
+# Web archive (WARC) capture and offline replay of every fetch
+WARC_CAPTURE_DIR = os.environ.get("WARC_CAPTURE_DIR")  # archive every response to this directory when set
+WARC_REPLAY_DIR = os.environ.get("WARC_REPLAY_DIR")  # serve every fetch from the archives in this directory when set
+WARC_MAX_FILE_SIZE = 1024 ** 3  # bytes written to an archive file before a new one is started
+
+# Raw HTML of scraped product pages, kept for re-extraction (raw_pages table)
+RAW_PAGE_STORE_ENABLED = os.environ.get("RAW_PAGE_STORE_ENABLED", "true").lower() == "true"
+RAW_PAGE_CODEC = os.environ.get("RAW_PAGE_CODEC")  # 'zstd' or 'zlib'; default zstd when zstandard is installed
+RAW_PAGE_ZSTD_LEVEL = 10  # zstd compression level (1-22)
+RAW_PAGE_ZLIB_LEVEL = 6  # zlib compression level (1-9)
+RAW_PAGE_DICTIONARY_SIZE = 64 * 1024  # bytes of a trained per-site dictionary (zlib uses at most 32 KB)
+RAW_PAGE_DICTIONARY_SAMPLES = 500  # stored pages a site's dictionary is trained on
+REEXTRACT_BATCH_SIZE = 200  # stored pages per re-extraction task
+REEXTRACT_WORKERS = os.cpu_count() or 1  # processes re-running the extractors
 
 # AI settings
 AI_MODEL = "gpt-3.5-turbo"
 AI_MAX_TOKENS = 1000
 AI_TEMPERATURE = 0.1
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+AI_MAX_CONCURRENCY = 8  # LLM requests in flight at once
+AI_REQUESTS_PER_MINUTE = int(os.environ.get("AI_REQUESTS_PER_MINUTE", 500))
+AI_TOKENS_PER_MINUTE = int(os.environ.get("AI_TOKENS_PER_MINUTE", 30000))
+AI_MAX_RETRIES = 5
+AI_REQUEST_TIMEOUT = 30  # seconds
+CATEGORIZATION_CACHE_SIZE = 5000  # in-process LRU entries in front of the DB cache
+CATEGORIZATION_CACHE_HIT_BATCH = 100  # cache hits counted in memory before they are written
+
+# Local classifier settings (fast tier before the LLM)
+LOCAL_CLASSIFIER_PATH = "data/models/category_classifier.json.gz"
+LOCAL_CLASSIFIER_THRESHOLD = 0.75  # below this confidence, fall through to the LLM
+LOCAL_CLASSIFIER_FEATURES = 2 ** 18  # hashed feature buckets
+
+# Category registry settings
+CATEGORY_REGISTRY_TTL = 300  # seconds before the in-memory category map is reloaded
+
+# Search settings
+SEARCH_INDEX_REFRESH_INTERVAL = 5  # seconds between checks for product changes (local index)
 
 # Export settings
 EXPORT_FORMATS = ["csv", "json", "facebook"]
@@ -103,10 +177,17 @@ EXCLUDE_KEYWORDS = [
     "cat collar", "hamster", "guinea pig", "rabbit"
 ]
 
-# Exchange rates (updated periodically via API)
+# Exchange rates (ZAR per unit); fallback values used by the "static" rate source
 EXCHANGE_RATES = {
-    "USD": 18.50,  # Default value, should be updated via API
-    "EUR": 20.10,  # Default value, should be updated via API
-    "GBP": 23.80,  # Default value, should be updated via API
-    "CNY": 2.65,   # Default value, should be updated via API
+    "USD": 18.50,
+    "EUR": 20.10,
+    "GBP": 23.80,
+    "CNY": 2.65,
 }
+
+# Currency settings
+BASE_CURRENCY = "ZAR"
+# "static" (EXCHANGE_RATES above), "file:<path>" (JSON file) or "<module>:<class>" for a custom source
+EXCHANGE_RATE_SOURCE = os.environ.get("EXCHANGE_RATE_SOURCE", "static")
+EXCHANGE_RATE_TTL = 6 * 3600  # seconds before rates are reloaded from the source
+EXCHANGE_RATE_BACKFILL_BATCH = 5000  # products per UPDATE when price_zar is recomputed
@@ -0,0 +1,373 @@
+"""
+Versioned schema migrations.
+
+Each module in app/migrations/versions defines `revision`, `down_revision`,
+`description` and `upgrade(op)` / `downgrade(op)` functions, forming a linear
+chain. Applied revisions are recorded in the schema_migrations table.
+
+`db.create_all()` only creates missing tables; changes to existing tables
+(new columns, new indexes) are made by migrations instead.
+
+Usage:
+    python -m app.migrations upgrade [--target REVISION]
+    python -m app.migrations downgrade REVISION
+    python -m app.migrations current
+    python -m app.migrations history
+    python -m app.migrations revision "description"
+"""
+import os
+import re
+import logging
+import pkgutil
+import importlib
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+VERSIONS_PACKAGE = 'app.migrations.versions'
+VERSIONS_PATH = os.path.join(os.path.dirname(__file__), 'versions')
+VERSION_TABLE = 'schema_migrations'
+
+# Arbitrary key for the PostgreSQL advisory lock that serializes migration runs
+MIGRATION_LOCK_ID = 72150433
+
+# Oldest SQLite migrations run on: the first with ALTER TABLE ... DROP COLUMN
+SQLITE_MIN_VERSION = (3, 35, 0)
+
+class MigrationError(Exception):
+    """Raised when the migration chain is invalid, a target is unknown or the database is unsupported."""
+
+class Operations:
+    """
+    Schema operations available to migrations.
+
+    Every operation checks the current schema first, so migrations can be
+    applied to databases created by `db.create_all()` as well as older ones.
+    """
+    def __init__(self, connection):
+        """
+        Initialize operations on a connection.
+
+        Args:
+            connection: SQLAlchemy connection inside the migration transaction
+        """
+        self.connection = connection
+        self.dialect = connection.dialect.name
+
+    def execute(self, sql, **params):
+        """Execute raw SQL."""
+        return self.connection.execute(text(sql), params)
+
+    def has_table(self, table):
+        """Check if a table exists."""
+        return inspect(self.connection).has_table(table)
+
+    def has_column(self, table, column):
+        """Check if a column exists."""
+        return any(c['name'] == column for c in inspect(self.connection).get_columns(table))
+
+    def has_index(self, table, name):
+        """Check if an index exists."""
+        return any(i['name'] == name for i in inspect(self.connection).get_indexes(table))
+
+    def create_index(self, name, table, columns, unique=False, dialects=None):
+        """
+        Create an index if it does not exist.
+
+        Args:
+            name: Index name
+            table: Table name
+            columns: List of column names or SQL expressions
+            unique: Create a unique index
+            dialects: Optional list of dialect names the index applies to
+        """
+        if dialects and self.dialect not in dialects:
+            return
+        if not self.has_table(table) or self.has_index(table, name):
+            return
+
+        unique_sql = 'UNIQUE ' if unique else ''
+        self.execute(f"CREATE {unique_sql}INDEX {name} ON {table} ({', '.join(columns)})")
+        logging.info(f"Created index {name} on {table}")
+
+    def drop_index(self, name, table):
+        """Drop an index if it exists."""
+        if not self.has_table(table) or not self.has_index(table, name):
+            return
+        self.execute(f"DROP INDEX {name}")
+        logging.info(f"Dropped index {name}")
+
+    def has_foreign_key(self, table, column):
+        """Check if a column is part of a foreign key."""
+        return any(column in fk['constrained_columns'] for fk in inspect(self.connection).get_foreign_keys(table))
+
+    def add_column(self, table, column, type_, server_default=None, references=None):
+        """
+        Add a nullable column if it does not exist.
+
+        Args:
+            table: Table name
+            column: Column name
+            type_: SQLAlchemy type instance, e.g. db.Boolean()
+            server_default: Optional SQL default expression
+            references: Optional 'table.column' the column is a foreign key to
+        """
+        if not self.has_table(table) or self.has_column(table, column):
+            return
+
+        type_sql = type_.compile(dialect=self.connection.dialect)
+        default_sql = f" DEFAULT {server_default}" if server_default is not None else ''
+        references_sql = ''
+        if references:
+            # Named as PostgreSQL names the constraints db.create_all() creates
+            target_table, target_column = references.split('.')
+            references_sql = f" CONSTRAINT {table}_{column}_fkey REFERENCES {target_table} ({target_column})"
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {type_sql}{default_sql}{references_sql}")
+        logging.info(f"Added column {table}.{column}")
+
+    def create_foreign_key(self, table, column, references):
+        """
+        Make an existing column a foreign key if it is not one yet.
+
+        SQLite can only declare foreign keys with the column (see add_column);
+        there the call does nothing.
+
+        Args:
+            table: Table name
+            column: Column name
+            references: 'table.column' the column refers to
+        """
+        if self.dialect == 'sqlite':
+            return
+        if not self.has_table(table) or not self.has_column(table, column) or self.has_foreign_key(table, column):
+            return
+
+        target_table, target_column = references.split('.')
+        self.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+                     f"FOREIGN KEY ({column}) REFERENCES {target_table} ({target_column})")
+        logging.info(f"Created foreign key {table}.{column} -> {references}")
+
+    def drop_column(self, table, column):
+        """Drop a column if it exists, with the indexes on it."""
+        if not self.has_table(table) or not self.has_column(table, column):
+            return
+        if self.dialect == 'sqlite':
+            # SQLite refuses to drop an indexed column
+            for index in inspect(self.connection).get_indexes(table):
+                if column in index['column_names']:
+                    self.drop_index(index['name'], table)
+        self.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        logging.info(f"Dropped column {table}.{column}")
+
+def load_migrations():
+    """
+    Load migration modules in revision order.
+
+    Returns:
+        List of migration modules, oldest first
+
+    Raises:
+        MigrationError: If the revisions do not form a single linear chain
+    """
+    modules = {}
+    for module_info in pkgutil.iter_modules([VERSIONS_PATH]):
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{module_info.name}")
+        if module.revision in modules:
+            raise MigrationError(f"Duplicate migration revision: {module.revision}")
+        modules[module.revision] = module
+
+    by_parent = {}
+    for module in modules.values():
+        if module.down_revision in by_parent:
+            raise MigrationError(f"Migrations {by_parent[module.down_revision].revision} and "
+                                 f"{module.revision} both follow {module.down_revision}")
+        by_parent[module.down_revision] = module
+
+    chain = []
+    module = by_parent.get(None)
+    while module is not None:
+        chain.append(module)
+        module = by_parent.get(module.revision)
+
+    if len(chain) != len(modules):
+        orphans = sorted(set(modules) - {m.revision for m in chain})
+        raise MigrationError(f"Migrations not connected to the chain: {', '.join(orphans)}")
+    return chain
+
+def applied_revisions(connection):
+    """
+    Get the revisions recorded as applied.
+
+    Args:
+        connection: SQLAlchemy connection
+
+    Returns:
+        Set of revision identifiers
+    """
+    if not inspect(connection).has_table(VERSION_TABLE):
+        return set()
+    return set(connection.execute(text(f"SELECT revision FROM {VERSION_TABLE}")).scalars())
+
+def current_revision(engine):
+    """
+    Get the newest applied revision.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Revision identifier or None if no migrations were applied
+    """
+    with engine.connect() as connection:
+        applied = applied_revisions(connection)
+    current = None
+    for module in load_migrations():
+        if module.revision in applied:
+            current = module.revision
+    return current
+
+def upgrade(engine, target=None):
+    """
+    Apply pending migrations.
+
+    Args:
+        engine: SQLAlchemy engine
+        target: Revision to upgrade to (default: newest)
+
+    Returns:
+        List of revisions applied
+    """
+    chain = load_migrations()
+    revisions = [m.revision for m in chain]
+    if target is not None:
+        if target not in revisions:
+            raise MigrationError(f"Unknown revision: {target}")
+        chain = chain[:revisions.index(target) + 1]
+
+    _check_sqlite_version(engine)
+    applied = []
+    for module in chain:
+        # One transaction per migration, so a failure leaves earlier ones applied
+        with engine.begin() as connection:
+            _lock(connection)
+            _ensure_version_table(connection)
+            if module.revision in applied_revisions(connection):
+                continue
+
+            logging.info(f"Applying migration {module.revision}: {module.description}")
+            module.upgrade(Operations(connection))
+            connection.execute(
+                text(f"INSERT INTO {VERSION_TABLE} (revision, description, applied_at) "
+                     f"VALUES (:revision, :description, :applied_at)"),
+                {'revision': module.revision, 'description': module.description,
+                 'applied_at': datetime.utcnow()}
+            )
+            applied.append(module.revision)
+
+    if applied:
+        logging.info(f"Applied {len(applied)} migrations, now at {applied[-1]}")
+    return applied
+
+def downgrade(engine, target):
+    """
+    Revert migrations newer than a target revision.
+
+    Args:
+        engine: SQLAlchemy engine
+        target: Revision to downgrade to, or 'base' to revert everything
+
+    Returns:
+        List of revisions reverted
+    """
+    chain = load_migrations()
+    revisions = [m.revision for m in chain]
+    if target != 'base' and target not in revisions:
+        raise MigrationError(f"Unknown revision: {target}")
+    keep = 0 if target == 'base' else revisions.index(target) + 1
+
+    _check_sqlite_version(engine)
+    reverted = []
+    for module in reversed(chain[keep:]):
+        with engine.begin() as connection:
+            _lock(connection)
+            if module.revision not in applied_revisions(connection):
+                continue
+
+            logging.info(f"Reverting migration {module.revision}: {module.description}")
+            module.downgrade(Operations(connection))
+            connection.execute(
+                text(f"DELETE FROM {VERSION_TABLE} WHERE revision = :revision"),
+                {'revision': module.revision}
+            )
+            reverted.append(module.revision)
+    return reverted
+
+def create_revision(description):
+    """
+    Write a new empty migration module after the newest one.
+
+    Args:
+        description: Short description of the change
+
+    Returns:
+        Path of the new module
+    """
+    chain = load_migrations()
+    down_revision = chain[-1].revision if chain else None
+    revision = f"{int(down_revision or 0) + 1:04d}"
+    slug = re.sub(r'[^a-z0-9]+', '_', description.lower()).strip('_')[:40]
+    path = os.path.join(VERSIONS_PATH, f"m{revision}_{slug}.py")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(MIGRATION_TEMPLATE.format(
+            description=description,
+            description_repr=repr(description),
+            revision=revision,
+            down_revision=repr(down_revision)
+        ))
+    return path
+
+def _check_sqlite_version(engine):
+    """
+    Refuse to migrate an SQLite database older than SQLITE_MIN_VERSION.
+
+    Raises:
+        MigrationError: If the SQLite library is too old
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.connect() as connection:
+        version = connection.execute(text("SELECT sqlite_version()")).scalar()
+    if tuple(int(part) for part in version.split('.')) < SQLITE_MIN_VERSION:
+        raise MigrationError(f"SQLite {version} is too old; migrations need "
+                             f"{'.'.join(map(str, SQLITE_MIN_VERSION))} or newer")
+
+def _ensure_version_table(connection):
+    """Create the version table if it does not exist."""
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+        f"revision VARCHAR(32) PRIMARY KEY, "
+        f"description VARCHAR(255), "
+        f"applied_at TIMESTAMP)"
+    ))
+
+def _lock(connection):
+    """Serialize concurrent migration runs (e.g. several workers starting at once)."""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {'lock_id': MIGRATION_LOCK_ID})
+
+MIGRATION_TEMPLATE = '''"""
+{description}
+"""
+revision = '{revision}'
+down_revision = {down_revision}
+description = {description_repr}
+
+def upgrade(op):
+    """Apply the migration."""
+    pass
+
+def downgrade(op):
+    """Revert the migration."""
+    pass
+'''
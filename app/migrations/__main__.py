@@ -0,0 +1,55 @@
+"""
+Command-line entry point for schema migrations (python -m app.migrations).
+"""
+import sys
+import argparse
+
+from app.migrations import (
+    MigrationError, load_migrations, current_revision, upgrade, downgrade, create_revision
+)
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m app.migrations', description='Schema migrations')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    upgrade_parser = subparsers.add_parser('upgrade', help='Apply pending migrations')
+    upgrade_parser.add_argument('--target', help='Revision to upgrade to (default: newest)')
+
+    downgrade_parser = subparsers.add_parser('downgrade', help='Revert migrations')
+    downgrade_parser.add_argument('target', help="Revision to downgrade to, or 'base'")
+
+    subparsers.add_parser('current', help='Show the applied revision')
+    subparsers.add_parser('history', help='List all revisions')
+
+    revision_parser = subparsers.add_parser('revision', help='Create a new empty migration')
+    revision_parser.add_argument('description', help='Short description of the change')
+
+    args = parser.parse_args()
+
+    if args.command == 'revision':
+        print(create_revision(args.description))
+        return 0
+
+    if args.command == 'history':
+        for module in load_migrations():
+            print(f"{module.revision}  {module.description}")
+        return 0
+
+    from app import app, db
+
+    try:
+        with app.app_context():
+            if args.command == 'upgrade':
+                applied = upgrade(db.engine, target=args.target)
+                print(f"Applied: {', '.join(applied)}" if applied else "Already up to date")
+            elif args.command == 'downgrade':
+                reverted = downgrade(db.engine, args.target)
+                print(f"Reverted: {', '.join(reverted)}" if reverted else "Nothing to revert")
+            print(f"Current revision: {current_revision(db.engine) or 'base'}")
+    except MigrationError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
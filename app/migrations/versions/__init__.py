@@ -0,0 +1,3 @@
+"""
+Migration modules, applied in down_revision order.
+"""
@@ -0,0 +1,39 @@
+"""
+Add indexes matching the product listing, export, scraping and scrape log queries,
+and columns added to existing tables since they were first created.
+"""
+from sqlalchemy import Boolean
+
+revision = '0001'
+down_revision = None
+description = 'Initial indexes'
+
+# (name, table, columns); the leading column of each composite also serves
+# plain lookups on that column, e.g. the category and website foreign keys
+INDEXES = [
+    # /api/products and /products: newest first, optionally filtered by category or website
+    ('ix_products_created_at_id', 'products', ['created_at', 'id']),
+    ('ix_products_category_id_created_at_id', 'products', ['category_id', 'created_at', 'id']),
+    ('ix_products_website_id_created_at_id', 'products', ['website_id', 'created_at', 'id']),
+    # Duplicate checks while scraping
+    ('ix_products_url', 'products', ['url']),
+    # ExportService._get_products orders by name
+    ('ix_products_name', 'products', ['name']),
+    # Incremental search index refresh
+    ('ix_products_updated_at', 'products', ['updated_at']),
+    # Scrape logs page, per website and latest overall
+    ('ix_scrape_logs_website_id_start_time', 'scrape_logs', ['website_id', 'start_time']),
+    ('ix_scrape_logs_start_time', 'scrape_logs', ['start_time']),
+]
+
+def upgrade(op):
+    """Add missing columns and indexes."""
+    op.add_column('products', 'category_confirmed', Boolean(), server_default='false')
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+def downgrade(op):
+    """Drop the indexes. Columns are kept, as the models still use them."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table)
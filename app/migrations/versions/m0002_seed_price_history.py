@@ -0,0 +1,26 @@
+"""
+Seed price history with the current price of every existing product.
+"""
+revision = '0002'
+down_revision = '0001'
+description = 'Seed price history'
+
+def upgrade(op):
+    """Add one observation per priced product that has no history yet."""
+    if not op.has_table('price_observations'):
+        return
+
+    op.execute(
+        "INSERT INTO price_observations "
+        "(product_id, price, currency, price_zar, first_seen, last_seen, observation_count) "
+        "SELECT p.id, p.price, p.currency, p.price_zar, "
+        "COALESCE(p.updated_at, p.created_at, CURRENT_TIMESTAMP), "
+        "COALESCE(p.updated_at, p.created_at, CURRENT_TIMESTAMP), 1 "
+        "FROM products p "
+        "WHERE p.price IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM price_observations o WHERE o.product_id = p.id)"
+    )
+
+def downgrade(op):
+    """Seeded rows are indistinguishable from recorded ones, so nothing is removed."""
+    pass
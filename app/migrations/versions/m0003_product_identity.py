@@ -0,0 +1,108 @@
+"""
+Key products on their SKU or canonical URL instead of name and website.
+
+The key function is copied here as it was when this migration was written,
+so the keys it computes don't change with the application code.
+"""
+import hashlib
+import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy import String, bindparam, column, select, table
+
+revision = '0003'
+down_revision = '0002'
+description = 'Product identity keys'
+
+# Salt of app.utils.hash_utils.generate_hash_id
+HASH_SALT = "reptile_scraper_salt"
+
+# Query parameters that never change which product a URL points to
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_', 'srsltid',
+    '_pos', '_sid', '_ss', '_psq', '_v'
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+products = table(
+    'products',
+    column('id'), column('website_id'), column('url'), column('sku'), column('identity_key')
+)
+
+def canonicalize_url(url):
+    """Normalize a product URL so that equivalent URLs compare equal."""
+    if not url:
+        return None
+
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+def identity_key_for(website_id, url=None, sku=None):
+    """Compute the identity key of a product from its SKU, or else its canonical URL."""
+    if sku and str(sku).strip():
+        source = f"sku:{website_id}:{str(sku).strip().lower()}"
+    else:
+        canonical_url = canonicalize_url(url)
+        if not canonical_url:
+            return None
+        source = f"url:{canonical_url}"
+    return hashlib.sha256((HASH_SALT + source).encode()).hexdigest()
+
+def upgrade(op):
+    """Add identity columns and compute identity keys for existing products."""
+    op.add_column('products', 'sku', String(100))
+    op.add_column('products', 'identity_key', String(64))
+    op.add_column('products', 'content_hash', String(64))
+
+    rows = op.connection.execute(
+        select(products.c.id, products.c.website_id, products.c.url, products.c.sku)
+        .where(products.c.identity_key.is_(None)).order_by(products.c.id)
+    ).all()
+    taken = set(op.connection.execute(
+        select(products.c.identity_key).where(products.c.identity_key.isnot(None))
+    ).scalars())
+
+    keys, duplicates = [], 0
+    for product_id, website_id, url, sku in rows:
+        identity_key = identity_key_for(website_id, url=url, sku=sku)
+        if identity_key is None:
+            continue
+        if identity_key in taken:
+            # Later duplicates of the same page keep a NULL key; the oldest row is the product
+            duplicates += 1
+            continue
+        taken.add(identity_key)
+        keys.append({'product_id': product_id, 'new_identity_key': identity_key})
+
+    if keys:
+        op.connection.execute(
+            products.update().where(products.c.id == bindparam('product_id'))
+                    .values(identity_key=bindparam('new_identity_key')),
+            keys
+        )
+    if duplicates:
+        logging.warning(f"{duplicates} duplicate products left without an identity key")
+
+    op.create_index('ix_products_identity_key', 'products', ['identity_key'], unique=True)
+
+def downgrade(op):
+    """Drop the identity index. Columns are kept, as the models still use them."""
+    op.drop_index('ix_products_identity_key', 'products')
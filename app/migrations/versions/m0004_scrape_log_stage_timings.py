@@ -0,0 +1,16 @@
+"""
+Record per-stage timings of each crawl on its scrape log.
+"""
+from sqlalchemy import Text
+
+revision = '0004'
+down_revision = '0003'
+description = 'Scrape log stage timings'
+
+def upgrade(op):
+    """Add the stage_timings column."""
+    op.add_column('scrape_logs', 'stage_timings', Text())
+
+def downgrade(op):
+    """Drop the stage_timings column."""
+    op.drop_column('scrape_logs', 'stage_timings')
@@ -0,0 +1,16 @@
+"""
+Trace requests in the scrape_events table instead of the unused scrape_logs.log_details column.
+"""
+from sqlalchemy import Text
+
+revision = '0005'
+down_revision = '0004'
+description = 'Scrape events replace log details'
+
+def upgrade(op):
+    """Drop the log_details column; the scrape_events table is created by db.create_all()."""
+    op.drop_column('scrape_logs', 'log_details')
+
+def downgrade(op):
+    """Restore the log_details column. The scrape_events table is left in place."""
+    op.add_column('scrape_logs', 'log_details', Text())
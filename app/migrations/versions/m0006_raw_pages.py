@@ -0,0 +1,18 @@
+"""
+Link products to the stored HTML of the page they were scraped from.
+"""
+from sqlalchemy import Integer
+
+revision = '0006'
+down_revision = '0005'
+description = 'Raw page store'
+
+def upgrade(op):
+    """Add products.raw_page_id; the raw_pages and raw_page_dictionaries tables are created by db.create_all()."""
+    op.add_column('products', 'raw_page_id', Integer(), references='raw_pages.id')
+    op.create_index('ix_products_raw_page_id', 'products', ['raw_page_id'])
+
+def downgrade(op):
+    """Drop products.raw_page_id. The raw page tables are left in place."""
+    op.drop_index('ix_products_raw_page_id', 'products')
+    op.drop_column('products', 'raw_page_id')
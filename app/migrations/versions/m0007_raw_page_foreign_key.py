@@ -0,0 +1,14 @@
+"""
+Make products.raw_page_id a foreign key on databases migrated before 0006 declared it.
+"""
+revision = '0007'
+down_revision = '0006'
+description = 'Raw page foreign key'
+
+def upgrade(op):
+    """Add the products.raw_page_id foreign key where it is missing (PostgreSQL; SQLite declares it in 0006)."""
+    op.create_foreign_key('products', 'raw_page_id', 'raw_pages.id')
+
+def downgrade(op):
+    """Keep the foreign key; 0006 declares it on new databases too."""
+    pass
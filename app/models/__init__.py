@@ -8,6 +8,14 @@ from app.models.category import Category
 from app.models.website import Website
 from app.models.product import Product
 from app.models.scrape_log import ScrapeLog
+from app.models.scrape_event import ScrapeEvent
+from app.models.categorization_cache import CategorizationCache
+from app.models.price_observation import PriceObservation
+from app.models.exchange_rate import ExchangeRate
+from app.models.host_state import HostState
+from app.models.host_circuit import HostCircuit
+from app.models.raw_page_dictionary import RawPageDictionary
+from app.models.raw_page import RawPage
 
 # Export models
-__all__ = ['db', 'Product', 'Website', 'Category', 'ScrapeLog']
+__all__ = ['db', 'Product', 'Website', 'Category', 'ScrapeLog', 'ScrapeEvent', 'CategorizationCache', 'PriceObservation', 'ExchangeRate', 'HostState', 'HostCircuit', 'RawPageDictionary', 'RawPage']
@@ -0,0 +1,63 @@
+"""
+CategorizationCache model for persisting AI categorization results.
+"""
+from datetime import datetime
+from app.models.database import db
+
+class CategorizationCache(db.Model):
+    """
+    CategorizationCache model to store categorization results keyed by normalized product text.
+    """
+    __tablename__ = 'categorization_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)
+    category_version = db.Column(db.String(64), nullable=False, index=True)
+    category_name = db.Column(db.String(100), nullable=True)
+    confidence_score = db.Column(db.Float, default=0.0)
+
+    # Metadata
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, cache_key, category_version, **kwargs):
+        """
+        Initialize a cache entry with required fields.
+        """
+        self.cache_key = cache_key
+        self.category_version = category_version
+
+        # Set other attributes from kwargs
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+
+    @staticmethod
+    def find_by_key(cache_key):
+        """Find a cache entry by cache key."""
+        return CategorizationCache.query.filter_by(cache_key=cache_key).first()
+
+    @staticmethod
+    def purge_stale(category_version):
+        """
+        Delete entries written for a different category list.
+
+        Args:
+            category_version: The current category-list version
+
+        Returns:
+            Number of deleted entries
+        """
+        deleted = CategorizationCache.query\
+            .filter(CategorizationCache.category_version != category_version)\
+            .delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def to_result(self):
+        """Convert cache entry to a categorization result."""
+        return {
+            'category_name': self.category_name,
+            'confidence_score': self.confidence_score
+        }
@@ -53,13 +53,23 @@ class Category(db.Model):
         """Check if category has subcategories."""
         return len(self.subcategories) > 0
     
-    def to_dict(self):
-        """Convert category to dictionary."""
+    def to_dict(self, product_counts=None):
+        """
+        Convert category to dictionary.
+
+        Args:
+            product_counts: Optional dictionary of category ID to product count (Product.count_by),
+                to avoid a count query per category
+        """
+        if product_counts is None:
+            from app.models.product import Product
+            product_counts = Product.count_by(Product.category_id)
         return {
             'hash_id': self.hash_id,
             'name': self.name,
             'description': self.description,
             'parent_id': self.parent_id,
-            'product_count': len(self.products) if self.products else 0,
-            'subcategories': [subcategory.to_dict() for subcategory in self.subcategories] if self.has_subcategories() else []
+            'product_count': product_counts.get(self.id, 0),
+            'subcategories': [subcategory.to_dict(product_counts) for subcategory in self.subcategories]
+                             if self.has_subcategories() else []
         }
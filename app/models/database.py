@@ -2,8 +2,34 @@
 Database configuration and initialization.
 """
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
 from app import db
+from app.config import SQLITE_BUSY_TIMEOUT, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE
+import click
 import logging
+import sqlite3
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection.
+
+    WAL lets readers run concurrently with the writer, and synchronous=NORMAL
+    is durable in WAL mode apart from the last transactions on power loss.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 def init_db():
     """
@@ -16,10 +42,26 @@ def init_db():
         from app.models.website import Website
         from app.models.category import Category
         from app.models.scrape_log import ScrapeLog
+        from app.models.scrape_event import ScrapeEvent
+        from app.models.categorization_cache import CategorizationCache
+        from app.models.price_observation import PriceObservation
+        from app.models.exchange_rate import ExchangeRate
+        from app.models.host_state import HostState
+        from app.models.host_circuit import HostCircuit
+        from app.models.raw_page_dictionary import RawPageDictionary
+        from app.models.raw_page import RawPage
         
-        # Create tables
+        # Create missing tables, then bring existing ones up to date
         db.create_all()
+
+        from app.migrations import upgrade
+        upgrade(db.engine)
         
+        if db.engine.dialect.name == 'sqlite':
+            # Refresh planner statistics where stale (also used for row estimates)
+            db.session.execute(text("PRAGMA optimize"))
+            db.session.commit()
+
         # Initialize categories if empty
         from app.config import PRODUCT_CATEGORIES
         if not Category.query.first():
@@ -50,8 +92,41 @@ def init_db():
             db.session.commit()
             logging.info("Default websites initialized.")
         
+        # Create the full-text search index on databases that support it
+        from app.services.search_service import SearchService
+        SearchService().ensure_index()
+        
+        # Load exchange rates; price_zar is backfilled if they changed
+        from app.services.currency_service import currency_service
+        currency_service.refresh()
+        
+        # Drop cached categorizations made against an older category list
+        from app.services.categorization_cache_service import CategorizationCacheService
+        CategorizationCacheService().purge_stale()
+        
+        # Keep the per-request trace to its retention period
+        from app.services.scrape_event_recorder import purge_expired_events
+        purge_expired_events()
+        
+        # Drop stored pages no product links to any more
+        from app.services.raw_page_store import raw_page_store
+        raw_page_store.purge_unlinked()
+        
         logging.info("Database initialization completed successfully.")
     except Exception as e:
         logging.error(f"Error initializing database: {str(e)}")
         db.session.rollback()
         raise
+
+def register_commands(app):
+    """
+    Register database commands with the Flask CLI.
+    
+    Args:
+        app: Flask application instance
+    """
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create tables, apply migrations and seed default data."""
+        init_db()
+        click.echo("Database initialized.")
@@ -0,0 +1,52 @@
+"""
+ExchangeRate model for storing currency conversion rates.
+"""
+from datetime import datetime
+from app.models.database import db
+
+class ExchangeRate(db.Model):
+    """
+    ExchangeRate model to store the rate from a currency to ZAR.
+    """
+    __tablename__ = 'exchange_rates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    currency = db.Column(db.String(3), unique=True, nullable=False)
+    rate_to_zar = db.Column(db.Float, nullable=False)  # ZAR per unit of the currency
+    source = db.Column(db.String(100), nullable=True)
+
+    # Metadata
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __init__(self, currency, rate_to_zar, **kwargs):
+        """
+        Initialize an exchange rate with required fields.
+        """
+        self.currency = currency
+        self.rate_to_zar = rate_to_zar
+
+        # Set other attributes from kwargs
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+
+    @staticmethod
+    def find_by_currency(currency):
+        """Find the rate for a currency."""
+        return ExchangeRate.query.filter_by(currency=currency).first()
+
+    @staticmethod
+    def find_all():
+        """Get all rates ordered by currency."""
+        return ExchangeRate.query.order_by(ExchangeRate.currency).all()
+
+    def to_dict(self):
+        """Convert exchange rate to dictionary."""
+        return {
+            'currency': self.currency,
+            'rate_to_zar': self.rate_to_zar,
+            'source': self.source,
+            'fetched_at': self.fetched_at.isoformat() if self.fetched_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,56 @@
+"""
+HostCircuit model for sharing each host's circuit breaker state between processes.
+"""
+from datetime import datetime
+from app.models.database import db
+
+class HostCircuit(db.Model):
+    """
+    HostCircuit model holding the last circuit breaker transition of a host.
+
+    Every worker process reads this row, so a host one process found
+    failing is skipped by the others too.
+    """
+    __tablename__ = 'host_circuits'
+
+    id = db.Column(db.Integer, primary_key=True)
+    host = db.Column(db.String(255), unique=True, nullable=False)
+    state = db.Column(db.String(20), nullable=False, default='closed')  # closed, open, half_open
+    failures = db.Column(db.Integer, default=0)  # consecutive failures when the state was set
+    cooldown = db.Column(db.Float, nullable=False, default=0.0)  # seconds the circuit stays open
+    opened_at = db.Column(db.DateTime, nullable=True)
+
+    # Metadata
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)  # time of the last transition
+
+    def __init__(self, host, **kwargs):
+        """
+        Initialize a host circuit with required fields.
+        """
+        self.host = host
+
+        # Set other attributes from kwargs
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+
+    @staticmethod
+    def find_by_host(host):
+        """Find the circuit of a host."""
+        return HostCircuit.query.filter_by(host=host).first()
+
+    @staticmethod
+    def find_all():
+        """Get all host circuits ordered by host."""
+        return HostCircuit.query.order_by(HostCircuit.host).all()
+
+    def to_dict(self):
+        """Convert host circuit to dictionary."""
+        return {
+            'host': self.host,
+            'state': self.state,
+            'failures': self.failures,
+            'cooldown': self.cooldown,
+            'opened_at': self.opened_at.isoformat() if self.opened_at else None,
+            'changed_at': self.changed_at.isoformat() if self.changed_at else None
+        }
@@ -0,0 +1,57 @@
+"""
+HostState model for storing the learned request rate of each crawled host.
+"""
+from datetime import datetime
+from app.models.database import db
+
+class HostState(db.Model):
+    """
+    HostState model to persist a host's AIMD controller between runs.
+    """
+    __tablename__ = 'host_states'
+
+    id = db.Column(db.Integer, primary_key=True)
+    host = db.Column(db.String(255), unique=True, nullable=False)
+    concurrency_limit = db.Column(db.Float, nullable=False, default=1.0)  # requests in flight
+    request_interval = db.Column(db.Float, nullable=False, default=0.0)  # seconds between request starts
+    latency = db.Column(db.Float, nullable=True)  # baseline response time in seconds
+
+    # Totals across runs
+    successes = db.Column(db.Integer, default=0)
+    overloads = db.Column(db.Integer, default=0)
+
+    # Metadata
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __init__(self, host, **kwargs):
+        """
+        Initialize a host state with required fields.
+        """
+        self.host = host
+
+        # Set other attributes from kwargs
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+
+    @staticmethod
+    def find_by_host(host):
+        """Find the state of a host."""
+        return HostState.query.filter_by(host=host).first()
+
+    @staticmethod
+    def find_all():
+        """Get all host states ordered by host."""
+        return HostState.query.order_by(HostState.host).all()
+
+    def to_dict(self):
+        """Convert host state to dictionary."""
+        return {
+            'host': self.host,
+            'concurrency_limit': self.concurrency_limit,
+            'request_interval': self.request_interval,
+            'latency': self.latency,
+            'successes': self.successes,
+            'overloads': self.overloads,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,79 @@
+"""
+PriceObservation model for storing product price history.
+"""
+from datetime import datetime
+from app.models.database import db
+
+class PriceObservation(db.Model):
+    """
+    PriceObservation model to store one run of an unchanged product price.
+
+    A row covers every crawl between first_seen and last_seen that saw the
+    same price; a new row is only added when the price changes. Rows for a
+    product are append-only, so its newest row has the highest id.
+    """
+    __tablename__ = 'price_observations'
+    __table_args__ = (
+        # Latest observation per product and per-product history
+        db.Index('ix_price_observations_product_id_id', 'product_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
+    price = db.Column(db.Float, nullable=True)
+    currency = db.Column(db.String(3), nullable=True)
+    price_zar = db.Column(db.Float, nullable=True)
+
+    # Run of crawls that saw this price
+    first_seen = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    observation_count = db.Column(db.Integer, default=1)
+
+    # Relationships
+    product = db.relationship('Product', back_populates='price_history')
+
+    def __init__(self, product_id, **kwargs):
+        """
+        Initialize a price observation with required fields.
+        """
+        self.product_id = product_id
+
+        # Set other attributes from kwargs
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+
+    @staticmethod
+    def find_latest(product_id):
+        """Find the most recent observation for a product."""
+        return PriceObservation.query.filter_by(product_id=product_id)\
+                                     .order_by(PriceObservation.id.desc()).first()
+
+    @staticmethod
+    def find_in_range(product_id, since=None, until=None):
+        """Find observations for a product overlapping a time range, oldest first."""
+        query = PriceObservation.query.filter_by(product_id=product_id)
+        if since is not None:
+            query = query.filter(PriceObservation.last_seen >= since)
+        if until is not None:
+            query = query.filter(PriceObservation.first_seen <= until)
+        return query.order_by(PriceObservation.id).all()
+
+    def matches(self, price, currency):
+        """Check if a price is the same as this observation's."""
+        if (self.currency or None) != (currency or None):
+            return False
+        if self.price is None or price is None:
+            return self.price is None and price is None
+        return abs(self.price - price) < 0.005
+
+    def to_dict(self):
+        """Convert price observation to dictionary."""
+        return {
+            'price': self.price,
+            'currency': self.currency,
+            'price_zar': self.price_zar,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'observation_count': self.observation_count
+        }
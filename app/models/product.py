@@ -1,15 +1,37 @@
 """
 Product model for storing product data.
 """
+import uuid
 from datetime import datetime
 from app.models.database import db
-from app.utils.hash_utils import generate_hash_id
+from app.utils.hash_utils import generate_hash_id, generate_content_key
+from app.utils.url_utils import canonicalize_url
+
+# Full-text search document (PostgreSQL); must match the GIN index expression exactly
+SEARCH_DOCUMENT_SQL = "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))"
 
 class Product(db.Model):
     """
     Product model to store product information scraped from websites.
     """
     __tablename__ = 'products'
+    __table_args__ = (
+        db.Index('ix_products_search', db.text(SEARCH_DOCUMENT_SQL), postgresql_using='gin')
+          .ddl_if(dialect='postgresql'),
+        # Keyset pagination, unfiltered and filtered by category or website
+        db.Index('ix_products_created_at_id', 'created_at', 'id'),
+        db.Index('ix_products_category_id_created_at_id', 'category_id', 'created_at', 'id'),
+        db.Index('ix_products_website_id_created_at_id', 'website_id', 'created_at', 'id'),
+        # Product identity (canonical URL or SKU), the upsert conflict target
+        db.Index('ix_products_identity_key', 'identity_key', unique=True),
+        db.Index('ix_products_url', 'url'),
+        # Export ordering
+        db.Index('ix_products_name', 'name'),
+        # Incremental search index refresh
+        db.Index('ix_products_updated_at', 'updated_at'),
+        # Stored pages still in use
+        db.Index('ix_products_raw_page_id', 'raw_page_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     hash_id = db.Column(db.String(64), unique=True, nullable=False)
@@ -21,6 +43,12 @@ class Product(db.Model):
     url = db.Column(db.String(512), nullable=True)
     image_url = db.Column(db.String(512), nullable=True)
     image_path = db.Column(db.String(512), nullable=True)
+    sku = db.Column(db.String(100), nullable=True)
+    
+    # Identity and change detection
+    identity_key = db.Column(db.String(64), nullable=True)  # Hash of the SKU or canonical URL
+    content_hash = db.Column(db.String(64), nullable=True)  # Hash of the scraped content fields
+    raw_page_id = db.Column(db.Integer, db.ForeignKey('raw_pages.id'), nullable=True)  # Page last scraped
     
     # Foreign keys
     website_id = db.Column(db.Integer, db.ForeignKey('websites.id'), nullable=False)
@@ -28,12 +56,15 @@ class Product(db.Model):
     
     # Metadata
     confidence_score = db.Column(db.Float, default=0.0)  # AI confidence in categorization
+    category_confirmed = db.Column(db.Boolean, default=False)  # Category set manually by a user
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     website = db.relationship('Website', back_populates='products')
     category = db.relationship('Category', back_populates='products')
+    price_history = db.relationship('PriceObservation', back_populates='product', lazy='dynamic',
+                                    cascade='all, delete-orphan')
     
     def __init__(self, name, website_id, **kwargs):
         """
@@ -41,12 +72,68 @@ class Product(db.Model):
         """
         self.name = name
         self.website_id = website_id
-        self.hash_id = generate_hash_id(f"{name}-{website_id}")
         
         # Set other attributes from kwargs
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
+        
+        # Identity follows the SKU or canonical URL, so renames don't create new products
+        self.identity_key = Product.identity_key_for(website_id, url=self.url, sku=self.sku)
+        self.hash_id = Product.new_hash_id()
+        self.content_hash = Product.content_hash_for(kwargs, name=name)
+    
+    @staticmethod
+    def identity_key_for(website_id, url=None, sku=None):
+        """
+        Compute the identity key of a product.
+        
+        Args:
+            website_id: ID of the website
+            url: Product URL
+            sku: Product SKU, preferred over the URL when present
+            
+        Returns:
+            Identity key or None if there is neither a SKU nor a URL
+        """
+        if sku and str(sku).strip():
+            return generate_hash_id(f"sku:{website_id}:{str(sku).strip().lower()}")
+        canonical_url = canonicalize_url(url)
+        if canonical_url:
+            return generate_hash_id(f"url:{canonical_url}")
+        return None
+    
+    @staticmethod
+    def new_hash_id():
+        """
+        Generate the public ID of a new product.
+        
+        It is random rather than derived from the identity key, because the
+        identity changes when a SKU is found while the public ID must not.
+        """
+        return uuid.uuid4().hex
+    
+    @staticmethod
+    def content_hash_for(product_data, name=None):
+        """
+        Hash the scraped content fields, to detect whether a re-scrape changed anything.
+        
+        Args:
+            product_data: Dictionary with product data
+            name: Optional name overriding product_data['name']
+            
+        Returns:
+            Content hash
+        """
+        price = product_data.get('price')
+        return generate_content_key(
+            name if name is not None else product_data.get('name'),
+            product_data.get('description'),
+            f"{price:.2f}" if price is not None else '',
+            product_data.get('currency') or 'ZAR',
+            product_data.get('image_url'),
+            product_data.get('sku')
+        )
     
     @staticmethod
     def find_by_hash_id(hash_id):
@@ -58,6 +145,29 @@ class Product(db.Model):
         """Find a product by URL to prevent duplicates."""
         return Product.query.filter_by(url=url).first()
     
+    @staticmethod
+    def find_by_identity(website_id, url=None, sku=None):
+        """
+        Find a product by SKU or canonical URL.
+        
+        A product stored before its SKU was known (e.g. keyed from its URL by
+        migration 0003) is found by its URL; the next upsert re-keys it on the SKU.
+        A page scraped without its SKU finds the product keyed on the SKU
+        that was last scraped from the same URL.
+        """
+        identity_key = Product.identity_key_for(website_id, url=url, sku=sku)
+        if not identity_key:
+            return None
+        product = Product.query.filter_by(identity_key=identity_key).first()
+        if product is None and sku and str(sku).strip():
+            url_key = Product.identity_key_for(website_id, url=url)
+            if url_key:
+                product = Product.query.filter_by(identity_key=url_key, sku=None).first()
+        elif product is None and url:
+            product = Product.query.filter(Product.website_id == website_id, Product.url == url,
+                                           Product.sku != None).first()
+        return product
+    
     @staticmethod
     def find_all(limit=100, offset=0, **filters):
         """Find products with optional filters."""
@@ -71,8 +181,34 @@ class Product(db.Model):
         # Apply pagination
         return query.order_by(Product.created_at.desc()).limit(limit).offset(offset).all()
     
-    def to_dict(self):
-        """Convert product to dictionary for export."""
+    @staticmethod
+    def count_by(column):
+        """
+        Count products per value of a column in one grouped query.
+
+        Args:
+            column: Product column to group by, e.g. Product.website_id
+
+        Returns:
+            Dictionary of column value to product count; values without products are absent
+        """
+        return dict(db.session.query(column, db.func.count(Product.id)).group_by(column).all())
+
+    @staticmethod
+    def find_confirmed():
+        """Find products whose category was confirmed manually."""
+        return Product.query.filter(
+            Product.category_confirmed == True,
+            Product.category_id != None
+        ).all()
+    
+    def to_dict(self, category_name=None):
+        """
+        Convert product to dictionary for export.
+        
+        Args:
+            category_name: Optional category name, to avoid loading the category relationship
+        """
         return {
             'hash_id': self.hash_id,
             'name': self.name,
@@ -81,11 +217,13 @@ class Product(db.Model):
             'currency': self.currency,
             'price_zar': self.price_zar,
             'url': self.url,
+            'sku': self.sku,
             'image_url': self.image_url,
             'image_path': self.image_path,
-            'category': self.category.name if self.category else 'Uncategorized',
+            'category': category_name or (self.category.name if self.category else 'Uncategorized'),
             'website': self.website.name,
             'confidence_score': self.confidence_score,
+            'category_confirmed': bool(self.category_confirmed),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,62 @@
+"""
+RawPage model for storing the compressed HTML of scraped product pages.
+"""
+from datetime import datetime
+from app.models.database import db
+
+class RawPage(db.Model):
+    """
+    RawPage model to keep a product page's HTML for re-extraction.
+
+    Pages are stored once per content hash, compressed with the codec in
+    `codec` and, if set, the site dictionary `dictionary_id`. Products link
+    to the page they were last scraped from through Product.raw_page_id.
+    """
+    __tablename__ = 'raw_pages'
+    __table_args__ = (
+        # Deduplication on insert
+        db.Index('ix_raw_pages_content_hash', 'content_hash', unique=True),
+        # Dictionary training samples per site
+        db.Index('ix_raw_pages_host_id', 'host', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the uncompressed HTML
+    host = db.Column(db.String(255), nullable=False)
+    codec = db.Column(db.String(10), nullable=False)  # zstd, zlib
+    dictionary_id = db.Column(db.Integer, db.ForeignKey('raw_page_dictionaries.id'), nullable=True)
+    size = db.Column(db.Integer, nullable=False)  # bytes before compression
+    compressed_size = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def find_by_content_hash(content_hash):
+        """Find a page by the hash of its HTML."""
+        return RawPage.query.filter_by(content_hash=content_hash).first()
+
+    @staticmethod
+    def find_samples(host, limit):
+        """Find the newest pages of a host."""
+        return RawPage.query.filter_by(host=host).order_by(RawPage.id.desc()).limit(limit).all()
+
+    @staticmethod
+    def stats():
+        """
+        Sum page counts and sizes per codec.
+
+        Returns:
+            List of dictionaries with codec, dictionary (whether a dictionary was used),
+            pages, size and compressed_size
+        """
+        rows = db.session.query(
+            RawPage.codec, RawPage.dictionary_id.isnot(None), db.func.count(RawPage.id),
+            db.func.sum(RawPage.size), db.func.sum(RawPage.compressed_size)
+        ).group_by(RawPage.codec, RawPage.dictionary_id.isnot(None)).all()
+        return [{
+            'codec': codec,
+            'dictionary': bool(with_dictionary),
+            'pages': pages,
+            'size': size or 0,
+            'compressed_size': compressed_size or 0
+        } for codec, with_dictionary, pages, size, compressed_size in rows]
@@ -0,0 +1,31 @@
+"""
+RawPageDictionary model for storing per-site compression dictionaries.
+"""
+from datetime import datetime
+from app.models.database import db
+
+class RawPageDictionary(db.Model):
+    """
+    RawPageDictionary model to hold a compression dictionary trained on one site's pages.
+
+    Pages share a site's header, menus and footer; compressing them with a
+    dictionary of that markup makes each page much smaller. A new
+    dictionary is used for pages stored after it; older pages keep theirs.
+    """
+    __tablename__ = 'raw_page_dictionaries'
+    __table_args__ = (
+        db.Index('ix_raw_page_dictionaries_host_id', 'host', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    host = db.Column(db.String(255), nullable=False)
+    codec = db.Column(db.String(10), nullable=False)  # zstd, zlib
+    data = db.Column(db.LargeBinary, nullable=False)
+    sample_count = db.Column(db.Integer, default=0)  # pages it was trained on
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def find_latest(host, codec):
+        """Find the newest dictionary of a host for a codec."""
+        return RawPageDictionary.query.filter_by(host=host, codec=codec)\
+                                      .order_by(RawPageDictionary.id.desc()).first()
@@ -0,0 +1,131 @@
+"""
+ScrapeEvent model for storing one row per request made during a scrape.
+"""
+from datetime import datetime
+from sqlalchemy import case, func
+from app.models.database import db
+
+# Outcomes that count as errors in the error-rate view
+ERROR_OUTCOMES = ('failed', 'retry')
+
+class ScrapeEvent(db.Model):
+    """
+    ScrapeEvent model to trace a single request of a scraping operation.
+
+    Rows are append-only and written in batches by ScrapeEventRecorder. A
+    listing page has the outcome 'ok', 'retry' or 'failed'; a product page
+    has the outcome of the product ('created', 'updated', 'written',
+    'no_product', 'retry' or 'failed').
+    """
+    __tablename__ = 'scrape_events'
+    __table_args__ = (
+        db.Index('ix_scrape_events_scrape_log_id', 'scrape_log_id'),
+        # Slow-URL and error-rate views over recent events
+        db.Index('ix_scrape_events_created_at', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    scrape_log_id = db.Column(db.Integer, db.ForeignKey('scrape_logs.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Request
+    url = db.Column(db.String(2048), nullable=False)
+    host = db.Column(db.String(255), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # listing, product
+    attempt = db.Column(db.Integer, default=0)
+
+    # Response
+    status_code = db.Column(db.Integer, nullable=True)  # None when no response was received
+    bytes = db.Column(db.Integer, nullable=True)
+    fetch_seconds = db.Column(db.Float, nullable=True)
+    process_seconds = db.Column(db.Float, nullable=True)  # parse, extract and classify
+    outcome = db.Column(db.String(20), nullable=False)
+    reason = db.Column(db.String(255), nullable=True)  # why the request failed or was retried
+
+    @staticmethod
+    def find_by_scrape_log_id(scrape_log_id, limit=100):
+        """Find the events of a scrape log, oldest first."""
+        return ScrapeEvent.query.filter_by(scrape_log_id=scrape_log_id)\
+                                .order_by(ScrapeEvent.id).limit(limit).all()
+
+    @staticmethod
+    def _recent(since=None, website_id=None):
+        """Query events since a time, optionally for one website."""
+        from app.models.scrape_log import ScrapeLog
+
+        query = ScrapeEvent.query
+        if since is not None:
+            query = query.filter(ScrapeEvent.created_at >= since)
+        if website_id:
+            query = query.join(ScrapeLog, ScrapeLog.id == ScrapeEvent.scrape_log_id)\
+                         .filter(ScrapeLog.website_id == website_id)
+        return query
+
+    @staticmethod
+    def find_slowest(since=None, website_id=None, limit=10):
+        """Find the slowest fetches, slowest first."""
+        return ScrapeEvent._recent(since, website_id)\
+                          .filter(ScrapeEvent.fetch_seconds.isnot(None))\
+                          .order_by(ScrapeEvent.fetch_seconds.desc())\
+                          .limit(limit).all()
+
+    @staticmethod
+    def error_rates(since=None, website_id=None):
+        """
+        Count requests and errors per host.
+
+        Args:
+            since: Only count events from this time on
+            website_id: Only count events of this website's scrapes
+
+        Returns:
+            List of dictionaries with host, requests, errors, error_rate,
+            avg_fetch_seconds and top_reason, highest error rate first
+        """
+        errors = func.sum(case((ScrapeEvent.outcome.in_(ERROR_OUTCOMES), 1), else_=0))
+        rows = ScrapeEvent._recent(since, website_id)\
+                          .with_entities(ScrapeEvent.host, func.count(ScrapeEvent.id), errors,
+                                         func.avg(ScrapeEvent.fetch_seconds))\
+                          .group_by(ScrapeEvent.host).all()
+
+        reasons = {}
+        reason_rows = ScrapeEvent._recent(since, website_id)\
+                                 .filter(ScrapeEvent.reason.isnot(None))\
+                                 .with_entities(ScrapeEvent.host, ScrapeEvent.reason, func.count(ScrapeEvent.id))\
+                                 .group_by(ScrapeEvent.host, ScrapeEvent.reason).all()
+        for host, reason, count in reason_rows:
+            if count > reasons.get(host, (None, 0))[1]:
+                reasons[host] = (reason, count)
+
+        rates = [{
+            'host': host,
+            'requests': requests,
+            'errors': errors or 0,
+            'error_rate': (errors or 0) / requests if requests else 0.0,
+            'avg_fetch_seconds': avg_fetch,
+            'top_reason': reasons.get(host, (None, 0))[0]
+        } for host, requests, errors, avg_fetch in rows]
+        return sorted(rates, key=lambda rate: (-rate['error_rate'], -rate['requests']))
+
+    @staticmethod
+    def purge_before(cutoff):
+        """Delete events older than a time; returns the number deleted."""
+        deleted = ScrapeEvent.query.filter(ScrapeEvent.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def to_dict(self):
+        """Convert scrape event to dictionary."""
+        return {
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'url': self.url,
+            'host': self.host,
+            'kind': self.kind,
+            'attempt': self.attempt,
+            'status_code': self.status_code,
+            'bytes': self.bytes,
+            'fetch_seconds': self.fetch_seconds,
+            'process_seconds': self.process_seconds,
+            'outcome': self.outcome,
+            'reason': self.reason
+        }
@@ -1,6 +1,7 @@
 """
 ScrapeLog model for storing scraping operation logs.
 """
+import json
 from datetime import datetime
 from app.models.database import db
 from app.utils.hash_utils import generate_hash_id
@@ -10,6 +11,10 @@ class ScrapeLog(db.Model):
     ScrapeLog model to track details of scraping operations.
     """
     __tablename__ = 'scrape_logs'
+    __table_args__ = (
+        db.Index('ix_scrape_logs_website_id_start_time', 'website_id', 'start_time'),
+        db.Index('ix_scrape_logs_start_time', 'start_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     hash_id = db.Column(db.String(64), unique=True, nullable=False)
@@ -26,10 +31,10 @@ class ScrapeLog(db.Model):
     # Performance metrics
     avg_request_time = db.Column(db.Float, nullable=True)
     total_request_count = db.Column(db.Integer, default=0)
+    stage_timings = db.Column(db.Text, nullable=True)  # JSON: count, seconds, mean and max per crawl stage
     
-    # Log details
+    # Log details; per-request details are in scrape_events
     error_message = db.Column(db.Text, nullable=True)
-    log_details = db.Column(db.Text, nullable=True)  # JSON string with detailed log
     
     # Relationships
     website = db.relationship('Website', back_populates='logs')
@@ -61,7 +66,8 @@ class ScrapeLog(db.Model):
     @staticmethod
     def find_latest():
         """Find the most recent scrape logs."""
-        return ScrapeLog.query.order_by(ScrapeLog.start_time.desc()).limit(10).all()
+        return ScrapeLog.query.options(db.joinedload(ScrapeLog.website))\
+                              .order_by(ScrapeLog.start_time.desc()).limit(10).all()
     
     def update_stats(self, **stats):
         """Update scraping statistics."""
@@ -89,6 +95,7 @@ class ScrapeLog(db.Model):
             'products_failed': self.products_failed,
             'avg_request_time': self.avg_request_time,
             'total_request_count': self.total_request_count,
+            'stage_timings': json.loads(self.stage_timings) if self.stage_timings else None,
             'error_message': self.error_message,
             'duration': str(self.end_time - self.start_time) if self.end_time else None
         }
@@ -73,8 +73,16 @@ class Website(db.Model):
             self.scrape_success_rate = (success_count / total_count) * 100
             db.session.commit()
     
-    def to_dict(self):
-        """Convert website to dictionary."""
+    def to_dict(self, product_count=None):
+        """
+        Convert website to dictionary.
+
+        Args:
+            product_count: Optional product count, to avoid a count query per website
+        """
+        if product_count is None:
+            from app.models.product import Product
+            product_count = Product.query.filter_by(website_id=self.id).count()
         return {
             'hash_id': self.hash_id,
             'name': self.name,
@@ -85,7 +93,7 @@ class Website(db.Model):
             'max_products': self.max_products,
             'last_scraped': self.last_scraped.isoformat() if self.last_scraped else None,
             'scrape_success_rate': self.scrape_success_rate,
-            'product_count': len(self.products) if self.products else 0,
+            'product_count': product_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -4,30 +4,23 @@ Routes for the Reptile Products Scraper application.
 import os
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask import (
     render_template, redirect, url_for, request, flash, 
-    session, jsonify, send_from_directory, Blueprint
+    session, jsonify, send_from_directory, Blueprint, Response
 )
 from functools import wraps
+from sqlalchemy.orm import joinedload
 from app import db
-from app.config import ADMIN_USERNAME, ADMIN_PASSWORD, EXPORT_PATH
-from app.models import Website, Product, Category, ScrapeLog
-from app.services.ai_service import AIService
-from app.services.scraper_service import ScraperService
-from app.services.export_service import ExportService
-from app.services.image_service import ImageService
+from app.config import ADMIN_USERNAME, ADMIN_PASSWORD, EXPORT_PATH, SCRAPE_EVENT_VIEW_DAYS
+from app.models import Website, Product, Category, ScrapeLog, ScrapeEvent
+from app.services import get_scraper_service, get_export_service, get_search_service
+from app.utils.pagination import keyset_paginate
 from app.utils.validation import validate_url
 
 # Import API routes
 from app.api import register_api_routes
 
-# Initialize services
-ai_service = AIService()
-image_service = ImageService()
-scraper_service = ScraperService(ai_service, image_service)
-export_service = ExportService()
-
 # Authentication decorator
 def login_required(f):
     @wraps(f)
@@ -69,6 +62,13 @@ def register_routes(app):
         
         return render_template('login.html')
     
+    @app.route('/metrics')
+    def metrics():
+        """Expose crawler metrics in the Prometheus text format."""
+        from app.utils.metrics import registry
+        
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+    
     @app.route('/logout')
     def logout():
         """Handle user logout."""
@@ -89,8 +89,9 @@ def register_routes(app):
         
         # Get top websites by product count
         websites = Website.query.all()
+        website_counts = Product.count_by(Product.website_id)
         websites_data = [
-            {'name': website.name, 'products': len(website.products)} 
+            {'name': website.name, 'products': website_counts.get(website.id, 0)}
             for website in websites
         ]
         websites_data.sort(key=lambda x: x['products'], reverse=True)
@@ -98,8 +99,9 @@ def register_routes(app):
         
         # Get category distribution
         categories = Category.query.all()
+        category_counts = Product.count_by(Product.category_id)
         category_data = [
-            {'name': category.name, 'products': len(category.products)}
+            {'name': category.name, 'products': category_counts.get(category.id, 0)}
             for category in categories
         ]
         category_data.sort(key=lambda x: x['products'], reverse=True)
@@ -118,7 +120,8 @@ def register_routes(app):
     def websites():
         """Website management view."""
         all_websites = Website.find_all()
-        return render_template('websites.html', websites=all_websites)
+        product_counts = Product.count_by(Product.website_id)
+        return render_template('websites.html', websites=all_websites, product_counts=product_counts)
     
     @app.route('/websites/add', methods=['POST'])
     @login_required
@@ -237,10 +240,12 @@ def register_routes(app):
         try:
             # Start scraping in a background thread (would use Celery in production)
             import threading
-            thread = threading.Thread(
-                target=scraper_service.scrape_website,
-                args=(website,)
-            )
+            
+            def run_scrape(website_id):
+                with app.app_context():
+                    get_scraper_service().scrape_website(db.session.get(Website, website_id))
+            
+            thread = threading.Thread(target=run_scrape, args=(website.id,))
             thread.daemon = True
             thread.start()
             
@@ -258,24 +263,49 @@ def register_routes(app):
         category_id = request.args.get('category_id')
         website_id = request.args.get('website_id')
         search_query = request.args.get('q')
-        page = int(request.args.get('page', 1))
-        
-        # Build query
-        query = Product.query
-        
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
-        
-        if website_id:
-            query = query.filter(Product.website_id == website_id)
+        # Malformed numbers are ignored rather than failing the request
+        min_price = request.args.get('min_price', type=float)
+        max_price = request.args.get('max_price', type=float)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = 20
         
         if search_query:
-            query = query.filter(Product.name.ilike(f'%{search_query}%'))
-        
-        # Pagination
-        per_page = 20
-        products = query.order_by(Product.created_at.desc())\
-                       .paginate(page=page, per_page=per_page, error_out=False)
+            # Ranked full-text search
+            products = get_search_service().search(
+                search_query,
+                category_id=category_id,
+                website_id=website_id,
+                min_price=min_price,
+                max_price=max_price,
+                page=page,
+                per_page=per_page
+            )
+        else:
+            # Build query
+            query = Product.query.options(joinedload(Product.website), joinedload(Product.category))
+            
+            if category_id:
+                query = query.filter(Product.category_id == category_id)
+            
+            if website_id:
+                query = query.filter(Product.website_id == website_id)
+            
+            if min_price is not None:
+                query = query.filter(Product.price >= min_price)
+            
+            if max_price is not None:
+                query = query.filter(Product.price <= max_price)
+            
+            # Keyset pagination
+            try:
+                products = keyset_paginate(
+                    query, Product, limit=per_page,
+                    after=request.args.get('cursor'),
+                    before=request.args.get('before')
+                )
+            except ValueError:
+                flash('Invalid page link, showing the newest products.', 'warning')
+                products = keyset_paginate(query, Product, limit=per_page)
         
         # Get categories and websites for filters
         categories = Category.find_all()
@@ -288,7 +318,9 @@ def register_routes(app):
             websites=websites,
             current_category=category_id,
             current_website=website_id,
-            search_query=search_query
+            search_query=search_query,
+            min_price=min_price,
+            max_price=max_price
         )
     
     @app.route('/products/delete/<hash_id>', methods=['POST'])
@@ -323,6 +355,7 @@ def register_routes(app):
         
         try:
             product.category_id = category_id if category_id else None
+            product.category_confirmed = bool(category_id)
             db.session.commit()
             flash('Product category updated.', 'success')
         except Exception as e:
@@ -355,11 +388,11 @@ def register_routes(app):
             # Generate export
             export_path = None
             if export_format == 'csv':
-                export_path = export_service.export_csv(filters)
+                export_path = get_export_service().export_csv(filters)
             elif export_format == 'json':
-                export_path = export_service.export_json(filters)
+                export_path = get_export_service().export_json(filters)
             elif export_format == 'facebook':
-                export_path = export_service.export_facebook_catalog(filters)
+                export_path = get_export_service().export_facebook_catalog(filters)
             
             if export_path:
                 # Extract filename from path
@@ -367,7 +400,7 @@ def register_routes(app):
                 flash(f'Export completed successfully: {filename}', 'success')
                 # Return the file for download
                 return send_from_directory(
-                    directory=EXPORT_PATH,
+                    directory=os.path.abspath(EXPORT_PATH),
                     path=filename,
                     as_attachment=True
                 )
@@ -412,7 +445,7 @@ def register_routes(app):
     def download_export(filename):
         """Download an export file."""
         return send_from_directory(
-            directory=EXPORT_PATH,
+            directory=os.path.abspath(EXPORT_PATH),
             path=filename,
             as_attachment=True
         )
@@ -430,13 +463,21 @@ def register_routes(app):
             logs = ScrapeLog.find_latest()
             current_website = None
         
+        # Slowest requests and error rates per host from the request trace
+        since = datetime.utcnow() - timedelta(days=SCRAPE_EVENT_VIEW_DAYS)
+        slow_events = ScrapeEvent.find_slowest(since=since, website_id=website_id)
+        error_rates = ScrapeEvent.error_rates(since=since, website_id=website_id)
+        
         websites = Website.find_all()
         
         return render_template(
             'scrape_logs.html',
             logs=logs,
             websites=websites,
-            current_website=current_website
+            current_website=current_website,
+            slow_events=slow_events,
+            error_rates=error_rates,
+            event_days=SCRAPE_EVENT_VIEW_DAYS
         )
     
     @app.route('/api/website-status')
@@ -444,13 +485,14 @@ def register_routes(app):
     def website_status():
         """API endpoint for website scraping status."""
         websites = Website.query.all()
+        product_counts = Product.count_by(Product.website_id)
         data = [
             {
                 'id': website.hash_id,
                 'name': website.name,
                 'status': website.status,
                 'last_scraped': website.last_scraped.isoformat() if website.last_scraped else None,
-                'product_count': len(website.products)
+                'product_count': product_counts.get(website.id, 0)
             }
             for website in websites
         ]
@@ -1,10 +1,112 @@
 """
 Initialize services package.
+
+Service modules are imported on first use rather than with the package, so
+importing one service does not pull in the scraping and AI dependencies of
+the others. The get_* functions return process-wide instances, built on
+first call.
 """
-from app.services.ai_service import AIService
-from app.services.scraper_service import ScraperService
-from app.services.export_service import ExportService
-from app.services.image_service import ImageService
+import importlib
+import threading
+
+# Exported service classes and the modules defining them
+_SERVICE_MODULES = {
+    'AIService': 'app.services.ai_service',
+    'ScraperService': 'app.services.scraper_service',
+    'ExportService': 'app.services.export_service',
+    'ImageService': 'app.services.image_service',
+}
+
+_instances = {}
+_instances_lock = threading.RLock()
+
+def __getattr__(name):
+    """Import exported service classes on first access."""
+    if name in _SERVICE_MODULES:
+        return getattr(importlib.import_module(_SERVICE_MODULES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _shared(name, factory):
+    """Get the shared instance called name, creating it with factory on first use."""
+    if name not in _instances:
+        with _instances_lock:
+            if name not in _instances:
+                _instances[name] = factory()
+    return _instances[name]
+
+def get_ai_service():
+    """
+    Get the shared AI service.
+
+    Returns:
+        AIService instance
+    """
+    from app.services.ai_service import AIService
+    return _shared('ai_service', AIService)
+
+def get_image_service():
+    """
+    Get the shared image service.
+
+    Returns:
+        ImageService instance
+    """
+    from app.services.image_service import ImageService
+    return _shared('image_service', ImageService)
+
+def get_scraper_service():
+    """
+    Get the shared scraper service.
+
+    Returns:
+        ScraperService instance using the shared AI and image services
+    """
+    from app.services.scraper_service import ScraperService
+    return _shared('scraper_service', lambda: ScraperService(get_ai_service(), get_image_service()))
+
+def get_direct_scraper():
+    """
+    Get the shared direct scraper.
+
+    Returns:
+        DirectScraper instance using the shared AI and image services
+    """
+    from app.services.direct_scraper import DirectScraper
+    return _shared('direct_scraper', lambda: DirectScraper(get_ai_service(), get_image_service()))
+
+def get_export_service():
+    """
+    Get the shared export service.
+
+    Returns:
+        ExportService instance
+    """
+    from app.services.export_service import ExportService
+    return _shared('export_service', ExportService)
+
+def get_search_service():
+    """
+    Get the shared search service.
+
+    Returns:
+        SearchService instance
+    """
+    from app.services.search_service import SearchService
+    return _shared('search_service', SearchService)
+
+def get_price_history_service():
+    """
+    Get the shared price history service.
+
+    Returns:
+        PriceHistoryService instance
+    """
+    from app.services.price_history_service import PriceHistoryService
+    return _shared('price_history_service', PriceHistoryService)
 
 # Export services
-__all__ = ['AIService', 'ScraperService', 'ExportService', 'ImageService']
+__all__ = [
+    'AIService', 'ScraperService', 'ExportService', 'ImageService',
+    'get_ai_service', 'get_image_service', 'get_scraper_service', 'get_direct_scraper',
+    'get_export_service', 'get_search_service', 'get_price_history_service'
+]
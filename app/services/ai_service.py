@@ -4,9 +4,13 @@ AI service for product categorization and analysis.
 import os
 import json
 import logging
-from openai import OpenAI
-from app.config import PRODUCT_CATEGORIES, REPTILE_KEYWORDS, EXCLUDE_KEYWORDS
-from app.models import Category
+from functools import lru_cache
+from app.config import PRODUCT_CATEGORIES, LOCAL_CLASSIFIER_THRESHOLD
+from app.services.categorization_cache_service import CategorizationCacheService
+from app.services.category_registry import category_registry
+from app.services.llm_client import get_llm_client
+from app.services.local_classifier import get_local_classifier, product_text
+from app.utils.keyword_matcher import get_product_matcher
 
 class AIService:
     """
@@ -17,9 +21,10 @@ class AIService:
         Initialize the AI service with API key.
         """
         self.api_key = os.environ.get("OPENAI_API_KEY", "")
-        self.client = None
+        self.llm_client = None
+        self.cache = CategorizationCacheService()
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.llm_client = get_llm_client(self.api_key)
             logging.info("AI service initialized with API key")
         else:
             logging.warning("OpenAI API key not found, AI features will be limited")
@@ -34,52 +39,117 @@ class AIService:
         Returns:
             Dict with category_name and confidence_score
         """
-        if not self.client:
-            # Fallback to keyword-based categorization
-            return self._keyword_categorization(product_data)
+        return self.categorize_products([product_data])[0]
+    
+    def categorize_products(self, products_data):
+        """
+        Categorize several products, sending those that need the LLM concurrently.
         
-        try:
-            # Prepare product data and categories for classification
-            product_text = f"Product Name: {product_data.get('name', '')}\n"
-            if product_data.get('description'):
-                product_text += f"Description: {product_data.get('description')}\n"
-            
-            categories_list = "\n".join([f"- {cat}" for cat in PRODUCT_CATEGORIES])
-            
-            # Prompt for the AI
-            prompt = f"""
-            Analyze this reptile or exotic pet product and classify it into the most appropriate category.
-            
-            {product_text}
+        Each product goes through the local classifier, then the categorization
+        cache, and only then the LLM, within the shared client's concurrency and
+        rate limits.
+        
+        Args:
+            products_data: List of dicts with product information
             
-            Available categories:
-            {categories_list}
+        Returns:
+            List of dicts with category_name and confidence_score, in input order
+        """
+        results = [None] * len(products_data)
+        pending = []
+        
+        for i, product_data in enumerate(products_data):
+            # Fast local tier: accept confident predictions without a network call
+            local_result = self._local_categorization(product_data)
+            if local_result and local_result['confidence_score'] >= LOCAL_CLASSIFIER_THRESHOLD:
+                results[i] = local_result
+                continue
             
-            First, determine if this is actually a reptile/exotic pet product. If it's for dogs, cats, or other common pets, respond with "Not a reptile product".
+            if not self.llm_client:
+                # Fallback to the local model, then keyword-based categorization
+                results[i] = local_result or self._keyword_categorization(product_data)
+                continue
             
-            If it is a reptile product, respond in JSON format:
-            {{
-                "category": "selected category name from the list",
-                "confidence": a number between 0 and 1 indicating confidence,
-                "reasoning": "brief explanation for this classification"
-            }}
-            """
+            # Reuse the result for unchanged product text
+            cached_result = self.cache.get(product_data)
+            if cached_result is not None:
+                results[i] = cached_result
+                continue
             
-            # Query the OpenAI API for classification
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                max_tokens=400,
-                temperature=0.1
+            pending.append(i)
+        
+        if pending:
+            responses = self.llm_client.complete_many(
+                [self._categorization_request(products_data[i]) for i in pending]
             )
+            for i, response in zip(pending, responses):
+                results[i] = self._handle_categorization_response(products_data[i], response)
+        
+        return results
+    
+    def _categorization_request(self, product_data):
+        """
+        Build the LLM request for categorizing a product.
+        
+        Returns:
+            Dict of arguments for LLMClient.acomplete
+        """
+        # Prepare product data and categories for classification
+        product_details = f"Product Name: {product_data.get('name', '')}\n"
+        if product_data.get('description'):
+            product_details += f"Description: {product_data.get('description')}\n"
+        
+        categories_list = "\n".join([f"- {cat}" for cat in PRODUCT_CATEGORIES])
+        
+        # Prompt for the AI
+        prompt = f"""
+        Analyze this reptile or exotic pet product and classify it into the most appropriate category.
+        
+        {product_details}
+        
+        Available categories:
+        {categories_list}
+        
+        First, determine if this is actually a reptile/exotic pet product. If it's for dogs, cats, or other common pets, respond with "Not a reptile product".
+        
+        If it is a reptile product, respond in JSON format:
+        {{
+            "category": "selected category name from the list",
+            "confidence": a number between 0 and 1 indicating confidence,
+            "reasoning": "brief explanation for this classification"
+        }}
+        """
+        
+        return {
+            'model': "gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
+            'messages': [{"role": "user", "content": prompt}],
+            'response_format': {"type": "json_object"},
+            'max_tokens': 400,
+            'temperature': 0.1
+        }
+    
+    def _handle_categorization_response(self, product_data, result_text):
+        """
+        Turn an LLM response (or failure) into a categorization result.
+        
+        Args:
+            product_data: Dict with product information
+            result_text: Response content, or the exception raised by the LLM client
             
-            # Process the response
-            result_text = response.choices[0].message.content
-            
+        Returns:
+            Dict with category_name and confidence_score
+        """
+        if isinstance(result_text, Exception):
+            logging.warning(f"AI categorization failed for '{product_data.get('name', '')}', "
+                            f"using keyword fallback: {result_text}")
+            return self._keyword_categorization(product_data)
+        
+        try:
             # If it's not a reptile product
             if "Not a reptile product" in result_text:
-                return {"category_name": None, "confidence_score": 0.0}
+                result = {"category_name": None, "confidence_score": 0.0}
+                self.cache.set(product_data, result)
+                return result
             
             # Parse JSON response
             try:
@@ -88,63 +158,65 @@ class AIService:
                 confidence_score = result.get("confidence", 0.0)
                 
                 # Validate category exists
-                category = Category.find_by_name(category_name)
-                if not category and category_name:
+                if category_name and not category_registry.exists(category_name):
                     category_name = "Uncategorized"
                     confidence_score = 0.1
                 
-                return {
+                result = {
                     "category_name": category_name,
                     "confidence_score": confidence_score
                 }
+                self.cache.set(product_data, result)
+                return result
             except json.JSONDecodeError:
                 logging.error(f"Failed to parse AI response: {result_text}")
                 return self._keyword_categorization(product_data)
                 
         except Exception as e:
+            # Empty content, a JSON body that isn't an object, ...
             logging.error(f"Error in AI categorization: {str(e)}")
             return self._keyword_categorization(product_data)
     
+    def _local_categorization(self, product_data):
+        """
+        Categorize a product with the local classifier, if a trained model exists.
+        
+        Returns:
+            Dict with category_name and confidence_score, or None without a model
+        """
+        classifier = get_local_classifier()
+        if not classifier:
+            return None
+        
+        category_name, confidence_score = classifier.predict(product_text(product_data))
+        if not category_name:
+            return None
+        
+        return {
+            "category_name": category_name,
+            "confidence_score": round(confidence_score, 4)
+        }
+    
     def _keyword_categorization(self, product_data):
         """
         Fallback method for categorization using keywords.
         """
-        name = product_data.get('name', '').lower()
-        description = product_data.get('description', '').lower()
-        combined_text = f"{name} {description}"
+        matches = _scan_product_text(_product_text(product_data))
         
         # Check if this is even a reptile product
-        is_reptile_product = False
-        for keyword in REPTILE_KEYWORDS:
-            if keyword.lower() in combined_text:
-                is_reptile_product = True
-                break
-        
-        # Check exclusions
-        for keyword in EXCLUDE_KEYWORDS:
-            if keyword.lower() in combined_text:
-                is_reptile_product = False
-                break
-        
-        if not is_reptile_product:
+        if 'reptile' not in matches or 'exclude' in matches:
             return {"category_name": None, "confidence_score": 0.0}
         
-        # Simple keyword matching for categories
-        matches = {}
+        # Score each category by the number of its keywords found
+        scores = {}
         for category_name in PRODUCT_CATEGORIES:
-            category_keywords = category_name.lower().split()
-            match_score = 0
-            
-            for keyword in category_keywords:
-                if keyword in combined_text:
-                    match_score += 1
-            
+            match_score = len(matches.get(f'category:{category_name}', ()))
             if match_score > 0:
-                matches[category_name] = match_score
+                scores[category_name] = match_score
         
         # Find best match
-        if matches:
-            best_category = max(matches.items(), key=lambda x: x[1])
+        if scores:
+            best_category = max(scores.items(), key=lambda x: x[1])
             return {
                 "category_name": best_category[0],
                 "confidence_score": min(best_category[1] / 5, 0.8)  # Scale confidence
@@ -164,22 +236,19 @@ class AIService:
             Boolean indicating if this is a reptile product
         """
         # This could be expanded to use AI for more advanced filtering
-        name = product_data.get('name', '').lower()
-        description = product_data.get('description', '').lower()
-        combined_text = f"{name} {description}"
-        
-        # Check reptile keywords
-        is_reptile = False
-        for keyword in REPTILE_KEYWORDS:
-            if keyword.lower() in combined_text:
-                is_reptile = True
-                break
-        
-        # Check exclusion keywords
-        if is_reptile:
-            for keyword in EXCLUDE_KEYWORDS:
-                if keyword.lower() in combined_text:
-                    is_reptile = False
-                    break
-        
-        return is_reptile
+        matches = _scan_product_text(_product_text(product_data))
+        return 'reptile' in matches and 'exclude' not in matches
+
+def _product_text(product_data):
+    """Combine the text fields used for keyword matching."""
+    return f"{product_data.get('name') or ''} {product_data.get('description') or ''}"
+
+@lru_cache(maxsize=256)
+def _scan_product_text(text):
+    """
+    Scan product text once for all keyword groups.
+    
+    Cached so the relevance check during scraping and the later
+    categorization of the same product share a single scan.
+    """
+    return get_product_matcher().scan(text)
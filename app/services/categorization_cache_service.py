@@ -0,0 +1,214 @@
+"""
+Categorization cache service for reusing AI categorization results.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import bindparam
+
+from app import db
+from app.config import PRODUCT_CATEGORIES, CATEGORIZATION_CACHE_SIZE, CATEGORIZATION_CACHE_HIT_BATCH
+from app.models.categorization_cache import CategorizationCache
+from app.utils.hash_utils import generate_content_key, generate_hash_id
+from app.utils.metrics import CACHE_LOOKUPS
+from app.utils.write_queue import write_queue
+
+def category_list_version(categories=None):
+    """
+    Compute a version string for a category list.
+
+    Args:
+        categories: List of category names (defaults to PRODUCT_CATEGORIES)
+
+    Returns:
+        Hash of the category list; changes whenever the list changes
+    """
+    categories = PRODUCT_CATEGORIES if categories is None else categories
+    return generate_hash_id("|".join(categories))
+
+class CategorizationCacheService:
+    """
+    Two-level cache for categorization results: an in-process LRU in front of a DB table.
+
+    Lookups run on the crawl's worker threads and never write: hits are
+    counted in memory and written in batches, and new results are stored,
+    through the write queue, so the caller's session is never committed.
+    """
+    def __init__(self, max_size=CATEGORIZATION_CACHE_SIZE, categories=None, hit_batch=CATEGORIZATION_CACHE_HIT_BATCH):
+        """
+        Initialize the cache service.
+
+        Args:
+            max_size: Maximum number of entries held in the in-process LRU
+            categories: Category list the cached results belong to
+            hit_batch: Hits counted in memory before they are written
+        """
+        self.max_size = max_size
+        self.hit_batch = hit_batch
+        self.category_version = category_list_version(categories)
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending_hits = {}  # cache key -> (hits not written yet, time of the last one)
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, product_data):
+        """
+        Build the cache key for a product.
+
+        Args:
+            product_data: Dict with product information (name, description, etc.)
+
+        Returns:
+            Hash of the normalized name and description plus the category-list version
+        """
+        return generate_content_key(
+            self.category_version,
+            product_data.get('name') or '',
+            product_data.get('description') or ''
+        )
+
+    def get(self, product_data):
+        """
+        Look up a cached categorization result.
+
+        Args:
+            product_data: Dict with product information
+
+        Returns:
+            Dict with category_name and confidence_score, or None on a miss
+        """
+        key = self.make_key(product_data)
+
+        with self._lock:
+            result = self._lru.get(key)
+            if result is not None:
+                self._lru.move_to_end(key)
+        if result is not None:
+            self._hit(key)
+            return dict(result)
+
+        try:
+            entry = CategorizationCache.find_by_key(key)
+            if entry and entry.category_version == self.category_version:
+                result = entry.to_result()
+                self._remember(key, result)
+                self._hit(key)
+                return dict(result)
+        except Exception as e:
+            logging.error(f"Error reading categorization cache: {str(e)}")
+            db.session.rollback()
+
+        with self._lock:
+            self.misses += 1
+        CACHE_LOOKUPS.inc(cache='categorization', result='miss')
+        return None
+
+    def set(self, product_data, result):
+        """
+        Store a categorization result; it is written to the table through the write queue.
+
+        Args:
+            product_data: Dict with product information
+            result: Dict with category_name and confidence_score
+
+        Returns:
+            Future of the write
+        """
+        key = self.make_key(product_data)
+        result = {
+            'category_name': result.get('category_name'),
+            'confidence_score': result.get('confidence_score', 0.0)
+        }
+        self._remember(key, result)
+        return self._submit(self._write_entry, key, self.category_version, result)
+
+    def flush(self):
+        """
+        Write the hits counted since the last write.
+
+        Returns:
+            Future of the write, or None if there were no hits
+        """
+        with self._lock:
+            hits, self._pending_hits = self._pending_hits, {}
+        if not hits:
+            return None
+        return self._submit(self._write_hits, [
+            {'key': key, 'hits': count, 'last_hit_at': last_hit_at}
+            for key, (count, last_hit_at) in hits.items()
+        ])
+
+    def clear(self):
+        """Clear the in-process LRU."""
+        with self._lock:
+            self._lru.clear()
+
+    def purge_stale(self):
+        """
+        Remove persisted entries that belong to an older category list.
+
+        Returns:
+            Number of deleted entries
+        """
+        deleted = CategorizationCache.purge_stale(self.category_version)
+        if deleted:
+            logging.info(f"Purged {deleted} stale categorization cache entries")
+        return deleted
+
+    def _hit(self, key):
+        """Count a hit, writing the counts once hit_batch of them are pending."""
+        with self._lock:
+            self.hits += 1
+            count, _ = self._pending_hits.get(key, (0, None))
+            self._pending_hits[key] = (count + 1, datetime.utcnow())
+            full = sum(count for count, _ in self._pending_hits.values()) >= self.hit_batch
+        CACHE_LOOKUPS.inc(cache='categorization', result='hit')
+        if full:
+            self.flush()
+
+    @staticmethod
+    def _submit(func, *args):
+        """Queue a cache write, logging it if it fails."""
+        future = write_queue.submit(func, *args)
+        future.add_done_callback(CategorizationCacheService._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future):
+        """Log a cache write that failed; the cache is an optimization, so nothing else is done."""
+        if future.exception() is not None:
+            logging.error(f"Error writing categorization cache: {str(future.exception())}")
+
+    @staticmethod
+    def _write_entry(key, category_version, result):
+        """Insert or replace a cache entry; runs on the database writer."""
+        entry = CategorizationCache.find_by_key(key)
+        if entry is None:
+            entry = CategorizationCache(cache_key=key, category_version=category_version)
+            db.session.add(entry)
+        entry.category_version = category_version
+        entry.category_name = result['category_name']
+        entry.confidence_score = result['confidence_score']
+
+    @staticmethod
+    def _write_hits(rows):
+        """Add counted hits to their entries in one executemany UPDATE; runs on the database writer."""
+        table = CategorizationCache.__table__
+        db.session.execute(
+            table.update().where(table.c.cache_key == bindparam('key')).values(
+                hit_count=db.func.coalesce(table.c.hit_count, 0) + bindparam('hits'),
+                last_hit_at=bindparam('last_hit_at')
+            ),
+            rows
+        )
+
+    def _remember(self, key, result):
+        """Insert a result into the LRU, evicting the oldest entry when full."""
+        with self._lock:
+            self._lru[key] = result
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
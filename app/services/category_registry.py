@@ -0,0 +1,150 @@
+"""
+Process-wide registry of categories held in memory.
+"""
+import time
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.config import CATEGORY_REGISTRY_TTL
+from app.models.category import Category
+
+class CategoryRegistry:
+    """
+    In-memory map of category names to IDs.
+
+    The categories table is tiny and rarely changes, so it is loaded once and
+    served from memory. The map is invalidated whenever a Category is inserted,
+    updated or deleted in this process, and reloaded after CATEGORY_REGISTRY_TTL
+    seconds to pick up changes made by other processes.
+
+    Categories created by get_or_create_id() are only flushed; they are
+    committed with the caller's transaction, and forgotten if it rolls back.
+    """
+    def __init__(self, ttl=CATEGORY_REGISTRY_TTL):
+        """
+        Initialize the registry.
+
+        Args:
+            ttl: Seconds before the map is reloaded from the database
+        """
+        self.ttl = ttl
+        self._ids_by_name = {}
+        self._names_by_id = {}
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def get_id(self, name):
+        """
+        Get the ID of a category.
+
+        Args:
+            name: Category name
+
+        Returns:
+            Category ID or None if the category does not exist
+        """
+        if not name:
+            return None
+        self._ensure_loaded()
+        return self._ids_by_name.get(name)
+
+    def get_name(self, category_id):
+        """
+        Get the name of a category.
+
+        Args:
+            category_id: Category ID
+
+        Returns:
+            Category name or None if the category does not exist
+        """
+        if category_id is None:
+            return None
+        self._ensure_loaded()
+        return self._names_by_id.get(int(category_id))
+
+    def exists(self, name):
+        """Check if a category with this name exists."""
+        return self.get_id(name) is not None
+
+    def names(self):
+        """Get all category names."""
+        self._ensure_loaded()
+        return list(self._ids_by_name)
+
+    def get_or_create_id(self, name):
+        """
+        Get the ID of a category, creating the category if it does not exist.
+
+        A new category is flushed, not committed: it is written with the
+        caller's transaction, which must be committed for the ID to last.
+
+        Args:
+            name: Category name
+
+        Returns:
+            Category ID or None if no name was given
+        """
+        category_id = self.get_id(name)
+        if category_id is not None or not name:
+            return category_id
+
+        with self._lock:
+            # Another thread or process may have created it meanwhile
+            category = Category.find_by_name(name)
+            if not category:
+                category = Category(name=name)
+                db.session.add(category)
+                db.session.flush()
+                db.session.info.setdefault('created_categories', set()).add(category.id)
+                logging.info(f"Created category: {name}")
+
+            self._ids_by_name[category.name] = category.id
+            self._names_by_id[category.id] = category.name
+            return category.id
+
+    def invalidate(self):
+        """Force a reload on next access."""
+        with self._lock:
+            self._loaded_at = None
+
+    def refresh(self):
+        """Reload the map from the database."""
+        rows = db.session.query(Category.id, Category.name).all()
+        with self._lock:
+            self._ids_by_name = {name: category_id for category_id, name in rows}
+            self._names_by_id = {category_id: name for category_id, name in rows}
+            self._loaded_at = time.monotonic()
+        logging.debug(f"Category registry loaded {len(rows)} categories")
+
+    def _ensure_loaded(self):
+        """Load the map if it was never loaded, was invalidated or has expired."""
+        with self._lock:
+            loaded_at = self._loaded_at
+            if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+                self.refresh()
+
+# Shared registry used by the AI, scraper and export services
+category_registry = CategoryRegistry()
+
+@event.listens_for(Category, 'after_insert')
+@event.listens_for(Category, 'after_update')
+@event.listens_for(Category, 'after_delete')
+def _invalidate_registry(mapper, connection, target):
+    """Invalidate the registry whenever a category changes."""
+    category_registry.invalidate()
+
+@event.listens_for(Session, 'after_commit')
+def _forget_created_categories(session):
+    """Categories created in a committed transaction are permanent."""
+    session.info.pop('created_categories', None)
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_created_categories(session):
+    """Drop the IDs of categories whose creation was rolled back."""
+    if session.info.pop('created_categories', None):
+        category_registry.invalidate()
@@ -0,0 +1,255 @@
+"""
+Per-host circuit breaker shared by every scraper thread and worker process.
+"""
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from flask import has_app_context
+
+from app import db
+from app.config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN, CIRCUIT_MAX_COOLDOWN, CIRCUIT_SYNC_INTERVAL
+from app.models.host_circuit import HostCircuit
+from app.utils.write_queue import write_queue
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class _Circuit:
+    """In-process state of one host's circuit."""
+    def __init__(self, host, cooldown):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.changed_at = datetime.min
+        self.synced_at = None  # time.monotonic() of the last read from the database
+
+    def to_dict(self):
+        return {
+            'host': self.host,
+            'state': self.state,
+            'failures': self.failures,
+            'cooldown': self.cooldown,
+            'opened_at': self.opened_at,
+            'changed_at': self.changed_at
+        }
+
+class CircuitBreaker:
+    """
+    Stops requests to a host that keeps failing and probes it again later.
+
+    closed: requests pass; CIRCUIT_FAILURE_THRESHOLD consecutive failures
+        (network errors or failure statuses) open the circuit.
+    open: requests are refused until the cooldown has passed.
+    half_open: a single probe request is let through; success closes the
+        circuit, failure opens it again with twice the cooldown.
+
+    Transitions are written to the host_circuits table and each process
+    re-reads a host's row at most every CIRCUIT_SYNC_INTERVAL seconds; the
+    most recent transition wins. Without an app context the breaker works
+    in memory only.
+    """
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN,
+                 max_cooldown=CIRCUIT_MAX_COOLDOWN, sync_interval=CIRCUIT_SYNC_INTERVAL):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open a circuit
+            cooldown: Seconds a circuit first stays open
+            max_cooldown: Longest cooldown after repeated failed probes
+            sync_interval: Seconds between reads of a host's shared state
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.sync_interval = sync_interval
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        """
+        Check whether a request to a host may be sent.
+
+        When an open circuit's cooldown has passed, the first caller is
+        allowed through as the half-open probe and must report its outcome.
+
+        Args:
+            host: Host name
+
+        Returns:
+            True if the request may be sent
+        """
+        circuit = self._circuit(host)
+        with self._lock:
+            if circuit.state == CLOSED:
+                return True
+            # A probe that never reported back (e.g. its process died) is
+            # replaced after another cooldown
+            if datetime.utcnow() < circuit.changed_at + timedelta(seconds=circuit.cooldown):
+                return False
+            self._transition(circuit, HALF_OPEN)
+            changed = circuit.to_dict()
+        logging.info(f"Circuit for {host} half-open; sending a probe")
+        self._save(changed)
+        return True
+
+    def is_open(self, host):
+        """
+        Check whether a host's circuit is refusing requests.
+
+        A half-open circuit is not: its probe is on its way, and the crawl
+        keeps its queued pages, deferring those allow() refuses by
+        retry_after(), until the probe closes or reopens the circuit.
+
+        Args:
+            host: Host name
+
+        Returns:
+            True while the circuit is open and its cooldown has not passed
+        """
+        circuit = self._circuit(host)
+        with self._lock:
+            return (circuit.state == OPEN and
+                    datetime.utcnow() < circuit.changed_at + timedelta(seconds=circuit.cooldown))
+
+    def retry_after(self, host):
+        """
+        Get how long a request refused by allow() should wait before trying again.
+
+        An open circuit refuses requests until its cooldown has passed. While a
+        half-open probe is out, the answer is due at the next sync at the
+        latest, and a probe that never reports back is replaced after the
+        cooldown, whichever comes first.
+
+        Args:
+            host: Host name
+
+        Returns:
+            Seconds to wait; 0.0 if the circuit is closed
+        """
+        circuit = self._circuit(host)
+        with self._lock:
+            if circuit.state == CLOSED:
+                return 0.0
+            remaining = (circuit.changed_at + timedelta(seconds=circuit.cooldown) - datetime.utcnow()).total_seconds()
+            if circuit.state == HALF_OPEN:
+                remaining = min(remaining, self.sync_interval)
+            return max(remaining, 0.0)
+
+    def record_success(self, host):
+        """
+        Record a successful request to a host.
+
+        Args:
+            host: Host name
+        """
+        circuit = self._circuit(host)
+        changed = None
+        with self._lock:
+            circuit.failures = 0
+            if circuit.state != CLOSED:
+                circuit.cooldown = self.cooldown
+                self._transition(circuit, CLOSED)
+                changed = circuit.to_dict()
+        if changed:
+            logging.info(f"Circuit for {host} closed")
+            self._save(changed)
+
+    def record_failure(self, host):
+        """
+        Record a failed request to a host.
+
+        Args:
+            host: Host name
+        """
+        circuit = self._circuit(host)
+        changed = None
+        with self._lock:
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN:
+                circuit.cooldown = min(circuit.cooldown * 2, self.max_cooldown)
+                self._transition(circuit, OPEN)
+                changed = circuit.to_dict()
+            elif circuit.state == CLOSED and circuit.failures >= self.failure_threshold:
+                circuit.cooldown = self.cooldown
+                self._transition(circuit, OPEN)
+                changed = circuit.to_dict()
+        if changed:
+            logging.warning(f"Circuit for {host} opened after {changed['failures']} failures; "
+                            f"retrying in {changed['cooldown']:.0f}s")
+            self._save(changed)
+
+    def snapshot(self):
+        """Get the state of every circuit known to this process."""
+        with self._lock:
+            return [circuit.to_dict() for circuit in self._circuits.values()]
+
+    def _transition(self, circuit, state):
+        """Move a circuit to a new state; call with the lock held."""
+        circuit.state = state
+        circuit.changed_at = datetime.utcnow()
+        if state == OPEN:
+            circuit.opened_at = circuit.changed_at
+
+    def _circuit(self, host):
+        """Get a host's circuit, refreshed from the database when due."""
+        host = (host or '').lower()
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = self._circuits[host] = _Circuit(host, self.cooldown)
+            now = time.monotonic()
+            if circuit.synced_at is not None and now - circuit.synced_at < self.sync_interval:
+                return circuit
+            circuit.synced_at = now
+
+        if has_app_context():
+            self._sync(circuit)
+        return circuit
+
+    def _sync(self, circuit):
+        """Adopt the shared state of a circuit if another process changed it more recently."""
+        try:
+            row = HostCircuit.find_by_host(circuit.host)
+        except Exception as e:
+            logging.warning(f"Could not load circuit for {circuit.host}: {str(e)}")
+            db.session.rollback()
+            return
+        if row is None or row.changed_at is None:
+            return
+        with self._lock:
+            if row.changed_at > circuit.changed_at:
+                circuit.state = row.state
+                circuit.failures = row.failures or 0
+                circuit.cooldown = row.cooldown
+                circuit.opened_at = row.opened_at
+                circuit.changed_at = row.changed_at
+
+    def _save(self, changed):
+        """Write a transition to the database for the other processes."""
+        if not has_app_context():
+            return
+        try:
+            write_queue.run(self._write, changed)
+        except Exception as e:
+            logging.error(f"Error saving circuit for {changed['host']}: {str(e)}")
+            db.session.rollback()
+
+    def _write(self, changed):
+        """Upsert a HostCircuit row, unless a newer transition is already stored."""
+        row = HostCircuit.find_by_host(changed['host'])
+        if row is None:
+            row = HostCircuit(changed['host'])
+            db.session.add(row)
+        elif row.changed_at and row.changed_at > changed['changed_at']:
+            return
+        for key in ('state', 'failures', 'cooldown', 'opened_at', 'changed_at'):
+            setattr(row, key, changed[key])
+
+# Shared breaker for all scrapers in the process
+circuit_breaker = CircuitBreaker()
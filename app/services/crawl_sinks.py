@@ -0,0 +1,124 @@
+"""
+Output sinks for products collected by the scraper engine.
+"""
+import json
+import threading
+from datetime import datetime
+
+from app.models.product import Product
+from app.config import DEFAULT_SPRINT_SIZE
+
+class DatabaseSink:
+    """
+    Stores crawled products in batches: new products are categorized
+    together, so the LLM client sends them concurrently, and inserted;
+    known products are updated and their prices recorded.
+    This is the default sink.
+
+    A new product is counted as created when it is queued; those that then
+    fail to be stored are counted in failed.
+    """
+    def __init__(self, scraper, batch_size=DEFAULT_SPRINT_SIZE):
+        """
+        Initialize the sink.
+
+        Args:
+            scraper: ScraperService doing the writes
+            batch_size: Products per batch, new and known ones separately
+        """
+        self.scraper = scraper
+        self.batch_size = batch_size
+        self.pending = []
+        self.new = []
+        self.failed = 0
+
+    def write(self, product_data, website_id):
+        """
+        Store one product.
+
+        Args:
+            product_data: Scraped product data dictionary
+            website_id: ID of the website
+
+        Returns:
+            'created' or 'updated'; both are queued for the next batch
+        """
+        if Product.find_by_identity(website_id, product_data['url'], product_data.get('sku')):
+            self.pending.append(product_data)
+            if len(self.pending) >= self.batch_size:
+                self._update(website_id)
+            return 'updated'
+
+        self.new.append(product_data)
+        if len(self.new) >= self.batch_size:
+            self._create(website_id)
+        return 'created'
+
+    def flush(self, website_id):
+        """
+        Write queued products.
+
+        Args:
+            website_id: ID of the website
+
+        Returns:
+            Number of products whose price changed
+        """
+        self._create(website_id)
+        return self._update(website_id)
+
+    def _create(self, website_id):
+        """Categorize and insert the queued new products."""
+        new, self.new = self.new, []
+        if new:
+            self.failed += len(new) - self.scraper._process_products(new, website_id)
+
+    def _update(self, website_id):
+        """Update the queued known products; returns the number of price changes."""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return 0
+        return self.scraper._update_products(pending, website_id)
+
+class JsonLinesSink:
+    """
+    Writes crawled products as JSON lines without touching the database.
+    One sink can be shared by crawls running in parallel.
+    """
+    # Products are written when they are handed over, so none fail later
+    failed = 0
+
+    def __init__(self, stream):
+        """
+        Initialize the sink.
+
+        Args:
+            stream: Text stream to write to (e.g. sys.stdout or an open file)
+        """
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, product_data, website_id):
+        """
+        Write one product as a JSON line.
+
+        Args:
+            product_data: Scraped product data dictionary
+            website_id: ID of the website
+
+        Returns:
+            'written'
+        """
+        line = json.dumps({
+            **product_data,
+            'website_id': website_id,
+            'scraped_at': datetime.utcnow().isoformat()
+        }, default=str)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+        return 'written'
+
+    def flush(self, website_id):
+        """Nothing is buffered; returns 0 price changes."""
+        return 0
@@ -0,0 +1,371 @@
+"""
+Currency service for detecting currencies and converting prices to ZAR.
+"""
+import re
+import json
+import time
+import logging
+import importlib
+import threading
+from datetime import datetime
+
+from sqlalchemy import case, cast, func, Numeric
+
+from app import db
+from app.models.product import Product
+from app.models.exchange_rate import ExchangeRate
+from app.utils.structured_data import json_ld_objects, find_json_ld_value
+from app.utils.write_queue import write_queue
+from app.config import (
+    BASE_CURRENCY, EXCHANGE_RATES, EXCHANGE_RATE_SOURCE, EXCHANGE_RATE_TTL,
+    EXCHANGE_RATE_BACKFILL_BATCH
+)
+
+# Symbols and prefixes in price text, longest first so "US$" wins over "$"
+CURRENCY_SYMBOLS = [
+    ('US$', 'USD'),
+    ('CN¥', 'CNY'),
+    ('RMB', 'CNY'),
+    ('€', 'EUR'),
+    ('£', 'GBP'),
+    ('¥', 'CNY'),
+    ('$', 'USD'),
+]
+
+ISO_CODE_PATTERN = re.compile(r'\b(ZAR|USD|EUR|GBP|CNY|AUD|CAD|JPY)\b')
+
+# Rand amounts: "R 199", "R1,299.00"
+RAND_PATTERN = re.compile(r'(?<![A-Za-z])R\s?\d')
+
+# Elements that commonly hold the displayed price
+PRICE_SELECTORS = [
+    'span.price', 'div.price', 'p.price', 'span.current-price',
+    'span.product-price', 'div.product-price', 'span.amount',
+    '.product__price', '.product-single__price'
+]
+
+def detect_currency_from_text(price_text, default=None):
+    """
+    Detect the currency of a price string.
+
+    Args:
+        price_text: Text such as "R 199.00", "$12.99" or "12,50 EUR"
+        default: Value returned if no currency is recognized
+
+    Returns:
+        ISO 4217 currency code or the default
+    """
+    if not price_text:
+        return default
+
+    match = ISO_CODE_PATTERN.search(price_text.upper())
+    if match:
+        return match.group(1)
+
+    if RAND_PATTERN.search(price_text):
+        return 'ZAR'
+
+    for symbol, currency in CURRENCY_SYMBOLS:
+        if symbol in price_text:
+            return currency
+
+    return default
+
+def detect_currency_from_structured_data(soup):
+    """
+    Detect the currency declared in a page's structured data.
+
+    Checks JSON-LD offers, schema.org microdata and Open Graph product tags.
+
+    Args:
+        soup: BeautifulSoup of the product page
+
+    Returns:
+        ISO 4217 currency code or None
+    """
+    for data in json_ld_objects(soup):
+        currency = find_json_ld_value(data, 'priceCurrency')
+        if currency and len(currency) == 3:
+            return currency.upper()
+
+    for selector in ('[itemprop="priceCurrency"]', 'meta[property="product:price:currency"]',
+                     'meta[property="og:price:currency"]'):
+        element = soup.select_one(selector)
+        if element:
+            value = element.get('content') or element.get_text(strip=True)
+            if value and len(value.strip()) == 3:
+                return value.strip().upper()
+
+    return None
+
+def detect_currency(price_text=None, soup=None, default=BASE_CURRENCY):
+    """
+    Detect the currency of a product price.
+
+    Structured data is trusted first, then the price text, then the text of
+    the page's price elements.
+
+    Args:
+        price_text: Optional price string
+        soup: Optional BeautifulSoup of the product page
+        default: Currency assumed when nothing is recognized
+
+    Returns:
+        ISO 4217 currency code
+    """
+    if soup is not None:
+        currency = detect_currency_from_structured_data(soup)
+        if currency:
+            return currency
+
+    currency = detect_currency_from_text(price_text)
+    if currency:
+        return currency
+
+    if soup is not None:
+        for selector in PRICE_SELECTORS:
+            element = soup.select_one(selector)
+            if element:
+                currency = detect_currency_from_text(element.get_text(' ', strip=True))
+                if currency:
+                    return currency
+
+    return default
+
+class StaticRateSource:
+    """
+    Rate source backed by a fixed dictionary (config.EXCHANGE_RATES by default).
+    """
+    name = 'static'
+
+    def __init__(self, rates=None):
+        self.rates = dict(EXCHANGE_RATES if rates is None else rates)
+
+    def fetch(self):
+        """Get rates as a dictionary of currency code to ZAR per unit."""
+        return dict(self.rates)
+
+class FileRateSource:
+    """
+    Rate source backed by a local JSON file.
+
+    The file holds either {"rates": {"USD": 18.5, ...}} or a flat mapping,
+    with values in ZAR per unit of each currency.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.name = f'file:{path}'
+
+    def fetch(self):
+        """Get rates as a dictionary of currency code to ZAR per unit."""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rates = data.get('rates', data)
+        return {currency.upper(): float(rate) for currency, rate in rates.items()}
+
+def rate_source_from_config(spec=EXCHANGE_RATE_SOURCE):
+    """
+    Create a rate source from a configuration string.
+
+    Args:
+        spec: "static", "file:<path>" or "<module>:<class>" for a class with a fetch() method
+
+    Returns:
+        Rate source instance
+    """
+    if not spec or spec == 'static':
+        return StaticRateSource()
+    if spec.startswith('file:'):
+        return FileRateSource(spec[len('file:'):])
+
+    module_name, _, class_name = spec.partition(':')
+    source = getattr(importlib.import_module(module_name), class_name)()
+    if not hasattr(source, 'name'):
+        source.name = spec
+    return source
+
+class CurrencyService:
+    """
+    Service for exchange rates and conversion of prices to ZAR.
+
+    Rates are loaded from a pluggable source into the exchange_rates table
+    and cached in memory for EXCHANGE_RATE_TTL seconds. When a refresh
+    changes any rate, price_zar is recomputed for the affected products with
+    batched set-based UPDATEs.
+
+    A refresh commits, so it never runs inside a write: while a write job
+    is running, or the session has pending changes, expired rates are
+    served as they are and refreshed on the next call outside it.
+    """
+    def __init__(self, source=None, ttl=EXCHANGE_RATE_TTL, batch_size=EXCHANGE_RATE_BACKFILL_BATCH):
+        """
+        Initialize the currency service.
+
+        Args:
+            source: Rate source with a fetch() method (default: from EXCHANGE_RATE_SOURCE)
+            ttl: Seconds before rates are reloaded from the source
+            batch_size: Products per UPDATE during backfills
+        """
+        self.source = source or rate_source_from_config()
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self._rates = None
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def rates(self):
+        """
+        Get the current rates, refreshing them if the TTL has passed
+        and no write is in progress in this thread.
+
+        Returns:
+            Dictionary of currency code to ZAR per unit, including ZAR itself
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            if self._in_write():
+                # Refreshing would commit the caller's transaction halfway
+                with self._lock:
+                    if self._rates is None:
+                        self._rates = self._stored_rates()
+                return self._rates
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last known rates if the source is unavailable
+                logging.error(f"Error refreshing exchange rates: {str(e)}")
+                db.session.rollback()
+                with self._lock:
+                    if self._rates is None:
+                        self._rates = self._stored_rates()
+                    self._loaded_at = time.monotonic()
+        return self._rates
+
+    def to_zar(self, amount, currency):
+        """
+        Convert an amount to ZAR.
+
+        Args:
+            amount: Amount in the given currency
+            currency: Currency code (None is treated as ZAR)
+
+        Returns:
+            Amount in ZAR, or None if the amount is None or the currency has no rate
+        """
+        if amount is None:
+            return None
+        rate = self.rates().get((currency or BASE_CURRENCY).upper())
+        return round(amount * rate, 2) if rate is not None else None
+
+    def refresh(self, force_backfill=False):
+        """
+        Load rates from the source, store them and backfill products if they changed.
+
+        Args:
+            force_backfill: Recompute price_zar for all products even if no rate changed
+
+        Returns:
+            Dictionary of the rates that changed
+        """
+        with self._lock:
+            fetched = {currency.upper(): float(rate) for currency, rate in self.source.fetch().items()}
+            fetched.pop(BASE_CURRENCY, None)
+            stored = {rate.currency: rate for rate in ExchangeRate.query.all()}
+            now = datetime.utcnow()
+
+            changed = {}
+            for currency, rate in fetched.items():
+                existing = stored.get(currency)
+                if existing is None:
+                    db.session.add(ExchangeRate(currency, rate, source=self.source.name, fetched_at=now))
+                    changed[currency] = rate
+                else:
+                    existing.fetched_at = now
+                    if abs(existing.rate_to_zar - rate) > 1e-9:
+                        existing.rate_to_zar = rate
+                        existing.source = self.source.name
+                        changed[currency] = rate
+            db.session.commit()
+
+            self._rates = self._stored_rates()
+            self._loaded_at = time.monotonic()
+
+        if changed:
+            logging.info(f"Exchange rates changed: {changed}")
+
+        if force_backfill or not stored:
+            # First load: no product has been converted yet
+            self.backfill()
+        elif changed:
+            self.backfill(list(changed))
+        return changed
+
+    def backfill(self, currencies=None):
+        """
+        Recompute Product.price_zar in batches of set-based UPDATEs.
+
+        Each batch converts a range of product IDs with a single
+        UPDATE ... SET price_zar = price * CASE currency ... END,
+        so the rows never pass through Python.
+
+        Args:
+            currencies: Currencies to recompute (default: all, including ZAR)
+
+        Returns:
+            Number of products updated
+        """
+        rates = dict(self.rates())
+        if currencies is not None:
+            rates = {currency: rates[currency] for currency in currencies if currency in rates}
+        if not rates:
+            return 0
+
+        rate_case = case(
+            *[(Product.currency == currency, rate) for currency, rate in rates.items()],
+            else_=None
+        )
+        if BASE_CURRENCY in rates:
+            # Products without a currency are priced in ZAR
+            rate_case = case((Product.currency == None, rates[BASE_CURRENCY]), else_=rate_case)
+            currency_filter = db.or_(Product.currency.in_(list(rates)), Product.currency == None)
+        else:
+            currency_filter = Product.currency.in_(list(rates))
+
+        min_id, max_id = db.session.query(func.min(Product.id), func.max(Product.id)).one()
+        if min_id is None:
+            return 0
+
+        start_time = time.time()
+        updated = 0
+        for batch_start in range(min_id, max_id + 1, self.batch_size):
+            result = db.session.execute(
+                Product.__table__.update()
+                .where(Product.id >= batch_start)
+                .where(Product.id < batch_start + self.batch_size)
+                .where(Product.price != None)
+                .where(currency_filter)
+                .values(price_zar=func.round(cast(Product.price * rate_case, Numeric), 2))
+            )
+            db.session.commit()
+            updated += result.rowcount
+
+        logging.info(f"Backfilled price_zar for {updated} products ({', '.join(sorted(rates))}) "
+                     f"in {time.time() - start_time:.2f}s")
+        return updated
+
+    @staticmethod
+    def _in_write():
+        """Whether this thread is in the middle of a write that a commit would split."""
+        session = db.session
+        return write_queue.in_job() or bool(session.new or session.dirty or session.deleted)
+
+    @staticmethod
+    def _stored_rates():
+        """Load rates from the exchange_rates table."""
+        rates = {currency: rate for currency, rate in
+                 db.session.query(ExchangeRate.currency, ExchangeRate.rate_to_zar).all()}
+        rates[BASE_CURRENCY] = 1.0
+        return rates
+
+# Shared service so rates are cached once per process
+currency_service = CurrencyService()
@@ -6,8 +6,10 @@ import csv
 import json
 import logging
 from datetime import datetime
-from app.models import Product, Category
+from sqlalchemy.orm import joinedload
+from app.models import Product
 from app.config import EXPORT_PATH
+from app.services.category_registry import category_registry
 
 class ExportService:
     """
@@ -49,7 +51,9 @@ class ExportService:
                 writer.writeheader()
                 
                 for product in products:
-                    product_dict = product.to_dict()
+                    product_dict = product.to_dict(
+                        category_name=category_registry.get_name(product.category_id)
+                    )
                     # Only include specified fields
                     row = {field: product_dict.get(field, '') for field in fields}
                     writer.writerow(row)
@@ -80,7 +84,10 @@ class ExportService:
             products = self._get_products(filters)
             
             # Convert to dictionary list
-            products_data = [product.to_dict() for product in products]
+            products_data = [
+                product.to_dict(category_name=category_registry.get_name(product.category_id))
+                for product in products
+            ]
             
             # Write JSON file
             with open(filepath, 'w', encoding='utf-8') as jsonfile:
@@ -136,7 +143,7 @@ class ExportService:
                         'link': product.url,
                         'image_link': product.image_url if product.image_url else "",
                         'brand': product.website.name if product.website else "",
-                        'product_type': product.category.name if product.category else "Uncategorized"
+                        'product_type': category_registry.get_name(product.category_id) or "Uncategorized"
                     }
                     writer.writerow(row)
             
@@ -158,7 +165,7 @@ class ExportService:
             List of Product instances
         """
         # Get all products with valid name and categorized
-        query = Product.query.filter(Product.name != None)
+        query = Product.query.options(joinedload(Product.website)).filter(Product.name != None)
         
         # Apply category filter if specified
         if filters and 'category_id' in filters and filters['category_id']:
@@ -0,0 +1,136 @@
+"""
+Process-wide registry of per-host request controllers.
+"""
+import logging
+import threading
+import urllib.parse
+
+from flask import has_app_context
+
+from app import db
+from app.config import (
+    HOST_MAX_CONCURRENCY, HOST_INTERVAL_STEP, HOST_MAX_INTERVAL, HOST_LATENCY_SPIKE_FACTOR,
+    HOST_OVERLOAD_STATUSES
+)
+from app.models.host_state import HostState
+from app.utils.http_transport import http_transport
+from app.utils.metrics import IN_FLIGHT, CONCURRENCY_LIMIT
+from app.utils.throttling import AIMDController
+from app.utils.write_queue import write_queue
+
+class HostRegistry:
+    """
+    One AIMDController per host, shared by every scraper in the process.
+
+    A host's controller is loaded from its HostState the first time the host
+    is seen and written back by save(), so each run starts at the rate the
+    host tolerated last time instead of from scratch. While the transport
+    replays archived responses, controllers start unpaced and nothing is
+    loaded or saved: replayed timings say nothing about the live host.
+    """
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._controllers = {}
+        self._lock = threading.Lock()
+
+    def controller(self, host, initial_interval=0.0):
+        """
+        Get the controller for a host, loading its saved state on first use.
+
+        Args:
+            host: Host name
+            initial_interval: Seconds between requests for a host without saved state
+
+        Returns:
+            AIMDController instance
+        """
+        host = (host or '').lower()
+        with self._lock:
+            controller = self._controllers.get(host)
+            if controller is None:
+                controller = self._load(host, initial_interval)
+                self._controllers[host] = controller
+            return controller
+
+    def controller_for_url(self, url, initial_interval=0.0):
+        """
+        Get the controller for the host of a URL.
+
+        Args:
+            url: Request URL
+            initial_interval: Seconds between requests for a host without saved state
+
+        Returns:
+            AIMDController instance
+        """
+        return self.controller(urllib.parse.urlsplit(url).hostname, initial_interval)
+
+    def snapshots(self):
+        """Get the state of every controller in this process."""
+        with self._lock:
+            controllers = list(self._controllers.values())
+        return [controller.snapshot() for controller in controllers]
+
+    def save(self, hosts=None):
+        """
+        Persist controller state to the database.
+
+        Args:
+            hosts: Host names to save (default: every host seen by this process)
+        """
+        with self._lock:
+            controllers = [
+                controller for host, controller in self._controllers.items()
+                if hosts is None or host in hosts
+            ]
+        if controllers and not http_transport.replaying:
+            write_queue.run(self._write, [controller.snapshot() for controller in controllers])
+
+    def _write(self, snapshots):
+        """Upsert HostState rows from controller snapshots."""
+        for snapshot in snapshots:
+            state = HostState.find_by_host(snapshot['host'])
+            if state is None:
+                state = HostState(snapshot['host'])
+                db.session.add(state)
+            state.concurrency_limit = snapshot['limit']
+            state.request_interval = snapshot['interval']
+            state.latency = snapshot['latency']
+            state.successes = snapshot['successes']
+            state.overloads = snapshot['overloads']
+
+    def _load(self, host, initial_interval):
+        """Create a controller from the host's saved state, if any."""
+        if http_transport.replaying:
+            return AIMDController(host, limit=HOST_MAX_CONCURRENCY, max_limit=HOST_MAX_CONCURRENCY)
+
+        state = None
+        if has_app_context():
+            try:
+                state = HostState.find_by_host(host)
+            except Exception as e:
+                logging.warning(f"Could not load state for {host}: {str(e)}")
+                db.session.rollback()
+
+        controller = AIMDController(
+            host,
+            limit=state.concurrency_limit if state else 1.0,
+            interval=state.request_interval if state else initial_interval,
+            latency=state.latency if state else None,
+            max_limit=HOST_MAX_CONCURRENCY,
+            interval_step=HOST_INTERVAL_STEP,
+            max_interval=HOST_MAX_INTERVAL,
+            spike_factor=HOST_LATENCY_SPIKE_FACTOR,
+            overload_statuses=HOST_OVERLOAD_STATUSES
+        )
+        if state:
+            # Totals carry on across runs
+            controller.successes = state.successes or 0
+            controller.overloads = state.overloads or 0
+        return controller
+
+# Shared registry for all scrapers in the process
+host_registry = HostRegistry()
+
+IN_FLIGHT.set_function(lambda: {(s['host'],): s['in_flight'] for s in host_registry.snapshots()})
+CONCURRENCY_LIMIT.set_function(lambda: {(s['host'],): s['limit'] for s in host_registry.snapshots()})
@@ -4,9 +4,9 @@ Image service for downloading and processing product images.
 import os
 import uuid
 import logging
-import requests
 from urllib.parse import urlparse
 from app.config import IMAGES_PATH
+from app.utils.http_transport import http_transport
 
 class ImageService:
     """
@@ -61,7 +61,7 @@ class ImageService:
             filepath = os.path.join(IMAGES_PATH, filename)
             
             # Download the image
-            response = requests.get(image_url, stream=True, timeout=10)
+            response = http_transport.get(image_url, stream=True, timeout=10)
             
             if response.status_code == 200:
                 with open(filepath, 'wb') as f:
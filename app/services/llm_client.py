@@ -0,0 +1,349 @@
+"""
+LLM client with concurrency, rate-limit and retry handling.
+"""
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from app.config import (
+    AI_MAX_CONCURRENCY, AI_REQUESTS_PER_MINUTE, AI_TOKENS_PER_MINUTE,
+    AI_MAX_RETRIES, AI_REQUEST_TIMEOUT
+)
+from app.utils.metrics import LLM_CALLS, LLM_TOKENS, LLM_THROTTLED_SECONDS, LLM_LATENCY
+from app.utils.throttling import TokenBucket
+
+# Rough characters-per-token ratio used to budget a request before it is sent
+CHARS_PER_TOKEN = 4
+
+class LLMError(Exception):
+    """Raised when an LLM call fails after all retries."""
+
+class LLMMetrics:
+    """
+    Per-call latency and token counters for the LLM client.
+    """
+    def __init__(self, window=1000):
+        """
+        Initialize the metrics.
+
+        Args:
+            window: Number of recent call latencies kept for percentiles
+        """
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.throttled_seconds = 0.0
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_call(self, latency, prompt_tokens=0, completion_tokens=0):
+        """Record a successful call."""
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.latencies.append(latency)
+
+    def record_retry(self, rate_limited=False):
+        """Record a retried attempt."""
+        with self._lock:
+            self.retries += 1
+            if rate_limited:
+                self.rate_limited += 1
+
+    def record_failure(self):
+        """Record a call that failed after all retries."""
+        with self._lock:
+            self.failures += 1
+
+    def record_throttle(self, seconds):
+        """Record time spent waiting for rate-limit capacity."""
+        with self._lock:
+            self.throttled_seconds += seconds
+
+    def snapshot(self):
+        """
+        Get a summary of the metrics.
+
+        Returns:
+            Dict with call counts, token totals and latency percentiles in seconds
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+            summary = {
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'throttled_seconds': round(self.throttled_seconds, 3)
+            }
+
+        for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            summary[f'latency_{name}'] = (
+                round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)], 3)
+                if latencies else None
+            )
+        return summary
+
+class LLMClient:
+    """
+    Async wrapper around the OpenAI chat completions API.
+
+    All calls run on one background event loop, so every thread in the
+    process shares the same concurrency window and rate-limit budgets.
+    Requests wait on token buckets for both requests and tokens per minute,
+    and 429/5xx responses are retried with full-jitter backoff that honours
+    Retry-After.
+    """
+    def __init__(self, api_key, max_concurrency=AI_MAX_CONCURRENCY,
+                 requests_per_minute=AI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=AI_TOKENS_PER_MINUTE,
+                 max_retries=AI_MAX_RETRIES, timeout=AI_REQUEST_TIMEOUT):
+        """
+        Initialize the LLM client.
+
+        Args:
+            api_key: OpenAI API key
+            max_concurrency: Maximum number of requests in flight
+            requests_per_minute: Request budget per minute
+            tokens_per_minute: Token budget per minute (prompt + completion)
+            max_retries: Retries for rate-limited or failed requests
+            timeout: Per-request timeout in seconds
+        """
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.request_bucket = TokenBucket.per_minute(requests_per_minute)
+        self.token_bucket = TokenBucket.per_minute(tokens_per_minute)
+        self.metrics = LLMMetrics()
+
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    def complete(self, messages, model, max_tokens, **kwargs):
+        """
+        Run a chat completion and wait for the result.
+
+        Args:
+            messages: Chat messages
+            model: Model name
+            max_tokens: Completion token limit
+            kwargs: Extra arguments for chat.completions.create
+
+        Returns:
+            Response message content
+
+        Raises:
+            LLMError: If the call fails after all retries
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.acomplete(messages, model, max_tokens, **kwargs),
+            self._ensure_loop()
+        )
+        return future.result()
+
+    def complete_many(self, requests):
+        """
+        Run many chat completions concurrently within the limits.
+
+        Args:
+            requests: List of dicts with messages, model, max_tokens and extra arguments
+
+        Returns:
+            List of response contents or LLMError instances, in request order
+        """
+        async def run_all():
+            return await asyncio.gather(
+                *(self.acomplete(**request) for request in requests),
+                return_exceptions=True
+            )
+
+        future = asyncio.run_coroutine_threadsafe(run_all(), self._ensure_loop())
+        return future.result()
+
+    async def acomplete(self, messages, model, max_tokens, **kwargs):
+        """
+        Run a chat completion on the client's event loop.
+
+        Args:
+            messages: Chat messages
+            model: Model name
+            max_tokens: Completion token limit
+            kwargs: Extra arguments for chat.completions.create
+
+        Returns:
+            Response message content
+
+        Raises:
+            LLMError: If the call fails after all retries
+        """
+        import openai
+
+        estimated_tokens = self._estimate_tokens(messages, max_tokens)
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_capacity(estimated_tokens)
+
+            start_time = time.monotonic()
+            try:
+                async with self._semaphore:
+                    response = await self._client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        timeout=self.timeout,
+                        **kwargs
+                    )
+            except openai.APIStatusError as e:
+                retryable = e.status_code == 429 or e.status_code >= 500
+                if e.status_code == 429 and getattr(e, 'code', None) == 'insufficient_quota':
+                    retryable = False
+                if not retryable or attempt == self.max_retries:
+                    self.metrics.record_failure()
+                    raise LLMError(f"LLM request failed with status {e.status_code}: {e}") from e
+
+                delay = self._backoff(attempt, self._retry_after(e.response))
+                self.metrics.record_retry(rate_limited=e.status_code == 429)
+                logging.warning(f"LLM request returned {e.status_code}, retrying in {delay:.2f}s "
+                                f"(attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+                continue
+            except (openai.APIConnectionError, asyncio.TimeoutError) as e:
+                # APITimeoutError is a subclass of APIConnectionError
+                if attempt == self.max_retries:
+                    self.metrics.record_failure()
+                    raise LLMError(f"LLM request failed: {e}") from e
+
+                delay = self._backoff(attempt)
+                self.metrics.record_retry()
+                logging.warning(f"LLM connection error ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            latency = time.monotonic() - start_time
+            usage = getattr(response, 'usage', None)
+            prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+            completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+            self.metrics.record_call(latency, prompt_tokens, completion_tokens)
+
+            # Reconcile the token budget with what the call actually used
+            if usage is not None:
+                self.token_bucket.adjust(estimated_tokens - (prompt_tokens + completion_tokens))
+
+            logging.debug(f"LLM call took {latency:.2f}s "
+                          f"({prompt_tokens} prompt + {completion_tokens} completion tokens)")
+            return response.choices[0].message.content
+
+        raise LLMError("LLM request failed after all retries")
+
+    async def _wait_for_capacity(self, estimated_tokens):
+        """Wait until both the request and token budgets allow another call."""
+        wait_seconds = max(
+            self.request_bucket.reserve(1),
+            self.token_bucket.reserve(estimated_tokens)
+        )
+        if wait_seconds > 0:
+            self.metrics.record_throttle(wait_seconds)
+            await asyncio.sleep(wait_seconds)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(60.0, 0.5 * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    @staticmethod
+    def _retry_after(response):
+        """Parse the Retry-After delay (in seconds) from a response, if present."""
+        if response is None:
+            return None
+
+        headers = response.headers
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+            if headers.get('retry-after'):
+                return float(headers['retry-after'])
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    @staticmethod
+    def _estimate_tokens(messages, max_tokens):
+        """Estimate the tokens a call will consume before sending it."""
+        prompt_chars = sum(len(str(message.get('content', ''))) for message in messages)
+        return prompt_chars // CHARS_PER_TOKEN + max_tokens
+
+    def _ensure_loop(self):
+        """Start the background event loop and async client on first use."""
+        if self._loop is not None:
+            return self._loop
+
+        with self._start_lock:
+            if self._loop is None:
+                from openai import AsyncOpenAI
+
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='llm-client', daemon=True)
+                thread.start()
+
+                async def setup():
+                    # Created on the loop so they are bound to it
+                    self._client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+                asyncio.run_coroutine_threadsafe(setup(), loop).result()
+                self._loop = loop
+                logging.info(f"LLM client started (concurrency {self.max_concurrency})")
+
+        return self._loop
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def get_llm_client(api_key):
+    """
+    Get the process-wide LLM client.
+
+    Args:
+        api_key: OpenAI API key
+
+    Returns:
+        LLMClient instance shared by all callers
+    """
+    global _shared_client
+
+    with _shared_client_lock:
+        if _shared_client is None or _shared_client.api_key != api_key:
+            _shared_client = LLMClient(api_key)
+        return _shared_client
+
+def _metric_values(select):
+    """Read values for an exported metric from the shared client's metrics; none before the first client."""
+    client = _shared_client
+    if client is None:
+        return {}
+    return {labels: value for labels, value in select(client.metrics.snapshot()).items() if value is not None}
+
+LLM_CALLS.set_function(lambda: _metric_values(lambda m: {
+    ('ok',): m['calls'], ('failed',): m['failures'], ('retry',): m['retries'], ('rate_limited',): m['rate_limited']
+}))
+LLM_TOKENS.set_function(lambda: _metric_values(lambda m: {
+    ('prompt',): m['prompt_tokens'], ('completion',): m['completion_tokens']
+}))
+LLM_THROTTLED_SECONDS.set_function(lambda: _metric_values(lambda m: {(): m['throttled_seconds']}))
+LLM_LATENCY.set_function(lambda: _metric_values(lambda m: {
+    ('0.5',): m['latency_p50'], ('0.95',): m['latency_p95'], ('0.99',): m['latency_p99']
+}))
@@ -0,0 +1,345 @@
+"""
+Local text classifier for fast offline product categorization.
+"""
+import os
+import gzip
+import json
+import math
+import zlib
+import random
+import logging
+import threading
+from datetime import datetime
+
+from app.config import LOCAL_CLASSIFIER_PATH, LOCAL_CLASSIFIER_FEATURES
+from app.utils.keyword_matcher import PUNCTUATION_TABLE
+
+MODEL_FORMAT_VERSION = 1
+
+class LocalClassifier:
+    """
+    Multinomial logistic regression over hashed TF-IDF features.
+
+    Text is tokenized into unigrams and bigrams, each hashed into a fixed
+    number of buckets, weighted by sublinear TF-IDF and L2-normalized.
+    Weights are only kept for buckets seen during training, so the model
+    stays small and prediction costs one dict lookup per token.
+    """
+    def __init__(self, n_features=LOCAL_CLASSIFIER_FEATURES):
+        """
+        Initialize an untrained classifier.
+
+        Args:
+            n_features: Number of hashed feature buckets
+        """
+        self.n_features = n_features
+        self.classes = []
+        self.idf = {}
+        self.weights = {}
+        self.bias = []
+        self.metadata = {}
+
+    @property
+    def is_trained(self):
+        """Whether the classifier has been trained or loaded."""
+        return bool(self.classes)
+
+    def fit(self, texts, labels, epochs=15, learning_rate=0.5, l2=1e-5, seed=42):
+        """
+        Train the classifier.
+
+        Args:
+            texts: List of product texts
+            labels: List of category names, one per text
+            epochs: Passes of stochastic gradient descent over the data
+            learning_rate: Initial learning rate (decays per epoch)
+            l2: L2 regularization strength
+            seed: Random seed for shuffling
+
+        Returns:
+            self
+        """
+        if not texts:
+            raise ValueError("Cannot train a classifier without examples")
+
+        self.classes = sorted(set(labels))
+        class_index = {name: i for i, name in enumerate(self.classes)}
+        n_classes = len(self.classes)
+
+        # Document frequencies for IDF
+        token_counts = [self._hashed_counts(text) for text in texts]
+        document_frequency = {}
+        for counts in token_counts:
+            for bucket in counts:
+                document_frequency[bucket] = document_frequency.get(bucket, 0) + 1
+        n_documents = len(texts)
+        self.idf = {
+            bucket: math.log((1 + n_documents) / (1 + frequency)) + 1
+            for bucket, frequency in document_frequency.items()
+        }
+
+        examples = [
+            (self._weigh(counts), class_index[label])
+            for counts, label in zip(token_counts, labels)
+        ]
+
+        self.weights = {}
+        self.bias = [0.0] * n_classes
+        rng = random.Random(seed)
+
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            rate = learning_rate / (1 + epoch * 0.5)
+            decay = 1 - rate * l2
+
+            for features, target in examples:
+                gradients = self._probabilities(features)
+                gradients[target] -= 1.0
+
+                self.bias = [b - rate * g for b, g in zip(self.bias, gradients)]
+                for bucket, value in features:
+                    row = self.weights.get(bucket) or [0.0] * n_classes
+                    step = rate * value
+                    self.weights[bucket] = [w * decay - step * g for w, g in zip(row, gradients)]
+
+        self.metadata = {
+            'trained_at': datetime.utcnow().isoformat(),
+            'examples': n_documents,
+            'epochs': epochs
+        }
+        return self
+
+    def predict(self, text):
+        """
+        Predict the category of a text.
+
+        Args:
+            text: Product text
+
+        Returns:
+            Tuple of (category_name, confidence) or (None, 0.0) if untrained
+        """
+        if not self.is_trained:
+            return None, 0.0
+
+        probabilities = self._probabilities(self._weigh(self._hashed_counts(text)))
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return self.classes[best], probabilities[best]
+
+    def predict_many(self, texts):
+        """
+        Predict categories for many texts.
+
+        Args:
+            texts: List of product texts
+
+        Returns:
+            List of (category_name, confidence) tuples
+        """
+        return [self.predict(text) for text in texts]
+
+    def evaluate(self, texts, labels, threshold=0.0):
+        """
+        Evaluate the classifier against labelled texts.
+
+        Args:
+            texts: List of product texts
+            labels: List of expected category names
+            threshold: Confidence at or above which a prediction is accepted locally
+
+        Returns:
+            Dict with accuracy, coverage at the threshold, accuracy of the covered
+            predictions and per-class precision/recall
+        """
+        predictions = self.predict_many(texts)
+        total = len(labels)
+        correct = 0
+        covered = 0
+        covered_correct = 0
+        per_class = {}
+
+        for (predicted, confidence), expected in zip(predictions, labels):
+            hit = predicted == expected
+            correct += hit
+            if confidence >= threshold:
+                covered += 1
+                covered_correct += hit
+
+            stats = per_class.setdefault(expected, {'tp': 0, 'fp': 0, 'fn': 0})
+            if hit:
+                stats['tp'] += 1
+            else:
+                stats['fn'] += 1
+                per_class.setdefault(predicted, {'tp': 0, 'fp': 0, 'fn': 0})['fp'] += 1
+
+        report = {}
+        for name, stats in sorted(per_class.items(), key=lambda item: str(item[0])):
+            predicted_count = stats['tp'] + stats['fp']
+            expected_count = stats['tp'] + stats['fn']
+            report[name] = {
+                'precision': stats['tp'] / predicted_count if predicted_count else 0.0,
+                'recall': stats['tp'] / expected_count if expected_count else 0.0,
+                'support': expected_count
+            }
+
+        return {
+            'examples': total,
+            'accuracy': correct / total if total else 0.0,
+            'threshold': threshold,
+            'coverage': covered / total if total else 0.0,
+            'covered_accuracy': covered_correct / covered if covered else 0.0,
+            'classes': report
+        }
+
+    def save(self, path=LOCAL_CLASSIFIER_PATH):
+        """
+        Serialize the model to a gzip-compressed JSON file.
+
+        Args:
+            path: Destination file path
+
+        Returns:
+            The path written
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        payload = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'n_features': self.n_features,
+            'classes': self.classes,
+            'bias': self.bias,
+            'idf': {str(bucket): value for bucket, value in self.idf.items()},
+            'weights': {
+                str(bucket): [round(value, 6) for value in row]
+                for bucket, row in self.weights.items()
+            },
+            'metadata': self.metadata
+        }
+
+        temporary_path = f"{path}.tmp"
+        with gzip.open(temporary_path, 'wt', encoding='utf-8') as model_file:
+            json.dump(payload, model_file)
+        os.replace(temporary_path, path)
+
+        logging.info(f"Saved local classifier with {len(self.weights)} weighted features to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path=LOCAL_CLASSIFIER_PATH):
+        """
+        Load a serialized model.
+
+        Args:
+            path: Model file path
+
+        Returns:
+            LocalClassifier instance
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as model_file:
+            payload = json.load(model_file)
+
+        if payload.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported classifier format: {payload.get('format_version')}")
+
+        classifier = cls(n_features=payload['n_features'])
+        classifier.classes = payload['classes']
+        classifier.bias = payload['bias']
+        classifier.idf = {int(bucket): value for bucket, value in payload['idf'].items()}
+        classifier.weights = {int(bucket): row for bucket, row in payload['weights'].items()}
+        classifier.metadata = payload.get('metadata', {})
+        return classifier
+
+    def _hashed_counts(self, text):
+        """Count hashed unigram and bigram buckets in a text."""
+        words = (text or "").lower().translate(PUNCTUATION_TABLE).split()
+        tokens = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+        counts = {}
+        for token in tokens:
+            bucket = zlib.crc32(token.encode('utf-8')) % self.n_features
+            counts[bucket] = counts.get(bucket, 0) + 1
+        return counts
+
+    def _weigh(self, counts):
+        """Convert bucket counts into L2-normalized TF-IDF feature pairs."""
+        features = []
+        for bucket, count in counts.items():
+            idf = self.idf.get(bucket)
+            if idf is not None:
+                features.append((bucket, (1 + math.log(count)) * idf))
+
+        norm = math.sqrt(sum(value * value for _, value in features))
+        if norm:
+            features = [(bucket, value / norm) for bucket, value in features]
+        return features
+
+    def _probabilities(self, features):
+        """Softmax class probabilities for a feature vector."""
+        scores = list(self.bias)
+        n_classes = len(scores)
+        for bucket, value in features:
+            row = self.weights.get(bucket)
+            if row is not None:
+                for k in range(n_classes):
+                    scores[k] += row[k] * value
+
+        top = max(scores)
+        exponentials = [math.exp(score - top) for score in scores]
+        total = sum(exponentials)
+        return [value / total for value in exponentials]
+
+def product_text(product_data):
+    """
+    Build the classifier input text for a product.
+
+    Args:
+        product_data: Dict with product information (name, description)
+
+    Returns:
+        Text with the name repeated so it outweighs long descriptions
+    """
+    name = product_data.get('name') or ''
+    description = product_data.get('description') or ''
+    return f"{name} {name} {description[:1000]}"
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+def get_local_classifier(path=LOCAL_CLASSIFIER_PATH):
+    """
+    Get the shared classifier, loading it from disk on first use.
+
+    Args:
+        path: Model file path
+
+    Returns:
+        LocalClassifier instance, or None if no trained model exists
+    """
+    global _model, _model_loaded
+
+    if _model_loaded:
+        return _model
+
+    with _model_lock:
+        if not _model_loaded:
+            if os.path.exists(path):
+                try:
+                    _model = LocalClassifier.load(path)
+                    logging.info(f"Local classifier loaded from {path} ({len(_model.classes)} classes)")
+                except Exception as e:
+                    logging.error(f"Error loading local classifier: {str(e)}")
+                    _model = None
+            _model_loaded = True
+
+    return _model
+
+def reset_local_classifier():
+    """Forget the shared classifier so the next call reloads it from disk."""
+    global _model, _model_loaded
+
+    with _model_lock:
+        _model = None
+        _model_loaded = False
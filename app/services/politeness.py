@@ -0,0 +1,261 @@
+"""
+Politeness: robots.txt rules per host and a crawl worker pool that serves whichever host is ready.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+import urllib.parse
+import urllib.robotparser
+from concurrent.futures import Future
+
+from app.config import ROBOTS_USER_AGENT, ROBOTS_TTL, ROBOTS_ERROR_TTL, CRAWL_WORKERS
+from app.services.host_registry import host_registry
+from app.utils.http_transport import http_transport
+from app.utils.metrics import CACHE_LOOKUPS
+
+# Larger robots.txt files are truncated (RFC 9309 asks parsers to read at least 500 KiB)
+ROBOTS_MAX_BYTES = 500 * 1024
+
+class RobotsCache:
+    """
+    Fetches, parses and caches robots.txt per origin.
+
+    Following RFC 9309, a 4xx robots.txt allows everything, while a 5xx or
+    no response disallows the whole site until it is fetched again after
+    ROBOTS_ERROR_TTL. A Crawl-delay becomes the minimum interval of the
+    host's request controller.
+    """
+    def __init__(self, ttl=ROBOTS_TTL, error_ttl=ROBOTS_ERROR_TTL, user_agent=ROBOTS_USER_AGENT):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a fetched robots.txt is reused
+            error_ttl: Seconds a failed fetch is remembered
+            user_agent: Token matched against User-agent lines
+        """
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.user_agent = user_agent
+        self._entries = {}  # origin -> (expires at, RobotFileParser)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def allowed(self, url):
+        """
+        Check whether robots.txt allows fetching a URL.
+
+        Args:
+            url: URL to fetch
+
+        Returns:
+            True if the URL may be fetched
+        """
+        return self._rules(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        """
+        Get the Crawl-delay that applies to a URL's host.
+
+        Args:
+            url: Any URL on the host
+
+        Returns:
+            Seconds between requests, or None if robots.txt sets none
+        """
+        delay = self._rules(url).crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    def clear(self):
+        """Forget every cached robots.txt."""
+        with self._lock:
+            self._entries.clear()
+
+    def _rules(self, url):
+        """Get the parsed robots.txt for a URL's origin, fetching it when stale."""
+        parts = urllib.parse.urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry and entry[0] > time.monotonic():
+                CACHE_LOOKUPS.inc(cache='robots', result='hit')
+                return entry[1]
+            origin_lock = self._locks.setdefault(origin, threading.Lock())
+
+        # One fetch per origin; other threads wait for it
+        with origin_lock:
+            with self._lock:
+                entry = self._entries.get(origin)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+            CACHE_LOOKUPS.inc(cache='robots', result='miss')
+            rules, ttl = self._fetch(origin)
+            with self._lock:
+                self._entries[origin] = (time.monotonic() + ttl, rules)
+
+        # Replayed responses come from disk; there is no host to be polite to
+        delay = rules.crawl_delay(self.user_agent) if not http_transport.replaying else None
+        if delay is not None:
+            logging.info(f"{origin} asks for a crawl delay of {delay}s")
+        host_registry.controller(parts.hostname).set_min_interval(float(delay or 0.0))
+        return rules
+
+    def _fetch(self, origin):
+        """
+        Fetch and parse an origin's robots.txt.
+
+        Returns:
+            Tuple of (RobotFileParser, seconds to cache it)
+        """
+        rules = urllib.robotparser.RobotFileParser(origin + '/robots.txt')
+        try:
+            response = http_transport.get(origin + '/robots.txt', timeout=10)
+        except Exception as e:
+            logging.warning(f"Could not fetch robots.txt of {origin}: {str(e)}; treating the site as disallowed")
+            rules.disallow_all = True
+            return rules, self.error_ttl
+
+        if response.status_code >= 500:
+            logging.warning(f"robots.txt of {origin} returned {response.status_code}; "
+                            f"treating the site as disallowed")
+            rules.disallow_all = True
+            return rules, self.error_ttl
+        if response.status_code >= 400:
+            rules.allow_all = True
+            return rules, self.ttl
+
+        rules.parse(response.text[:ROBOTS_MAX_BYTES].splitlines())
+        return rules, self.ttl
+
+class PolitenessScheduler:
+    """
+    Worker pool for page fetches across every host being crawled.
+
+    Tasks are queued per host. A free worker takes the next due task from
+    the first host, in round-robin order, whose request controller grants
+    a slot right now. It only waits when no host is ready, and then only
+    until the earliest host is. A worker is therefore never parked on a
+    slow host while another host has capacity.
+
+    A task runs as func(ticket, *args) and must release the ticket on the
+    host's controller.
+    """
+    def __init__(self, workers=CRAWL_WORKERS):
+        """
+        Initialize the scheduler; worker threads start on first use.
+
+        Args:
+            workers: Number of worker threads
+        """
+        self.workers = workers
+        self._queues = {}  # host -> heap of (not_before, seq, future, controller, func, args)
+        self._order = []  # hosts with queued tasks, in round-robin order
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def submit(self, url, func, *args, not_before=0.0):
+        """
+        Queue a fetch.
+
+        Args:
+            url: URL the task fetches; its host decides the pacing
+            func: Callable run as func(ticket, *args)
+            args: Further arguments for func
+            not_before: time.monotonic() value before which the task may not start
+
+        Returns:
+            Future for the task's return value; it can be cancelled until the task starts
+        """
+        host = (urllib.parse.urlsplit(url).hostname or '').lower()
+        controller = host_registry.controller(host)
+        future = Future()
+        with self._condition:
+            self._start()
+            if host not in self._queues:
+                self._queues[host] = []
+                self._order.append(host)
+            heapq.heappush(self._queues[host], (not_before, next(self._sequence), future, controller, func, args))
+            self._condition.notify()
+        return future
+
+    def pending(self):
+        """Get the number of queued tasks per host."""
+        with self._condition:
+            return {host: len(queue) for host, queue in self._queues.items()}
+
+    def _start(self):
+        """Start the worker threads; call with the condition held."""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"crawl-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        """Worker loop: run the next ready task, or wait until one is due."""
+        while True:
+            with self._condition:
+                task = self._next_task()
+                while task is None:
+                    self._condition.wait(self._wait_time())
+                    task = self._next_task()
+            future, controller, func, args, ticket = task
+
+            if not future.set_running_or_notify_cancel():
+                controller.release(ticket)
+            else:
+                try:
+                    future.set_result(func(ticket, *args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            # The task released its slot; a waiting host may be ready now
+            with self._condition:
+                self._condition.notify_all()
+
+    def _next_task(self):
+        """Take the next task whose host can send now; call with the condition held."""
+        now = time.monotonic()
+        for position, host in enumerate(self._order):
+            queue = self._queues[host]
+            while queue and queue[0][2].cancelled():
+                heapq.heappop(queue)
+            if not queue:
+                continue
+            not_before, _, future, controller, func, args = queue[0]
+            if not_before > now:
+                continue
+            ticket = controller.try_acquire()
+            if ticket is None:
+                continue
+            heapq.heappop(queue)
+            # Serve the other hosts before this one again
+            self._order.append(self._order.pop(position))
+            self._drop_empty()
+            return future, controller, func, args, ticket
+        self._drop_empty()
+        return None
+
+    def _wait_time(self):
+        """Seconds until the earliest queued task may start; call with the condition held."""
+        if not self._queues:
+            return None
+        now = time.monotonic()
+        ready_at = min(max(queue[0][0], queue[0][3].ready_at()) for queue in self._queues.values())
+        # Slots freed by fetches outside the pool (listing pages) do not
+        # notify the pool, so never sleep for long
+        return min(max(ready_at - now, 0.0), 1.0)
+
+    def _drop_empty(self):
+        """Forget hosts without queued tasks; call with the condition held."""
+        for host in [host for host in self._order if not self._queues[host]]:
+            del self._queues[host]
+            self._order.remove(host)
+
+# Shared instances for all scrapers in the process
+robots_cache = RobotsCache()
+politeness_scheduler = PolitenessScheduler()
@@ -0,0 +1,202 @@
+"""
+Price history service for recording and querying product prices over time.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app import db
+from app.models.price_observation import PriceObservation
+from app.services.currency_service import currency_service
+
+# Bucket sizes accepted by PriceHistoryService.history
+HISTORY_INTERVALS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=30)
+}
+
+class PriceHistoryService:
+    """
+    Service for the run-length encoded price history of products.
+
+    Each crawl either extends the product's latest observation (same price)
+    or starts a new one (price changed), so storage grows with the number of
+    price changes rather than the number of crawls. A crawl that found no
+    price (e.g. a failed extraction) records nothing, so it does not split
+    the run it interrupted.
+    """
+    def record(self, product, price, currency=None, observed_at=None, commit=True):
+        """
+        Record the price seen for a product on a crawl.
+
+        Also updates the product's current price when it changed.
+
+        Args:
+            product: Product instance
+            price: Price seen, or None if the page showed no price
+            currency: Currency code (defaults to the product's currency)
+            observed_at: Time of the crawl (default: now)
+            commit: Commit the session afterwards
+
+        Returns:
+            True if the price changed, False if it extended the current run
+            or there was no price
+        """
+        if price is None:
+            if commit:
+                db.session.commit()
+            return False
+
+        currency = currency or product.currency
+        price_zar = currency_service.to_zar(price, currency)
+        observed_at = observed_at or datetime.utcnow()
+        latest = PriceObservation.find_latest(product.id)
+
+        if latest is not None and latest.matches(price, currency):
+            latest.last_seen = max(latest.last_seen, observed_at)
+            latest.observation_count = (latest.observation_count or 0) + 1
+            changed = False
+        else:
+            db.session.add(PriceObservation(
+                product_id=product.id,
+                price=price,
+                currency=currency,
+                price_zar=price_zar,
+                first_seen=observed_at,
+                last_seen=observed_at
+            ))
+            changed = latest is not None
+            if changed:
+                logging.info(f"Price change for {product.name}: {latest.price} -> {price} {currency}")
+
+            product.price = price
+            product.currency = currency
+            product.price_zar = price_zar
+
+        if commit:
+            db.session.commit()
+        return changed
+
+    def record_many(self, observations, observed_at=None):
+        """
+        Record prices for many products with one lookup of their latest observations.
+
+        Unlike record, this does not update the products themselves; it is
+        meant for rows that were just written by ProductUpsertService, and
+        only flushes, so both are committed together by the write job.
+
+        Args:
+            observations: List of (product_id, price, currency) tuples; those
+                without a price are skipped
+            observed_at: Time of the crawl (default: now)
+
+        Returns:
+            Number of products whose price changed
+        """
+        observed_at = observed_at or datetime.utcnow()
+        observations = [observation for observation in observations if observation[1] is not None]
+        latest = self.latest_prices(product_id for product_id, _, _ in observations)
+
+        changed = 0
+        for product_id, price, currency in observations:
+            current = latest.get(product_id)
+            if current is not None and current.matches(price, currency):
+                current.last_seen = max(current.last_seen, observed_at)
+                current.observation_count = (current.observation_count or 0) + 1
+                continue
+
+            observation = PriceObservation(
+                product_id=product_id,
+                price=price,
+                currency=currency,
+                price_zar=currency_service.to_zar(price, currency),
+                first_seen=observed_at,
+                last_seen=observed_at
+            )
+            db.session.add(observation)
+            latest[product_id] = observation
+            if current is not None:
+                changed += 1
+
+        db.session.flush()
+        return changed
+
+    def latest_prices(self, product_ids):
+        """
+        Get the latest observation for many products in one query.
+
+        Args:
+            product_ids: Iterable of product IDs
+
+        Returns:
+            Dictionary mapping product ID to PriceObservation
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+
+        latest_ids = db.session.query(func.max(PriceObservation.id))\
+                               .filter(PriceObservation.product_id.in_(product_ids))\
+                               .group_by(PriceObservation.product_id)
+        observations = PriceObservation.query.filter(PriceObservation.id.in_(latest_ids)).all()
+        return {observation.product_id: observation for observation in observations}
+
+    def history(self, product_id, interval='day', since=None, until=None, max_points=500):
+        """
+        Get a product's price history downsampled to fixed buckets, for charts.
+
+        Args:
+            product_id: Product ID
+            interval: Bucket size: 'hour', 'day', 'week' or 'month'
+            since: Start of the range (default: first observation)
+            until: End of the range (default: last observation)
+            max_points: Maximum number of buckets; wider ranges use larger buckets
+
+        Returns:
+            List of dicts with bucket start time, closing price and min/max
+            price within the bucket; buckets before the first observation
+            are omitted
+        """
+        if interval not in HISTORY_INTERVALS:
+            raise ValueError(f"Unknown interval: {interval}")
+
+        runs = PriceObservation.find_in_range(product_id, since, until)
+        if not runs:
+            return []
+
+        since = since or runs[0].first_seen
+        until = until or runs[-1].last_seen
+        step = HISTORY_INTERVALS[interval]
+        if (until - since) / step > max_points:
+            step = (until - since) / max_points
+
+        points = []
+        index = 0
+        bucket_start = since
+        while bucket_start <= until:
+            bucket_end = bucket_start + step
+
+            # Run in effect at the start of the bucket; a price holds until the next change
+            while index + 1 < len(runs) and runs[index + 1].first_seen <= bucket_start:
+                index += 1
+
+            active = []
+            position = index
+            while position < len(runs) and runs[position].first_seen < bucket_end:
+                active.append(runs[position])
+                position += 1
+
+            prices = [run.price for run in active if run.price is not None]
+            if active:
+                points.append({
+                    'time': bucket_start.isoformat(),
+                    'price': active[-1].price,
+                    'min': min(prices) if prices else None,
+                    'max': max(prices) if prices else None
+                })
+            bucket_start = bucket_end
+
+        return points
@@ -0,0 +1,267 @@
+"""
+Product upsert service for writing scraped products in bulk.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import bindparam, func
+
+from app import db
+from app.models.product import Product
+from app.services.currency_service import currency_service
+
+# Rows per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 500
+
+# Columns refreshed from a re-scrape; category and confirmation are left alone
+UPDATE_COLUMNS = ['name', 'description', 'price', 'currency', 'price_zar', 'url', 'image_url', 'sku']
+
+class ProductUpsertService:
+    """
+    Service for inserting or updating scraped products by identity.
+
+    Products are matched on identity_key (SKU or canonical URL) with
+    INSERT ... ON CONFLICT (identity_key) DO UPDATE, many rows per statement.
+    The update only fires when the content hash differs, so unchanged
+    products are not rewritten and keep their updated_at; their link to the
+    stored page (raw_page_id) is refreshed separately.
+
+    A product keyed on its URL because its SKU was not known yet is re-keyed
+    on the SKU in place the first time a scrape finds one, instead of being
+    inserted again; a later scrape of its page that misses the SKU still
+    updates it.
+    """
+    def upsert(self, products_data, website_id):
+        """
+        Insert new products and update changed ones; flushes without committing.
+
+        Args:
+            products_data: List of product data dictionaries (name, url, price, ...);
+                category_id, confidence_score and image_path are used for new rows,
+                raw_page_id (optional) links the product to its stored page
+            website_id: ID of the website
+
+        Returns:
+            Dictionary with 'inserted', 'updated' and 'unchanged' lists of product IDs,
+            and 'ids' mapping each identity key to its product ID
+        """
+        rows = {}
+        for product_data in products_data:
+            row = self._row(product_data, website_id)
+            if row['identity_key'] is None:
+                logging.warning(f"Skipping product without URL or SKU: {product_data.get('name')}")
+                continue
+            # Duplicates within a batch: the last one wins
+            rows[row['identity_key']] = row
+
+        result = {'inserted': [], 'updated': [], 'unchanged': [], 'ids': {}}
+        rows = list(rows.values())
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            batch_result = self._upsert_batch(batch)
+            result['ids'].update(batch_result.pop('ids'))
+            for status, product_ids in batch_result.items():
+                result[status].extend(product_ids)
+
+        db.session.flush()
+        logging.info(f"Upserted {len(rows)} products: {len(result['inserted'])} new, "
+                     f"{len(result['updated'])} changed, {len(result['unchanged'])} unchanged")
+        return result
+
+    def _upsert_batch(self, rows):
+        """Upsert one batch and classify each row."""
+        self._rekey_on_sku(rows)
+        rows, aliases = self._match_sku_keys(rows)
+        result = self._write_batch(rows)
+        # Rows matched to a SKU key are also found under their own key
+        result['ids'].update({key: result['ids'][alias] for key, alias in aliases.items() if alias in result['ids']})
+        return result
+
+    def _write_batch(self, rows):
+        """Insert or update the rows of one batch by identity key."""
+        keys = [row['identity_key'] for row in rows]
+        existing = dict(
+            db.session.query(Product.identity_key, Product.id)
+                      .filter(Product.identity_key.in_(keys)).all()
+        )
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return self._upsert_rows_orm(rows, existing)
+
+        statement = insert(Product.__table__).values(rows)
+        excluded = statement.excluded
+        table = Product.__table__
+        statement = statement.on_conflict_do_update(
+            index_elements=['identity_key'],
+            set_={
+                **{column: excluded[column] for column in UPDATE_COLUMNS},
+                'image_path': func.coalesce(excluded.image_path, table.c.image_path),
+                'raw_page_id': func.coalesce(excluded.raw_page_id, table.c.raw_page_id),
+                'content_hash': excluded.content_hash,
+                'updated_at': excluded.updated_at
+            },
+            where=table.c.content_hash.is_distinct_from(excluded.content_hash)
+        ).returning(table.c.id, table.c.identity_key)
+
+        # Only inserted and changed rows are returned
+        written = dict((key, product_id) for product_id, key in db.session.execute(statement))
+
+        # Another writer inserted the same, unchanged product between the lookup and the upsert
+        raced = [key for key in keys if key not in existing and key not in written]
+        if raced:
+            existing.update(db.session.query(Product.identity_key, Product.id)
+                                      .filter(Product.identity_key.in_(raced)).all())
+
+        result = {'inserted': [], 'updated': [], 'unchanged': [], 'ids': {**existing, **written}}
+        for key in keys:
+            if key not in existing:
+                result['inserted'].append(written[key])
+            elif key in written:
+                result['updated'].append(written[key])
+            else:
+                result['unchanged'].append(existing[key])
+        self._link_raw_pages([row for row in rows if row['identity_key'] in existing
+                              and row['identity_key'] not in written])
+        return result
+
+    @staticmethod
+    def _rekey_on_sku(rows):
+        """
+        Move products keyed on their URL to the SKU key of rows that now have a SKU.
+
+        Only products without a SKU are moved, and only when no product has the SKU key yet.
+        """
+        url_keys = {}
+        for row in rows:
+            if row['sku'] and str(row['sku']).strip():
+                url_key = Product.identity_key_for(row['website_id'], url=row['url'])
+                if url_key and url_key != row['identity_key']:
+                    url_keys[url_key] = row
+        if not url_keys:
+            return
+
+        legacy = dict(
+            db.session.query(Product.identity_key, Product.id)
+                      .filter(Product.identity_key.in_(list(url_keys)), Product.sku == None).all()
+        )
+        if not legacy:
+            return
+        taken = {key for key, in db.session.query(Product.identity_key).filter(
+            Product.identity_key.in_([url_keys[url_key]['identity_key'] for url_key in legacy]))}
+
+        table = Product.__table__
+        for url_key, product_id in legacy.items():
+            row = url_keys[url_key]
+            if row['identity_key'] in taken:
+                continue
+            db.session.execute(table.update().where(table.c.id == product_id)
+                               .values(identity_key=row['identity_key'], sku=row['sku']))
+            taken.add(row['identity_key'])
+            logging.info(f"Re-keyed product {product_id} on its SKU {row['sku']}")
+
+    @staticmethod
+    def _match_sku_keys(rows):
+        """
+        Give rows scraped without a SKU the SKU key of the product last scraped from the same URL.
+
+        Returns:
+            Tuple of (the rows, dictionary mapping each matched row's own key to
+            the SKU key); a row matched to a product that another row of the
+            batch also updates is dropped
+        """
+        unkeyed = {row['url']: row for row in rows if not (row['sku'] and str(row['sku']).strip()) and row['url']}
+        if not unkeyed:
+            return rows, {}
+        known = {key for key, in db.session.query(Product.identity_key)
+                                           .filter(Product.identity_key.in_([row['identity_key'] for row in rows]))}
+        website_id = rows[0]['website_id']
+        candidates = db.session.query(Product.url, Product.identity_key, Product.sku).filter(
+            Product.website_id == website_id, Product.url.in_(list(unkeyed)), Product.sku != None)
+
+        batch_keys = {row['identity_key'] for row in rows}
+        aliases, dropped = {}, set()
+        for url, identity_key, sku in candidates:
+            row = unkeyed[url]
+            if row['identity_key'] in known:
+                continue
+            aliases[row['identity_key']] = identity_key
+            if identity_key in batch_keys:
+                dropped.add(id(row))
+                continue
+            row.update(identity_key=identity_key, sku=sku)
+            row['content_hash'] = Product.content_hash_for(row)
+            batch_keys.add(identity_key)
+        return [row for row in rows if id(row) not in dropped], aliases
+
+    @staticmethod
+    def _link_raw_pages(rows):
+        """Point unchanged products at the page they were just scraped from, in one executemany."""
+        links = [{'key': row['identity_key'], 'page_id': row['raw_page_id']}
+                 for row in rows if row['raw_page_id'] is not None]
+        if not links:
+            return
+        table = Product.__table__
+        statement = table.update().where(
+            table.c.identity_key == bindparam('key'),
+            table.c.raw_page_id.is_distinct_from(bindparam('page_id'))
+        ).values(raw_page_id=bindparam('page_id'))
+        db.session.execute(statement, links)
+
+    def _upsert_rows_orm(self, rows, existing):
+        """Row-by-row fallback for databases without ON CONFLICT."""
+        result = {'inserted': [], 'updated': [], 'unchanged': [], 'ids': dict(existing)}
+        for row in rows:
+            product_id = existing.get(row['identity_key'])
+            if product_id is None:
+                product = Product(**row)
+                db.session.add(product)
+                db.session.flush()
+                result['inserted'].append(product.id)
+                result['ids'][row['identity_key']] = product.id
+                continue
+
+            product = db.session.get(Product, product_id)
+            product.raw_page_id = row['raw_page_id'] or product.raw_page_id
+            if product.content_hash == row['content_hash']:
+                result['unchanged'].append(product_id)
+                continue
+
+            for column in UPDATE_COLUMNS + ['content_hash', 'updated_at']:
+                setattr(product, column, row[column])
+            product.image_path = row['image_path'] or product.image_path
+            result['updated'].append(product_id)
+        return result
+
+    @staticmethod
+    def _row(product_data, website_id):
+        """Build a complete products row from scraped data."""
+        now = datetime.utcnow()
+        currency = product_data.get('currency') or 'ZAR'
+        identity_key = Product.identity_key_for(website_id, url=product_data.get('url'),
+                                                sku=product_data.get('sku'))
+        return {
+            'hash_id': Product.new_hash_id(),
+            'identity_key': identity_key,
+            'content_hash': Product.content_hash_for({**product_data, 'currency': currency}),
+            'name': product_data['name'],
+            'description': product_data.get('description', ''),
+            'price': product_data.get('price'),
+            'currency': currency,
+            'price_zar': currency_service.to_zar(product_data.get('price'), currency),
+            'url': product_data.get('url'),
+            'image_url': product_data.get('image_url'),
+            'image_path': product_data.get('image_path'),
+            'sku': product_data.get('sku'),
+            'raw_page_id': product_data.get('raw_page_id'),
+            'website_id': website_id,
+            'category_id': product_data.get('category_id'),
+            'confidence_score': product_data.get('confidence_score', 0.0),
+            'category_confirmed': False,
+            'created_at': now,
+            'updated_at': now
+        }
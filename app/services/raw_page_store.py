@@ -0,0 +1,198 @@
+"""
+Deduplicated, compressed store of the HTML of scraped product pages (raw_pages table).
+"""
+import hashlib
+import logging
+import threading
+import urllib.parse
+
+from sqlalchemy import insert
+
+from app import db
+from app.config import RAW_PAGE_DICTIONARY_SAMPLES
+from app.models.product import Product
+from app.models.raw_page import RawPage
+from app.models.raw_page_dictionary import RawPageDictionary
+from app.utils import compression
+from app.utils.write_queue import write_queue
+
+# Rows per deduplication lookup
+LOOKUP_BATCH_SIZE = 500
+
+class RawPageStore:
+    """
+    Stores product pages once per content hash, compressed with the
+    configured codec and the site's dictionary when one has been trained.
+
+    Compression runs in pack(), on the crawl's worker threads; save_many()
+    only inserts, on the database writer, in the same transaction as the
+    products linking to the pages.
+    """
+    def __init__(self):
+        """Initialize the store with empty dictionary caches."""
+        self._host_dictionaries = {}  # (host, codec) -> (dictionary ID, bytes) or None
+        self._dictionaries = {}  # dictionary ID -> bytes
+        self._lock = threading.Lock()
+
+    def pack(self, html, url):
+        """
+        Hash and compress a page for storage.
+
+        Args:
+            html: Page HTML (str or bytes)
+            url: Page URL; its host selects the dictionary
+
+        Returns:
+            Dictionary of raw_pages column values
+        """
+        data = html.encode('utf-8') if isinstance(html, str) else html
+        host = (urllib.parse.urlsplit(url).hostname or '').lower()
+        codec = compression.default_codec()
+        dictionary_id, dictionary = self._host_dictionary(host, codec)
+        compressed = compression.compress(data, codec, dictionary)
+        return {
+            'content_hash': hashlib.sha256(data).hexdigest(),
+            'host': host,
+            'codec': codec,
+            'dictionary_id': dictionary_id,
+            'size': len(data),
+            'compressed_size': len(compressed),
+            'data': compressed
+        }
+
+    def save_many(self, pages):
+        """
+        Insert pages not stored yet; runs on the database writer, inside the caller's transaction.
+
+        Args:
+            pages: List of dictionaries from pack()
+
+        Returns:
+            Dictionary mapping each content hash to its raw page ID
+        """
+        pages = {page['content_hash']: page for page in pages}
+        ids = {}
+        hashes = list(pages)
+        for start in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+            batch = hashes[start:start + LOOKUP_BATCH_SIZE]
+            ids.update(db.session.query(RawPage.content_hash, RawPage.id)
+                                 .filter(RawPage.content_hash.in_(batch)).all())
+
+        missing = [pages[content_hash] for content_hash in hashes if content_hash not in ids]
+        if missing:
+            db.session.execute(self._insert_statement(), missing)
+            for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+                batch = [page['content_hash'] for page in missing[start:start + LOOKUP_BATCH_SIZE]]
+                ids.update(db.session.query(RawPage.content_hash, RawPage.id)
+                                     .filter(RawPage.content_hash.in_(batch)).all())
+        return ids
+
+    def html(self, raw_page):
+        """
+        Get the HTML of a stored page.
+
+        Args:
+            raw_page: RawPage instance
+
+        Returns:
+            HTML string
+        """
+        dictionary = self.dictionary(raw_page.dictionary_id) if raw_page.dictionary_id else None
+        return compression.decompress(raw_page.data, raw_page.codec, dictionary).decode('utf-8', 'replace')
+
+    def dictionary(self, dictionary_id):
+        """Get a dictionary's bytes by ID, cached."""
+        with self._lock:
+            dictionary = self._dictionaries.get(dictionary_id)
+        if dictionary is None:
+            row = db.session.get(RawPageDictionary, dictionary_id)
+            dictionary = row.data if row else None
+            with self._lock:
+                self._dictionaries[dictionary_id] = dictionary
+        return dictionary
+
+    def train_dictionary(self, host, samples=RAW_PAGE_DICTIONARY_SAMPLES):
+        """
+        Train a dictionary on a host's newest stored pages and use it for its pages from now on.
+
+        Pages already stored keep the dictionary they were compressed with.
+
+        Args:
+            host: Host name
+            samples: Number of pages to train on
+
+        Returns:
+            RawPageDictionary instance, or None if the host has too few pages or nothing in common
+        """
+        host = host.lower()
+        codec = compression.default_codec()
+        pages = RawPage.find_samples(host, samples)
+        if len(pages) < 2:
+            logging.warning(f"Not enough stored pages of {host} to train a dictionary ({len(pages)})")
+            return None
+
+        data = compression.train_dictionary([self.html(page).encode('utf-8') for page in pages], codec)
+        if not data:
+            logging.warning(f"Pages of {host} share too little to train a dictionary")
+            return None
+
+        def save():
+            dictionary = RawPageDictionary(host=host, codec=codec, data=data, sample_count=len(pages))
+            db.session.add(dictionary)
+            db.session.flush()
+            return dictionary.id
+
+        dictionary_id = write_queue.run(save)
+        with self._lock:
+            self._dictionaries[dictionary_id] = data
+            self._host_dictionaries[(host, codec)] = (dictionary_id, data)
+        logging.info(f"Trained a {len(data)} byte {codec} dictionary for {host} on {len(pages)} pages")
+        return db.session.get(RawPageDictionary, dictionary_id)
+
+    def purge_unlinked(self):
+        """
+        Delete pages no product links to.
+
+        Returns:
+            Number of deleted pages
+        """
+        linked = db.session.query(Product.raw_page_id).filter(Product.raw_page_id.isnot(None))
+        deleted = RawPage.query.filter(RawPage.id.notin_(linked)).delete(synchronize_session=False)
+        db.session.commit()
+        if deleted:
+            logging.info(f"Purged {deleted} stored pages no product links to")
+        return deleted
+
+    @staticmethod
+    def _insert_statement():
+        """INSERT that skips pages another process stored meanwhile, where the database supports it."""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(RawPage)
+        return dialect_insert(RawPage).on_conflict_do_nothing(index_elements=['content_hash'])
+
+    def _host_dictionary(self, host, codec):
+        """Get the (ID, bytes) of a host's newest dictionary for a codec, or (None, None)."""
+        key = (host, codec)
+        with self._lock:
+            if key in self._host_dictionaries:
+                return self._host_dictionaries[key] or (None, None)
+        try:
+            row = RawPageDictionary.find_latest(host, codec)
+        except Exception as e:
+            logging.warning(f"Could not load the dictionary of {host}: {str(e)}")
+            db.session.rollback()
+            row = None
+        entry = (row.id, row.data) if row else None
+        with self._lock:
+            self._host_dictionaries[key] = entry
+            if row:
+                self._dictionaries[row.id] = row.data
+        return entry or (None, None)
+
+# Shared store for every scraper in the process
+raw_page_store = RawPageStore()
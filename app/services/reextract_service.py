@@ -0,0 +1,252 @@
+"""
+Re-extraction service for re-running the current extractors over stored product pages.
+"""
+import time
+import logging
+import multiprocessing
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+from sqlalchemy import bindparam
+
+from app import db
+from app.models.product import Product
+from app.models.raw_page import RawPage
+from app.models.raw_page_dictionary import RawPageDictionary
+from app.services.currency_service import currency_service
+from app.services.price_history_service import PriceHistoryService
+from app.utils import compression
+from app.utils.write_queue import write_queue
+from app.config import REEXTRACT_BATCH_SIZE, REEXTRACT_WORKERS
+
+# Fields the extractors produce and a re-extraction may change
+REEXTRACT_FIELDS = ['name', 'description', 'price', 'currency', 'sku', 'image_url']
+
+# Scraper of a worker process, built on its first batch
+_worker_scraper = None
+
+def extract_batch(payload):
+    """
+    Decompress and extract one batch of stored pages; runs in a worker process.
+
+    Args:
+        payload: Tuple of (dictionary mapping dictionary ID to bytes,
+            list of (product ID, url, codec, dictionary ID, compressed HTML))
+
+    Returns:
+        List of (product ID, extracted fields or None if the page yielded no name)
+    """
+    global _worker_scraper
+    from app.services.scraper_service import ScraperService
+    from app.services.site_profiles import profile_for_url
+
+    if _worker_scraper is None:
+        _worker_scraper = ScraperService(None, None)
+
+    dictionaries, pages = payload
+    results = []
+    for product_id, url, codec, dictionary_id, data in pages:
+        try:
+            html = compression.decompress(data, codec, dictionaries.get(dictionary_id))
+            soup = BeautifulSoup(html.decode('utf-8', 'replace'), 'html.parser')
+            fields = _worker_scraper.extract_fields(soup, url, profile_for_url(url))
+            results.append((product_id, fields if fields['name'] else None))
+        except Exception as e:
+            logging.error(f"Error re-extracting product {product_id} ({url}): {str(e)}")
+            results.append((product_id, None))
+    return results
+
+class ReextractService:
+    """
+    Service for refreshing products from their stored pages without fetching them again.
+
+    Products are read in keyset batches on the product ID together with
+    their compressed page; worker processes decompress and extract, and
+    only products whose fields changed are written back, in one
+    executemany UPDATE per batch on the database writer. A field the
+    extractors no longer find keeps its stored value.
+    """
+    def __init__(self, workers=REEXTRACT_WORKERS, batch_size=REEXTRACT_BATCH_SIZE):
+        """
+        Initialize the service.
+
+        Args:
+            workers: Extraction processes; 1 extracts in this process
+            batch_size: Products per batch
+        """
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.price_history_service = PriceHistoryService()
+
+    def run(self, website_ids=None, dry_run=False):
+        """
+        Re-extract products and update the changed ones.
+
+        Args:
+            website_ids: IDs of the websites to re-extract (default: all)
+            dry_run: Count changes without writing them
+
+        Returns:
+            Dictionary with products, changed, unchanged, failed, identity_conflicts,
+            price_changes, per-field change counts (fields) and seconds
+        """
+        start_time = time.time()
+        stats = {'products': 0, 'changed': 0, 'unchanged': 0, 'failed': 0,
+                 'identity_conflicts': 0, 'price_changes': 0, 'fields': Counter()}
+
+        if self.workers == 1:
+            for payload, current in self._batches(website_ids):
+                self._apply(current, extract_batch(payload), stats, dry_run)
+        else:
+            # Spawned workers don't inherit the database connections or the writer thread
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+                pending = {}
+                for payload, current in self._batches(website_ids):
+                    # Keep a couple of batches per worker in flight, so pages
+                    # are not all loaded into memory at once
+                    while len(pending) >= self.workers * 2:
+                        self._collect(pending, stats, dry_run)
+                    pending[executor.submit(extract_batch, payload)] = current
+                while pending:
+                    self._collect(pending, stats, dry_run)
+
+        stats['seconds'] = time.time() - start_time
+        logging.info(f"Re-extracted {stats['products']} products in {stats['seconds']:.1f}s: "
+                     f"{stats['changed']} changed, {stats['unchanged']} unchanged, {stats['failed']} failed"
+                     f"{' (dry run)' if dry_run else ''}")
+        return stats
+
+    def _collect(self, pending, stats, dry_run):
+        """Apply the results of the batches that have finished."""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            self._apply(pending.pop(future), future.result(), stats, dry_run)
+
+    def _batches(self, website_ids):
+        """
+        Read products with a stored page in keyset batches.
+
+        Yields:
+            Tuple of (worker payload, dictionary mapping product ID to its current row)
+        """
+        dictionaries = {}
+        last_id = 0
+        while True:
+            query = db.session.query(
+                Product.id, Product.website_id, Product.url, Product.identity_key,
+                *[getattr(Product, field) for field in REEXTRACT_FIELDS],
+                RawPage.codec, RawPage.dictionary_id, RawPage.data
+            ).join(RawPage, RawPage.id == Product.raw_page_id).filter(Product.id > last_id)
+            if website_ids:
+                query = query.filter(Product.website_id.in_(website_ids))
+            rows = query.order_by(Product.id).limit(self.batch_size).all()
+            db.session.rollback()  # don't hold a read transaction while the writer updates
+            if not rows:
+                return
+            last_id = rows[-1].id
+
+            missing = {row.dictionary_id for row in rows if row.dictionary_id and row.dictionary_id not in dictionaries}
+            if missing:
+                dictionaries.update(db.session.query(RawPageDictionary.id, RawPageDictionary.data)
+                                              .filter(RawPageDictionary.id.in_(missing)).all())
+            used = {row.dictionary_id for row in rows if row.dictionary_id}
+            payload = (
+                {dictionary_id: dictionaries.get(dictionary_id) for dictionary_id in used},
+                [(row.id, row.url, row.codec, row.dictionary_id, row.data) for row in rows]
+            )
+            current = {row.id: {
+                'website_id': row.website_id,
+                'url': row.url,
+                'identity_key': row.identity_key,
+                **{field: getattr(row, field) for field in REEXTRACT_FIELDS}
+            } for row in rows}
+            yield payload, current
+
+    def _apply(self, current, results, stats, dry_run):
+        """Compare one batch's extracted fields with the stored ones and write the changes."""
+        updates = []
+        for product_id, fields in results:
+            stats['products'] += 1
+            if fields is None:
+                stats['failed'] += 1
+                continue
+            before = current[product_id]
+            changed = [field for field in REEXTRACT_FIELDS if self._changed(before.get(field), fields.get(field))]
+            if not changed:
+                stats['unchanged'] += 1
+                continue
+            stats['changed'] += 1
+            stats['fields'].update(changed)
+            updates.append((product_id, {**before, **{field: fields[field] for field in changed}}, before))
+
+        if updates and not dry_run:
+            currency_service.rates()  # expired rates can only be refreshed outside the write
+            conflicts, price_changes = write_queue.run(self._save, updates)
+            stats['identity_conflicts'] += conflicts
+            stats['price_changes'] += price_changes
+
+    @staticmethod
+    def _changed(old, new):
+        """Whether an extracted value should replace the stored one; missing values never do."""
+        if new is None or new == '':
+            return False
+        if isinstance(new, float) and old is not None:
+            return round(new, 2) != round(old, 2)
+        return new != old
+
+    def _save(self, updates):
+        """
+        Write one batch of changed products and record changed prices; runs on the database writer.
+
+        A product whose new SKU gives it the identity of another product keeps
+        its SKU and identity.
+
+        Args:
+            updates: List of (product ID, updated row, current row)
+
+        Returns:
+            Tuple of (number of identity conflicts, number of price changes)
+        """
+        identity_keys = {}
+        for product_id, row, before in updates:
+            identity_key = Product.identity_key_for(row['website_id'], url=row['url'], sku=row['sku'])
+            if identity_key and identity_key != before['identity_key']:
+                identity_keys[product_id] = identity_key
+        taken = set()
+        if identity_keys:
+            taken = {key for key, in db.session.query(Product.identity_key)
+                                               .filter(Product.identity_key.in_(list(identity_keys.values())))}
+
+        now = datetime.utcnow()
+        rows, observations, conflicts = [], [], 0
+        for product_id, row, before in updates:
+            identity_key = identity_keys.get(product_id)
+            if identity_key in taken:
+                conflicts += 1
+                row['sku'] = before['sku']
+                identity_key = None
+            elif identity_key:
+                taken.add(identity_key)
+            currency = row['currency'] or 'ZAR'
+            rows.append({
+                'product_id': product_id,
+                **{f"new_{field}": row[field] for field in REEXTRACT_FIELDS},
+                'new_currency': currency,
+                'new_price_zar': currency_service.to_zar(row['price'], currency),
+                'new_identity_key': identity_key or before['identity_key'],
+                'new_content_hash': Product.content_hash_for({**row, 'currency': currency}),
+                'new_updated_at': now
+            })
+            # The latest observation must match the product, or the next crawl counts a price change
+            if (row['price'], currency) != (before['price'], before['currency'] or 'ZAR'):
+                observations.append((product_id, row['price'], currency))
+
+        table = Product.__table__
+        columns = REEXTRACT_FIELDS + ['price_zar', 'identity_key', 'content_hash', 'updated_at']
+        statement = table.update().where(table.c.id == bindparam('product_id'))\
+                         .values({column: bindparam(f"new_{column}") for column in columns})
+        db.session.execute(statement, rows)
+        return conflicts, self.price_history_service.record_many(observations) if observations else 0
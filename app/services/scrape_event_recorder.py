@@ -0,0 +1,146 @@
+"""
+Batched writer for the per-request trace of a scrape (scrape_events table).
+"""
+import logging
+import urllib.parse
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import db
+from app.config import SCRAPE_EVENT_BATCH_SIZE, SCRAPE_EVENT_RETENTION_DAYS
+from app.models.scrape_event import ScrapeEvent
+from app.utils.write_queue import write_queue
+
+# Longest reason stored; the column is a String(255)
+MAX_REASON_LENGTH = 255
+
+def new_event(url, kind, attempt=0):
+    """
+    Start the trace of one request.
+
+    The fetch fills in status_code, bytes, fetch_seconds and reason; the
+    crawl adds process_seconds and hands the event to a recorder with
+    its outcome.
+
+    Args:
+        url: Requested URL
+        kind: 'listing' or 'product'
+        attempt: Number of earlier attempts at this URL
+
+    Returns:
+        Event dictionary
+    """
+    return {
+        'url': url,
+        'host': (urllib.parse.urlsplit(url).hostname or '').lower(),
+        'kind': kind,
+        'attempt': attempt,
+        'status_code': None,
+        'bytes': None,
+        'fetch_seconds': None,
+        'process_seconds': None,
+        'reason': None
+    }
+
+def fetch_outcome(event, retry_delay=None):
+    """
+    Get the outcome of a fetch from its event.
+
+    Args:
+        event: Event dictionary filled in by the fetch
+        retry_delay: Delay the retry policy gave, or None
+
+    Returns:
+        'retry', 'ok' (status 200), 'skipped' (never sent) or 'failed'
+    """
+    if retry_delay is not None:
+        return 'retry'
+    if event['status_code'] == 200:
+        return 'ok'
+    if event['fetch_seconds'] is None:
+        return 'skipped'
+    return 'failed'
+
+class ScrapeEventRecorder:
+    """
+    Buffers the events of one scrape and inserts them in batches.
+
+    Batches go through the database write queue without waiting, so
+    tracing never holds up the crawl; flush() writes the rest and waits.
+    Events are recorded from the crawl's own thread. A recorder without a
+    scrape log (dry runs) drops every event.
+    """
+    def __init__(self, scrape_log_id, batch_size=SCRAPE_EVENT_BATCH_SIZE):
+        """
+        Initialize the recorder.
+
+        Args:
+            scrape_log_id: ID of the ScrapeLog the events belong to, or None
+            batch_size: Events per insert
+        """
+        self.scrape_log_id = scrape_log_id
+        self.batch_size = batch_size
+        self.recorded = 0
+        self._rows = []
+        self._writes = []
+
+    def record(self, event, outcome, reason=None):
+        """
+        Add an event.
+
+        Args:
+            event: Event dictionary from new_event()
+            outcome: Outcome of the request
+            reason: Why it failed, if the fetch gave no reason
+        """
+        if self.scrape_log_id is None:
+            return
+        reason = reason or event.get('reason')
+        self._rows.append({
+            **event,
+            'scrape_log_id': self.scrape_log_id,
+            'created_at': datetime.utcnow(),
+            'outcome': outcome,
+            'reason': reason[:MAX_REASON_LENGTH] if reason else None
+        })
+        self.recorded += 1
+        if len(self._rows) >= self.batch_size:
+            self._write()
+
+    def flush(self):
+        """Write the buffered events and wait for every batch of this scrape."""
+        self._write()
+        writes, self._writes = self._writes, []
+        for future in writes:
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Error writing scrape events: {str(e)}")
+                db.session.rollback()
+
+    def _write(self):
+        """Queue an insert of the buffered events."""
+        rows, self._rows = self._rows, []
+        if rows:
+            self._writes.append(write_queue.submit(self._insert, rows))
+
+    @staticmethod
+    def _insert(rows):
+        """Insert events in one statement; runs on the database writer."""
+        db.session.execute(insert(ScrapeEvent), rows)
+
+def purge_expired_events(days=SCRAPE_EVENT_RETENTION_DAYS):
+    """
+    Delete events older than the retention period.
+
+    Args:
+        days: Days events are kept
+
+    Returns:
+        Number of deleted events
+    """
+    deleted = ScrapeEvent.purge_before(datetime.utcnow() - timedelta(days=days))
+    if deleted:
+        logging.info(f"Purged {deleted} scrape events older than {days} days")
+    return deleted
@@ -8,18 +8,30 @@ import random
 import logging
 import traceback
 import urllib.parse
-import subprocess
-import os
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, wait
 
 from bs4 import BeautifulSoup
-import requests
-import trafilatura
+from flask import current_app
 
 from app import db
-from app.models import Website, Product, Category, ScrapeLog
-from app.utils.throttling import Throttler 
-from app.config import DEFAULT_USER_AGENTS, MAX_REQUESTS_PER_MINUTE, RETRY_ATTEMPTS
+from app.models import Product, ScrapeLog
+from app.services.category_registry import category_registry
+from app.services.price_history_service import PriceHistoryService
+from app.services.currency_service import detect_currency
+from app.services.product_upsert_service import ProductUpsertService
+from app.services.crawl_sinks import DatabaseSink
+from app.services.site_profiles import GENERIC_PROFILE, profile_for_url
+from app.services.host_registry import host_registry
+from app.services.circuit_breaker import circuit_breaker
+from app.services.politeness import robots_cache, politeness_scheduler
+from app.services.scrape_event_recorder import ScrapeEventRecorder, new_event, fetch_outcome
+from app.services.raw_page_store import raw_page_store
+from app.utils.structured_data import extract_sku
+from app.utils.write_queue import write_queue
+from app.utils.http_transport import http_transport
+from app.utils.retry_policy import retry_policy
+from app.utils.metrics import HTTP_RESPONSES, StageTimings, collect_stages, stage
+from app.config import DEFAULT_USER_AGENTS, CIRCUIT_FAILURE_STATUSES, RAW_PAGE_STORE_ENABLED
 
 class ScraperService:
     """
@@ -35,254 +47,351 @@ class ScraperService:
         """
         self.ai_service = ai_service
         self.image_service = image_service
-        self.throttler = Throttler(MAX_REQUESTS_PER_MINUTE)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': random.choice(DEFAULT_USER_AGENTS),
-            'Accept': 'text/html,application/xhtml+xml,application/xml',
-            'Accept-Language': 'en-US,en;q=0.9',
-        })
+        self.price_history_service = PriceHistoryService()
+        self.product_upsert_service = ProductUpsertService()
+        self.transport = http_transport
     
-    def scrape_website(self, website):
+    def scrape_website(self, website, max_products=None):
         """
-        Scrape products from a website using an external process.
+        Scrape products from a website with the shared crawl engine.
         
         Args:
             website: Website model instance
+            max_products: Maximum product pages to scrape (default: the website's limit)
             
         Returns:
             ScrapeLog instance
         """
-        # Create a new scrape log
-        scrape_log = ScrapeLog(website_id=website.id)
-        db.session.add(scrape_log)
-        db.session.commit()
-        
-        # Update website status
-        website.update_status('scraping')
-        
-        # Determine which script to run based on website URL
-        script_name = None
-        if 'ultimateexotics.co.za' in website.url:
-            script_name = "scrape_ultimateexotics.py"
-        elif 'reptile-garden-sa.myshopify.com' in website.url:
-            script_name = "scrape_reptilegarden.py"
-        else:
-            # For other websites, use a generic approach
-            try:
-                return self._scrape_website_directly(website, scrape_log)
-            except Exception as e:
-                scrape_log.status = 'failed'
-                scrape_log.error_message = str(e)
-                scrape_log.end_time = datetime.utcnow()
-                website.status = 'failed'
-                db.session.commit()
-                return scrape_log
-        
-        # Run the appropriate script as a background process
-        try:
-            # Make sure data directories exist
-            os.makedirs("data/images", exist_ok=True)
-            os.makedirs("data/exports", exist_ok=True)
-            
-            # Start the process
-            process = subprocess.Popen(
-                ["python", script_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True
-            )
-            
-            # Write PID to file for monitoring
-            website_name = website.name.lower().replace(' ', '_')
-            with open(f"{website_name}_pid.txt", "w") as f:
-                f.write(f"{process.pid}")
-            
-            # Log the start
-            logging.info(f"Started scraper process for {website.name} (PID: {process.pid})")
-            
-            # No need to wait for process to complete as it runs in background
-            return scrape_log
-            
-        except Exception as e:
-            error_msg = f"Error starting scraper for {website.name}: {str(e)}"
-            logging.error(error_msg)
-            scrape_log.error_message = error_msg
-            scrape_log.complete(success=False)
-            website.update_status('failed')
-            return scrape_log
+        return self.crawl(website, max_products=max_products)['scrape_log']
     
-    def _scrape_website_directly(self, website, scrape_log):
+    def crawl(self, website, max_products=None, sink=None, deadline=None, dry_run=False):
         """
-        Directly scrape a website without using an external script.
+        Crawl one website: collect product links from its listing pages,
+        scrape each product page and hand the products to a sink.
+        
+        Every site goes through this loop; what differs per site is only
+        its SiteProfile (listing pages and selectors).
         
         Args:
             website: Website model instance
-            scrape_log: ScrapeLog instance
+            max_products: Maximum product pages to scrape (default: the website's limit)
+            sink: Destination for products (default: a DatabaseSink storing them)
+            deadline: time.monotonic() value after which no further products are scraped
+            dry_run: Do not record a ScrapeLog or update the website
             
         Returns:
-            ScrapeLog instance
+            Dictionary with the run's statistics, per-product outcomes and the
+            ScrapeLog (None on a dry run)
         """
-        try:
-            logging.info(f"Starting direct scrape for {website.name} ({website.url})")
-            
-            # Extract product links
-            product_links = self._extract_product_links(website.url, scrape_log)
-            scrape_log.update_stats(products_found=len(product_links))
-            
-            # Scrape products with throttling
-            success_count = 0
-            for i, product_url in enumerate(product_links[:website.max_products]):
-                try:
-                    # Check if product already exists
-                    if Product.find_by_url(product_url):
-                        logging.info(f"Product already exists: {product_url}")
-                        continue
-                    
-                    # Apply throttling
-                    self.throttler.throttle()
-                    time.sleep(website.request_delay)
-                    
-                    # Scrape product
-                    product_data = self._scrape_product(product_url, website.id)
-                    
-                    if product_data:
-                        # Process product data
-                        self._process_product(product_data, website.id)
-                        success_count += 1
-                        scrape_log.update_stats(products_scraped=success_count)
+        profile = profile_for_url(website.url)
+        sink = sink or DatabaseSink(self)
+        failed_before = sink.failed
+        # Pages are kept for re-extraction only when the products go to the database
+        keep_raw_pages = RAW_PAGE_STORE_ENABLED and isinstance(sink, DatabaseSink)
+        max_products = website.max_products if max_products is None else max_products
+        
+        scrape_log = None
+        if not dry_run:
+            scrape_log = ScrapeLog(website_id=website.id)
+            db.session.add(scrape_log)
+            db.session.commit()
+            website.update_status('scraping')
+        
+        result = {
+            'success': False,
+            'website': website.name,
+            'website_url': website.url,
+            'profile': profile.name,
+            'products_found': 0,
+            'products_processed': 0,
+            'products_scraped': 0,
+            'products_updated': 0,
+            'products_failed': 0,
+            'products_skipped': 0,
+            'price_changes': 0,
+            'products': [],
+            'error': None,
+            'scrape_log': scrape_log
+        }
+        
+        # The website's request delay is the starting interval for a host
+        # that has no saved state yet
+        controller = host_registry.controller_for_url(website.url, initial_interval=website.request_delay)
+        
+        # Every request of the run is traced in scrape_events
+        events = ScrapeEventRecorder(scrape_log.id if scrape_log else None)
+        timings = StageTimings()
+        with collect_stages(timings):
+            try:
+                logging.info(f"Starting crawl for {website.name} ({website.url}) with profile {profile.name}")
+                
+                # Extract product links
+                product_links = self._extract_product_links(website.url, profile, events)
+                result['products_found'] = len(product_links)
+                if scrape_log:
+                    scrape_log.update_stats(products_found=len(product_links), **self._timing_stats(timings))
+                if not product_links:
+                    raise ValueError("No product links found")
+                
+                # Pages disallowed by robots.txt are never requested
+                product_links = product_links[:max_products]
+                allowed_links = [product_url for product_url in product_links if robots_cache.allowed(product_url)]
+                if len(allowed_links) < len(product_links):
+                    logging.info(f"robots.txt disallows {len(product_links) - len(allowed_links)} "
+                                 f"product pages of {website.name}")
+                    result['products_skipped'] += len(product_links) - len(allowed_links)
+                
+                # Product pages go to the shared politeness scheduler, whose workers
+                # serve whichever host may send next; this host's controller decides
+                # how many of its pages are in flight. A page that should be retried
+                # is queued again with the time it may be fetched, so it never holds a worker.
+                app = current_app._get_current_object()
+                
+                def scrape(ticket, product_url, attempt):
+                    event = new_event(product_url, 'product', attempt)
+                    with app.app_context(), collect_stages(timings):
+                        try:
+                            html_content, retry_delay = self._fetch(product_url, attempt, ticket=ticket, event=event)
+                            if html_content is None:
+                                return None, retry_delay, event
+                            start_time = time.perf_counter()
+                            product_data = self._parse_product(html_content, product_url, website.id, profile)
+                            if product_data and keep_raw_pages:
+                                with stage('compress'):
+                                    product_data['raw_page'] = raw_page_store.pack(html_content, product_url)
+                            event['process_seconds'] = time.perf_counter() - start_time
+                            return product_data, None, event
+                        except Exception as e:
+                            return e, None, event
+                
+                pending = {}
+                
+                def schedule(product_url, attempt, not_before=0.0):
+                    future = politeness_scheduler.submit(product_url, scrape, product_url, attempt, not_before=not_before)
+                    pending[future] = (product_url, attempt)
+                
+                for product_url in allowed_links:
+                    schedule(product_url, 0)
+                
+                stopping = False
+                while pending:
+                    timeout = None if deadline is None or stopping else max(0.0, deadline - time.monotonic())
+                    done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
                     
-                    # Update success rate periodically
-                    if i > 0 and i % 10 == 0:
-                        website.update_success_rate(success_count, i + 1)
+                    for future in done:
+                        product_url, attempt = pending.pop(future)
+                        if future.cancelled():
+                            continue
+                        product_data, retry_delay, event = future.result()
+                        if retry_delay is not None and not stopping:
+                            # A request the circuit refused was never sent and uses no attempt
+                            if event['fetch_seconds'] is not None:
+                                attempt += 1
+                            logging.info(f"Deferring {product_url} for {retry_delay:.1f}s (attempt {attempt})")
+                            events.record(event, 'retry')
+                            schedule(product_url, attempt, time.monotonic() + retry_delay)
+                            continue
                         
-                except Exception as e:
-                    logging.error(f"Error scraping product {product_url}: {str(e)}")
-                    scrape_log.update_stats(products_failed=scrape_log.products_failed + 1)
-            
-            # Update final statistics
-            website.update_success_rate(success_count, len(product_links))
-            website.update_status('completed')
-            scrape_log.complete(success=True)
+                        self._record_product(result, sink, website.id, product_url, product_data, event, events)
+                        
+                        # Update progress periodically
+                        if scrape_log and result['products_processed'] % 10 == 0:
+                            scrape_log.update_stats(products_scraped=result['products_scraped'],
+                                                    products_failed=result['products_failed'],
+                                                    **self._timing_stats(timings))
+                    
+                    # Out of time, or the host is failing: drop the queued pages
+                    # and leave the workers to other sites
+                    if stopping:
+                        continue
+                    if deadline is not None and time.monotonic() >= deadline:
+                        reason = f"Time budget used up for {website.name}"
+                    elif circuit_breaker.is_open(controller.host):
+                        reason = f"Circuit open for {controller.host}"
+                    else:
+                        continue
+                    stopping = True
+                    cancelled = [future for future in pending if future.cancel()]
+                    for future in cancelled:
+                        del pending[future]
+                    result['products_skipped'] += len(cancelled)
+                    logging.warning(f"{reason}; skipping {len(cancelled)} products")
+                
+                result['price_changes'] = sink.flush(website.id)
+                # New products are stored in batches, after they were counted as scraped
+                failed = sink.failed - failed_before
+                result['products_scraped'] -= failed
+                result['products_failed'] += failed
+                result['success'] = True
+                
+                if scrape_log:
+                    # Update final statistics
+                    website.update_success_rate(result['products_scraped'] + result['products_updated'],
+                                                result['products_processed'])
+                    website.update_status('completed')
+                    scrape_log.update_stats(products_scraped=result['products_scraped'],
+                                            products_failed=result['products_failed'],
+                                            **self._timing_stats(timings))
+                    scrape_log.complete(success=True)
+                
+                logging.info(f"Crawl completed for {website.name}: {result['products_scraped']} new, "
+                             f"{result['products_updated']} updated, {result['products_failed']} failed, "
+                             f"{result['price_changes']} price changes")
+                return result
+                
+            except Exception as e:
+                logging.error(f"Error scraping {website.name}: {str(e)}\n{traceback.format_exc()}")
+                db.session.rollback()
+                result['error'] = str(e)
+                if scrape_log:
+                    website.update_status('failed')
+                    scrape_log.error_message = str(e)
+                    scrape_log.update_stats(products_scraped=result['products_scraped'],
+                                            products_failed=result['products_failed'],
+                                            **self._timing_stats(timings))
+                    scrape_log.complete(success=False)
+                return result
+
+            finally:
+                events.flush()
+                if self.ai_service:
+                    self.ai_service.cache.flush()
+                logging.info(f"Host {controller.host}: {controller.snapshot()}")
+                if not dry_run:
+                    try:
+                        host_registry.save([controller.host])
+                    except Exception as e:
+                        logging.error(f"Error saving host state for {controller.host}: {str(e)}")
+                        db.session.rollback()
+
+    def _timing_stats(self, timings):
+        """
+        Get the ScrapeLog fields rolled up from a crawl's stage timings.
+        
+        Args:
+            timings: StageTimings of the crawl
             
-            logging.info(f"Scrape completed for {website.name}: {success_count} products scraped")
-            return scrape_log
+        Returns:
+            Dictionary of total_request_count, avg_request_time and stage_timings (JSON)
+        """
+        fetch = timings.get('fetch')
+        return {
+            'total_request_count': fetch['count'] if fetch else 0,
+            'avg_request_time': fetch['seconds'] / fetch['count'] if fetch else None,
+            'stage_timings': json.dumps(timings.to_dict())
+        }
+    
+    def _record_product(self, result, sink, website_id, product_url, product_data, event=None, events=None):
+        """
+        Hand a scraped product to the sink and count the outcome in a crawl result.
+        
+        Args:
+            result: Crawl result dictionary
+            sink: Product sink
+            website_id: ID of the website
+            product_url: URL of the product page
+            product_data: Product data dictionary, None if the page had no product,
+                or the exception raised while scraping it
+            event: Trace of the page's request, recorded with the product's outcome
+            events: ScrapeEventRecorder of the crawl
+        """
+        result['products_processed'] += 1
+        outcome, reason = 'failed', None
+        try:
+            if isinstance(product_data, Exception):
+                raise product_data
+            if not product_data:
+                outcome = fetch_outcome(event) if event else 'failed'
+                if outcome == 'ok':
+                    outcome = 'no_product'
+                return
+            
+            status = sink.write(product_data, website_id)
+            outcome = status
+            if status == 'failed':
+                reason = 'Could not store product'
+                result['products_failed'] += 1
+            elif status == 'updated':
+                result['products_updated'] += 1
+            else:
+                result['products_scraped'] += 1
+            result['products'].append({
+                'name': product_data['name'],
+                'url': product_url,
+                'price': product_data.get('price'),
+                'status': status
+            })
             
         except Exception as e:
-            error_msg = f"Error scraping {website.name}: {str(e)}\n{traceback.format_exc()}"
-            logging.error(error_msg)
-            website.update_status('failed')
-            scrape_log.error_message = error_msg
-            scrape_log.complete(success=False)
-            return scrape_log
+            logging.error(f"Error scraping product {product_url}: {str(e)}")
+            result['products_failed'] += 1
+            result['products'].append({'url': product_url, 'status': 'failed', 'error': str(e)})
+            outcome, reason = 'failed', str(e)
+        finally:
+            if event and events:
+                events.record(event, outcome, reason)
     
-    def _extract_product_links(self, base_url, scrape_log):
+    def _extract_product_links(self, base_url, profile=GENERIC_PROFILE, events=None):
         """
-        Extract product links from a website.
+        Extract product links from a website's listing pages.
         
         Args:
             base_url: The website URL
-            scrape_log: ScrapeLog instance for tracking
+            profile: SiteProfile of the website
+            events: ScrapeEventRecorder tracing the listing requests
             
         Returns:
-            List of product URLs
+            List of product URLs in the order found
         """
         product_links = []
         pages_crawled = 0
-        request_times = []
         
         try:
-            # Initial page
-            current_url = base_url
-            visited_urls = set()
-            
-            # Crawl pages (limited to 5 for safety)
-            while current_url and pages_crawled < 5:
-                if current_url in visited_urls:
+            # The first listing page that loads is the starting point
+            current_url = None
+            html = None
+            for listing_url in profile.listing_urls(base_url):
+                html = self._fetch_url(listing_url, events)
+                if html:
+                    current_url = listing_url
                     break
-                
+            
+            visited_urls = set()
+            while html and pages_crawled < profile.max_listing_pages:
                 visited_urls.add(current_url)
                 
-                # Apply throttling
-                self.throttler.throttle()
-                
-                # Fetch page
-                start_time = time.time()
-                response = self._fetch_url(current_url)
-                request_time = time.time() - start_time
-                request_times.append(request_time)
-                
-                if not response:
-                    break
-                
-                # Parse HTML
-                soup = BeautifulSoup(response, 'html.parser')
-                
-                # Extract product links - look for common patterns
-                links = self._find_product_links(soup, base_url)
-                product_links.extend(links)
+                # Parse HTML and extract product links
+                soup = BeautifulSoup(html, 'html.parser')
+                product_links.extend(self._find_product_links(soup, base_url, profile))
+                pages_crawled += 1
                 
                 # Find pagination link
                 next_page = self._find_next_page(soup, base_url, current_url)
+                if not next_page or next_page in visited_urls:
+                    break
                 current_url = next_page
-                pages_crawled += 1
-                
-                # Update log
-                scrape_log.update_stats(
-                    total_request_count=pages_crawled,
-                    avg_request_time=sum(request_times) / len(request_times) if request_times else 0
-                )
+                html = self._fetch_url(current_url, events)
             
-            return list(set(product_links))  # Remove duplicates
+            return list(dict.fromkeys(product_links))  # Remove duplicates, keep order
             
         except Exception as e:
             logging.error(f"Error extracting product links: {str(e)}")
-            return product_links
+            return list(dict.fromkeys(product_links))
     
-    def _find_product_links(self, soup, base_url):
+    def _find_product_links(self, soup, base_url, profile=GENERIC_PROFILE):
         """
-        Find product links in a page using common patterns.
+        Find product links in a listing page using the profile's selectors.
         """
         product_links = []
         
-        # Common product link patterns
-        product_patterns = [
-            # Look for product containers with links
-            ('div.product', 'a', 'href'),
-            ('li.product', 'a', 'href'),
-            ('div.item', 'a', 'href'),
-            ('div.product-item', 'a', 'href'),
-            
-            # Look for product grids
-            ('div.product-grid', 'a', 'href'),
-            
-            # Look for product anchors directly
-            ('a.product-link', None, 'href'),
-            ('a.product-title', None, 'href'),
-            
-            # Generic links with product in href
-            ('a[href*="product"]', None, 'href'),
-            ('a[href*="item"]', None, 'href')
-        ]
-        
-        # Try each pattern
-        for container_selector, link_selector, attr in product_patterns:
+        # Matches of all link selectors are combined
+        for selector in profile.link_selectors:
             try:
-                if link_selector:
-                    containers = soup.select(container_selector)
-                    for container in containers:
-                        links = container.select(link_selector)
-                        for link in links:
-                            if attr in link.attrs:
-                                url = link[attr]
-                                full_url = urllib.parse.urljoin(base_url, url)
-                                product_links.append(full_url)
-                else:
-                    links = soup.select(container_selector)
-                    for link in links:
-                        if attr in link.attrs:
-                            url = link[attr]
-                            full_url = urllib.parse.urljoin(base_url, url)
+                for link in soup.select(selector):
+                    href = link.get('href')
+                    if isinstance(href, str) and href:
+                        full_url = urllib.parse.urljoin(base_url, href)
+                        if profile.is_product_link(full_url):
                             product_links.append(full_url)
             except Exception:
                 continue
@@ -295,9 +404,9 @@ class ScraperService:
                 
                 # Filter for likely product links
                 if 'product' in url or 'item' in url or '/p/' in url:
-                    if not url.startswith(('http://', 'https://')):
-                        url = urllib.parse.urljoin(base_url, url)
-                    product_links.append(url)
+                    url = urllib.parse.urljoin(base_url, url)
+                    if profile.is_product_link(url):
+                        product_links.append(url)
         
         return product_links
     
@@ -311,7 +420,7 @@ class ScraperService:
             ('a[rel="next"]', 'href'),
             ('a[aria-label="Next"]', 'href'),
             ('li.next a', 'href'),
-            ('div.pagination a:contains("Next")', 'href')
+            ('div.pagination a:-soup-contains("Next")', 'href')
         ]
         
         for selector, attr in pagination_patterns:
@@ -334,43 +443,53 @@ class ScraperService:
         
         return None
     
-    def _scrape_product(self, product_url, website_id):
+    def _scrape_product(self, product_url, website_id, profile=GENERIC_PROFILE):
         """
         Scrape a single product page.
         
         Args:
             product_url: URL of the product page
             website_id: ID of the website
+            profile: SiteProfile of the website
             
         Returns:
             Dictionary with product data or None if failed
         """
-        try:
-            # Fetch product page
-            html_content = self._fetch_url(product_url)
-            if not html_content:
-                return None
+        html_content = self._fetch_url(product_url)
+        if not html_content:
+            return None
+        return self._parse_product(html_content, product_url, website_id, profile)
+    
+    def _parse_product(self, html_content, product_url, website_id, profile=GENERIC_PROFILE):
+        """
+        Extract product data from a fetched product page.
+        
+        Args:
+            html_content: HTML of the product page
+            product_url: URL of the product page
+            website_id: ID of the website
+            profile: SiteProfile of the website
             
+        Returns:
+            Dictionary with product data or None if failed
+        """
+        try:
             # Parse HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
+            with stage('parse'):
+                soup = BeautifulSoup(html_content, 'html.parser')
             
             # Extract main product data
-            product_data = {
-                'name': self._extract_product_name(soup),
-                'description': self._extract_product_description(soup),
-                'price': self._extract_product_price(soup),
-                'currency': 'ZAR',  # Default currency for South African sites
-                'url': product_url,
-                'image_url': self._extract_product_image(soup, product_url),
-                'website_id': website_id
-            }
+            with stage('extract'):
+                product_data = {**self.extract_fields(soup, product_url, profile), 'website_id': website_id}
             
             # Validate required fields
             if not product_data['name']:
                 return None
             
             # Check if this is a reptile product
-            if not self.ai_service.is_reptile_product(product_data):
+            with stage('classify'):
+                is_reptile_product = self.ai_service.is_reptile_product(product_data)
+            if not is_reptile_product:
                 logging.info(f"Not a reptile product: {product_data['name']}")
                 return None
             
@@ -380,20 +499,31 @@ class ScraperService:
             logging.error(f"Error scraping product {product_url}: {str(e)}")
             return None
     
-    def _extract_product_name(self, soup):
-        """Extract product name from soup."""
-        selectors = [
-            'h1.product-title',
-            'h1.product_title',
-            'h1.title',
-            'h1',
-            'h2.product-name',
-            'h2.product-title',
-            'div.product-title h1',
-            'div.product-name h1'
-        ]
+    def extract_fields(self, soup, product_url, profile=GENERIC_PROFILE):
+        """
+        Run the field extractors over a parsed product page.
         
-        for selector in selectors:
+        Args:
+            soup: BeautifulSoup of the product page
+            product_url: URL of the product page
+            profile: SiteProfile of the website
+            
+        Returns:
+            Dictionary with name, description, price, currency, url, sku and image_url
+        """
+        return {
+            'name': self._extract_product_name(soup, profile),
+            'description': self._extract_product_description(soup, profile),
+            'price': self._extract_product_price(soup, profile),
+            'currency': detect_currency(soup=soup),  # ZAR unless the page says otherwise
+            'url': product_url,
+            'sku': extract_sku(soup),
+            'image_url': self._extract_product_image(soup, product_url, profile)
+        }
+    
+    def _extract_product_name(self, soup, profile=GENERIC_PROFILE):
+        """Extract product name from soup."""
+        for selector in profile.name_selectors:
             try:
                 element = soup.select_one(selector)
                 if element and element.text.strip():
@@ -403,19 +533,9 @@ class ScraperService:
         
         return None
     
-    def _extract_product_description(self, soup):
+    def _extract_product_description(self, soup, profile=GENERIC_PROFILE):
         """Extract product description from soup."""
-        selectors = [
-            'div.product-description',
-            'div.description',
-            'div.product-details',
-            'div.product-info',
-            'div#description',
-            'div#product-description',
-            'div.tab-content'
-        ]
-        
-        for selector in selectors:
+        for selector in profile.description_selectors:
             try:
                 element = soup.select_one(selector)
                 if element and element.text.strip():
@@ -426,8 +546,9 @@ class ScraperService:
             except Exception:
                 continue
         
-        # Fallback to trafilatura for content extraction
+        # Fallback to trafilatura for content extraction (imported here: it is slow to load)
         try:
+            import trafilatura
             extracted_text = trafilatura.extract(str(soup), include_comments=False, include_links=False)
             if extracted_text:
                 # Keep only a portion to avoid excessive text
@@ -437,47 +558,32 @@ class ScraperService:
         
         return ""
     
-    def _extract_product_price(self, soup):
+    def _extract_product_price(self, soup, profile=GENERIC_PROFILE):
         """Extract product price from soup."""
-        price_patterns = [
-            r'R\s?(\d+(?:[.,]\d{1,2})?)',
-            r'ZAR\s?(\d+(?:[.,]\d{1,2})?)',
-            r'(\d+(?:[.,]\d{1,2}))\s?ZAR',
-            r'Price:\s*R\s?(\d+(?:[.,]\d{1,2})?)',
-            r'(\d+(?:[.,]\d{1,2}))'
-        ]
-        
-        selectors = [
-            'span.price',
-            'div.price',
-            'p.price',
-            'span.current-price',
-            'span.product-price',
-            'div.product-price',
-            'span.amount'
-        ]
-        
         # Try to find price in dedicated elements
-        for selector in selectors:
+        for selector in profile.price_selectors:
             try:
                 element = soup.select_one(selector)
                 if element and element.text.strip():
                     price_text = element.text.strip()
                     
                     # Try to extract the price using patterns
-                    for pattern in price_patterns:
-                        match = re.search(pattern, price_text)
+                    for pattern in profile.price_patterns:
+                        match = pattern.search(price_text)
                         if match:
                             price_str = match.group(1).replace(',', '.')
                             return float(price_str)
             except Exception:
                 continue
         
+        if profile is not GENERIC_PROFILE:
+            return None
+        
         # Try to find price in the whole page text
         page_text = soup.get_text()
-        for pattern in price_patterns:
+        for pattern in profile.price_patterns:
             try:
-                match = re.search(pattern, page_text)
+                match = pattern.search(page_text)
                 if match:
                     price_str = match.group(1).replace(',', '.')
                     return float(price_str)
@@ -486,25 +592,19 @@ class ScraperService:
         
         return None
     
-    def _extract_product_image(self, soup, product_url):
+    def _extract_product_image(self, soup, product_url, profile=GENERIC_PROFILE):
         """Extract product image URL from soup."""
-        selectors = [
-            'img.product-image',
-            'img.product-img',
-            'img.main-image',
-            'div.product-image img',
-            'div.product-img img',
-            'div.woocommerce-product-gallery__image img',
-            'div.product-gallery img',
-            'div.image-container img'
-        ]
-        
-        for selector in selectors:
+        for selector in profile.image_selectors:
             try:
                 img = soup.select_one(selector)
-                if img and ('src' in img.attrs or 'data-src' in img.attrs):
-                    src = img.get('data-src') or img.get('src')
-                    return urllib.parse.urljoin(product_url, src)
+                if not img:
+                    continue
+                for attribute in profile.image_attributes:
+                    src = img.get(attribute)
+                    if isinstance(src, str) and src.strip():
+                        # srcset lists several sizes: take the first URL
+                        src = src.split(',')[0].strip().split(' ')[0]
+                        return urllib.parse.urljoin(product_url, src)
             except Exception:
                 continue
         
@@ -520,97 +620,209 @@ class ScraperService:
         
         return None
     
-    def _fetch_url(self, url, retries=RETRY_ATTEMPTS):
+    def _fetch(self, url, attempt=0, ticket=None, event=None):
         """
-        Fetch a URL with retry logic.
+        Make one attempt at fetching a URL.
         
         Args:
             url: URL to fetch
-            retries: Number of retries
+            attempt: Number of earlier attempts at this URL
+            ticket: Slot already taken on the host's controller (released here);
+                without one, the call waits for a slot
+            event: Event dictionary from new_event() to fill in with the status,
+                size, fetch time and failure reason
             
         Returns:
-            HTML content or None if failed
+            Tuple of (HTML content or None, seconds after which the URL may be
+            retried or None if it should not be)
         """
-        for attempt in range(retries):
-            try:
-                response = self.session.get(
-                    url, 
+        host = urllib.parse.urlsplit(url).hostname or ''
+        controller = host_registry.controller_for_url(url)
+        event = event if event is not None else {}
+        if not robots_cache.allowed(url):
+            logging.info(f"Disallowed by robots.txt: {url}")
+            event['reason'] = 'Disallowed by robots.txt'
+            if ticket is not None:
+                controller.release(ticket)
+            return None, None
+        if not circuit_breaker.allow(host):
+            # Open, or half-open with the probe out: the URL waits for the circuit
+            retry_delay = circuit_breaker.retry_after(host)
+            logging.debug(f"Circuit open for {host}; deferring {url} for {retry_delay:.1f}s")
+            event['reason'] = f"Circuit open for {host}"
+            if ticket is not None:
+                controller.release(ticket)
+            return None, retry_delay
+        if attempt == 0:
+            retry_policy.record_request(host)
+        
+        # Wait for the host's controller to allow another request
+        if ticket is None:
+            ticket = controller.acquire()
+        start_time = time.monotonic()
+        try:
+            with stage('fetch'):
+                response = self.transport.get(
+                    url,
                     timeout=10,
                     headers={'User-Agent': random.choice(DEFAULT_USER_AGENTS)}
                 )
-                
-                if response.status_code == 200:
-                    return response.text
-                
-                # If blocked or rate limited, wait longer before retry
-                if response.status_code in (403, 429):
-                    wait_time = (attempt + 1) * 5  # Exponential backoff
-                    logging.warning(f"Request blocked ({response.status_code}), waiting {wait_time}s before retry")
-                    time.sleep(wait_time)
-                else:
-                    logging.warning(f"Request failed with status code: {response.status_code}")
-                    
-            except Exception as e:
-                logging.error(f"Error fetching {url}: {str(e)}")
-                
-            # Wait before retry
-            time.sleep(attempt + 1)
+        except Exception as e:
+            event['fetch_seconds'] = time.monotonic() - start_time
+            event['reason'] = f"{type(e).__name__}: {str(e)}"
+            controller.release(ticket, error=True)
+            HTTP_RESPONSES.inc(host=host, status='error')
+            circuit_breaker.record_failure(host)
+            logging.error(f"Error fetching {url}: {str(e)}")
+            return None, retry_policy.retry_delay(host, attempt, error=True)
+        controller.release(ticket, response.status_code, time.monotonic() - start_time)
+        HTTP_RESPONSES.inc(host=host, status=response.status_code)
+        event['status_code'] = response.status_code
+        event['bytes'] = len(response.content)
+        event['fetch_seconds'] = time.monotonic() - start_time
         
-        return None
+        if response.status_code in CIRCUIT_FAILURE_STATUSES:
+            circuit_breaker.record_failure(host)
+        else:
+            circuit_breaker.record_success(host)
+        
+        if response.status_code == 200:
+            return response.text, None
+        
+        event['reason'] = f"HTTP {response.status_code}"
+        logging.warning(f"Request for {url} failed with status code: {response.status_code}")
+        return None, retry_policy.retry_delay(host, attempt, response.status_code, response.headers)
+    
+    def _fetch_url(self, url, events=None):
+        """
+        Fetch a URL, waiting between attempts as the retry policy says.
+        
+        Used where the crawl cannot go on without the page (listing pages);
+        product pages are retried through the crawl frontier instead.
+        
+        Args:
+            url: URL to fetch
+            events: ScrapeEventRecorder to trace each attempt as a listing request
+            
+        Returns:
+            HTML content or None if failed
+        """
+        attempt = 0
+        while True:
+            event = new_event(url, 'listing', attempt)
+            html_content, retry_delay = self._fetch(url, attempt, event=event)
+            if events:
+                events.record(event, fetch_outcome(event, retry_delay))
+            # Listing pages are not waited for while the host's circuit is open
+            if retry_delay is None or event['fetch_seconds'] is None:
+                return html_content
+            logging.info(f"Retrying {url} in {retry_delay:.1f}s")
+            time.sleep(retry_delay)
+            attempt += 1
     
-    def _process_product(self, product_data, website_id):
+    def _update_products(self, products_data, website_id):
         """
-        Process product data and save to database.
+        Update known products in place and record their prices.
         
         Args:
-            product_data: Dictionary with product data
+            products_data: List of product data dictionaries from re-scraped pages
             website_id: ID of the website
             
         Returns:
-            Product instance or None if failed
+            Number of products whose price changed
         """
         try:
-            # Categorize product
-            category_result = self.ai_service.categorize_product(product_data)
-            category_name = category_result.get('category_name', 'Uncategorized')
-            confidence_score = category_result.get('confidence_score', 0.0)
-            
-            # Get or create category
-            category = Category.query.filter_by(name=category_name).first()
-            if not category:
-                category = Category(name=category_name)
-                db.session.add(category)
-                db.session.flush()
-            
-            # Download image if available
-            image_path = None
-            if product_data.get('image_url'):
-                image_path = self.image_service.download_image(
-                    product_data['image_url'], 
-                    product_data['name']
-                )
-            
-            # Create product
-            product = Product(
-                name=product_data['name'],
-                description=product_data.get('description', ''),
-                price=product_data.get('price'),
-                currency=product_data.get('currency', 'ZAR'),
-                url=product_data['url'],
-                image_url=product_data.get('image_url'),
-                image_path=image_path,
-                website_id=website_id,
-                category_id=category.id if category else None,
-                confidence_score=confidence_score
-            )
+            with stage('db_write'):
+                _, price_changes = write_queue.run(self._save_products, products_data, website_id)
+            return price_changes
+        except Exception as e:
+            logging.error(f"Error updating {len(products_data)} products: {str(e)}")
+            db.session.rollback()
+            return 0
+    
+    def _save_products(self, products_data, website_id):
+        """
+        Store the products' pages, upsert the products and record their prices;
+        runs on the database writer.
+        
+        Args:
+            products_data: List of product data dictionaries, each with an optional
+                'raw_page' from raw_page_store.pack()
+            website_id: ID of the website
             
-            db.session.add(product)
-            db.session.commit()
+        Returns:
+            Tuple of (dictionary mapping identity key to product ID, number of price changes)
+        """
+        raw_pages = [product_data['raw_page'] for product_data in products_data if product_data.get('raw_page')]
+        if raw_pages:
+            raw_page_ids = raw_page_store.save_many(raw_pages)
+            products_data = [{
+                **{key: value for key, value in product_data.items() if key != 'raw_page'},
+                'raw_page_id': raw_page_ids.get(product_data['raw_page']['content_hash'])
+                               if product_data.get('raw_page') else None
+            } for product_data in products_data]
+        result = self.product_upsert_service.upsert(products_data, website_id)
+        observations = []
+        for product_data in products_data:
+            identity_key = Product.identity_key_for(website_id, url=product_data['url'],
+                                                    sku=product_data.get('sku'))
+            if identity_key in result['ids']:
+                observations.append((
+                    result['ids'][identity_key],
+                    product_data.get('price'),
+                    product_data.get('currency', 'ZAR')
+                ))
+        return result['ids'], self.price_history_service.record_many(observations)
+    
+    def _process_products(self, products_data, website_id):
+        """
+        Categorize new products together, download their images and save them.
+        
+        The products are categorized in one call, so those that need the LLM
+        are sent concurrently, and saved in one write job.
+        
+        Args:
+            products_data: List of product data dictionaries
+            website_id: ID of the website
             
-            logging.info(f"Product saved: {product.name}")
-            return product
+        Returns:
+            Number of products saved
+        """
+        try:
+            # Categorize products
+            with stage('classify'):
+                category_results = self.ai_service.categorize_products(products_data)
+            
+            rows = []
+            for product_data, category_result in zip(products_data, category_results):
+                # Download image if available
+                image_path = None
+                if product_data.get('image_url'):
+                    with stage('image'):
+                        image_path = self.image_service.download_image(
+                            product_data['image_url'],
+                            product_data['name']
+                        )
+                rows.append((product_data, category_result, image_path))
+            
+            # Create products (or update them, if another worker created them meanwhile);
+            # new categories are committed with them, so they are created just before
+            with stage('db_write'):
+                product_ids, _ = write_queue.run(self._save_products, [{
+                    **product_data,
+                    'category_id': category_registry.get_or_create_id(
+                        category_result.get('category_name', 'Uncategorized')),
+                    'confidence_score': category_result.get('confidence_score', 0.0),
+                    'image_path': image_path
+                } for product_data, category_result, image_path in rows], website_id)
+            
+            saved = [product_data['name'] for product_data in products_data
+                     if Product.identity_key_for(website_id, url=product_data['url'],
+                                                 sku=product_data.get('sku')) in product_ids]
+            logging.info(f"Saved {len(saved)} new products: {', '.join(saved)}")
+            return len(saved)
             
         except Exception as e:
-            logging.error(f"Error processing product {product_data.get('name', 'Unknown')}: {str(e)}")
+            logging.error(f"Error processing {len(products_data)} products: {str(e)}")
             db.session.rollback()
-            return None
\ No newline at end of file
+            return 0
\ No newline at end of file
@@ -0,0 +1,405 @@
+"""
+Search service for full-text product search.
+"""
+import re
+import math
+import time
+import bisect
+import logging
+import threading
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Product
+from app.models.product import SEARCH_DOCUMENT_SQL
+from app.config import SEARCH_INDEX_REFRESH_INTERVAL
+from app.services.category_registry import category_registry
+from app.utils.keyword_matcher import PUNCTUATION_TABLE
+
+TERM_PATTERN = re.compile(r'\w+')
+
+def tokenize(text_value):
+    """
+    Split text into lowercase search tokens.
+
+    Args:
+        text_value: Text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    if not text_value:
+        return []
+    return [
+        token for token in text_value.lower().translate(PUNCTUATION_TABLE).replace('-', ' ').split()
+        if token
+    ]
+
+class SearchResults:
+    """
+    A page of search results with the same interface as a Flask-SQLAlchemy pagination.
+    """
+    def __init__(self, items, page, per_page, total, offset=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.offset = (page - 1) * per_page if offset is None else offset
+
+    @property
+    def pages(self):
+        """Total number of pages."""
+        return max(1, math.ceil(self.total / self.per_page)) if self.per_page else 1
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.offset + self.per_page < self.total
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=4, right_edge=2):
+        """Yield page numbers for a pagination widget, with None for gaps."""
+        last = 0
+        for number in range(1, self.pages + 1):
+            if (number <= left_edge
+                    or self.page - left_current - 1 < number < self.page + right_current
+                    or number > self.pages - right_edge):
+                if last + 1 != number:
+                    yield None
+                yield number
+                last = number
+
+class LocalSearchIndex:
+    """
+    In-process inverted index used when the database has no full-text search.
+
+    Postings map each token to the products containing it. Filter columns
+    (category, website, price) are kept alongside, so matching, filtering
+    and ranking all happen in memory and only the requested page is loaded
+    from the database. The index is refreshed incrementally from rows whose
+    updated_at moved on, and rebuilt if products were deleted.
+    """
+    def __init__(self, refresh_interval=SEARCH_INDEX_REFRESH_INTERVAL):
+        """
+        Initialize an empty index.
+
+        Args:
+            refresh_interval: Minimum seconds between staleness checks
+        """
+        self.refresh_interval = refresh_interval
+        self.postings = {}
+        self.documents = {}
+        self.document_tokens = {}
+        self.category_members = {}
+        self.vocabulary = []
+        self._vocabulary_dirty = False
+        self._stamp = None
+        self._checked_at = None
+        self._lock = threading.RLock()
+
+    def search(self, query, category_id=None, website_id=None, min_price=None, max_price=None):
+        """
+        Find products matching every query term.
+
+        Terms match whole tokens or token prefixes in the name and description,
+        or words in the product's category name.
+
+        Args:
+            query: Search text
+            category_id: Optional category filter
+            website_id: Optional website filter
+            min_price: Optional minimum price
+            max_price: Optional maximum price
+
+        Returns:
+            List of product IDs, best match first
+        """
+        self.refresh()
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            category_matches = self._category_matches(terms)
+            scores = None
+
+            for term in terms:
+                term_scores = {}
+                for token in self._expand(term):
+                    postings = self.postings[token]
+                    idf = math.log(1 + len(self.documents) / len(postings))
+                    weight = idf if token == term else idf * 0.7
+                    for product_id, frequency in postings.items():
+                        term_scores[product_id] = term_scores.get(product_id, 0.0) + weight * (1 + math.log(frequency))
+
+                for category in category_matches.get(term, ()):
+                    for product_id in self.category_members.get(category, ()):
+                        term_scores[product_id] = term_scores.get(product_id, 0.0) + 1.0
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        product_id: score + term_scores[product_id]
+                        for product_id, score in scores.items() if product_id in term_scores
+                    }
+                if not scores:
+                    return []
+
+            results = []
+            for product_id, score in scores.items():
+                document_category, document_website, price, created_at = self.documents[product_id]
+                if category_id and document_category != int(category_id):
+                    continue
+                if website_id and document_website != int(website_id):
+                    continue
+                if min_price is not None and (price is None or price < min_price):
+                    continue
+                if max_price is not None and (price is None or price > max_price):
+                    continue
+                results.append((score, created_at or 0, product_id))
+
+        results.sort(reverse=True)
+        return [product_id for _, _, product_id in results]
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to date with the products table.
+
+        Args:
+            force: Check for changes even if the refresh interval has not passed
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            count, max_updated = db.session.query(func.count(Product.id), func.max(Product.updated_at)).one()
+            stamp = (count, max_updated)
+            self._checked_at = now
+
+            if stamp == self._stamp:
+                return
+
+            if self._stamp is None or count < len(self.documents):
+                self._rebuild()
+            else:
+                self._update_since(self._stamp[1])
+                # Deletes hidden by concurrent inserts leave the counts out of step
+                if len(self.documents) != count:
+                    self._rebuild()
+
+            self._stamp = stamp
+
+    def _rebuild(self):
+        """Build the index from scratch."""
+        start_time = time.time()
+        self.postings = {}
+        self.documents = {}
+        self.document_tokens = {}
+        self.category_members = {}
+        for row in self._rows(Product.query):
+            self._add(row)
+        self._vocabulary_dirty = True
+        logging.info(f"Search index built with {len(self.documents)} products and "
+                     f"{len(self.postings)} tokens in {time.time() - start_time:.2f}s")
+
+    def _update_since(self, updated_at):
+        """Re-index products created or changed since a timestamp."""
+        query = Product.query
+        if updated_at is not None:
+            query = query.filter(Product.updated_at >= updated_at)
+        for row in self._rows(query):
+            self._remove(row.id)
+            self._add(row)
+        self._vocabulary_dirty = True
+
+    @staticmethod
+    def _rows(query):
+        """Stream the columns the index needs."""
+        return query.with_entities(
+            Product.id, Product.name, Product.description, Product.category_id,
+            Product.website_id, Product.price, Product.created_at
+        ).yield_per(1000)
+
+    def _add(self, row):
+        """Add a product row to the index."""
+        frequencies = {}
+        for token in tokenize(row.name) * 2 + tokenize(row.description):
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        for token, frequency in frequencies.items():
+            self.postings.setdefault(token, {})[row.id] = frequency
+
+        created_at = row.created_at.timestamp() if row.created_at else 0
+        self.documents[row.id] = (row.category_id, row.website_id, row.price, created_at)
+        self.document_tokens[row.id] = list(frequencies)
+        self.category_members.setdefault(row.category_id, set()).add(row.id)
+
+    def _remove(self, product_id):
+        """Remove a product from the index, if present."""
+        document = self.documents.pop(product_id, None)
+        if document is None:
+            return
+
+        self.category_members.get(document[0], set()).discard(product_id)
+        for token in self.document_tokens.pop(product_id, ()):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self.postings[token]
+
+    def _expand(self, term):
+        """Find indexed tokens equal to or starting with a term."""
+        if self._vocabulary_dirty:
+            self.vocabulary = sorted(self.postings)
+            self._vocabulary_dirty = False
+
+        tokens = []
+        position = bisect.bisect_left(self.vocabulary, term)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+            tokens.append(self.vocabulary[position])
+            position += 1
+        return tokens
+
+    @staticmethod
+    def _category_matches(terms):
+        """Map each term to the IDs of categories with a word starting with it."""
+        matches = {}
+        for name in category_registry.names():
+            words = tokenize(name)
+            for term in terms:
+                if any(word.startswith(term) for word in words):
+                    matches.setdefault(term, []).append(category_registry.get_id(name))
+        return matches
+
+# Shared index for databases without native full-text search
+local_search_index = LocalSearchIndex()
+
+class SearchService:
+    """
+    Service for ranked full-text search over products.
+
+    Uses PostgreSQL full-text search (tsvector with a GIN index) when
+    available and the in-process LocalSearchIndex otherwise.
+    """
+    def search(self, query, category_id=None, website_id=None, min_price=None, max_price=None,
+               page=1, per_page=20, offset=None):
+        """
+        Search products.
+
+        Args:
+            query: Search text; every term must match, terms match as prefixes
+            category_id: Optional category filter
+            website_id: Optional website filter
+            min_price: Optional minimum price
+            max_price: Optional maximum price
+            page: Page number (1-based)
+            per_page: Results per page
+            offset: Optional number of results to skip, used exactly instead of page
+
+        Returns:
+            SearchResults with the products for the requested page, best match first
+        """
+        page = max(int(page), 1)
+        if offset is None:
+            offset = (page - 1) * per_page
+        else:
+            offset = max(int(offset), 0)
+            page = offset // per_page + 1 if per_page else 1
+        filters = {
+            'category_id': category_id,
+            'website_id': website_id,
+            'min_price': float(min_price) if min_price not in (None, '') else None,
+            'max_price': float(max_price) if max_price not in (None, '') else None
+        }
+
+        if db.engine.dialect.name == 'postgresql':
+            items, total = self._search_postgres(query, filters, offset, per_page)
+        else:
+            product_ids = local_search_index.search(query, **filters)
+            total = len(product_ids)
+            items = self._load(product_ids[offset:offset + per_page])
+
+        return SearchResults(items, page, per_page, total, offset)
+
+    def ensure_index(self):
+        """Create the full-text index on PostgreSQL if it does not exist yet."""
+        if db.engine.dialect.name != 'postgresql':
+            return
+        db.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin ({SEARCH_DOCUMENT_SQL})"
+        ))
+        db.session.commit()
+
+    def _search_postgres(self, query, filters, offset, per_page):
+        """Ranked search using tsvector/tsquery with prefix matching."""
+        terms = TERM_PATTERN.findall(query.lower())
+        if not terms:
+            return [], 0
+
+        ts_query = " & ".join(f"{term}:*" for term in terms)
+        document = text(SEARCH_DOCUMENT_SQL)
+        matches = text(f"{SEARCH_DOCUMENT_SQL} @@ to_tsquery('english', :ts_query)")
+
+        # Products whose category name matches every term are included as well
+        category_ids = self._categories_matching_all(terms)
+        condition = matches
+        if category_ids:
+            condition = db.or_(matches, Product.category_id.in_(category_ids))
+
+        base_query = Product.query.filter(condition)
+        base_query = self._apply_filters(base_query, filters).params(ts_query=ts_query)
+        total = base_query.order_by(None).count()
+
+        rank = func.ts_rank(document, func.to_tsquery('english', ts_query))
+        items = base_query.options(joinedload(Product.website), joinedload(Product.category))\
+                          .order_by(rank.desc(), Product.created_at.desc())\
+                          .limit(per_page).offset(offset).all()
+        return items, total
+
+    @staticmethod
+    def _apply_filters(query, filters):
+        """Apply category, website and price filters to a product query."""
+        if filters['category_id']:
+            query = query.filter(Product.category_id == filters['category_id'])
+        if filters['website_id']:
+            query = query.filter(Product.website_id == filters['website_id'])
+        if filters['min_price'] is not None:
+            query = query.filter(Product.price >= filters['min_price'])
+        if filters['max_price'] is not None:
+            query = query.filter(Product.price <= filters['max_price'])
+        return query
+
+    @staticmethod
+    def _categories_matching_all(terms):
+        """IDs of categories whose name has a word starting with every term."""
+        category_ids = []
+        for name in category_registry.names():
+            words = tokenize(name)
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                category_ids.append(category_registry.get_id(name))
+        return category_ids
+
+    @staticmethod
+    def _load(product_ids):
+        """Load products by ID, preserving the given order."""
+        if not product_ids:
+            return []
+        products = Product.query.options(joinedload(Product.website), joinedload(Product.category))\
+                                .filter(Product.id.in_(product_ids)).all()
+        by_id = {product.id: product for product in products}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
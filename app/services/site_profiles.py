@@ -0,0 +1,196 @@
+"""
+Site profiles: where each shop lists its products and how its pages are marked up.
+"""
+import re
+import urllib.parse
+
+# Price patterns tried in order against price text; group 1 is the amount
+RAND_PRICE_PATTERN = r'R\s?(\d+(?:[.,]\d{1,2})?)'
+GENERIC_PRICE_PATTERNS = [
+    RAND_PRICE_PATTERN,
+    r'ZAR\s?(\d+(?:[.,]\d{1,2})?)',
+    r'(\d+(?:[.,]\d{1,2}))\s?ZAR',
+    r'Price:\s*R\s?(\d+(?:[.,]\d{1,2})?)',
+    r'(\d+(?:[.,]\d{1,2}))'
+]
+
+class SiteProfile:
+    """
+    Selectors and listing pages for one shop (or one kind of shop).
+
+    The scraper engine is the same for every site; a profile only says where
+    to find product links and which elements hold the name, description,
+    price and image. Selectors are tried in order and the first match wins,
+    except link selectors, whose matches are combined.
+    """
+    def __init__(self, name, domains=(), listing_paths=('',), link_selectors=(), link_pattern=None,
+                 name_selectors=(), description_selectors=(), price_selectors=(),
+                 price_patterns=GENERIC_PRICE_PATTERNS, image_selectors=(),
+                 image_attributes=('data-src', 'src'), max_listing_pages=5):
+        """
+        Initialize a site profile.
+
+        Args:
+            name: Profile name used on the command line
+            domains: Host names the profile applies to (subdomains included)
+            listing_paths: Paths, relative to the website URL, of the listing pages to start from;
+                the first one that loads is used
+            link_selectors: CSS selectors for product links on listing pages
+            link_pattern: Substring a product URL must contain, if any
+            name_selectors: CSS selectors for the product name
+            description_selectors: CSS selectors for the product description
+            price_selectors: CSS selectors for the price element
+            price_patterns: Regular expressions extracting the amount from price text
+            image_selectors: CSS selectors for the main product image
+            image_attributes: Image attributes holding the URL, in order of preference
+            max_listing_pages: Maximum listing pages followed through pagination
+        """
+        self.name = name
+        self.domains = tuple(domains)
+        self.listing_paths = tuple(listing_paths)
+        self.link_selectors = tuple(link_selectors)
+        self.link_pattern = link_pattern
+        self.name_selectors = tuple(name_selectors)
+        self.description_selectors = tuple(description_selectors)
+        self.price_selectors = tuple(price_selectors)
+        self.price_patterns = [re.compile(pattern) for pattern in price_patterns]
+        self.image_selectors = tuple(image_selectors)
+        self.image_attributes = tuple(image_attributes)
+        self.max_listing_pages = max_listing_pages
+
+    def matches(self, url):
+        """
+        Check whether the profile applies to a URL.
+
+        Args:
+            url: Website or page URL
+
+        Returns:
+            True if the URL's host is one of the profile's domains
+        """
+        host = (urllib.parse.urlsplit(url).hostname or '').lower()
+        return any(host == domain or host.endswith('.' + domain) for domain in self.domains)
+
+    def listing_urls(self, website_url):
+        """
+        Get the listing pages to try for a website, in order.
+
+        Args:
+            website_url: The website's URL
+
+        Returns:
+            List of absolute URLs
+        """
+        return [urllib.parse.urljoin(website_url, path) if path else website_url
+                for path in self.listing_paths]
+
+    def is_product_link(self, url):
+        """Check a candidate product URL against the profile's link pattern."""
+        return self.link_pattern is None or self.link_pattern in url
+
+GENERIC_PROFILE = SiteProfile(
+    'generic',
+    link_selectors=[
+        # Product containers with links
+        'div.product a', 'li.product a', 'div.item a', 'div.product-item a',
+        # Product grids
+        'div.product-grid a',
+        # Product anchors directly
+        'a.product-link', 'a.product-title',
+        # Generic links with product in href
+        'a[href*="product"]', 'a[href*="item"]'
+    ],
+    name_selectors=[
+        'h1.product-title', 'h1.product_title', 'h1.title', 'h1',
+        'h2.product-name', 'h2.product-title', 'div.product-title h1', 'div.product-name h1'
+    ],
+    description_selectors=[
+        'div.product-description', 'div.description', 'div.product-details', 'div.product-info',
+        'div#description', 'div#product-description', 'div.tab-content'
+    ],
+    price_selectors=[
+        'span.price', 'div.price', 'p.price', 'span.current-price', 'span.product-price',
+        'div.product-price', 'span.amount'
+    ],
+    image_selectors=[
+        'img.product-image', 'img.product-img', 'img.main-image', 'div.product-image img',
+        'div.product-img img', 'div.woocommerce-product-gallery__image img',
+        'div.product-gallery img', 'div.image-container img'
+    ]
+)
+
+SITE_PROFILES = [
+    # WooCommerce shop
+    SiteProfile(
+        'ultimateexotics',
+        domains=['ultimateexotics.co.za'],
+        link_selectors=[
+            'li.product a.woocommerce-LoopProduct-link', 'div.product a.woocommerce-LoopProduct-link',
+            'li.product a', 'div.product a', 'div.product-item a'
+        ],
+        link_pattern='/product/',
+        name_selectors=['h1.product_title', 'h1.entry-title', 'h1'],
+        description_selectors=[
+            'div.woocommerce-product-details__short-description', 'div#tab-description',
+            'div.product-description'
+        ],
+        price_selectors=['p.price', 'span.price', 'span.woocommerce-Price-amount'],
+        price_patterns=[RAND_PRICE_PATTERN],
+        image_selectors=[
+            'img.wp-post-image', 'div.woocommerce-product-gallery__image img', 'div.images img'
+        ]
+    ),
+    # Shopify shop; /collections/all lists every product
+    SiteProfile(
+        'reptilegarden',
+        domains=['reptile-garden-sa.myshopify.com'],
+        listing_paths=['/collections/all', ''],
+        link_selectors=[
+            '.product-card a', '.product-item a', '.grid-product__link', '.product-grid-item a',
+            '.grid__item a[href*="/products/"]'
+        ],
+        link_pattern='/products/',
+        name_selectors=['.product-single__title', '.product__title', 'h1.title', 'h1'],
+        description_selectors=[
+            '.product-single__description', '.product__description', '.description',
+            '#product-description'
+        ],
+        price_selectors=['.product__price', '.product-single__price', '.price', '[data-product-price]'],
+        price_patterns=[RAND_PRICE_PATTERN, r'(\d+(?:[.,]\d{1,2})?)'],
+        image_selectors=[
+            '.product-featured-img', '.product-single__photo img', '.product__photo img',
+            '[data-product-featured-image] img'
+        ],
+        image_attributes=('data-srcset', 'data-src', 'srcset', 'src')
+    ),
+]
+
+def profile_for_url(url):
+    """
+    Get the profile for a website URL.
+
+    Args:
+        url: Website URL
+
+    Returns:
+        Matching SiteProfile, or the generic profile
+    """
+    for profile in SITE_PROFILES:
+        if profile.matches(url):
+            return profile
+    return GENERIC_PROFILE
+
+def get_profile(name):
+    """
+    Get a profile by name.
+
+    Args:
+        name: Profile name
+
+    Returns:
+        SiteProfile or None if there is no such profile
+    """
+    for profile in SITE_PROFILES + [GENERIC_PROFILE]:
+        if profile.name == name:
+            return profile
+    return None
@@ -0,0 +1,115 @@
+"""
+Page compression with zstd (when zstandard is installed) or zlib, with optional shared dictionaries.
+"""
+import zlib
+from collections import Counter
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+from app.config import RAW_PAGE_CODEC, RAW_PAGE_ZSTD_LEVEL, RAW_PAGE_ZLIB_LEVEL, RAW_PAGE_DICTIONARY_SIZE
+
+ZSTD = 'zstd'
+ZLIB = 'zlib'
+
+# zlib only looks back 32 KB, so a longer dictionary is wasted
+ZLIB_MAX_DICTIONARY_SIZE = 32 * 1024
+
+def default_codec():
+    """Get the configured codec, or zstd when zstandard is installed and zlib otherwise."""
+    if RAW_PAGE_CODEC:
+        return RAW_PAGE_CODEC
+    return ZSTD if zstandard is not None else ZLIB
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("The zstd codec needs the zstandard package (pip install zstandard)")
+
+def compress(data, codec=None, dictionary=None):
+    """
+    Compress bytes.
+
+    Args:
+        data: Bytes to compress
+        codec: 'zstd' or 'zlib' (default: default_codec())
+        dictionary: Optional dictionary trained for this codec
+
+    Returns:
+        Compressed bytes
+    """
+    codec = codec or default_codec()
+    if codec == ZSTD:
+        _require_zstd()
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=RAW_PAGE_ZSTD_LEVEL, dict_data=dict_data).compress(data)
+    if codec == ZLIB:
+        if dictionary:
+            compressor = zlib.compressobj(RAW_PAGE_ZLIB_LEVEL, zdict=dictionary)
+        else:
+            compressor = zlib.compressobj(RAW_PAGE_ZLIB_LEVEL)
+        return compressor.compress(data) + compressor.flush()
+    raise ValueError(f"Unknown codec: {codec}")
+
+def decompress(data, codec, dictionary=None):
+    """
+    Decompress bytes written by compress().
+
+    Args:
+        data: Compressed bytes
+        codec: Codec they were compressed with
+        dictionary: The dictionary they were compressed with, if any
+
+    Returns:
+        Original bytes
+    """
+    if codec == ZSTD:
+        _require_zstd()
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    if codec == ZLIB:
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+    raise ValueError(f"Unknown codec: {codec}")
+
+def train_dictionary(samples, codec=None, size=RAW_PAGE_DICTIONARY_SIZE):
+    """
+    Build a dictionary of the content shared by sample pages.
+
+    zstd trains one with zstandard. For zlib, the lines found in at least
+    half of the samples (the site's header, menus and footer) are joined,
+    most common last, since zlib matches nearby text most cheaply.
+
+    Args:
+        samples: List of page bytes from one site
+        codec: Codec the dictionary is for (default: default_codec())
+        size: Largest dictionary size in bytes
+
+    Returns:
+        Dictionary bytes, or None if the samples share nothing worth keeping
+    """
+    codec = codec or default_codec()
+    if not samples:
+        return None
+    if codec == ZSTD:
+        _require_zstd()
+        return zstandard.train_dictionary(size, samples).as_bytes()
+    if codec != ZLIB:
+        raise ValueError(f"Unknown codec: {codec}")
+
+    counts = Counter()
+    for sample in samples:
+        counts.update(set(line.strip() for line in sample.splitlines() if len(line.strip()) > 8))
+    shared = [line for line, count in counts.most_common() if count * 2 >= len(samples)]
+
+    budget = min(size, ZLIB_MAX_DICTIONARY_SIZE)
+    kept = []
+    for line in shared:
+        if budget - len(line) - 1 < 0:
+            break
+        kept.append(line)
+        budget -= len(line) + 1
+    if not kept:
+        return None
+    return b'\n'.join(reversed(kept))
@@ -31,3 +31,31 @@ def generate_hash_id(source_string):
     hash_id = hash_object.hexdigest()
     
     return hash_id
+
+
+def normalize_text(text):
+    """
+    Normalize free text for use in content keys.
+    
+    Args:
+        text: Text to normalize
+        
+    Returns:
+        Lowercased text with collapsed whitespace
+    """
+    if not text:
+        return ""
+    
+    return " ".join(str(text).lower().split())
+
+def generate_content_key(*parts):
+    """
+    Generate a stable hash key from normalized text parts.
+    
+    Args:
+        parts: Text parts to combine (e.g. name, description, version)
+        
+    Returns:
+        Hash key as a hexadecimal string
+    """
+    return generate_hash_id("\x1f".join(normalize_text(part) for part in parts))
@@ -0,0 +1,423 @@
+"""
+Shared HTTP transport: pooled keep-alive connections, compression and DNS caching.
+"""
+import sys
+import random
+import socket
+import logging
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+
+from app.utils.metrics import CACHE_LOOKUPS
+from app.utils.warc import WarcWriter, WarcArchive
+from app.config import (DEFAULT_USER_AGENTS, HOST_MAX_CONCURRENCY, HTTP_POOL_HOSTS, HTTP_DNS_CACHE_TTL,
+                        HTTP2_ENABLED, WARC_CAPTURE_DIR, WARC_REPLAY_DIR)
+
+class DNSCache:
+    """
+    Caches getaddrinfo results per (host, port) for a fixed time.
+
+    Every new connection otherwise resolves the host again; a crawl opens
+    connections to the same few hosts over and over. Failed lookups are not
+    cached.
+    """
+    def __init__(self, ttl=HTTP_DNS_CACHE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a resolved address list is reused
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port, family=socket.AF_UNSPEC):
+        """
+        Resolve a host, from the cache when possible.
+
+        Args:
+            host: Host name or IP address
+            port: Port number
+            family: Address family passed to getaddrinfo
+
+        Returns:
+            List of getaddrinfo tuples
+
+        Raises:
+            socket.gaierror: If the host cannot be resolved
+        """
+        host = self._pinned.get(host.lower(), host)
+        key = (host, port, family)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                CACHE_LOOKUPS.inc(cache='dns', result='hit')
+                return entry[1]
+            self.misses += 1
+        CACHE_LOOKUPS.inc(cache='dns', result='miss')
+
+        addresses = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def pin(self, host, address):
+        """
+        Resolve a host to a fixed address instead of asking DNS.
+
+        Used to point a shop's real domain at a local copy of it, e.g. the
+        mock storefronts of the crawl benchmark.
+
+        Args:
+            host: Host name
+            address: Host name or IP address to connect to instead
+        """
+        with self._lock:
+            self._pinned[host.lower()] = address
+
+    def clear(self):
+        """Forget every cached and pinned address."""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+class TransportStats:
+    """
+    Per-host counts of requests sent and TCP connections opened.
+
+    A request that did not open a connection reused a pooled one, so the
+    reuse rate is 1 - connections / requests.
+    """
+    def __init__(self):
+        """Initialize empty counters."""
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, host):
+        """Count a request to a host."""
+        with self._lock:
+            self._counters(host)['requests'] += 1
+
+    def record_connection(self, host, seconds):
+        """Count a new connection to a host and the time it took to set up."""
+        with self._lock:
+            counters = self._counters(host)
+            counters['connections'] += 1
+            counters['connect_seconds'] += seconds
+
+    def snapshot(self):
+        """
+        Get the counters of every host.
+
+        Returns:
+            Dictionary of host to requests, connections, reuse_rate and connect_seconds
+        """
+        with self._lock:
+            hosts = {host: dict(counters) for host, counters in self._hosts.items()}
+        for counters in hosts.values():
+            requests_sent = counters['requests']
+            counters['reuse_rate'] = (
+                round(max(0.0, 1 - counters['connections'] / requests_sent), 3) if requests_sent else None
+            )
+            counters['connect_seconds'] = round(counters['connect_seconds'], 3)
+        return hosts
+
+    def _counters(self, host):
+        return self._hosts.setdefault(host, {'requests': 0, 'connections': 0, 'connect_seconds': 0.0})
+
+class _CachedDNSMixin:
+    """Opens sockets through the transport's DNS cache and counts them."""
+    dns_cache = None
+    stats = None
+
+    def _new_conn(self):
+        start = time.monotonic()
+        try:
+            sock = _connect(self.dns_cache, self._dns_host, self.port, self.timeout,
+                            self.source_address, self.socket_options)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+        self.stats.record_connection(self.host, time.monotonic() - start)
+        sys.audit("http.client.connect", self, self.host, self.port)
+        return sock
+
+def _connect(dns_cache, host, port, timeout, source_address, socket_options):
+    """Connect to the first reachable address of a host (urllib3's create_connection, cached)."""
+    host = host.strip('[]')
+    error = None
+    for family, socktype, proto, _, address in dns_cache.resolve(host, port):
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            for option in socket_options or ():
+                sock.setsockopt(*option)
+            if timeout is not _DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(address)
+            return sock
+        except OSError as e:
+            error = e
+            if sock is not None:
+                sock.close()
+    raise error or OSError("getaddrinfo returned an empty list")
+
+class PooledAdapter(HTTPAdapter):
+    """
+    Requests adapter whose connection pools resolve through a DNS cache
+    and count new connections per host.
+    """
+    def __init__(self, dns_cache, stats, **kwargs):
+        """
+        Initialize the adapter.
+
+        Args:
+            dns_cache: DNSCache shared by the transport
+            stats: TransportStats shared by the transport
+            kwargs: HTTPAdapter arguments (pool_connections, pool_maxsize, ...)
+        """
+        attributes = {'dns_cache': dns_cache, 'stats': stats}
+        self._pool_classes = {
+            'http': type('CachedHTTPConnectionPool', (HTTPConnectionPool,), {
+                'ConnectionCls': type('CachedHTTPConnection', (_CachedDNSMixin, HTTPConnection), attributes)
+            }),
+            'https': type('CachedHTTPSConnectionPool', (HTTPSConnectionPool,), {
+                'ConnectionCls': type('CachedHTTPSConnection', (_CachedDNSMixin, HTTPSConnection), attributes)
+            }),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+class HttpTransport:
+    """
+    One HTTP client for the whole process.
+
+    Connections are kept alive and pooled per host, with as many pooled
+    connections per host as the host's controller may have requests in
+    flight, so repeated requests to a shop skip the TCP and TLS handshakes.
+    Responses are negotiated with every content encoding urllib3 can decode
+    (gzip and deflate, plus brotli or zstd when installed), and host names
+    are resolved through a DNS cache.
+
+    With HTTP2_ENABLED and httpx[http2] installed, HTTPS requests go over
+    HTTP/2 instead, multiplexed on one connection per host.
+
+    In capture mode every response, redirects included, is also appended to
+    WARC files; in replay mode requests never reach the network and are
+    answered from such archives instead, so a crawl can be re-run offline.
+    """
+    def __init__(self, pool_maxsize=HOST_MAX_CONCURRENCY, pool_hosts=HTTP_POOL_HOSTS,
+                 dns_ttl=HTTP_DNS_CACHE_TTL, http2=HTTP2_ENABLED, capture_dir=WARC_CAPTURE_DIR,
+                 replay_dir=WARC_REPLAY_DIR):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_maxsize: Connections kept open per host
+            pool_hosts: Hosts whose pools are kept before the least recently used is closed
+            dns_ttl: Seconds resolved addresses are reused
+            http2: Send HTTPS requests over HTTP/2 when httpx supports it
+            capture_dir: Archive every response to WARC files in this directory
+            replay_dir: Answer every request from the WARC files in this directory
+        """
+        self.dns_cache = DNSCache(dns_ttl)
+        self.stats = TransportStats()
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': random.choice(DEFAULT_USER_AGENTS),
+            'Accept': 'text/html,application/xhtml+xml,application/xml',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        })
+        adapter = PooledAdapter(self.dns_cache, self.stats, pool_connections=pool_hosts,
+                                pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.http2_client = self._create_http2_client(pool_maxsize, pool_hosts) if http2 else None
+        self.capture = None
+        self.replay = None
+        if replay_dir:
+            self.start_replay(replay_dir)
+        elif capture_dir:
+            self.start_capture(capture_dir)
+
+    @property
+    def replaying(self):
+        """Whether requests are answered from archives instead of the network."""
+        return self.replay is not None
+
+    def start_capture(self, directory):
+        """
+        Archive every following response to WARC files.
+
+        Args:
+            directory: Directory the archives are written to
+        """
+        self.stop_capture()
+        self.capture = WarcWriter(directory)
+
+    def stop_capture(self):
+        """Stop archiving responses and close the current archive file."""
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+
+    def start_replay(self, directory):
+        """
+        Answer every following request from archived responses, without network access.
+
+        Args:
+            directory: Directory holding WARC files written in capture mode
+        """
+        self.replay = WarcArchive(directory)
+
+    def stop_replay(self):
+        """Send requests to the network again."""
+        self.replay = None
+
+    def get(self, url, **kwargs):
+        """
+        Send a GET request.
+
+        Args:
+            url: URL to fetch
+            kwargs: requests.Session.get arguments (timeout, headers, stream, ...)
+
+        Returns:
+            requests.Response, or an Http2Response on the HTTP/2 path
+        """
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the shared pools.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            kwargs: requests.Session.request arguments
+
+        Returns:
+            requests.Response, or an Http2Response on the HTTP/2 path
+        """
+        host = urllib.parse.urlsplit(url).hostname or ''
+        self.stats.record_request(host)
+        if self.replay is not None:
+            return self.replay.response_for(method, url)
+        if self.http2_client is not None and url.startswith('https://'):
+            response = self._request_http2(method, url, **kwargs)
+        else:
+            response = self.session.request(method, url, **kwargs)
+        if self.capture is not None:
+            self._archive(method, url, kwargs.get('headers'), response)
+        return response
+
+    def report(self):
+        """
+        Get connection reuse and DNS cache statistics.
+
+        Returns:
+            Dictionary with per-host counters, DNS cache hits and misses and the protocol in use
+        """
+        report = {
+            'protocol': 'HTTP/2' if self.http2_client is not None else 'HTTP/1.1',
+            'accept_encoding': self.session.headers['Accept-Encoding'],
+            'hosts': self.stats.snapshot(),
+            'dns_cache': {'hits': self.dns_cache.hits, 'misses': self.dns_cache.misses},
+        }
+        if self.replay is not None:
+            report['replay'] = self.replay.report()
+        if self.capture is not None:
+            report['capture'] = {'directory': self.capture.directory, 'records': self.capture.records}
+        return report
+
+    def close(self):
+        """Close every pooled connection and the current archive file."""
+        self.session.close()
+        if self.http2_client is not None:
+            self.http2_client.close()
+        self.stop_capture()
+
+    def _archive(self, method, url, headers, response):
+        """Write a response and the redirects that led to it to the archive; never raises."""
+        try:
+            for hop in getattr(response, 'history', None) or []:
+                self.capture.write_exchange(method, hop.url, hop.request.headers, hop.status_code,
+                                            hop.reason, hop.headers, hop.content)
+            request = getattr(response, 'request', None)
+            request_headers = request.headers if request is not None else {**self.session.headers, **(headers or {})}
+            self.capture.write_exchange(method, response.url, request_headers, response.status_code,
+                                        getattr(response, 'reason', None), response.headers, response.content)
+        except Exception as e:
+            logging.error(f"Error archiving {url}: {str(e)}")
+
+    def _create_http2_client(self, pool_maxsize, pool_hosts):
+        """Create the httpx client for HTTP/2, or None if httpx[http2] is not installed."""
+        try:
+            import httpx
+            import h2  # noqa: F401 -- httpx needs it for http2=True
+        except ImportError:
+            logging.warning("HTTP/2 requested but httpx[http2] is not installed; using HTTP/1.1")
+            return None
+        return httpx.Client(
+            http2=True,
+            headers=dict(self.session.headers),
+            limits=httpx.Limits(max_connections=pool_maxsize * pool_hosts,
+                                max_keepalive_connections=pool_maxsize * pool_hosts),
+            follow_redirects=True
+        )
+
+    def _request_http2(self, method, url, headers=None, timeout=None, stream=False, **kwargs):
+        """Send a request with httpx; stream is accepted for compatibility and ignored."""
+        response = self.http2_client.request(method, url, headers=headers, timeout=timeout, **kwargs)
+        return Http2Response(response)
+
+class Http2Response:
+    """The parts of the requests.Response interface the scrapers use, over an httpx response."""
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+
+    @property
+    def text(self):
+        return self._response.text
+
+    @property
+    def content(self):
+        return self._response.content
+
+    def iter_content(self, chunk_size=1024):
+        return self._response.iter_bytes(chunk_size)
+
+# Shared transport for every scraper and downloader in the process
+http_transport = HttpTransport()
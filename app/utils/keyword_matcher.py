@@ -0,0 +1,124 @@
+"""
+Multi-pattern keyword matcher for relevance filtering and keyword categorization.
+"""
+import re
+import string
+from functools import lru_cache
+
+WORD_PATTERN = re.compile(r'\w')  # a keyword must contain at least one word character
+
+# Maps ASCII punctuation (except hyphens inside words) to spaces
+PUNCTUATION_TABLE = str.maketrans({char: ' ' for char in string.punctuation if char != '-'})
+
+class KeywordMatcher:
+    """
+    Matches many keyword groups against a text in a single pass.
+
+    The text is tokenized once on word boundaries and the tokens are
+    intersected with a precompiled table of keyword variants, so the cost
+    does not grow with the number of keywords. Plural forms ("s"/"es") of
+    every keyword are part of the table. Multi-word keywords are only
+    searched for when the text contains their first word.
+    """
+    def __init__(self, keyword_groups):
+        """
+        Initialize the matcher.
+
+        Args:
+            keyword_groups: Dict mapping a group label to a list of keywords
+        """
+        self.groups = {}
+        self._labels_by_keyword = {}
+        self._keywords_by_variant = {}
+        self._phrases_by_first_word = {}
+
+        for label, keywords in keyword_groups.items():
+            self.groups[label] = []
+            for keyword in keywords:
+                keyword = " ".join(keyword.lower().split())
+                # Skip tokens such as "&" that carry no word characters
+                if not WORD_PATTERN.search(keyword):
+                    continue
+                self.groups[label].append(keyword)
+                self._labels_by_keyword.setdefault(keyword, set()).add(label)
+
+        for keyword in self._labels_by_keyword:
+            words = keyword.split()
+            if len(words) > 1:
+                self._phrases_by_first_word.setdefault(words[0], []).append(keyword)
+                continue
+            for variant in (keyword, keyword + 's', keyword + 'es'):
+                self._keywords_by_variant.setdefault(variant, set()).add(keyword)
+
+        self._variants = frozenset(self._keywords_by_variant)
+        self._phrase_first_words = frozenset(self._phrases_by_first_word)
+
+    def scan(self, text):
+        """
+        Scan a text for every keyword group.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Dict mapping each matched group label to the set of keywords found
+        """
+        matches = {}
+        if not text:
+            return matches
+
+        words = text.lower().translate(PUNCTUATION_TABLE).split()
+        tokens = set(words)
+
+        # Hyphenated tokens also count as their parts ("uvb-lamp" contains "uvb")
+        for token in [token for token in tokens if '-' in token]:
+            tokens.update(part for part in token.split('-') if part)
+
+        found = set()
+        for variant in tokens & self._variants:
+            found.update(self._keywords_by_variant[variant])
+
+        phrase_first_words = tokens & self._phrase_first_words
+        if phrase_first_words:
+            normalized = " " + " ".join(words) + " "
+            for first_word in phrase_first_words:
+                for keyword in self._phrases_by_first_word[first_word]:
+                    if self._contains_phrase(normalized, keyword):
+                        found.add(keyword)
+
+        for keyword in found:
+            for label in self._labels_by_keyword[keyword]:
+                matches.setdefault(label, set()).add(keyword)
+
+        return matches
+
+    @staticmethod
+    def _contains_phrase(normalized, phrase):
+        """Check for a whole-word phrase (or its plural) in space-padded text."""
+        start = normalized.find(" " + phrase)
+        while start != -1:
+            end = start + len(phrase) + 1
+            for suffix in ("", "s", "es"):
+                if normalized.startswith(suffix + " ", end):
+                    return True
+            start = normalized.find(" " + phrase, end)
+        return False
+
+@lru_cache(maxsize=None)
+def get_product_matcher():
+    """
+    Get the matcher built from the configured product keywords.
+
+    Returns:
+        KeywordMatcher with "reptile", "exclude" and one "category:<name>" group per category
+    """
+    from app.config import PRODUCT_CATEGORIES, REPTILE_KEYWORDS, EXCLUDE_KEYWORDS
+
+    keyword_groups = {
+        'reptile': REPTILE_KEYWORDS,
+        'exclude': EXCLUDE_KEYWORDS
+    }
+    for category_name in PRODUCT_CATEGORIES:
+        keyword_groups[f'category:{category_name}'] = category_name.split()
+
+    return KeywordMatcher(keyword_groups)
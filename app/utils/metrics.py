@@ -0,0 +1,298 @@
+"""
+In-process metrics (counters, gauges, histograms) rendered in the Prometheus text format.
+"""
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, from cache hits to slow page fetches
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    """Escape a label value (backslash, double quote and newline)."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labelnames, values, extra=()):
+    """Render a label set as {name="value",...}."""
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    """Render a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """
+    Base class: a named metric with a fixed set of label names.
+
+    Its values are either recorded on the metric, or read at render time
+    from a function returning a dictionary of label-value tuples to values,
+    for state another object already keeps.
+    """
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = None
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set_function(self, function):
+        """Read the metric's values from a function at render time."""
+        self.function = function
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        """Render the metric's HELP, TYPE and sample lines."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        if self.function is not None:
+            items = sorted(self.function().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Counter(_Metric):
+    """A value that only goes up."""
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Add to the counter for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Get the counter for a label set."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """A value that goes up and down."""
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        """Set the gauge for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets, with their sum and count."""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """Record one observation for a label set."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            if index < len(self.buckets):
+                series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, dict(series, buckets=list(series['buckets']))) for key, series in self._values.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['buckets']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', _format_value(bound))])} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} "
+                         f"{series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+class MetricsRegistry:
+    """The metrics of the process, rendered together for /metrics."""
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Add a metric.
+
+        Args:
+            metric: Counter, Gauge or Histogram
+
+        Returns:
+            The metric
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Text ending with a newline
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+class StageTimings:
+    """
+    Per-run totals of stage durations, for the run's ScrapeLog.
+
+    The process-wide histograms cover every run; this keeps count, total
+    and maximum seconds per stage for a single crawl.
+    """
+    def __init__(self):
+        """Initialize empty totals."""
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        """Add one duration to a stage."""
+        with self._lock:
+            totals = self._stages.setdefault(stage, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            totals['max'] = max(totals['max'], seconds)
+
+    def get(self, stage):
+        """Get a stage's totals, or None if it never ran."""
+        with self._lock:
+            totals = self._stages.get(stage)
+            return dict(totals) if totals else None
+
+    def to_dict(self):
+        """Get every stage's count, total, mean and maximum seconds."""
+        with self._lock:
+            return {
+                stage: {
+                    'count': totals['count'],
+                    'seconds': round(totals['seconds'], 4),
+                    'mean': round(totals['seconds'] / totals['count'], 4),
+                    'max': round(totals['max'], 4)
+                }
+                for stage, totals in sorted(self._stages.items())
+            }
+
+# Registry and metrics shared by the whole process
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    'scraper_stage_seconds', 'Time spent per crawl stage (fetch, parse, extract, classify, image, db_write).',
+    ['stage']
+))
+HTTP_RESPONSES = registry.register(Counter(
+    'scraper_http_responses_total', 'Page fetches by host and status code ("error" when no response).',
+    ['host', 'status']
+))
+RETRIES = registry.register(Counter(
+    'scraper_retries_total', 'Retries granted by the retry policy, by host.', ['host']
+))
+RETRIES_DENIED = registry.register(Counter(
+    'scraper_retries_denied_total', 'Retries refused by a host\'s retry budget.', ['host']
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    'scraper_cache_lookups_total', 'Cache lookups by cache and result (hit or miss).', ['cache', 'result']
+))
+IN_FLIGHT = registry.register(Gauge(
+    'scraper_requests_in_flight', 'Requests currently in flight per host.', ['host']
+))
+CONCURRENCY_LIMIT = registry.register(Gauge(
+    'scraper_host_concurrency_limit', 'Current AIMD concurrency limit per host.', ['host']
+))
+LLM_CALLS = registry.register(Counter(
+    'scraper_llm_calls_total', 'LLM calls by result (ok, failed) and retried attempts (retry, rate_limited).',
+    ['result']
+))
+LLM_TOKENS = registry.register(Counter(
+    'scraper_llm_tokens_total', 'Tokens used by LLM calls, by kind (prompt or completion).', ['kind']
+))
+LLM_THROTTLED_SECONDS = registry.register(Counter(
+    'scraper_llm_throttled_seconds_total', 'Time LLM calls waited for rate-limit capacity.'
+))
+LLM_LATENCY = registry.register(Gauge(
+    'scraper_llm_latency_seconds', 'LLM call latency percentiles over recent calls.', ['quantile']
+))
+
+# Stage totals of the crawl the current code runs for, if any
+_current_timings = contextvars.ContextVar('stage_timings', default=None)
+
+@contextmanager
+def collect_stages(timings):
+    """
+    Add the stages timed inside the block to a StageTimings, in this thread.
+
+    Args:
+        timings: StageTimings of the running crawl
+    """
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+@contextmanager
+def stage(name):
+    """
+    Time a block as a crawl stage.
+
+    The duration goes to the scraper_stage_seconds histogram and to the
+    StageTimings being collected in this thread, if any.
+
+    Args:
+        name: Stage name
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(name, elapsed)
@@ -0,0 +1,150 @@
+"""
+Keyset (cursor) pagination utilities.
+"""
+import json
+import base64
+import logging
+from datetime import datetime
+
+from sqlalchemy import text, tuple_
+
+class KeysetPage:
+    """
+    A page of results from keyset pagination.
+    """
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        """
+        Initialize the page.
+
+        Args:
+            items: Items on this page
+            next_cursor: Cursor for the following (older) page, or None
+            prev_cursor: Cursor for the preceding (newer) page, or None
+        """
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+def encode_cursor(created_at, item_id):
+    """
+    Encode a (created_at, id) position as an opaque cursor token.
+
+    Args:
+        created_at: Datetime of the row
+        item_id: Primary key of the row
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([created_at.isoformat() if created_at else None, item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a cursor token.
+
+    Args:
+        token: Cursor string produced by encode_cursor
+
+    Returns:
+        Tuple of (created_at, id)
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return (datetime.fromisoformat(created_at) if created_at else None), int(item_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {token}")
+
+def keyset_paginate(query, model, limit=20, after=None, before=None):
+    """
+    Paginate a query newest-first on (created_at, id) without OFFSET or COUNT.
+
+    Each page is a range scan from the cursor position, so it costs the same
+    regardless of how deep it is.
+
+    Args:
+        query: SQLAlchemy query over `model`
+        model: Model class with created_at and id columns
+        limit: Items per page
+        after: Cursor of the last item on the previous page (move to older items)
+        before: Cursor of the first item on the next page (move to newer items)
+
+    Returns:
+        KeysetPage
+
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    key = tuple_(model.created_at, model.id)
+
+    if before:
+        # Walk towards newer items, then restore newest-first order
+        position = decode_cursor(before)
+        rows = query.filter(key > position)\
+                    .order_by(model.created_at.asc(), model.id.asc())\
+                    .limit(limit + 1).all()
+        has_more = len(rows) > limit
+        items = list(reversed(rows[:limit]))
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if items else None
+        prev_cursor = encode_cursor(items[0].created_at, items[0].id) if items and has_more else None
+        return KeysetPage(items, next_cursor, prev_cursor)
+
+    if after:
+        query = query.filter(key < decode_cursor(after))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if items and has_more else None
+    prev_cursor = encode_cursor(items[0].created_at, items[0].id) if items and after else None
+    return KeysetPage(items, next_cursor, prev_cursor)
+
+def approximate_count(session, table_name):
+    """
+    Estimate a table's row count from planner statistics instead of COUNT(*).
+
+    Args:
+        session: SQLAlchemy session
+        table_name: Name of the table
+
+    Returns:
+        Estimated row count, or None if no statistics are available
+    """
+    dialect = session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table_name"),
+            {'table_name': table_name}
+        ).scalar()
+        # -1 means the table has never been analyzed
+        return int(estimate) if estimate is not None and estimate >= 0 else None
+
+    if dialect == 'sqlite':
+        # sqlite_stat1 only exists once ANALYZE has run
+        has_stats = session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        ).scalar()
+        if not has_stats:
+            return None
+        rows = session.execute(
+            text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table_name"),
+            {'table_name': table_name}
+        ).scalars().all()
+        estimates = [int(stat.split()[0]) for stat in rows if stat]
+        return max(estimates) if estimates else None
+
+    logging.debug(f"No row estimate available for {dialect}")
+    return None
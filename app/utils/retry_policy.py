@@ -0,0 +1,205 @@
+"""
+Retry policy for HTTP fetches: per-status rules, Retry-After, jittered backoff and retry budgets.
+"""
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from app.utils.metrics import RETRIES, RETRIES_DENIED
+from app.config import (
+    RETRY_ATTEMPTS, RETRY_STATUS_RULES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP, RETRY_MAX_RETRY_AFTER,
+    RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN
+)
+
+def parse_retry_after(value, now=None):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+        now: Current time as an aware datetime (default: now, UTC)
+
+    Returns:
+        Seconds to wait (never negative), or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+def full_jitter(attempt, base=RETRY_BACKOFF_BASE, cap=RETRY_BACKOFF_CAP):
+    """
+    Backoff delay with full jitter: uniform between 0 and the capped exponential delay.
+
+    Args:
+        attempt: Number of the failed attempt, starting at 0
+        base: Delay ceiling of the first retry in seconds
+        cap: Largest delay ceiling in seconds
+
+    Returns:
+        Seconds to wait
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of the requests sent to a host.
+
+    Each first attempt deposits `ratio` tokens and each retry withdraws one;
+    `minimum` tokens are always available, so a host that has only seen a
+    few requests can still be retried. When a host fails everything, at most
+    about ratio extra requests per request are sent instead of several
+    retries for every request.
+    """
+    def __init__(self, ratio=RETRY_BUDGET_RATIO, minimum=RETRY_BUDGET_MIN):
+        """
+        Initialize the budget.
+
+        Args:
+            ratio: Retries allowed per first attempt
+            minimum: Retries always allowed in reserve
+        """
+        self.ratio = ratio
+        self.minimum = minimum
+        self.tokens = float(minimum)
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def deposit(self):
+        """Record a first attempt."""
+        self.requests += 1
+        # Unused tokens are capped so a long healthy run cannot bank a retry storm
+        self.tokens = min(self.tokens + self.ratio, self.minimum + self.ratio * 100)
+
+    def withdraw(self):
+        """
+        Take a token for a retry.
+
+        Returns:
+            True if the retry is within budget
+        """
+        if self.tokens < 1:
+            self.denied += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed fetch is retried.
+
+    Statuses in the rules are retried up to their limit; any other status is
+    final. Network errors are retried up to RETRY_ATTEMPTS - 1 times. The
+    delay is the server's Retry-After when given (a Retry-After beyond
+    max_retry_after means giving up), else full-jitter exponential backoff.
+    Every retry must also fit the host's retry budget.
+
+    The policy only computes delays; callers decide whether to sleep or to
+    put the URL back on the frontier.
+    """
+    def __init__(self, rules=RETRY_STATUS_RULES, error_retries=RETRY_ATTEMPTS - 1, base=RETRY_BACKOFF_BASE,
+                 cap=RETRY_BACKOFF_CAP, max_retry_after=RETRY_MAX_RETRY_AFTER,
+                 budget_ratio=RETRY_BUDGET_RATIO, budget_minimum=RETRY_BUDGET_MIN):
+        """
+        Initialize the policy.
+
+        Args:
+            rules: Dictionary of status code to retries allowed
+            error_retries: Retries allowed after a network error
+            base: Backoff ceiling of the first retry in seconds
+            cap: Largest backoff ceiling in seconds
+            max_retry_after: Longest Retry-After honoured, in seconds
+            budget_ratio: Retries allowed per first attempt, per host
+            budget_minimum: Retries always allowed per host
+        """
+        self.rules = dict(rules)
+        self.error_retries = error_retries
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+        self.budget_ratio = budget_ratio
+        self.budget_minimum = budget_minimum
+        self._budgets = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, host):
+        """
+        Record a first attempt to a host, adding to its retry budget.
+
+        Args:
+            host: Host name
+        """
+        with self._lock:
+            self._budget(host).deposit()
+
+    def retry_delay(self, host, attempt, status_code=None, headers=None, error=False):
+        """
+        Get the delay before retrying a failed attempt.
+
+        Args:
+            host: Host name
+            attempt: Number of the failed attempt, starting at 0
+            status_code: Response status, or None after a network error
+            headers: Response headers (for Retry-After)
+            error: Whether the attempt failed with a network error
+
+        Returns:
+            Seconds to wait before the next attempt, or None if it should not be retried
+        """
+        allowed = self.error_retries if error or status_code is None else self.rules.get(status_code, 0)
+        if attempt >= allowed:
+            return None
+
+        delay = None
+        if headers:
+            delay = parse_retry_after(headers.get('Retry-After'))
+            if delay is not None and delay > self.max_retry_after:
+                logging.warning(f"{host} asked to retry after {delay:.0f}s; giving up")
+                return None
+        if delay is None:
+            delay = full_jitter(attempt, self.base, self.cap)
+
+        with self._lock:
+            allowed = self._budget(host).withdraw()
+        if not allowed:
+            RETRIES_DENIED.inc(host=host)
+            logging.warning(f"Retry budget for {host} used up; not retrying")
+            return None
+        RETRIES.inc(host=host)
+        return delay
+
+    def snapshot(self):
+        """
+        Get per-host retry counters.
+
+        Returns:
+            Dictionary of host to requests, retries, denied and tokens
+        """
+        with self._lock:
+            return {
+                host: {'requests': budget.requests, 'retries': budget.retries,
+                       'denied': budget.denied, 'tokens': round(budget.tokens, 2)}
+                for host, budget in self._budgets.items()
+            }
+
+    def _budget(self, host):
+        budget = self._budgets.get(host)
+        if budget is None:
+            budget = self._budgets[host] = RetryBudget(self.budget_ratio, self.budget_minimum)
+        return budget
+
+# Shared policy, so budgets cover every scraper in the process
+retry_policy = RetryPolicy()
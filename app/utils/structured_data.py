@@ -0,0 +1,73 @@
+"""
+Utility for reading structured product data (JSON-LD, microdata) from pages.
+"""
+import json
+
+def json_ld_objects(soup):
+    """
+    Parse the JSON-LD blocks of a page.
+
+    Args:
+        soup: BeautifulSoup of the page
+
+    Returns:
+        List of parsed JSON-LD documents; invalid blocks are skipped
+    """
+    objects = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            objects.append(json.loads(script.string or ''))
+        except (TypeError, ValueError):
+            continue
+    return objects
+
+def find_json_ld_value(data, key, nested_keys=('offers', '@graph', 'priceSpecification')):
+    """
+    Find the first string value for a key in parsed JSON-LD.
+
+    Args:
+        data: Parsed JSON-LD (dict or list)
+        key: Property name, e.g. 'sku' or 'priceCurrency'
+        nested_keys: Properties searched recursively
+
+    Returns:
+        Stripped string value or None
+    """
+    if isinstance(data, list):
+        for item in data:
+            value = find_json_ld_value(item, key, nested_keys)
+            if value:
+                return value
+    elif isinstance(data, dict):
+        value = data.get(key)
+        if isinstance(value, (str, int)) and str(value).strip():
+            return str(value).strip()
+        for nested_key in nested_keys:
+            if nested_key in data:
+                value = find_json_ld_value(data[nested_key], key, nested_keys)
+                if value:
+                    return value
+    return None
+
+def extract_sku(soup):
+    """
+    Extract a product's SKU from structured data.
+
+    Args:
+        soup: BeautifulSoup of the product page
+
+    Returns:
+        SKU string or None
+    """
+    for data in json_ld_objects(soup):
+        sku = find_json_ld_value(data, 'sku')
+        if sku:
+            return sku
+
+    element = soup.select_one('[itemprop="sku"]')
+    if element:
+        sku = element.get('content') or element.get_text(strip=True)
+        if sku:
+            return sku.strip()
+
+    return None
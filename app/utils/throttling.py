@@ -3,6 +3,7 @@ Throttling utilities to prevent overloading websites with requests.
 """
 import time
 import logging
+import threading
 from datetime import datetime, timedelta
 
 class Throttler:
@@ -45,66 +46,242 @@ class Throttler:
         # Record the current request time
         self.request_times.append(datetime.now())
         
-class AdaptiveThrottler(Throttler):
+class AIMDController:
     """
-    Advanced throttler that adapts to response status codes and response times.
+    Per-host request controller using AIMD (additive increase, multiplicative decrease).
+    
+    Two values govern a host: the number of requests allowed in flight and a
+    minimum interval between request starts. While responses stay healthy the
+    interval shrinks by a fixed step and, once it reaches zero, the in-flight
+    limit grows by about one per window of 2xx/3xx responses. On a 403, 429 or
+    5xx, a timeout or a latency spike the limit is halved (or, at one request
+    in flight, the interval doubled). Other 4xx responses say nothing about the
+    host's load and leave both values alone. Only one decrease is applied per
+    window: requests started before the last decrease do not trigger another.
     """
-    def __init__(self, max_requests_per_minute=10, initial_delay=1.0):
+    def __init__(self, host, limit=1.0, interval=0.0, latency=None, max_limit=4, interval_step=0.25,
+                 max_interval=30.0, spike_factor=3.0, overload_statuses=(403, 429, 500, 502, 503, 504)):
         """
-        Initialize the adaptive throttler.
+        Initialize the controller.
         
         Args:
-            max_requests_per_minute: Maximum number of requests allowed per minute
-            initial_delay: Initial delay between requests in seconds
+            host: Host name the controller paces
+            limit: Requests allowed in flight (fractional; the whole part is used)
+            interval: Minimum seconds between request starts
+            latency: Baseline response time in seconds, if known
+            max_limit: Upper bound for the in-flight limit
+            interval_step: Seconds taken off the interval per healthy response
+            max_interval: Upper bound for the interval
+            spike_factor: Latency above this multiple of the baseline counts as overload
+            overload_statuses: Status codes that count as overload
         """
-        super().__init__(max_requests_per_minute)
-        self.delay = initial_delay
-        self.min_delay = 0.5
-        self.max_delay = 10.0
-        self.success_count = 0
-        self.failure_count = 0
+        self.host = host
+        self.limit = min(max(float(limit), 1.0), max_limit)
+        self.interval = min(max(float(interval), 0.0), max_interval)
+        self.latency = latency
+        self.max_limit = max_limit
+        self.interval_step = interval_step
+        self.max_interval = max_interval
+        self.spike_factor = spike_factor
+        self.overload_statuses = set(overload_statuses)
+        self.min_interval = 0.0
+        self.in_flight = 0
+        self.successes = 0
+        self.overloads = 0
+        self.latency_samples = 0 if latency is None else 5
+        self._next_start = 0.0
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
     
-    def adjust_delay(self, success=True, status_code=None, response_time=None):
+    def acquire(self):
         """
-        Adjust the delay based on the success or failure of the previous request.
+        Wait for a free slot and the interval to pass, then take the slot.
+        
+        Returns:
+            Ticket to pass to release()
+        """
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                ticket = self._take(now)
+                if ticket is not None:
+                    return ticket
+                wait_seconds = None if self.in_flight >= int(self.limit) else self._next_start - now
+                self._condition.wait(wait_seconds)
+    
+    def try_acquire(self):
+        """
+        Take a slot if one is free and the interval has passed, without waiting.
+        
+        Returns:
+            Ticket to pass to release(), or None
+        """
+        with self._condition:
+            return self._take(time.monotonic())
+    
+    def ready_at(self):
+        """
+        Get the earliest time a request may start.
+        
+        Returns:
+            time.monotonic() value, or infinity while every slot is taken
+        """
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return float('inf')
+            return self._next_start
+    
+    def set_min_interval(self, seconds):
+        """
+        Set a floor for the interval, such as a robots.txt Crawl-delay.
         
         Args:
-            success: Whether the previous request was successful
-            status_code: HTTP status code of the previous request
-            response_time: Response time of the previous request in seconds
-        """
-        if not success or (status_code and status_code >= 400):
-            # Increase delay on failure
-            self.failure_count += 1
-            self.success_count = 0
-            
-            # Increase delay more aggressively for certain status codes
-            if status_code in (403, 429):  # Forbidden or Too Many Requests
-                self.delay = min(self.delay * 2.0, self.max_delay)
-            else:
-                self.delay = min(self.delay * 1.5, self.max_delay)
+            seconds: Minimum seconds between request starts
+        """
+        with self._condition:
+            self.min_interval = max(float(seconds or 0.0), 0.0)
+    
+    def release(self, ticket, status_code=None, latency=None, error=False):
+        """
+        Give back a slot and adapt to how the request went.
+        
+        Args:
+            ticket: Value returned by acquire()
+            status_code: HTTP status of the response, if any
+            latency: Response time in seconds
+            error: True if the request failed without a response (timeout, connection error)
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if error or status_code in self.overload_statuses or self._is_spike(latency):
+                self.overloads += 1
+                # Requests that started before the last decrease reflect the old rate
+                if ticket >= self._last_decrease:
+                    self._decrease()
+                    self._last_decrease = time.monotonic()
+            elif status_code is not None and 200 <= status_code < 400:
+                self.successes += 1
+                self._increase()
+                if latency is not None:
+                    self._observe_latency(latency)
+            self._condition.notify_all()
+    
+    def snapshot(self):
+        """Get the controller's state as a dictionary."""
+        with self._condition:
+            return {
+                'host': self.host,
+                'limit': round(self.limit, 3),
+                'interval': round(self.interval, 3),
+                'min_interval': self.min_interval,
+                'latency': round(self.latency, 4) if self.latency is not None else None,
+                'in_flight': self.in_flight,
+                'successes': self.successes,
+                'overloads': self.overloads
+            }
+    
+    def _take(self, now):
+        """Take a slot if allowed at `now`; call with the condition held."""
+        if self.in_flight < int(self.limit) and self._next_start <= now:
+            self.in_flight += 1
+            self._next_start = now + max(self.interval, self.min_interval)
+            return now
+        return None
+    
+    def _increase(self):
+        """Additive increase: shorten the interval first, then widen the window."""
+        if self.interval > 0:
+            self.interval = max(0.0, self.interval - self.interval_step)
         else:
-            # Decrease delay on consecutive successes
-            self.success_count += 1
-            self.failure_count = 0
-            
-            if self.success_count >= 10:
-                self.delay = max(self.delay * 0.9, self.min_delay)
+            self.limit = min(self.limit + 1.0 / self.limit, self.max_limit)
+    
+    def _decrease(self):
+        """Multiplicative decrease: halve the window, or double the interval at one request."""
+        if self.limit >= 2:
+            self.limit = max(1.0, self.limit / 2)
+        else:
+            self.limit = 1.0
+            self.interval = min(max(self.interval * 2, self.interval_step), self.max_interval)
+        logging.info(f"Backing off {self.host}: limit {self.limit:.2f}, interval {self.interval:.2f}s")
+    
+    def _is_spike(self, latency):
+        """Whether a response time is far above the host's baseline."""
+        return (latency is not None and self.latency is not None and self.latency_samples >= 5
+                and latency > self.latency * self.spike_factor)
+    
+    def _observe_latency(self, latency):
+        """Update the baseline latency (exponentially weighted moving average)."""
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        self.latency_samples += 1
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for limiting a rate (e.g. requests or tokens per minute).
+    
+    Callers reserve capacity up front and are told how long to wait before
+    using it, so the same bucket works for blocking and asyncio callers.
+    """
+    def __init__(self, capacity, refill_per_second):
+        """
+        Initialize the token bucket.
         
-        # Adjust delay based on response time if available
-        if response_time is not None and response_time > self.delay * 2:
-            # If response time is much longer than our delay, increase delay
-            self.delay = min(response_time * 0.5, self.max_delay)
+        Args:
+            capacity: Maximum number of tokens the bucket holds
+            refill_per_second: Tokens added per second
+        """
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def per_minute(cls, limit):
+        """Create a bucket that allows `limit` tokens per minute with a one-minute burst."""
+        return cls(limit, limit / 60.0)
+    
+    def reserve(self, amount=1):
+        """
+        Reserve tokens, going into debt if the bucket is short.
+        
+        Args:
+            amount: Number of tokens to reserve
             
-        logging.debug(f"Adjusted throttling delay to {self.delay:.2f} seconds")
+        Returns:
+            Seconds the caller must wait before the reservation is covered
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
     
-    def throttle(self):
+    def adjust(self, delta):
+        """
+        Return (positive) or charge (negative) tokens after the real cost is known.
+        
+        Args:
+            delta: Number of tokens to add back to the bucket
         """
-        Apply rate limiting and adaptive delay.
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens + delta, self.capacity)
+    
+    def consume(self, amount=1):
         """
-        # First apply rate limiting from parent class
-        super().throttle()
+        Reserve tokens and sleep until they are available.
         
-        # Then apply adaptive delay
-        if self.delay > 0:
-            time.sleep(self.delay)
\ No newline at end of file
+        Args:
+            amount: Number of tokens to consume
+        """
+        wait_seconds = self.reserve(amount)
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+    
+    def _refill(self):
+        """Add tokens for the time elapsed since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
@@ -0,0 +1,49 @@
+"""
+Utility for normalizing URLs.
+"""
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that never change which product a URL points to
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_', 'srsltid',
+    '_pos', '_sid', '_ss', '_psq', '_v'
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url):
+    """
+    Normalize a product URL so that equivalent URLs compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments, tracking
+    parameters (utm_*, fbclid, ...) and trailing slashes, and sorts the
+    remaining query parameters. http and https are treated as the same URL.
+
+    Args:
+        url: URL to normalize
+
+    Returns:
+        Canonical URL string, or None if no URL was given
+    """
+    if not url:
+        return None
+
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
@@ -0,0 +1,331 @@
+"""
+WARC capture and replay of HTTP exchanges.
+
+Archives are standard WARC/1.1 files (ISO 28500): one gzip member per
+record, a warcinfo record at the start of each file, and a request and a
+response record per exchange, so they also open in the usual WARC tools.
+Bodies are stored as the client received them after decoding: the
+Content-Encoding and Transfer-Encoding headers are dropped and
+Content-Length is set to the decoded size.
+"""
+import os
+import io
+import gzip
+import zlib
+import uuid
+import base64
+import hashlib
+import logging
+import threading
+import http.client
+import urllib.parse
+from datetime import datetime, timezone
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from app.config import WARC_MAX_FILE_SIZE
+
+WARC_VERSION = 'WARC/1.1'
+WARC_SUFFIX = '.warc.gz'
+
+# Headers describing the transfer rather than the stored body
+TRANSFER_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 30
+READ_CHUNK_SIZE = 64 * 1024
+
+def _digest(data):
+    """SHA-1 digest in the base32 form WARC tools use."""
+    return 'sha1:' + base64.b32encode(hashlib.sha1(data).digest()).decode('ascii')
+
+def _record(warc_type, headers, block):
+    """
+    Serialize one gzip-compressed WARC record.
+
+    Args:
+        warc_type: WARC-Type value
+        headers: List of (name, value) WARC headers besides the standard ones
+        block: Record content block (bytes)
+
+    Returns:
+        (record ID, compressed record bytes)
+    """
+    record_id = f"<urn:uuid:{uuid.uuid4()}>"
+    lines = [
+        WARC_VERSION,
+        f"WARC-Type: {warc_type}",
+        f"WARC-Record-ID: {record_id}",
+        f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}",
+    ]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    lines.append(f"WARC-Block-Digest: {_digest(block)}")
+    lines.append(f"Content-Length: {len(block)}")
+    raw = '\r\n'.join(lines).encode('utf-8') + b'\r\n\r\n' + block + b'\r\n\r\n'
+    return record_id, gzip.compress(raw, compresslevel=6)
+
+def _header_lines(headers):
+    """Serialize HTTP headers, one 'Name: value' line each."""
+    return ''.join(f"{name}: {value}\r\n" for name, value in headers.items()).encode('latin-1', 'replace')
+
+class WarcWriter:
+    """
+    Appends HTTP exchanges to WARC files in a directory.
+
+    Files are named <prefix>-<timestamp>-<pid>-<serial>.warc.gz and a new
+    file is started once the current one passes max_size bytes. Writes from
+    several threads are serialized.
+    """
+    def __init__(self, directory, prefix='crawl', max_size=WARC_MAX_FILE_SIZE):
+        """
+        Initialize the writer.
+
+        Args:
+            directory: Directory the archives are written to (created if needed)
+            prefix: File name prefix
+            max_size: Bytes after which a new file is started
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.max_size = max_size
+        self.records = 0
+        self._serial = 0
+        self._file = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def write_exchange(self, method, url, request_headers, status_code, reason, response_headers, body):
+        """
+        Archive one request and its response.
+
+        Args:
+            method: HTTP method
+            url: Requested URL
+            request_headers: Headers sent
+            status_code: Response status code
+            reason: Response reason phrase
+            response_headers: Headers received
+            body: Decoded response body (bytes)
+        """
+        parts = urllib.parse.urlsplit(url)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        request_block = (f"{method} {target} HTTP/1.1\r\n".encode('latin-1', 'replace')
+                         + _header_lines({'Host': parts.netloc, **dict(request_headers or {})}) + b'\r\n')
+
+        headers = {name: value for name, value in (response_headers or {}).items()
+                   if name.lower() not in TRANSFER_HEADERS}
+        headers['Content-Length'] = str(len(body))
+        reason = reason or http.client.responses.get(status_code, '')
+        response_block = (f"HTTP/1.1 {status_code} {reason}\r\n".encode('latin-1', 'replace')
+                          + _header_lines(headers) + b'\r\n' + body)
+
+        response_id, response_record = _record('response', [
+            ('WARC-Target-URI', url),
+            ('WARC-Payload-Digest', _digest(body)),
+            ('Content-Type', 'application/http;msgtype=response'),
+        ], response_block)
+        _, request_record = _record('request', [
+            ('WARC-Target-URI', url),
+            ('WARC-Concurrent-To', response_id),
+            ('Content-Type', 'application/http;msgtype=request'),
+        ], request_block)
+
+        with self._lock:
+            archive = self._current_file()
+            archive.write(response_record)
+            archive.write(request_record)
+            archive.flush()
+            self.records += 2
+
+    def close(self):
+        """Close the current file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _current_file(self):
+        """Get the file to append to, starting a new one when the current one is full."""
+        if self._file is not None and self._file.tell() >= self.max_size:
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self._serial += 1
+            timestamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+            filename = f"{self.prefix}-{timestamp}-{os.getpid()}-{self._serial:05d}{WARC_SUFFIX}"
+            self._file = open(os.path.join(self.directory, filename), 'ab')
+            info = f"software: reptile-products-scraper\r\nformat: WARC File Format 1.1\r\n".encode('utf-8')
+            self._file.write(_record('warcinfo', [
+                ('WARC-Filename', filename),
+                ('Content-Type', 'application/warc-fields'),
+            ], info)[1])
+            logging.info(f"Archiving responses to {filename}")
+        return self._file
+
+def _prepared_url(url):
+    """Normalize a URL the way requests does before sending it."""
+    try:
+        return requests.Request('GET', url).prepare().url
+    except requests.RequestException:
+        return url
+
+def _read_members(stream):
+    """
+    Iterate over the gzip members of a file.
+
+    Yields:
+        (offset of the member, decompressed member bytes)
+    """
+    offset = 0
+    pending = b''
+    while True:
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        start = offset
+        chunks = []
+        while not decompressor.eof:
+            if not pending:
+                pending = stream.read(READ_CHUNK_SIZE)
+                if not pending:
+                    if chunks:
+                        logging.warning(f"Truncated WARC record at offset {start}")
+                    return
+            chunks.append(decompressor.decompress(pending))
+            offset += len(pending) - len(decompressor.unused_data)
+            pending = decompressor.unused_data
+        yield start, b''.join(chunks)
+
+def _parse_record(data):
+    """
+    Split a WARC record into its headers and content block.
+
+    Returns:
+        (CaseInsensitiveDict of WARC headers, block bytes)
+    """
+    head, _, rest = data.partition(b'\r\n\r\n')
+    lines = head.decode('utf-8', 'replace').split('\r\n')
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    length = int(headers.get('Content-Length', len(rest)))
+    return headers, rest[:length]
+
+def _parse_http_response(block):
+    """
+    Parse an archived HTTP response block.
+
+    Returns:
+        (status code, reason, CaseInsensitiveDict of headers, body bytes)
+    """
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status_parts = lines[0].split(' ', 2)
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name:
+            headers[name.strip()] = value.strip()
+    return int(status_parts[1]), status_parts[2] if len(status_parts) > 2 else '', headers, body
+
+class WarcArchive:
+    """
+    Serves archived responses by URL from every WARC file in a directory.
+
+    The directory is indexed once: for each URL, the response archived last
+    is kept, so a page that failed and then succeeded replays as the
+    success. Lookups read one record from disk.
+    """
+    def __init__(self, directory):
+        """
+        Index the archives of a directory.
+
+        Args:
+            directory: Directory holding .warc.gz files
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._lock = threading.Lock()
+        self._build_index()
+
+    def __len__(self):
+        return len(self._index)
+
+    def response_for(self, method, url):
+        """
+        Build the response to a request from the archive, following archived redirects.
+
+        Args:
+            method: HTTP method; only GET responses are archived
+            url: Requested URL
+
+        Returns:
+            requests.Response; a 404 with the reason 'Not In Archive' when
+            the URL was never archived
+        """
+        # Archived under the URL as requests sent it, e.g. with a path added to a bare host
+        current = _prepared_url(url)
+        for _ in range(MAX_REDIRECTS):
+            location = self._index.get(current) if method.upper() == 'GET' else None
+            if location is None:
+                break
+            status_code, reason, headers, body = self._read(*location)
+            if status_code in REDIRECT_STATUSES and headers.get('Location'):
+                current = _prepared_url(urllib.parse.urljoin(current, headers['Location']))
+                continue
+            with self._lock:
+                self.hits += 1
+            return self._response(current, status_code, reason, headers, body)
+
+        with self._lock:
+            self.misses += 1
+        logging.debug(f"Not in archive: {method} {url}")
+        return self._response(url, 404, 'Not In Archive', CaseInsensitiveDict(), b'')
+
+    def report(self):
+        """Get the archive's size and lookup counts."""
+        with self._lock:
+            return {'directory': self.directory, 'urls': len(self._index),
+                    'hits': self.hits, 'misses': self.misses}
+
+    def _build_index(self):
+        """Map each archived URL to the file and offset of its latest response record."""
+        if not os.path.isdir(self.directory):
+            logging.warning(f"WARC directory {self.directory} does not exist; every fetch will miss")
+            return
+        filenames = sorted(name for name in os.listdir(self.directory) if name.endswith(WARC_SUFFIX))
+        for filename in filenames:
+            path = os.path.join(self.directory, filename)
+            with open(path, 'rb') as stream:
+                for offset, data in _read_members(stream):
+                    headers, _ = _parse_record(data)
+                    if headers.get('WARC-Type') == 'response' and headers.get('WARC-Target-URI'):
+                        self._index[headers['WARC-Target-URI']] = (path, offset)
+        logging.info(f"Indexed {len(self._index)} archived URLs in {len(filenames)} WARC files")
+
+    @staticmethod
+    def _read(path, offset):
+        """Read and parse the response record at an offset."""
+        with open(path, 'rb') as stream:
+            stream.seek(offset)
+            _, data = next(_read_members(stream))
+        _, block = _parse_record(data)
+        return _parse_http_response(block)
+
+    @staticmethod
+    def _response(url, status_code, reason, headers, body):
+        """Build a requests.Response the scrapers cannot tell from a live one."""
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = reason
+        response.headers = headers
+        response.url = url
+        response.encoding = get_encoding_from_headers(headers)
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
@@ -0,0 +1,157 @@
+"""
+Utility for serializing database writes through a single writer thread.
+"""
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+from flask import current_app, has_app_context
+from sqlalchemy import text
+
+from app import db
+
+class WriteQueue:
+    """
+    Runs write jobs one at a time on a dedicated thread.
+
+    SQLite allows a single writer at a time; when several scraper threads
+    write concurrently they contend for the lock and can fail with
+    "database is locked". Funnelling batched writes through one thread
+    removes that contention while readers (the web UI) keep reading
+    concurrently under WAL. Each job runs in its own app context and session,
+    inside a BEGIN IMMEDIATE transaction, and is committed when it returns,
+    so a job made of several writes is applied as a whole or not at all.
+    Jobs only flush; the queue commits.
+
+    On other databases jobs run inline in the calling thread, but still in
+    their own app context and session, committed when they return. A job
+    started from inside another job joins its transaction.
+    """
+    def __init__(self, max_pending=1000):
+        """
+        Initialize the queue; the writer thread starts on first use.
+
+        Args:
+            max_pending: Maximum queued jobs before submitters block
+        """
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._local = threading.local()  # depth of write jobs running in this thread
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run a write job and wait for its result.
+
+        Pending changes in the caller's session are committed first, so the
+        job neither waits on the caller's locks nor misses its changes.
+
+        Args:
+            func: Callable doing the writes; it flushes, the queue commits
+            args: Positional arguments for func
+            kwargs: Keyword arguments for func
+
+        Returns:
+            The return value of func
+
+        Raises:
+            Any exception raised by func
+        """
+        if self.in_job() or not has_app_context():
+            return self._call(func, args, kwargs)
+
+        db.session.commit()
+        if not self._serialized():
+            return self._call_in_session(current_app._get_current_object(), func, args, kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue a write job without waiting for it.
+
+        Args:
+            func: Callable doing the writes
+            args: Positional arguments for func
+            kwargs: Keyword arguments for func
+
+        Returns:
+            Future with the return value of func
+        """
+        future = Future()
+        if self.in_job() or not self._serialized():
+            try:
+                if self.in_job() or not has_app_context():
+                    result = self._call(func, args, kwargs)
+                else:
+                    result = self._call_in_session(current_app._get_current_object(), func, args, kwargs)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_started()
+        self._jobs.put((current_app._get_current_object(), func, args, kwargs, future))
+        return future
+
+    def pending(self):
+        """Number of queued jobs."""
+        return self._jobs.qsize()
+
+    def in_job(self):
+        """Whether the current thread is running a write job, whose transaction must not be committed early."""
+        return getattr(self._local, 'depth', 0) > 0
+
+    def _call(self, func, args, kwargs):
+        """Run a job's function, marking the thread as inside a write job."""
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._local.depth -= 1
+
+    def _call_in_session(self, app, func, args, kwargs):
+        """Run a job in a new app context and session, committing it when it returns."""
+        with app.app_context():
+            try:
+                if db.engine.dialect.name == 'sqlite':
+                    # Take the write lock up front instead of upgrading a read lock later
+                    db.session.execute(text("BEGIN IMMEDIATE"))
+                result = self._call(func, args, kwargs)
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def _serialized():
+        """Whether writes go through the writer thread (SQLite only)."""
+        return has_app_context() and db.engine.dialect.name == 'sqlite'
+
+    def _ensure_started(self):
+        """Start the writer thread on first use."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _work(self):
+        """Writer thread loop."""
+        while True:
+            app, func, args, kwargs, future = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(self._call_in_session(app, func, args, kwargs))
+            except Exception as e:
+                logging.error(f"Write job {getattr(func, '__name__', func)} failed: {str(e)}")
+                future.set_exception(e)
+
+# Shared queue for batched scraper writes
+write_queue = WriteQueue()
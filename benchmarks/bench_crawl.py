@@ -0,0 +1,304 @@
+"""
+End-to-end crawl benchmark against local mock storefronts.
+
+A Shopify and a WooCommerce storefront (benchmarks/mock_storefront.py)
+are served on 127.0.0.1. The shops' real domains are pinned to them in the
+transport's DNS cache, so each crawl uses its real site profile. The
+scenarios then run against a temporary SQLite database, with no network
+access and no OpenAI key:
+
+    crawl   ScraperService.crawl on both sites at once, on an empty
+            database (new products: categorization, images, inserts)
+    direct  DirectScraper.scrape_website on both sites at once, re-crawling
+            them (known products: batched updates and price history)
+    replay  the crawl scenario again on an emptied catalogue, with every
+            fetch answered from WARC archives of the scenarios before it
+            (disk-speed extraction and writes, no network)
+
+With replay selected, the scenarios before it archive their responses,
+which costs them a little time.
+
+Each scenario reports pages/sec and products/sec, the p50/p99 fetch
+latency from the run's scrape_events, responses by status and the peak
+RSS of the process. Results are compared with a saved baseline; a
+throughput drop or latency/RSS rise beyond --tolerance is reported as a
+regression and the script exits with status 1.
+
+Usage:
+    python benchmarks/bench_crawl.py [--products 200] [--latency 0.02] [--error-rate 0.02]
+        [--throttle-rate 0.01] [--scenarios crawl direct replay] [--save-baseline]
+        [--baseline benchmarks/baselines/bench_crawl.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_storefront import MockStorefront
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_crawl.json')
+
+# Metric -> True if higher is better
+METRICS = {
+    'pages_per_second': True,
+    'products_per_second': True,
+    'latency_p50_ms': False,
+    'latency_p99_ms': False,
+    'peak_rss_mb': False,
+}
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers, or None if it is empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_parallel(app, jobs):
+    """Run callables in threads, each in an app context, and return their results in order."""
+    results = [None] * len(jobs)
+
+    def run(index, job):
+        with app.app_context():
+            results[index] = job()
+
+    threads = [threading.Thread(target=run, args=(i, job)) for i, job in enumerate(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def measure(app, name, storefronts, jobs, offline=False):
+    """
+    Run one scenario and collect its metrics.
+
+    Args:
+        app: Flask application
+        name: Scenario name
+        storefronts: MockStorefront instances being crawled
+        jobs: Callables returning crawl results, run in parallel
+        offline: Fetches are replayed, so pages are counted from the scrape events
+
+    Returns:
+        Dictionary of metrics
+    """
+    from app.models import ScrapeEvent
+
+    with app.app_context():
+        last_event = ScrapeEvent.query.order_by(ScrapeEvent.id.desc()).first()
+        last_event_id = last_event.id if last_event else 0
+    for storefront in storefronts:
+        storefront.reset_stats()
+
+    start = time.perf_counter()
+    results = run_parallel(app, jobs)
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        latencies = [seconds for (seconds,) in ScrapeEvent.query
+                     .filter(ScrapeEvent.id > last_event_id, ScrapeEvent.fetch_seconds.isnot(None))
+                     .with_entities(ScrapeEvent.fetch_seconds)]
+
+    network_pages = sum(storefront.count(kind, None) for storefront in storefronts for kind in ('listing', 'product'))
+    pages = len(latencies) if offline else network_pages
+    statuses = {}
+    for storefront in storefronts:
+        for (kind, status), count in storefront.stats.items():
+            if kind in ('listing', 'product'):
+                statuses[str(status)] = statuses.get(str(status), 0) + count
+    products = sum(result.get('products_scraped', 0) + result.get('products_updated', 0) for result in results)
+    p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+    return {
+        'seconds': round(elapsed, 3),
+        'pages': pages,
+        'products': products,
+        'failed': sum(result.get('products_failed', 0) for result in results),
+        'statuses': statuses,
+        'network_pages': network_pages,
+        'pages_per_second': round(pages / elapsed, 2),
+        'products_per_second': round(products / elapsed, 2),
+        'latency_p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+        'latency_p99_ms': round(p99 * 1000, 1) if p99 is not None else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'errors': [result['error'] for result in results if result.get('error')],
+    }
+
+def compare(results, baseline, tolerance):
+    """
+    Compare scenario metrics with a baseline.
+
+    Returns:
+        List of regression descriptions
+    """
+    regressions = []
+    for scenario, metrics in results.items():
+        base = baseline.get('scenarios', {}).get(scenario)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            value, reference = metrics.get(metric), base.get(metric)
+            if not value or not reference:
+                continue
+            change = (value - reference) / reference
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{scenario}.{metric}: {value} vs baseline {reference} ({change:+.0%})")
+    return regressions
+
+def print_results(results, baseline):
+    """Print a table of scenario metrics, with the baseline's values alongside."""
+    print(f"{'scenario':<8} {'metric':<20} {'value':>10} {'baseline':>10}")
+    for scenario, metrics in results.items():
+        base = baseline.get('scenarios', {}).get(scenario, {}) if baseline else {}
+        for metric in ['seconds', 'pages', 'network_pages', 'products', 'failed'] + list(METRICS):
+            reference = base.get(metric)
+            print(f"{scenario:<8} {metric:<20} {str(metrics.get(metric)):>10} "
+                  f"{str(reference) if reference is not None else '-':>10}")
+        print(f"{scenario:<8} {'statuses':<20} {json.dumps(metrics['statuses'], sort_keys=True)}")
+        for error in metrics['errors']:
+            print(f"{scenario:<8} error: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end crawl benchmark against mock storefronts')
+    parser.add_argument('--products', type=int, default=200, help='Products per storefront')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.01, help='Random extra seconds per response, at most')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Share of page requests answered with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.01, help='Share of page requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with a 429')
+    parser.add_argument('--scenarios', nargs='+', choices=['crawl', 'direct', 'replay'], default=['crawl', 'direct'])
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Relative change from the baseline reported as a regression')
+    parser.add_argument('--verbose', action='store_true', help='Show the scraper logs')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    settings = {key: getattr(args, key) for key in
+                ('products', 'latency', 'jitter', 'error_rate', 'throttle_rate', 'retry_after')}
+
+    storefronts = [
+        MockStorefront(name, products=args.products, latency=args.latency, jitter=args.jitter,
+                       error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                       retry_after=args.retry_after).start()
+        for name in ('shopify', 'woocommerce')
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Images and exports land in the temporary directory; the LLM is never called
+        os.chdir(tmp)
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault('SESSION_SECRET', 'bench')
+        os.environ.pop('OPENAI_API_KEY', None)
+
+        from app import app, db
+        from app.models import Website, Product, PriceObservation
+        from app.models.database import init_db
+        from app.services.ai_service import AIService
+        from app.services.image_service import ImageService
+        from app.services.scraper_service import ScraperService
+        from app.services.direct_scraper import DirectScraper
+        from app.utils.http_transport import http_transport
+
+        for storefront in storefronts:
+            http_transport.dns_cache.pin(storefront.domain, '127.0.0.1')
+
+        with app.app_context():
+            init_db()
+            Website.query.delete()
+            websites = []
+            for storefront in storefronts:
+                website = Website(name=storefront.platform, url=storefront.website_url(),
+                                  priority=0, request_delay=0, max_products=args.products)
+                db.session.add(website)
+                websites.append(website)
+            db.session.commit()
+            website_ids = [website.id for website in websites]
+            website_urls = [website.url for website in websites]
+
+        ai_service, image_service = AIService(), ImageService()
+        scraper = ScraperService(ai_service, image_service)
+        direct_scraper = DirectScraper(ai_service, image_service)
+
+        scenarios = {
+            'crawl': [lambda website_id=website_id: scraper.crawl(db.session.get(Website, website_id))
+                      for website_id in website_ids],
+            'direct': [lambda url=url: direct_scraper.scrape_website(url, max_products=args.products)
+                       for url in website_urls],
+        }
+        warc_dir = os.path.join(tmp, 'warc')
+        if 'replay' in args.scenarios:
+            http_transport.start_capture(warc_dir)
+
+        results = {}
+        for name in args.scenarios:
+            if name == 'replay':
+                http_transport.stop_capture()
+                http_transport.start_replay(warc_dir)
+                with app.app_context():
+                    PriceObservation.query.delete()
+                    Product.query.delete()
+                    db.session.commit()
+                results[name] = measure(app, name, storefronts, scenarios['crawl'], offline=True)
+                http_transport.stop_replay()
+            else:
+                results[name] = measure(app, name, storefronts, scenarios[name])
+
+    for storefront in storefronts:
+        storefront.stop()
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print(f"Baseline {args.baseline} was recorded with other settings; not comparing")
+            baseline = None
+
+    print(f"{args.products} products per storefront, {args.latency * 1000:.0f}+{args.jitter * 1000:.0f} ms latency, "
+          f"{args.error_rate:.0%} errors, {args.throttle_rate:.0%} throttled")
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'settings': settings,
+                'python': platform.python_version(),
+                'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+                'scenarios': results,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Microbenchmark for the keyword matcher used by AIService.
+
+Compares the compiled single-pass matcher against the previous
+per-keyword substring loops over a synthetic corpus of product texts.
+
+Usage:
+    python benchmarks/bench_keyword_matcher.py [--products 5000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app.config import PRODUCT_CATEGORIES, REPTILE_KEYWORDS, EXCLUDE_KEYWORDS
+from app.utils.keyword_matcher import KeywordMatcher
+
+FILLER_WORDS = [
+    "premium", "quality", "durable", "natural", "large", "small", "medium",
+    "pack", "kit", "set", "glass", "wooden", "ceramic", "digital", "black",
+    "white", "ideal", "for", "with", "and", "the", "your", "easy", "clean",
+    "safe", "non-toxic", "size", "cm", "watt", "bulb", "bowl", "mat", "box",
+    "stand", "cover", "mesh", "lid", "water", "food", "dish", "tool", "tongs",
+]
+
+def build_corpus(count, seed=42):
+    """Build a deterministic corpus of product name/description pairs."""
+    rng = random.Random(seed)
+    vocabulary = REPTILE_KEYWORDS + EXCLUDE_KEYWORDS + [
+        word.lower() for name in PRODUCT_CATEGORIES for word in name.split()
+    ]
+
+    corpus = []
+    for _ in range(count):
+        name_words = rng.sample(FILLER_WORDS, 3) + rng.sample(vocabulary, 1)
+        rng.shuffle(name_words)
+        description_words = [
+            rng.choice(vocabulary) if rng.random() < 0.08 else rng.choice(FILLER_WORDS)
+            for _ in range(rng.randint(20, 150))
+        ]
+        corpus.append({
+            'name': " ".join(name_words).title(),
+            'description': " ".join(description_words)
+        })
+    return corpus
+
+SPECIES_WORDS = [
+    "bearded", "dragon", "python", "boa", "chameleon", "iguana", "skink",
+    "monitor", "axolotl", "newt", "salamander", "isopod", "roach", "locust",
+]
+
+def build_keywords(extra=0, seed=7):
+    """Build keyword lists, optionally padded with synthetic species keywords."""
+    rng = random.Random(seed)
+    reptile_keywords = list(REPTILE_KEYWORDS)
+    for i in range(extra):
+        reptile_keywords.append(f"{rng.choice(SPECIES_WORDS)}{i}")
+    return {
+        'reptile': reptile_keywords,
+        'exclude': list(EXCLUDE_KEYWORDS),
+        'categories': {name: name.split() for name in PRODUCT_CATEGORIES}
+    }
+
+def build_matcher(keywords):
+    """Build a matcher with the same groups as get_product_matcher()."""
+    groups = {'reptile': keywords['reptile'], 'exclude': keywords['exclude']}
+    for name, words in keywords['categories'].items():
+        groups[f'category:{name}'] = words
+    return KeywordMatcher(groups)
+
+def legacy_is_reptile(keywords, combined_text):
+    """The previous relevance check: one substring scan per keyword."""
+    is_reptile = any(keyword.lower() in combined_text for keyword in keywords['reptile'])
+    if is_reptile:
+        is_reptile = not any(keyword.lower() in combined_text for keyword in keywords['exclude'])
+    return is_reptile
+
+def legacy_scan(keywords, product_data):
+    """
+    The previous per-product work: is_reptile_product during scraping, then
+    _keyword_categorization repeating the relevance scan and adding one
+    substring scan per category word.
+    """
+    name = product_data.get('name', '').lower()
+    description = product_data.get('description', '').lower()
+    combined_text = f"{name} {description}"
+
+    is_reptile = legacy_is_reptile(keywords, combined_text)
+    legacy_is_reptile(keywords, combined_text)
+
+    scores = {}
+    for category_name, words in keywords['categories'].items():
+        score = sum(1 for keyword in words if keyword.lower() in combined_text)
+        if score:
+            scores[category_name] = score
+    return is_reptile, scores
+
+def matcher_scan(matcher, product_data):
+    """The compiled matcher: a single pass over the text, shared by both checks."""
+    matches = matcher.scan(f"{product_data['name']} {product_data['description']}")
+    is_reptile = 'reptile' in matches and 'exclude' not in matches
+    scores = {
+        category_name: len(matches[f'category:{category_name}'])
+        for category_name in PRODUCT_CATEGORIES
+        if f'category:{category_name}' in matches
+    }
+    return is_reptile, scores
+
+def time_run(func, corpus, repeat):
+    """Return the best wall-clock time over several runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for product_data in corpus:
+            func(product_data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_case(label, corpus, keywords, repeat):
+    """Time both implementations for one keyword set and print the results."""
+    start = time.perf_counter()
+    matcher = build_matcher(keywords)
+    build_time = time.perf_counter() - start
+
+    legacy_time = time_run(lambda product: legacy_scan(keywords, product), corpus, repeat)
+    matcher_time = time_run(lambda product: matcher_scan(matcher, product), corpus, repeat)
+
+    print(f"[{label}] {len(matcher._labels_by_keyword)} keywords, "
+          f"matcher built in {build_time * 1000:.2f} ms")
+    print(f"  Legacy loops:  {legacy_time:.3f} s  ({len(corpus) / legacy_time:,.0f} products/s)")
+    print(f"  Matcher:       {matcher_time:.3f} s  ({len(corpus) / matcher_time:,.0f} products/s)")
+    print(f"  Speedup:       {legacy_time / matcher_time:.2f}x")
+    return matcher
+
+def main():
+    parser = argparse.ArgumentParser(description='Keyword matcher microbenchmark')
+    parser.add_argument('--products', type=int, default=5000, help='Number of product texts')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation')
+    parser.add_argument('--extra-keywords', type=int, default=500,
+                        help='Synthetic keywords added for the scaling case (0 to skip)')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.products)
+    print(f"Corpus: {len(corpus)} products, "
+          f"{sum(len(p['description']) for p in corpus) / len(corpus):.0f} chars avg description")
+
+    keywords = build_keywords()
+    matcher = run_case("configured", corpus, keywords, args.repeat)
+    if args.extra_keywords:
+        run_case(f"+{args.extra_keywords} keywords", corpus,
+                 build_keywords(args.extra_keywords), args.repeat)
+
+    # The legacy loop also matched substrings inside words (e.g. "cat" in "scatter"),
+    # so some disagreement on relevance is expected
+    agreement = sum(
+        1 for product in corpus
+        if legacy_scan(keywords, product)[0] == matcher_scan(matcher, product)[0]
+    ) / len(corpus)
+    print(f"Relevance agreement with legacy: {agreement * 100:.1f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Startup-time benchmark for the application package.
+
+Each stage runs in a fresh interpreter, the way a script or gunicorn worker
+starts, and reports wall-clock time plus which heavy modules were loaded:
+
+    import      `import app` (package only, no application built)
+    create_app  `from app import app` (configuration, routes, no DB work)
+    request     create_app plus the first request to the login page
+    init_db     create_app plus init_db() (tables, migrations, seed data)
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--database-url sqlite:////tmp/bench.db]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load when their feature is used
+HEAVY_MODULES = [
+    'openai', 'trafilatura', 'bs4', 'requests',
+    'app.services.scraper_service', 'app.services.direct_scraper', 'app.services.ai_service',
+]
+
+STAGES = {
+    'import': "import app",
+    'create_app': "from app import app",
+    'request': (
+        "from app import app\n"
+        "app.test_client().get('/login')"
+    ),
+    'init_db': (
+        "from app import app\n"
+        "from app.models.database import init_db\n"
+        "with app.app_context():\n"
+        "    init_db()"
+    ),
+}
+
+PROBE = """
+import sys, time, json, logging
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def run_stage(code, env):
+    """Run one stage in a fresh interpreter and return its measurement."""
+    probe = PROBE.format(code=code, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', probe], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    total = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_seconds'] = total
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Application startup benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per stage')
+    parser.add_argument('--database-url', help='Database to use (default: a temporary SQLite file)')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES),
+                        help='Stages to run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+        env.setdefault('SESSION_SECRET', 'bench')
+        env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        # Later stages read an initialized database, as a deployed worker would
+        run_stage(STAGES['init_db'], env)
+
+        print(f"{'stage':<12} {'in-process':>12} {'process':>10}  loaded heavy modules")
+        for stage in args.stages:
+            runs = [run_stage(STAGES[stage], env) for _ in range(args.repeat)]
+            seconds = statistics.median(run['seconds'] for run in runs)
+            process_seconds = statistics.median(run['process_seconds'] for run in runs)
+            loaded = ', '.join(runs[-1]['loaded']) or '-'
+            print(f"{stage:<12} {seconds * 1000:>9.1f} ms {process_seconds * 1000:>7.1f} ms  {loaded}")
+
+if __name__ == '__main__':
+    main()
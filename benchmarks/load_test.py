@@ -0,0 +1,286 @@
+"""
+Load test of the web and API layer against a seeded catalogue.
+
+Replays weighted mixes of requests through the Flask test client from
+several threads at once, logged in as the dashboard user:
+
+    polling   what an open dashboard tab does: website status, the status
+              summary and the newest products, over and over
+    browsing  a user paging through products (following cursors), filtering
+              by website and category, searching, opening the dashboard,
+              websites, scrape logs and the export page, and now and then
+              exporting one website as CSV
+    mixed     both at once
+
+Every SQL statement is counted per request with a SQLAlchemy cursor event,
+so the report shows latency percentiles and the queries each endpoint
+issues. An endpoint issuing more queries than its budget in QUERY_BUDGETS
+is an N+1 regression: the query count then grows with the catalogue
+instead of staying constant, and the script exits with status 1.
+
+Seed the database first with benchmarks/seed_catalogue.py.
+
+Usage:
+    python benchmarks/load_test.py [--database-url sqlite:////tmp/loadtest.db] [--mix mixed]
+        [--requests 2000] [--concurrency 4] [--seed 42]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_crawl import percentile
+
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(ROOT, 'data', 'loadtest.db')}"
+
+# Endpoint -> most SQL statements one request may issue, whatever the catalogue size
+QUERY_BUDGETS = {
+    'dashboard': 8,
+    'products': 6,
+    'products_search': 8,
+    'api_products': 3,
+    'api_products_search': 5,
+    'api_website_status': 2,
+    'api_status_summary': 4,
+    'scrape_logs': 6,
+    'websites': 3,
+    'export_page': 3,
+    'export_csv': 4,
+}
+
+# Mix -> endpoint weights
+MIXES = {
+    'polling': {
+        'api_website_status': 40,
+        'api_status_summary': 30,
+        'api_products': 30,
+    },
+    'browsing': {
+        'dashboard': 10,
+        'products': 30,
+        'products_search': 8,
+        'api_products': 25,
+        'api_products_search': 7,
+        'scrape_logs': 6,
+        'websites': 4,
+        'export_page': 8,
+        'export_csv': 2,
+    },
+}
+MIXES['mixed'] = {endpoint: MIXES['polling'].get(endpoint, 0) + MIXES['browsing'].get(endpoint, 0)
+                  for endpoint in {**MIXES['polling'], **MIXES['browsing']}}
+
+SEARCH_TERMS = ['heat mat', 'python', 'gecko substrate', 'uvb', 'thermostat', 'tortoise', 'hide', 'bearded dragon']
+
+class QueryCounter:
+    """Counts the SQL statements each thread issues."""
+    def __init__(self):
+        self._local = threading.local()
+
+    def install(self, engine):
+        """Listen for statements on an engine."""
+        from sqlalchemy import event
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+class Browser:
+    """
+    One simulated user: a logged-in test client and the cursor it is paging with.
+    """
+    def __init__(self, app, rng, websites, categories):
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['authenticated'] = True
+        self.rng = rng
+        self.websites = websites
+        self.categories = categories
+        self.cursor = None
+
+    def _filters(self):
+        """Random listing filters: none, a website, a category or a price range."""
+        choice = self.rng.random()
+        if choice < 0.4:
+            return {}
+        if choice < 0.65:
+            return {'website_id': self.rng.choice(self.websites)}
+        if choice < 0.9:
+            return {'category_id': self.rng.choice(self.categories)}
+        low = self.rng.choice([0, 100, 500, 1000])
+        return {'min_price': low, 'max_price': low + self.rng.choice([200, 1000, 5000])}
+
+    def request(self, endpoint):
+        """
+        Make one request for an endpoint.
+
+        Returns:
+            The response
+        """
+        if endpoint == 'dashboard':
+            return self.client.get('/')
+        if endpoint == 'products':
+            return self.client.get('/products', query_string=self._filters())
+        if endpoint == 'products_search':
+            return self.client.get('/products', query_string={'q': self.rng.choice(SEARCH_TERMS)})
+        if endpoint == 'api_products':
+            # Page on from the last page most of the time, else start over
+            params = {'limit': 20}
+            if self.cursor and self.rng.random() < 0.7:
+                params['cursor'] = self.cursor
+            else:
+                params.update(self._filters())
+            response = self.client.get('/api/products', query_string=params)
+            self.cursor = (response.get_json() or {}).get('pagination', {}).get('next_cursor')
+            return response
+        if endpoint == 'api_products_search':
+            return self.client.get('/api/products', query_string={'q': self.rng.choice(SEARCH_TERMS), 'limit': 20})
+        if endpoint == 'api_website_status':
+            return self.client.get('/api/website-status')
+        if endpoint == 'api_status_summary':
+            return self.client.get('/api/websiteStatusSummary')
+        if endpoint == 'scrape_logs':
+            return self.client.get('/scrape-logs')
+        if endpoint == 'websites':
+            return self.client.get('/websites')
+        if endpoint == 'export_page':
+            return self.client.get('/export')
+        if endpoint == 'export_csv':
+            return self.client.post('/export', data={'format': 'csv', 'website_id': self.rng.choice(self.websites)})
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+def run(app, counter, mix, total, concurrency, seed):
+    """
+    Replay a mix of requests from several threads.
+
+    Args:
+        app: Flask application
+        counter: QueryCounter installed on the engine
+        mix: Endpoint weights
+        total: Number of requests over all threads
+        concurrency: Number of threads
+        seed: Random seed
+
+    Returns:
+        (samples, seconds): endpoint -> list of (seconds, queries, status), and the wall time
+    """
+    from app.models import Website, Category
+
+    with app.app_context():
+        websites = [website.id for website in Website.query.all()]
+        categories = [category.id for category in Category.query.all()]
+
+    endpoints, weights = list(mix), list(mix.values())
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    # One untimed request per endpoint first, so one-off work (the search
+    # index, the category registry, template compilation) is not measured
+    warmup = Browser(app, random.Random(seed), websites, categories)
+    for endpoint in endpoints:
+        warmup.request(endpoint).get_data()
+
+    def worker(index, count):
+        rng = random.Random(seed + index)
+        browser = Browser(app, rng, websites, categories)
+        for endpoint in rng.choices(endpoints, weights, k=count):
+            counter.reset()
+            start = time.perf_counter()
+            response = browser.request(endpoint)
+            response.get_data()
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples[endpoint].append((elapsed, counter.count, response.status_code))
+
+    threads = [threading.Thread(target=worker, args=(i, total // concurrency + (i < total % concurrency)))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+def report(samples, seconds):
+    """
+    Print latency and query statistics per endpoint.
+
+    Returns:
+        List of problems: query budgets exceeded and server errors
+    """
+    problems = []
+    total = sum(len(rows) for rows in samples.values())
+    print(f"{total} requests in {seconds:.1f}s ({total / seconds:.1f} req/s)")
+    print(f"{'endpoint':<20} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'queries':>8} {'max q':>6} {'budget':>6} {'errors':>6}")
+    for endpoint in sorted(samples):
+        rows = samples[endpoint]
+        latencies = [elapsed * 1000 for elapsed, _, _ in rows]
+        queries = [count for _, count, _ in rows]
+        errors = sum(1 for _, _, status in rows if status >= 500)
+        budget = QUERY_BUDGETS.get(endpoint)
+        print(f"{endpoint:<20} {len(rows):>6} {percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.9):>8.1f} "
+              f"{percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f} {sum(queries) / len(queries):>8.1f} "
+              f"{max(queries):>6} {budget if budget is not None else '-':>6} {errors:>6}")
+        if budget is not None and max(queries) > budget:
+            problems.append(f"{endpoint} issued {max(queries)} queries in one request (budget {budget})")
+        if errors:
+            problems.append(f"{endpoint} answered {errors} requests with a server error")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the web and API layer')
+    parser.add_argument('--database-url', default=os.environ.get('LOADTEST_DATABASE_URL', DEFAULT_DATABASE_URL),
+                        help='Seeded database (default: data/loadtest.db)')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed', help='Request mix to replay')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests over all threads')
+    parser.add_argument('--concurrency', type=int, default=4, help='Simulated users making requests at once')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the request sequence')
+    parser.add_argument('--verbose', action='store_true', help='Show the application logs')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Exports land in the temporary directory
+        os.chdir(tmp)
+        os.environ['DATABASE_URL'] = args.database_url
+        os.environ.setdefault('SESSION_SECRET', 'loadtest')
+
+        from app import app, db
+        from app.models import Product
+
+        counter = QueryCounter()
+        with app.app_context():
+            products = Product.query.count()
+            if not products:
+                print(f"No products in {args.database_url}; run benchmarks/seed_catalogue.py first")
+                return 1
+            counter.install(db.engine)
+
+        print(f"{args.mix} mix against {products} products, {args.concurrency} concurrent users")
+        samples, seconds = run(app, counter, MIXES[args.mix], args.requests, args.concurrency, args.seed)
+
+    problems = report(samples, seconds)
+    for problem in problems:
+        print(f"PROBLEM {problem}")
+    return 1 if problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,382 @@
+"""
+Local mock storefront serving the recorded Shopify and WooCommerce pages.
+
+Listing and product pages are rendered from the fixtures in
+benchmarks/fixtures/storefronts for a deterministic synthetic catalogue,
+so the scraper runs its real profiles, selectors and pagination against
+them. Every response can be delayed, and a share of page requests can be
+answered with 500 errors or 429s carrying a Retry-After header.
+
+The server speaks HTTP/1.1 with keep-alive, like a real shop behind a CDN.
+Point the shop's real domain at it through the transport's DNS cache (see
+bench_crawl.py) to have the domain's site profile apply.
+
+Usage:
+    python benchmarks/mock_storefront.py --platform shopify --port 8001 [--latency 0.05]
+"""
+import os
+import re
+import time
+import random
+import argparse
+import threading
+from string import Template
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'storefronts')
+
+# 1x1 transparent PNG served for every product image
+PIXEL_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+
+PLATFORMS = {
+    'shopify': {
+        'domain': 'reptile-garden-sa.myshopify.com',
+        'website_path': '/',
+        'listing_template': 'collection.html',
+        'item_template': 'collection_item.html',
+        'listing_pattern': re.compile(r'^/collections/all/?$'),
+        'product_pattern': re.compile(r'^(?:/collections/all)?/products/([\w-]+)/?$'),
+        'image_path': '/cdn/shop/products/{handle}.png',
+    },
+    'woocommerce': {
+        'domain': 'ultimateexotics.co.za',
+        'website_path': '/shop/',
+        'listing_template': 'shop.html',
+        'item_template': 'shop_item.html',
+        'listing_pattern': re.compile(r'^/shop/(?:page/(\d+)/?)?$'),
+        'product_pattern': re.compile(r'^/product/([\w-]+)/?$'),
+        'image_path': '/wp-content/uploads/2025/01/{handle}.png',
+    },
+}
+
+# Catalogue vocabulary: most names carry a reptile keyword, some are non-reptile products
+ITEMS = [
+    ('Glass Terrarium', 'enclosures', 'Enclosures'), ('PVC Vivarium', 'enclosures', 'Enclosures'),
+    ('UVB Tube', 'lighting', 'Heating & Lighting'), ('Basking Heat Lamp', 'lighting', 'Heating & Lighting'),
+    ('Ceramic Heat Emitter', 'lighting', 'Heating & Lighting'), ('Coco Substrate', 'substrate', 'Substrate'),
+    ('Bioactive Substrate', 'substrate', 'Substrate'), ('Live Crickets', 'feeders', 'Live Food'),
+    ('Mealworms Tub', 'feeders', 'Live Food'), ('Feeder Roaches', 'feeders', 'Live Food'),
+    ('Cork Bark Hide', 'decor', 'Decor'), ('Water Dish', 'decor', 'Decor'),
+    ('Calcium Supplement', 'health', 'Health'), ('Snake Hook', 'handling', 'Handling'),
+]
+SPECIES = ['Gecko', 'Bearded Dragon', 'Ball Python', 'Corn Snake', 'Tortoise', 'Chameleon',
+           'Tarantula', 'Frog', 'Lizard', 'Reptile']
+SIZES = ['Small', 'Medium', 'Large', '45x45x60', '60x45x45', '90x45x60', '25W', '50W', '100W', '2L', '5L']
+NON_REPTILE = ['Dog Bowl', 'Cat Litter Tray', 'Rabbit Hutch', 'Hamster Wheel']
+DESCRIPTION_SENTENCES = [
+    "Designed for {species} keepers who want a reliable setup.",
+    "Suitable for desert and tropical enclosures alike.",
+    "Pairs well with a thermostat to keep temperatures in range.",
+    "Made from durable, easy to clean, non-toxic materials.",
+    "Recommended by our in-store reptile specialists.",
+    "Check the care sheet for your species before use.",
+    "Stock is limited; live products ship Monday to Wednesday only.",
+    "Spot clean weekly and replace as needed.",
+]
+
+def build_catalogue(count, seed=1):
+    """
+    Build a deterministic synthetic product catalogue.
+
+    Args:
+        count: Number of products
+        seed: Random seed; the same seed gives the same catalogue
+
+    Returns:
+        List of product dictionaries with handle, name, price, sku, category and description
+    """
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        species = rng.choice(SPECIES)
+        if rng.random() < 0.05:
+            name = f"{rng.choice(NON_REPTILE)} {rng.choice(SIZES)}"
+            category_slug, category = 'other', 'Other'
+        else:
+            item, category_slug, category = rng.choice(ITEMS)
+            name = f"{item} for {species} {rng.choice(SIZES)}"
+        sentences = [sentence.format(species=species) for sentence in rng.sample(DESCRIPTION_SENTENCES, 4)]
+        products.append({
+            'handle': re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') + f'-{i}',
+            'name': name,
+            # Prices stay below R1000; amounts with thousands separators are out of scope here
+            'price': f"{rng.randint(29, 999)}.{rng.choice(['00', '50', '95', '99'])}",
+            'sku': f"RG-{i:05d}",
+            'post_id': 1000 + i,
+            'category': category,
+            'category_slug': category_slug,
+            'summary': sentences[0],
+            'description': ''.join(f"<p>{sentence}</p>" for sentence in sentences),
+        })
+    return products
+
+def load_templates(platform):
+    """Load a platform's page templates and robots.txt."""
+    directory = os.path.join(FIXTURES_PATH, platform)
+    config = PLATFORMS[platform]
+    templates = {}
+    for key, filename in (('listing', config['listing_template']), ('item', config['item_template']),
+                          ('product', 'product.html')):
+        with open(os.path.join(directory, filename), encoding='utf-8') as f:
+            templates[key] = Template(f.read())
+    with open(os.path.join(directory, 'robots.txt'), encoding='utf-8') as f:
+        templates['robots'] = f.read()
+    return templates
+
+class MockStorefront:
+    """
+    A storefront served on 127.0.0.1 from a background thread.
+
+    Attributes:
+        stats: Responses sent per kind (listing, product, image, robots, other)
+            and per status code
+    """
+    def __init__(self, platform, products=200, per_page=48, latency=0.0, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=1, port=0):
+        """
+        Initialize the storefront; call start() to serve it.
+
+        Args:
+            platform: 'shopify' or 'woocommerce'
+            products: Products in the catalogue
+            per_page: Products per listing page
+            latency: Seconds added to every response
+            jitter: Random extra seconds, up to this much, added to every response
+            error_rate: Share of page requests answered with a 500
+            throttle_rate: Share of page requests answered with a 429
+            retry_after: Retry-After seconds sent with a 429
+            seed: Seed for the catalogue and for injected failures
+            port: Port to listen on (0 picks a free one)
+        """
+        self.platform = platform
+        self.config = PLATFORMS[platform]
+        self.templates = load_templates(platform)
+        self.catalogue = build_catalogue(products, seed)
+        self.index_of = {product['handle']: i for i, product in enumerate(self.catalogue)}
+        self.per_page = per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.stats = {}
+        # Failures are drawn per platform, so two storefronts do not fail in lockstep
+        self._rng = random.Random(f"{platform}-{seed}")
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def domain(self):
+        """The real shop's domain, whose site profile matches these pages."""
+        return self.config['domain']
+
+    @property
+    def port(self):
+        """Port the server listens on."""
+        return self._server.server_port
+
+    def website_url(self, host=None):
+        """
+        Get the URL to register as the website.
+
+        Args:
+            host: Host name to use (default: the shop's domain)
+        """
+        return f"http://{host or self.domain}:{self.port}{self.config['website_path']}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f'mock-{self.platform}',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self):
+        """Clear the response counters."""
+        with self._lock:
+            self.stats = {}
+
+    def count(self, kind, status):
+        """Get the responses sent of a kind with a status (None for any status)."""
+        with self._lock:
+            return sum(value for (k, s), value in self.stats.items()
+                       if k == kind and (status is None or s == status))
+
+    def route(self, path, query):
+        """
+        Render the response for a request path.
+
+        Args:
+            path: URL path
+            query: Query string
+
+        Returns:
+            Tuple of (kind, status, content type, body bytes, extra headers)
+        """
+        if path == '/robots.txt':
+            return 'robots', 200, 'text/plain; charset=utf-8', self.templates['robots'].encode(), {}
+        if path.startswith(self.config['image_path'].split('{')[0]) and path.endswith('.png'):
+            return 'image', 200, 'image/png', PIXEL_PNG, {}
+
+        listing = self.config['listing_pattern'].match(path)
+        product = self.config['product_pattern'].match(path)
+        kind = 'listing' if listing else 'product' if product else 'other'
+        if kind == 'other' or (product and product.group(1) not in self.index_of):
+            return kind, 404, 'text/html; charset=utf-8', b'<html><body><h1>404 Not Found</h1></body></html>', {}
+
+        failure = self._inject_failure()
+        if failure:
+            return (kind,) + failure
+
+        if listing:
+            page = self._page_number(listing, query)
+            body = self._render_listing(page)
+            if body is None:
+                return kind, 404, 'text/html; charset=utf-8', b'<html><body><h1>404 Not Found</h1></body></html>', {}
+        else:
+            body = self._render_product(self.index_of[product.group(1)])
+        return kind, 200, 'text/html; charset=utf-8', body.encode('utf-8'), {}
+
+    def _inject_failure(self):
+        """Pick an injected 500 or 429 for a page request, or None."""
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            return 500, 'text/html; charset=utf-8', b'<html><body><h1>Internal Server Error</h1></body></html>', {}
+        if roll < self.error_rate + self.throttle_rate:
+            return (429, 'text/html; charset=utf-8', b'<html><body><h1>Too Many Requests</h1></body></html>',
+                    {'Retry-After': str(self.retry_after)})
+        return None
+
+    def _page_number(self, listing, query):
+        """Get the listing page requested (?page=N on Shopify, /page/N/ on WooCommerce)."""
+        if listing.groups() and listing.group(1):
+            return int(listing.group(1))
+        match = re.search(r'(?:^|&)page=(\d+)', query or '')
+        return int(match.group(1)) if match else 1
+
+    def _image_url(self, product):
+        return self.config['image_path'].format(handle=product['handle'])
+
+    def _render_listing(self, page):
+        """Render a listing page, or None past the last page."""
+        start = (page - 1) * self.per_page
+        if page < 1 or (start >= len(self.catalogue) and page > 1):
+            return None
+        products = self.catalogue[start:start + self.per_page]
+        items = '\n'.join(self.templates['item'].safe_substitute(product, image=self._image_url(product))
+                          for product in products)
+        has_next = start + self.per_page < len(self.catalogue)
+        return self.templates['listing'].safe_substitute(
+            products=items,
+            pagination=self._pagination(page, has_next),
+            product_count=len(self.catalogue),
+            first=start + 1,
+            last=start + len(products)
+        )
+
+    def _pagination(self, page, has_next):
+        """Render pagination links the way each platform's default theme does."""
+        if self.platform == 'shopify':
+            links = []
+            if page > 1:
+                links.append(f'<span class="prev"><a href="/collections/all?page={page - 1}" '
+                             f'title="&laquo; Previous">&laquo; Previous</a></span>')
+            links.append(f'<span class="page current">{page}</span>')
+            if has_next:
+                links.append(f'<span class="next"><a href="/collections/all?page={page + 1}" '
+                             f'title="Next &raquo;">Next &raquo;</a></span>')
+            return '\n'.join(links)
+
+        links = []
+        if page > 1:
+            links.append(f'<li><a class="prev page-numbers" href="/shop/page/{page - 1}/">&larr;</a></li>')
+        links.append(f'<li><span aria-current="page" class="page-numbers current">{page}</span></li>')
+        if has_next:
+            links.append(f'<li><a class="page-numbers" href="/shop/page/{page + 1}/">{page + 1}</a></li>')
+            links.append(f'<li><a class="next page-numbers" href="/shop/page/{page + 1}/">&rarr;</a></li>')
+        return '\n'.join(links)
+
+    def _render_product(self, index):
+        """Render the product page of a catalogue entry."""
+        product = self.catalogue[index]
+        related = self.catalogue[index + 1:index + 4]
+        related_items = '\n'.join(self.templates['item'].safe_substitute(item, image=self._image_url(item))
+                                  for item in related)
+        return self.templates['product'].safe_substitute(product, image=self._image_url(product),
+                                                         related=related_items)
+
+    def _record(self, kind, status):
+        with self._lock:
+            self.stats[(kind, status)] = self.stats.get((kind, status), 0) + 1
+
+    def _delay(self):
+        """Seconds to wait before answering."""
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._rng.uniform(0, self.jitter)
+
+    def _handler_class(self):
+        storefront = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                path, _, query = self.path.partition('?')
+                kind, status, content_type, body, headers = storefront.route(path, query)
+                delay = storefront._delay()
+                if delay:
+                    time.sleep(delay)
+                storefront._record(kind, status)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a mock Shopify or WooCommerce storefront')
+    parser.add_argument('--platform', choices=list(PLATFORMS), default='shopify')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--products', type=int, default=200, help='Products in the catalogue')
+    parser.add_argument('--per-page', type=int, default=48, help='Products per listing page')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra seconds per response, at most')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of page requests answered with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of page requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with a 429')
+    args = parser.parse_args()
+
+    storefront = MockStorefront(args.platform, products=args.products, per_page=args.per_page,
+                                latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                throttle_rate=args.throttle_rate, retry_after=args.retry_after, port=args.port)
+    print(f"Serving {args.platform} storefront ({len(storefront.catalogue)} products) at "
+          f"{storefront.website_url('127.0.0.1')}")
+    try:
+        storefront._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        storefront._server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Seed a database with a large synthetic product catalogue for load testing.
+
+Products are spread over the configured websites (TARGET_WEBSITES) and
+categories, with creation times over the past year, a price history and a
+few scrape logs per website, so the dashboard, product listing, API and
+export queries run against realistic table sizes. Rows are bulk-inserted
+in batches; 100k products take well under a minute on SQLite.
+
+The database is created (init-db) when needed. Seeding refuses to touch a
+database that already has products unless --append is given, so a
+development database is not filled with fake products by accident.
+
+Usage:
+    python benchmarks/seed_catalogue.py [--products 100000] [--database-url sqlite:////tmp/loadtest.db]
+        [--observations 2] [--batch-size 5000] [--append]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import urllib.parse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_storefront import ITEMS, SPECIES, SIZES, NON_REPTILE, DESCRIPTION_SENTENCES
+
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(ROOT, 'data', 'loadtest.db')}"
+
+def product_rows(count, websites, categories, start_index=0, seed=42):
+    """
+    Generate product rows for bulk insertion.
+
+    Args:
+        count: Number of products
+        websites: List of (id, url) of the websites to spread products over
+        categories: List of category IDs
+        start_index: Index of the first product, so appended products get new identities
+        seed: Random seed
+
+    Yields:
+        Dictionaries of Product column values
+    """
+    from app.models import Product
+    from app.utils.hash_utils import generate_hash_id
+
+    rng = random.Random(seed + start_index)
+    now = datetime.utcnow()
+    for i in range(start_index, start_index + count):
+        website_id, website_url = websites[i % len(websites)]
+        species = rng.choice(SPECIES)
+        if rng.random() < 0.05:
+            name = f"{rng.choice(NON_REPTILE)} {rng.choice(SIZES)}"
+        else:
+            name = f"{rng.choice(ITEMS)[0]} for {species} {rng.choice(SIZES)}"
+        description = ' '.join(sentence.format(species=species)
+                               for sentence in rng.sample(DESCRIPTION_SENTENCES, 3))
+        price = round(rng.uniform(29, 4999), 2)
+        origin = urllib.parse.urlsplit(website_url)
+        url = f"{origin.scheme}://{origin.netloc}/products/item-{i}"
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        product_data = {'name': name, 'description': description, 'price': price, 'currency': 'ZAR',
+                        'image_url': f"{url}.jpg", 'sku': None}
+        identity_key = Product.identity_key_for(website_id, url=url)
+        yield {
+            'hash_id': identity_key or generate_hash_id(f"{name}-{i}"),
+            'identity_key': identity_key,
+            'content_hash': Product.content_hash_for(product_data),
+            'name': name,
+            'description': description,
+            'price': price,
+            'currency': 'ZAR',
+            'price_zar': price,
+            'url': url,
+            'image_url': product_data['image_url'],
+            'website_id': website_id,
+            # A share of products stays uncategorized, as after a run without the LLM
+            'category_id': rng.choice(categories) if rng.random() < 0.9 else None,
+            'confidence_score': round(rng.uniform(0.3, 1.0), 2),
+            'category_confirmed': rng.random() < 0.02,
+            'created_at': created_at,
+            'updated_at': created_at + timedelta(seconds=rng.randint(0, int((now - created_at).total_seconds()))),
+        }
+
+def seed(count, observations=2, batch_size=5000, append=False):
+    """
+    Insert synthetic products, price observations and scrape logs.
+
+    Args:
+        count: Number of products
+        observations: Price observations per product (0 for none)
+        batch_size: Rows per insert statement batch
+        append: Add to a database that already has products
+    """
+    from sqlalchemy import func, insert, select
+
+    from app import db
+    from app.models import Website, Category, Product, PriceObservation, ScrapeLog
+    from app.utils.hash_utils import generate_hash_id
+
+    existing = db.session.query(func.count(Product.id)).scalar()
+    if existing and not append:
+        raise SystemExit(f"The database already has {existing} products; use --append to add more")
+
+    websites = [(website.id, website.url) for website in Website.query.order_by(Website.id)]
+    categories = [category.id for category in Category.query.order_by(Category.id)]
+    if not websites or not categories:
+        raise SystemExit("No websites or categories; run init-db first")
+
+    start = time.perf_counter()
+    inserted = 0
+    batch = []
+    for row in product_rows(count, websites, categories, start_index=existing):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            inserted += _insert_batch(batch, observations)
+            batch = []
+            rate = inserted / (time.perf_counter() - start)
+            logging.info(f"{inserted}/{count} products ({rate:,.0f}/s)")
+    if batch:
+        inserted += _insert_batch(batch, observations)
+
+    # A month of daily scrape logs per website for the dashboard and scrape logs page
+    now = datetime.utcnow()
+    logs = []
+    for website_id, _ in websites:
+        for day in range(30):
+            start_time = now - timedelta(days=day, hours=random.randint(0, 12))
+            logs.append({
+                'hash_id': generate_hash_id(f"{website_id}-{start_time.isoformat()}-{existing}"),
+                'website_id': website_id,
+                'start_time': start_time,
+                'end_time': start_time + timedelta(minutes=random.randint(2, 40)),
+                'status': 'completed' if random.random() < 0.9 else 'failed',
+                'products_found': count // len(websites),
+                'products_scraped': random.randint(0, 200),
+                'products_failed': random.randint(0, 10),
+                'avg_request_time': round(random.uniform(0.2, 2.0), 3),
+                'total_request_count': random.randint(100, 5000),
+            })
+    db.session.execute(insert(ScrapeLog), logs)
+    db.session.execute(Website.__table__.update().values(status='completed', last_scraped=now))
+    db.session.commit()
+
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {inserted} products ({inserted * observations} price observations) over "
+          f"{len(websites)} websites and {len(categories)} categories in {elapsed:.1f}s")
+
+def _insert_batch(rows, observations):
+    """Insert a batch of products and their price observations; returns the products inserted."""
+    from sqlalchemy import insert, select
+
+    from app import db
+    from app.models import Product, PriceObservation
+
+    db.session.execute(insert(Product), rows)
+    if observations:
+        ids = dict(db.session.execute(
+            select(Product.identity_key, Product.id).where(Product.identity_key.in_([row['identity_key'] for row in rows]))
+        ).all())
+        history = []
+        for row in rows:
+            seen = row['created_at']
+            step = (row['updated_at'] - seen) / observations
+            for n in range(observations):
+                # Older observations had other prices; the newest matches the product
+                price = row['price'] if n == observations - 1 else round(row['price'] * random.uniform(0.8, 1.2), 2)
+                history.append({
+                    'product_id': ids[row['identity_key']],
+                    'price': price,
+                    'currency': 'ZAR',
+                    'price_zar': price,
+                    'first_seen': seen + step * n,
+                    'last_seen': seen + step * (n + 1),
+                    'observation_count': random.randint(1, 10),
+                })
+        db.session.execute(insert(PriceObservation), history)
+    db.session.commit()
+    return len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a synthetic product catalogue for load testing')
+    parser.add_argument('--products', type=int, default=100000, help='Products to insert')
+    parser.add_argument('--database-url', default=os.environ.get('LOADTEST_DATABASE_URL', DEFAULT_DATABASE_URL),
+                        help='Database to seed (default: data/loadtest.db)')
+    parser.add_argument('--observations', type=int, default=2, help='Price observations per product')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per insert batch')
+    parser.add_argument('--append', action='store_true', help='Add to a database that already has products')
+    parser.add_argument('--verbose', action='store_true', help='Log progress')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('SESSION_SECRET', 'loadtest')
+
+    from app import app
+    from app.models.database import init_db
+
+    with app.app_context():
+        init_db()
+        seed(args.products, observations=args.observations, batch_size=args.batch_size, append=args.append)
+
+if __name__ == '__main__':
+    main()
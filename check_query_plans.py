@@ -0,0 +1,131 @@
+"""
+Check the query plans of the application's hot queries for sequential scans.
+
+Runs EXPLAIN on the product listing, export, scraping and scrape log queries
+and reports any that read a whole table instead of using an index. On
+PostgreSQL sequential scans are disabled for the check by default, since the
+planner rightly prefers them on small tables; a query that still scans has
+no usable index.
+
+Usage:
+    python check_query_plans.py [--allow-seqscan] [--verbose]
+"""
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+from sqlalchemy import func, tuple_
+
+from app import app, db
+from app.models import Product, ScrapeLog
+
+def hot_queries():
+    """
+    Build the queries to check, mirroring api.py, routes.py and ExportService.
+
+    Returns:
+        List of (label, query) tuples
+    """
+    newest = Product.query.order_by(Product.created_at.desc(), Product.id.desc())
+    cursor = (datetime.utcnow(), 2 ** 31)
+
+    return [
+        ('products: newest page', newest.limit(21)),
+        ('products: page after cursor',
+         newest.filter(tuple_(Product.created_at, Product.id) < cursor).limit(21)),
+        ('products: by category', newest.filter(Product.category_id == 1).limit(21)),
+        ('products: by website', newest.filter(Product.website_id == 1).limit(21)),
+        ('products: by category after cursor',
+         newest.filter(Product.category_id == 1,
+                       tuple_(Product.created_at, Product.id) < cursor).limit(21)),
+        ('products: duplicate check by url', Product.query.filter(Product.url == 'https://example.com/p')),
+        ('products: count by category', db.session.query(func.count(Product.id)).filter(Product.category_id == 1)),
+        ('products: export by category', Product.query.filter(Product.category_id == 1).order_by(Product.name)),
+        ('products: export ordered by name', Product.query.order_by(Product.name).limit(100)),
+        ('products: changed since', Product.query.filter(Product.updated_at >= datetime.utcnow())),
+        ('products: last change', db.session.query(func.max(Product.updated_at))),
+        ('scrape_logs: by website',
+         ScrapeLog.query.filter_by(website_id=1).order_by(ScrapeLog.start_time.desc()).limit(10)),
+        ('scrape_logs: latest', ScrapeLog.query.order_by(ScrapeLog.start_time.desc()).limit(10)),
+    ]
+
+def explain(connection, query):
+    """
+    Get the plan for a query.
+
+    Args:
+        connection: SQLAlchemy connection
+        query: SQLAlchemy ORM query
+
+    Returns:
+        Tuple of (list of tables scanned sequentially, plan text)
+    """
+    compiled = query.statement.compile(dialect=connection.dialect)
+    sql = str(compiled)
+    params = compiled.params
+    if compiled.positiontup is not None:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+
+    if connection.dialect.name == 'postgresql':
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = []
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node.get('Node Type') == 'Seq Scan':
+                scans.append(node.get('Relation Name'))
+            nodes.extend(node.get('Plans', []))
+        return scans, json.dumps(plan, indent=2)
+
+    # SQLite: "SCAN <table>" without an index is a full table scan
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+    details = [row[-1] for row in rows]
+    scans = [
+        detail.split()[1] for detail in details
+        if detail.startswith('SCAN ') and 'INDEX' not in detail
+    ]
+    return scans, '\n'.join(details)
+
+def main():
+    parser = argparse.ArgumentParser(description='Flag hot queries that use sequential scans')
+    parser.add_argument('--allow-seqscan', action='store_true',
+                        help='Leave sequential scans enabled on PostgreSQL (show the real plans)')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = parser.parse_args()
+
+    flagged = 0
+    checked = 0
+    with app.app_context():
+        with db.engine.connect() as connection:
+            if connection.dialect.name == 'postgresql' and not args.allow_seqscan:
+                connection.exec_driver_sql("SET enable_seqscan = off")
+
+            for label, query in hot_queries():
+                scans, plan = explain(connection, query)
+                checked += 1
+                status = f"SEQ SCAN on {', '.join(scans)}" if scans else "ok"
+                print(f"{label:<40} {status}")
+                if scans:
+                    flagged += 1
+                if args.verbose or scans:
+                    print('    ' + plan.replace('\n', '\n    '))
+
+    print()
+    print(f"{flagged} of {checked} queries use sequential scans")
+    return 1 if flagged else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,16 @@
 """
 Main entry point for the Reptile Products Scraper application.
+
+Serve with `gunicorn main:app`; run `flask --app app init-db` first to
+create tables and apply migrations.
 """
-from app import app
+from app import create_app
+
+app = create_app()
 
 if __name__ == '__main__':
+    # The development server sets up the database itself
+    from app.models.database import init_db
+    with app.app_context():
+        init_db()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,36 @@
+"""
+Shared fixtures: an application on a temporary SQLite database.
+"""
+import pytest
+
+from app import create_app, db
+from app.models.database import init_db
+from app.models.website import Website
+from app.services.category_registry import category_registry
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application with an empty SQLite database in a temporary directory; tables are not created."""
+    # create_app() makes its data directories in the working directory
+    monkeypatch.chdir(tmp_path)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", 'TESTING': True,
+                      'SECRET_KEY': 'test'})
+    with app.app_context():
+        yield app
+        db.session.remove()
+        category_registry.invalidate()
+        db.engine.dispose()
+
+@pytest.fixture
+def database(app):
+    """Application database with every table, migration and seed applied."""
+    init_db()
+    return db
+
+@pytest.fixture
+def website(database):
+    """A website to attach products to."""
+    website = Website(name='Test Shop', url='https://shop.example.com/')
+    db.session.add(website)
+    db.session.commit()
+    return website
@@ -0,0 +1,28 @@
+"""
+Tests for turning LLM categorization responses into results.
+"""
+import pytest
+
+from app.services.ai_service import AIService
+
+PRODUCT = {'name': 'Ceramic Heat Emitter 100W', 'description': 'Heat lamp for reptile enclosures'}
+
+@pytest.mark.parametrize('result_text', [None, '', '["Heating"]', 'null', '42', '{"category": '])
+def test_malformed_responses_fall_back_to_keywords(database, result_text):
+    service = AIService()
+    expected = service._keyword_categorization(PRODUCT)
+    assert service._handle_categorization_response(PRODUCT, result_text) == expected
+
+def test_valid_response_is_used(database):
+    result = AIService()._handle_categorization_response(
+        PRODUCT, '{"category": "Heating & Lighting", "confidence": 0.9}')
+    assert result == {'category_name': 'Heating & Lighting', 'confidence_score': 0.9}
+
+def test_llm_metrics_are_exported(app):
+    from app.services.llm_client import get_llm_client
+
+    get_llm_client('test-key').metrics.record_call(0.4, prompt_tokens=120, completion_tokens=30)
+    body = app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'scraper_llm_tokens_total{kind="prompt"} 120' in body
+    assert 'scraper_llm_calls_total{result="ok"} 1' in body
+    assert 'scraper_llm_latency_seconds{quantile="0.5"} 0.4' in body
@@ -0,0 +1,69 @@
+"""
+Tests for the /api/products listing.
+"""
+from sqlalchemy import event, text
+
+from app import db
+from app.models.product import Product
+
+def add_products(website, count):
+    for index in range(count):
+        db.session.add(Product(name=f"Gecko Hide {index}", website_id=website.id, price=50.0 + index,
+                               url=f"https://shop.example.com/products/hide-{index}"))
+    db.session.commit()
+
+def counted(client, url):
+    """Get a page, also returning whether a COUNT query ran."""
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url).get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return response, any('count(' in statement.lower() for statement in statements)
+
+def test_offset_pagination_keeps_an_exact_total(app, website):
+    add_products(website, 5)
+    client = app.test_client()
+
+    first = client.get('/api/products?limit=2&offset=0').get_json()['pagination']
+    assert first['total'] == 5
+    assert first['total_is_estimate'] is False
+    assert first['offset'] == 0
+    assert first['has_more'] is True
+
+    deeper = client.get('/api/products?limit=2&offset=4').get_json()
+    assert deeper['pagination']['offset'] == 4
+    assert deeper['pagination']['total'] == 5
+    assert len(deeper['products']) == 1
+
+    filtered = client.get('/api/products?min_price=52&offset=0').get_json()['pagination']
+    assert filtered['total'] == 3
+    assert filtered['total_is_estimate'] is False
+
+def test_keyset_pages_do_not_count(app, website):
+    add_products(website, 5)
+    client = app.test_client()
+
+    first, count_ran = counted(client, '/api/products?limit=2&min_price=51')
+    assert not count_ran
+    assert first['pagination']['total'] is None
+    assert first['pagination']['offset'] == 0
+
+    second, count_ran = counted(client, f"/api/products?limit=2&min_price=51&cursor={first['pagination']['next_cursor']}")
+    assert not count_ran
+    assert second['pagination']['total'] is None
+    assert [p['name'] for p in second['products']] == ['Gecko Hide 2', 'Gecko Hide 1']
+
+def test_unfiltered_keyset_pages_get_the_estimated_total(app, website):
+    add_products(website, 5)
+    client = app.test_client()
+    assert client.get('/api/products').get_json()['pagination']['total'] is None
+
+    with db.engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    page, count_ran = counted(client, '/api/products?limit=2')
+    assert not count_ran
+    assert page['pagination']['total'] == 5
+    assert page['pagination']['total_is_estimate'] is True
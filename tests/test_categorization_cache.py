@@ -0,0 +1,40 @@
+"""
+Tests for the categorization cache.
+"""
+from app import db
+from app.models.categorization_cache import CategorizationCache
+from app.models.website import Website
+from app.services.categorization_cache_service import CategorizationCacheService
+
+PRODUCT = {'name': 'Ceramic Heat Emitter 100W', 'description': 'Heat lamp for reptile enclosures'}
+RESULT = {'category_name': 'Heating & Lighting', 'confidence_score': 0.9}
+
+def entry():
+    db.session.expire_all()
+    return CategorizationCache.query.one()
+
+def test_results_are_stored_without_committing_the_callers_session(database):
+    db.session.add(Website(name='Unsaved Shop', url='https://unsaved.example.com/'))
+    CategorizationCacheService().set(PRODUCT, RESULT).result()
+    db.session.rollback()
+
+    assert Website.query.filter_by(name='Unsaved Shop').count() == 0
+    assert entry().category_name == 'Heating & Lighting'
+    # A new process finds the stored result
+    assert CategorizationCacheService().get(PRODUCT) == RESULT
+
+def test_hits_are_counted_in_memory_and_written_in_batches(database):
+    CategorizationCacheService().set(PRODUCT, RESULT).result()
+    cache = CategorizationCacheService(hit_batch=3)
+
+    assert cache.get(PRODUCT) == RESULT
+    assert cache.get(PRODUCT) == RESULT
+    assert not db.session.new and not db.session.dirty
+    assert entry().hit_count == 0
+
+    assert cache.get(PRODUCT) == RESULT
+    cache.get(PRODUCT)
+    cache.flush().result()
+    assert entry().hit_count == 4
+    assert entry().last_hit_at is not None
+    assert cache.hits == 4
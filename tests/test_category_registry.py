@@ -0,0 +1,24 @@
+"""
+Tests for the in-memory category registry.
+"""
+from app import db
+from app.models.category import Category
+from app.models.website import Website
+from app.services.category_registry import category_registry
+
+def test_created_category_is_committed_with_the_caller(database):
+    category_id = category_registry.get_or_create_id('Feeder Insects')
+    db.session.commit()
+    db.session.remove()
+
+    assert db.session.get(Category, category_id).name == 'Feeder Insects'
+    assert category_registry.get_id('Feeder Insects') == category_id
+
+def test_creating_a_category_leaves_the_callers_transaction_open(database):
+    db.session.add(Website(name='Pending Shop', url='https://pending.example.com/'))
+    category_registry.get_or_create_id('Feeder Insects')
+    db.session.rollback()
+
+    assert Website.query.filter_by(name='Pending Shop').first() is None
+    assert Category.find_by_name('Feeder Insects') is None
+    assert category_registry.get_id('Feeder Insects') is None
@@ -0,0 +1,112 @@
+"""
+Tests for the per-host circuit breaker.
+"""
+import io
+import threading
+import time
+
+from app.services import scraper_service
+from app.services.circuit_breaker import CircuitBreaker, HALF_OPEN
+from app.services.crawl_sinks import JsonLinesSink
+from app.services.scraper_service import ScraperService
+
+HOST = 'shop.example.com'
+
+def open_breaker():
+    """A breaker, used outside an app context so it stays in memory, with HOST's circuit open."""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05, max_cooldown=1.0)
+    breaker.record_failure(HOST)
+    breaker.record_failure(HOST)
+    return breaker
+
+def test_open_circuit_refuses_requests_until_the_cooldown_passes():
+    breaker = open_breaker()
+    assert breaker.is_open(HOST)
+    assert not breaker.allow(HOST)
+
+    time.sleep(0.06)
+    assert not breaker.is_open(HOST)
+
+def test_half_open_circuit_lets_exactly_one_probe_through():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow(HOST)
+    assert breaker.snapshot()[0]['state'] == HALF_OPEN
+    # The crawl keeps its frontier while the probe is out, but sends nothing else
+    assert not breaker.is_open(HOST)
+    assert not breaker.allow(HOST)
+
+    breaker.record_success(HOST)
+    assert not breaker.is_open(HOST)
+    assert breaker.allow(HOST)
+
+def test_failed_probe_reopens_the_circuit_for_longer():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow(HOST)
+    breaker.record_failure(HOST)
+    assert breaker.is_open(HOST)
+    assert breaker.snapshot()[0]['cooldown'] == 0.1
+
+    time.sleep(0.06)
+    assert breaker.is_open(HOST)
+    assert not breaker.allow(HOST)
+
+def test_refused_requests_are_told_when_to_try_again():
+    breaker = open_breaker()
+    assert 0.0 < breaker.retry_after(HOST) <= 0.05
+
+    time.sleep(0.06)
+    assert breaker.allow(HOST)
+    breaker.sync_interval = 0.01
+    # The probe's answer is due at the next sync
+    assert not breaker.allow(HOST)
+    assert 0.0 < breaker.retry_after(HOST) <= 0.01
+
+    breaker.record_success(HOST)
+    assert breaker.retry_after(HOST) == 0.0
+
+class Response:
+    status_code = 200
+    headers = {}
+    text = '<html></html>'
+    content = text.encode()
+
+class ProductTransport:
+    """Serves every product page, counting the requests."""
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return Response()
+
+def test_queued_pages_wait_for_a_half_open_probe(website, monkeypatch):
+    """Pages refused while another request probes the host are fetched once the probe succeeds."""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.3, sync_interval=0.02)
+    monkeypatch.setattr(scraper_service, 'circuit_breaker', breaker)
+    monkeypatch.setattr(scraper_service.robots_cache, 'allowed', lambda url: True)
+    links = [f'https://shop.example.com/products/gecko-{number}' for number in range(3)]
+    scraper = ScraperService(None, None)
+    scraper.transport = ProductTransport()
+    monkeypatch.setattr(scraper, '_extract_product_links', lambda url, profile, events: links)
+    monkeypatch.setattr(scraper, '_parse_product',
+                        lambda html, url, website_id, profile: {'name': url, 'url': url, 'price': 10.0})
+
+    website.request_delay = 0.0
+    breaker.record_failure(HOST)
+    time.sleep(0.31)
+    # Another process sends the probe, which succeeds while the crawl runs
+    assert breaker.allow(HOST)
+    probe = threading.Timer(0.1, breaker.record_success, (HOST,))
+    probe.start()
+    try:
+        result = scraper.crawl(website, sink=JsonLinesSink(io.StringIO()), dry_run=True)
+    finally:
+        probe.cancel()
+
+    assert result['products_scraped'] == 3
+    assert result['products_skipped'] == 0
+    assert sorted(scraper.transport.urls) == links
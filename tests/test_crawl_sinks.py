@@ -0,0 +1,51 @@
+"""
+Tests for the database sink of the crawl engine.
+"""
+from app.models.category import Category
+from app.models.product import Product
+from app.services.crawl_sinks import DatabaseSink
+from app.services.scraper_service import ScraperService
+
+class RecordingAIService:
+    """Categorizes everything as Heating & Lighting, recording each call's products."""
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def categorize_products(self, products_data):
+        self.calls.append([product_data['name'] for product_data in products_data])
+        if self.fail:
+            raise RuntimeError('categorization unavailable')
+        return [{'category_name': 'Heating & Lighting', 'confidence_score': 0.9} for _ in products_data]
+
+def product(number):
+    return {'name': f'Basking Lamp {number}', 'description': 'A lamp.', 'price': 99.0, 'currency': 'ZAR',
+            'url': f'https://shop.example.com/products/lamp-{number}', 'sku': None, 'image_url': None}
+
+def test_new_products_are_categorized_and_saved_in_batches(website):
+    ai_service = RecordingAIService()
+    sink = DatabaseSink(ScraperService(ai_service, None), batch_size=3)
+
+    assert [sink.write(product(number), website.id) for number in range(2)] == ['created', 'created']
+    assert ai_service.calls == []
+    assert Product.query.count() == 0
+
+    sink.write(product(2), website.id)
+    assert ai_service.calls == [['Basking Lamp 0', 'Basking Lamp 1', 'Basking Lamp 2']]
+    assert Product.query.count() == 3
+
+    sink.write(product(3), website.id)
+    assert sink.write(product(0), website.id) == 'updated'
+    sink.flush(website.id)
+    assert ai_service.calls[1:] == [['Basking Lamp 3']]
+    assert Product.query.count() == 4
+    assert {p.category.name for p in Product.query} == {'Heating & Lighting'}
+    assert sink.failed == 0
+
+def test_products_of_a_failed_batch_are_counted_as_failed(website):
+    sink = DatabaseSink(ScraperService(RecordingAIService(fail=True), None), batch_size=10)
+    for number in range(2):
+        sink.write(product(number), website.id)
+    sink.flush(website.id)
+    assert sink.failed == 2
+    assert Product.query.count() == 0
@@ -0,0 +1,33 @@
+"""
+Tests for exchange rate refreshes around writes.
+"""
+import pytest
+
+from app import db
+from app.models.website import Website
+from app.services.currency_service import CurrencyService, StaticRateSource
+from app.utils.write_queue import write_queue
+
+def test_expired_rates_are_not_refreshed_inside_a_write(database):
+    service = CurrencyService(source=StaticRateSource({'USD': 18.0}), ttl=0)
+
+    def job():
+        db.session.add(Website(name='Half Written', url='https://half.example.com/'))
+        db.session.flush()
+        service.to_zar(10.0, 'USD')
+        raise RuntimeError('write failed')
+
+    with pytest.raises(RuntimeError):
+        write_queue.run(job)
+
+    # The refresh did not commit the job's first half
+    assert Website.query.filter_by(name='Half Written').first() is None
+    # Outside the write the expired rates are refreshed
+    assert service.to_zar(10.0, 'USD') == 180.0
+
+def test_pending_changes_defer_the_refresh(database):
+    service = CurrencyService(source=StaticRateSource({'USD': 18.0}), ttl=0)
+    db.session.add(Website(name='Pending Shop', url='https://pending.example.com/'))
+    service.to_zar(10.0, 'USD')
+    db.session.rollback()
+    assert Website.query.filter_by(name='Pending Shop').first() is None
@@ -0,0 +1,53 @@
+"""
+Tests for the shared HTTP transport's DNS cache.
+"""
+import socket
+
+import pytest
+
+from app.utils import http_transport
+from app.utils.http_transport import DNSCache
+
+ADDRESS = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('192.0.2.10', 443))]
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Fake getaddrinfo, recording the hosts looked up."""
+    hosts = []
+
+    def getaddrinfo(host, port, family, type_):
+        hosts.append(host)
+        if host == 'missing.example.com':
+            raise socket.gaierror('Name or service not known')
+        return ADDRESS
+
+    monkeypatch.setattr(http_transport.socket, 'getaddrinfo', getaddrinfo)
+    return hosts
+
+def test_addresses_are_reused_until_they_expire(lookups):
+    cache = DNSCache(ttl=60)
+    assert cache.resolve('shop.example.com', 443) == ADDRESS
+    assert cache.resolve('shop.example.com', 443) == ADDRESS
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    expired = DNSCache(ttl=0)
+    expired.resolve('shop.example.com', 443)
+    expired.resolve('shop.example.com', 443)
+    assert lookups == ['shop.example.com'] * 3
+
+def test_failed_lookups_are_not_cached(lookups):
+    cache = DNSCache(ttl=60)
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.resolve('missing.example.com', 443)
+    assert lookups == ['missing.example.com'] * 2
+
+def test_pinned_hosts_resolve_to_their_address(lookups):
+    cache = DNSCache(ttl=60)
+    cache.pin('Shop.Example.com', '127.0.0.1')
+    cache.resolve('shop.example.com', 443)
+    assert lookups == ['127.0.0.1']
+
+    cache.clear()
+    cache.resolve('shop.example.com', 443)
+    assert lookups == ['127.0.0.1', 'shop.example.com']
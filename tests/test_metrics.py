@@ -0,0 +1,83 @@
+"""
+Tests for the in-process metrics and the /metrics endpoint.
+"""
+import threading
+
+import pytest
+
+from app.utils.metrics import (Counter, Gauge, Histogram, MetricsRegistry, StageTimings, STAGE_SECONDS,
+                               collect_stages, stage)
+
+def test_counters_and_gauges_render_in_the_prometheus_format():
+    registry = MetricsRegistry()
+    responses = registry.register(Counter('responses_total', 'Responses.', ['host', 'status']))
+    limit = registry.register(Gauge('limit', 'Limit.', ['host'], function=lambda: {('a.example.com',): 2.5}))
+    responses.inc(host='a.example.com', status=200)
+    responses.inc(2, host='a.example.com', status=200)
+    responses.inc(host='say "hi"\n', status='error')
+
+    assert responses.value(host='a.example.com', status=200) == 3
+    assert limit.render() == ['# HELP limit Limit.', '# TYPE limit gauge', 'limit{host="a.example.com"} 2.5']
+    assert registry.render() == (
+        '# HELP responses_total Responses.\n'
+        '# TYPE responses_total counter\n'
+        'responses_total{host="a.example.com",status="200"} 3\n'
+        'responses_total{host="say \\"hi\\"\\n",status="error"} 1\n'
+        '# HELP limit Limit.\n'
+        '# TYPE limit gauge\n'
+        'limit{host="a.example.com"} 2.5\n'
+    )
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('fetch_seconds', 'Fetch time.', buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(seconds)
+
+    assert histogram.render()[2:] == [
+        'fetch_seconds_bucket{le="0.1"} 2',
+        'fetch_seconds_bucket{le="1.0"} 3',
+        'fetch_seconds_bucket{le="+Inf"} 4',
+        'fetch_seconds_sum 5.65',
+        'fetch_seconds_count 4',
+    ]
+
+def test_metrics_are_checked_on_use():
+    registry = MetricsRegistry()
+    registry.register(Counter('pages_total', 'Pages.'))
+    with pytest.raises(ValueError):
+        registry.register(Counter('pages_total', 'Pages.'))
+    with pytest.raises(ValueError):
+        Counter('responses_total', 'Responses.', ['host']).inc(status=200)
+
+def time_parse():
+    with stage('parse'):
+        pass
+
+def test_stages_are_added_to_the_crawl_collecting_them():
+    timings = StageTimings()
+    parse_count = STAGE_SECONDS._values.get(('parse',), {'count': 0})['count']
+
+    with collect_stages(timings):
+        time_parse()
+        # Other threads collect for their own crawl, or for none
+        worker = threading.Thread(target=time_parse)
+        worker.start()
+        worker.join()
+    time_parse()
+
+    assert timings.get('parse')['count'] == 1
+    assert timings.get('fetch') is None
+    # Every stage still reaches the process-wide histogram
+    assert STAGE_SECONDS._values[('parse',)]['count'] == parse_count + 3
+    assert set(timings.to_dict()['parse']) == {'count', 'seconds', 'mean', 'max'}
+
+def test_metrics_endpoint(app):
+    with stage('fetch'):
+        pass
+    response = app.test_client().get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE scraper_stage_seconds histogram' in body
+    assert 'scraper_stage_seconds_count{stage="fetch"}' in body
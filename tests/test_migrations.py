@@ -0,0 +1,109 @@
+"""
+Tests for the schema operations used by migrations.
+"""
+import pytest
+from sqlalchemy import inspect, text
+
+from app import db, migrations
+from app.migrations import MigrationError, Operations, upgrade
+from app.models.database import init_db
+from app.models.scrape_log import ScrapeLog
+from app.models.website import Website
+
+@pytest.fixture
+def logs(app):
+    """A table with indexes, a unique constraint and a table referencing it."""
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE logs (id INTEGER PRIMARY KEY, name VARCHAR(20) NOT NULL, details TEXT, "
+            "started_at DATETIME, UNIQUE (name))"
+        ))
+        connection.execute(text("CREATE INDEX ix_logs_started_at ON logs (started_at)"))
+        connection.execute(text("CREATE INDEX ix_logs_details ON logs (details)"))
+        connection.execute(text(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY, log_id INTEGER NOT NULL REFERENCES logs (id))"
+        ))
+        connection.execute(text("INSERT INTO logs (id, name, details) VALUES (1, 'first', 'x'), (2, 'second', 'y')"))
+        connection.execute(text("INSERT INTO events (log_id) VALUES (1), (2)"))
+
+def test_drop_column(logs):
+    with db.engine.begin() as connection:
+        op = Operations(connection)
+        op.drop_column('logs', 'details')
+        op.drop_column('logs', 'details')
+
+    with db.engine.begin() as connection:
+        assert [c['name'] for c in inspect(connection).get_columns('logs')] == ['id', 'name', 'started_at']
+        assert [i['name'] for i in inspect(connection).get_indexes('logs')] == ['ix_logs_started_at']
+        assert connection.execute(text("SELECT id, name FROM logs ORDER BY id")).all() == [(1, 'first'), (2, 'second')]
+        assert connection.execute(text("SELECT count(*) FROM events")).scalar() == 2
+
+def test_migrations_refuse_old_sqlite(app, monkeypatch):
+    monkeypatch.setattr(migrations, 'SQLITE_MIN_VERSION', (99, 0, 0))
+    with pytest.raises(MigrationError):
+        upgrade(db.engine)
+    with db.engine.connect() as connection:
+        assert not inspect(connection).has_table(migrations.VERSION_TABLE)
+
+def test_scrape_events_migration_drops_the_log_details(database):
+    """Migration 0005 drops scrape_logs.log_details, keeping the logs events point to."""
+    website = Website(name='Test Shop', url='https://shop.example.com/')
+    db.session.add(website)
+    db.session.commit()
+    db.session.add(ScrapeLog(website_id=website.id))
+    db.session.commit()
+    log_id = ScrapeLog.query.one().id
+    db.session.remove()
+
+    with db.engine.begin() as connection:
+        connection.execute(text("ALTER TABLE scrape_logs ADD COLUMN log_details TEXT"))
+        connection.execute(text("INSERT INTO scrape_events (scrape_log_id, url, host, kind, attempt, outcome, created_at) "
+                                "VALUES (:log_id, 'https://shop.example.com/', 'shop.example.com', 'listing', 0, 'ok', CURRENT_TIMESTAMP)"),
+                           {'log_id': log_id})
+        connection.execute(text("DELETE FROM schema_migrations WHERE revision >= '0005'"))
+
+    assert upgrade(db.engine) == ['0005', '0006', '0007']
+    with db.engine.connect() as connection:
+        assert 'log_details' not in [c['name'] for c in inspect(connection).get_columns('scrape_logs')]
+        assert connection.execute(text("SELECT scrape_log_id FROM scrape_events")).scalars().all() == [log_id]
+        assert connection.execute(text("PRAGMA foreign_key_check")).all() == []
+
+# The tables as the first release created them, before any migration
+BASELINE_SCHEMA = [
+    "CREATE TABLE websites (id INTEGER PRIMARY KEY, hash_id VARCHAR(64) NOT NULL UNIQUE, name VARCHAR(100) NOT NULL, "
+    "url VARCHAR(512) NOT NULL UNIQUE, priority INTEGER, status VARCHAR(20), request_delay FLOAT, "
+    "max_products INTEGER, last_scraped DATETIME, scrape_success_rate FLOAT, created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE categories (id INTEGER PRIMARY KEY, hash_id VARCHAR(64) NOT NULL UNIQUE, "
+    "name VARCHAR(100) NOT NULL UNIQUE, description TEXT, parent_id INTEGER REFERENCES categories (id))",
+    "CREATE TABLE products (id INTEGER PRIMARY KEY, hash_id VARCHAR(64) NOT NULL UNIQUE, name VARCHAR(255) NOT NULL, "
+    "description TEXT, price FLOAT, currency VARCHAR(3), price_zar FLOAT, url VARCHAR(512), image_url VARCHAR(512), "
+    "image_path VARCHAR(512), website_id INTEGER NOT NULL REFERENCES websites (id), "
+    "category_id INTEGER REFERENCES categories (id), confidence_score FLOAT, created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE scrape_logs (id INTEGER PRIMARY KEY, hash_id VARCHAR(64) NOT NULL UNIQUE, "
+    "website_id INTEGER NOT NULL REFERENCES websites (id), start_time DATETIME, end_time DATETIME, status VARCHAR(20), "
+    "products_found INTEGER, products_scraped INTEGER, products_failed INTEGER, avg_request_time FLOAT, "
+    "total_request_count INTEGER, error_message TEXT, log_details TEXT)",
+]
+
+def test_baseline_database_is_migrated_to_the_model_schema(app):
+    """Every column and foreign key a model declares reaches databases created before it, through a migration."""
+    with db.engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+    init_db()
+
+    with db.engine.connect() as connection:
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            assert {c['name'] for c in inspector.get_columns(table.name)} == set(table.columns.keys()), table.name
+            assert ({(tuple(fk['constrained_columns']), fk['referred_table']) for fk in inspector.get_foreign_keys(table.name)} ==
+                    {(tuple(fk.column_keys), fk.referred_table.name) for fk in table.foreign_key_constraints}), table.name
+
+def test_identity_migration_keys_match_the_model():
+    """Migration 0003 keeps its own copy of the key function; it must agree with the model's at the time."""
+    from app.migrations.versions import m0003_product_identity as m0003
+    from app.models.product import Product
+
+    for website_id, url, sku in [(1, 'HTTP://Shop.example.com:443/geckos/?utm_source=x&b=2#top', None),
+                                 (1, 'https://shop.example.com/geckos', ' GK-01 '), (2, None, None)]:
+        assert m0003.identity_key_for(website_id, url=url, sku=sku) == Product.identity_key_for(website_id, url=url, sku=sku)
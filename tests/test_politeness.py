@@ -0,0 +1,62 @@
+"""
+Tests for robots.txt handling.
+"""
+import requests
+
+from app.services import politeness
+from app.services.host_registry import host_registry
+from app.services.politeness import RobotsCache
+
+class Response:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+class RobotsTransport:
+    """Answers robots.txt requests with a fixed response, or raises it, counting the requests."""
+    replaying = False
+
+    def __init__(self, response):
+        self.response = response
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+def robots(monkeypatch, response, **kwargs):
+    transport = RobotsTransport(response)
+    monkeypatch.setattr(politeness, 'http_transport', transport)
+    return RobotsCache(user_agent='ReptileProductsScraper', **kwargs), transport
+
+def test_rules_and_crawl_delay_are_followed(monkeypatch):
+    cache, transport = robots(monkeypatch, Response(200, (
+        "User-agent: ReptileProductsScraper\n"
+        "Disallow: /checkout\n"
+        "Crawl-delay: 2\n"
+    )))
+    assert cache.allowed('https://robots-ok.example.com/products/gecko')
+    assert not cache.allowed('https://robots-ok.example.com/checkout/cart')
+    assert cache.crawl_delay('https://robots-ok.example.com/') == 2.0
+    assert host_registry.controller('robots-ok.example.com').min_interval == 2.0
+    # One fetch per origin while the rules are fresh
+    assert transport.requests == 1
+
+def test_client_error_allows_everything(monkeypatch):
+    cache, _ = robots(monkeypatch, Response(404))
+    assert cache.allowed('https://robots-404.example.com/products/gecko')
+
+def test_server_error_disallows_the_site_until_fetched_again(monkeypatch):
+    cache, transport = robots(monkeypatch, Response(503), error_ttl=0)
+    assert not cache.allowed('https://robots-503.example.com/products/gecko')
+
+    # The failure is only remembered for the error TTL
+    transport.response = Response(200, "User-agent: *\nDisallow:\n")
+    assert cache.allowed('https://robots-503.example.com/products/gecko')
+    assert transport.requests == 2
+
+def test_unreachable_robots_disallows_the_site(monkeypatch):
+    cache, _ = robots(monkeypatch, requests.ConnectionError('connection refused'))
+    assert not cache.allowed('https://robots-down.example.com/products/gecko')
@@ -0,0 +1,36 @@
+"""
+Tests for the run-length encoded price history.
+"""
+from app import db
+from app.models.price_observation import PriceObservation
+from app.models.product import Product
+from app.services.price_history_service import PriceHistoryService
+
+def make_product(website):
+    product = Product(name='Basking Lamp', website_id=website.id, url='https://shop.example.com/lamp', price=99.0)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+def runs(product):
+    return [(o.price, o.observation_count) for o in
+            PriceObservation.query.filter_by(product_id=product.id).order_by(PriceObservation.id)]
+
+def test_missing_price_does_not_split_the_run(website):
+    product = make_product(website)
+    service = PriceHistoryService()
+
+    assert service.record(product, 99.0, 'ZAR') is False
+    assert service.record(product, None, 'ZAR') is False
+    assert service.record(product, 99.0, 'ZAR') is False
+    assert runs(product) == [(99.0, 2)]
+    assert product.price == 99.0
+
+def test_record_many_skips_missing_prices(website):
+    product = make_product(website)
+    service = PriceHistoryService()
+
+    service.record_many([(product.id, 99.0, 'ZAR')])
+    assert service.record_many([(product.id, None, 'ZAR')]) == 0
+    assert service.record_many([(product.id, 109.0, 'ZAR')]) == 1
+    assert runs(product) == [(99.0, 1), (109.0, 1)]
@@ -0,0 +1,153 @@
+"""
+Tests for product identity keys, the product upsert and migration 0003.
+"""
+import pytest
+from sqlalchemy import event, text
+
+from app import db
+from app.migrations import upgrade
+from app.models.price_observation import PriceObservation
+from app.models.product import Product
+from app.models.website import Website
+from app.services.crawl_sinks import DatabaseSink
+from app.services.product_upsert_service import ProductUpsertService
+from app.utils.hash_utils import generate_hash_id
+
+URL = 'https://shop.example.com/products/leopard-gecko-hide'
+
+def scraped(**overrides):
+    """Product data as a crawl scrapes it."""
+    return {'name': 'Leopard Gecko Hide', 'description': 'A cave.', 'price': 149.0, 'currency': 'ZAR',
+            'url': URL, 'sku': 'LGH-1', 'image_url': None, **overrides}
+
+def test_identity_prefers_sku_over_url():
+    by_sku = Product.identity_key_for(1, url=URL, sku=' lgh-1 ')
+    assert by_sku == Product.identity_key_for(1, url=URL + '?variant=2', sku='LGH-1')
+    assert by_sku != Product.identity_key_for(2, url=URL, sku='LGH-1')
+    assert Product.identity_key_for(1, url=URL) == Product.identity_key_for(1, url=URL + '#reviews')
+    assert Product.identity_key_for(1) is None
+
+def test_upsert_inserts_updates_and_skips_unchanged(website):
+    service = ProductUpsertService()
+    first = service.upsert([scraped()], website.id)
+    assert len(first['inserted']) == 1
+
+    assert service.upsert([scraped()], website.id)['unchanged'] == first['inserted']
+    assert service.upsert([scraped(price=159.0)], website.id)['updated'] == first['inserted']
+    assert Product.query.count() == 1
+    assert Product.query.one().price == 159.0
+
+def test_upsert_counts_a_product_inserted_meanwhile_as_unchanged(website):
+    service = ProductUpsertService()
+    row = service._row(scraped(), website.id)
+    inserted = []
+
+    # Another writer stores the same product between the lookup and the upsert
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def insert_first(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO products') and not inserted:
+            columns = ', '.join(row)
+            values = ', '.join('?' for _ in row)
+            cursor.connection.execute(f"INSERT INTO products ({columns}) VALUES ({values})", list(row.values()))
+            inserted.append(True)
+
+    try:
+        result = service.upsert([scraped()], website.id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', insert_first)
+
+    product = Product.query.one()
+    assert inserted
+    assert result['inserted'] == []
+    assert result['unchanged'] == [product.id]
+    assert result['ids'] == {row['identity_key']: product.id}
+
+def test_migrated_products_are_matched_by_sku_on_the_next_crawl(app):
+    """Products from before migration 0003 are keyed on their URL; a crawl finding their SKU updates them."""
+    # Every table as it is now, except products, which has its shape from before the identity keys
+    tables = [table for table in db.metadata.sorted_tables if table.name != 'products']
+    db.metadata.create_all(db.engine, tables=tables)
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE products (id INTEGER PRIMARY KEY, hash_id VARCHAR(64) NOT NULL UNIQUE, "
+            "name VARCHAR(255) NOT NULL, description TEXT, price FLOAT, currency VARCHAR(3), price_zar FLOAT, "
+            "url VARCHAR(512), image_url VARCHAR(512), image_path VARCHAR(512), website_id INTEGER NOT NULL, "
+            "category_id INTEGER, confidence_score FLOAT, created_at DATETIME, updated_at DATETIME)"
+        ))
+    website = Website(name='Test Shop', url='https://shop.example.com/')
+    db.session.add(website)
+    db.session.commit()
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO products (hash_id, name, price, currency, url, website_id) "
+            "VALUES (:hash_id, 'Leopard Gecko Hide', 149.0, 'ZAR', :url, :website_id)"
+        ), {'hash_id': generate_hash_id(f"Leopard Gecko Hide-{website.id}"), 'url': URL, 'website_id': website.id})
+
+    upgrade(db.engine)
+    legacy = Product.query.one()
+    assert legacy.sku is None
+    assert legacy.identity_key == Product.identity_key_for(website.id, url=URL)
+
+    # The crawl sees a known product, and the upsert moves it to the SKU key
+    assert Product.find_by_identity(website.id, URL, 'LGH-1').id == legacy.id
+    assert DatabaseSink(scraper=None).write(scraped(), website.id) == 'updated'
+    result = ProductUpsertService().upsert([scraped(price=159.0)], website.id)
+
+    db.session.expire_all()
+    product = Product.query.one()
+    assert result['updated'] == [legacy.id]
+    assert product.id == legacy.id
+    assert product.sku == 'LGH-1'
+    assert product.identity_key == Product.identity_key_for(website.id, url=URL, sku='LGH-1')
+    assert product.price == 159.0
+
+def test_rekey_leaves_a_product_already_keyed_on_the_sku(website):
+    service = ProductUpsertService()
+    service.upsert([scraped()], website.id)
+    legacy = Product(name='Leopard Gecko Hide', website_id=website.id, url=URL + '-old')
+    db.session.add(legacy)
+    db.session.commit()
+
+    # Same SKU, but the product keyed on it already exists: the URL-keyed one stays as it is
+    service.upsert([scraped(url=URL + '-old')], website.id)
+    db.session.expire_all()
+    assert Product.query.count() == 2
+    assert db.session.get(Product, legacy.id).sku is None
+
+def test_products_and_their_price_history_are_written_together(website, monkeypatch):
+    from app.services.scraper_service import ScraperService
+    from app.utils.write_queue import write_queue
+
+    scraper = ScraperService(None, None)
+
+    def fail(observations):
+        raise RuntimeError('price history unavailable')
+
+    monkeypatch.setattr(scraper.price_history_service, 'record_many', fail)
+    with pytest.raises(RuntimeError):
+        write_queue.run(scraper._save_products, [scraped()], website.id)
+    assert Product.query.count() == 0
+
+    product_ids, _ = write_queue.run(ScraperService(None, None)._save_products, [scraped()], website.id)
+    db.session.expire_all()
+    assert Product.query.count() == 1
+    assert PriceObservation.query.filter_by(product_id=next(iter(product_ids.values()))).count() == 1
+
+def test_page_scraped_without_its_sku_after_a_rekey_updates_the_product(website):
+    service = ProductUpsertService()
+    product_id = service.upsert([scraped(sku=None)], website.id)['inserted'][0]
+    hash_id = db.session.get(Product, product_id).hash_id
+    assert service.upsert([scraped()], website.id)['updated'] == [product_id]
+
+    # The URL key is free again, but the page still belongs to the product keyed on its SKU
+    assert Product.find_by_identity(website.id, URL).id == product_id
+    result = service.upsert([scraped(sku=None, price=159.0)], website.id)
+    assert result['updated'] == [product_id]
+    # The scraper looks the product up by the key of what it scraped
+    assert result['ids'][Product.identity_key_for(website.id, url=URL)] == product_id
+
+    db.session.expire_all()
+    product = Product.query.one()
+    assert product.hash_id == hash_id
+    assert product.sku == 'LGH-1'
+    assert product.price == 159.0
@@ -0,0 +1,52 @@
+"""
+Tests for the deduplicated store of raw product pages.
+"""
+from app import db
+from app.models.product import Product
+from app.models.raw_page import RawPage
+from app.services.crawl_sinks import DatabaseSink
+from app.services.raw_page_store import raw_page_store
+from app.services.scraper_service import ScraperService
+from app.utils.write_queue import write_queue
+
+PAGE = '<html><body><h1>Bearded Dragon Basking Lamp</h1><p>R 249,00</p></body></html>'
+
+class AIService:
+    """Categorizes everything as Heating & Lighting."""
+    def categorize_products(self, products_data):
+        return [{'category_name': 'Heating & Lighting', 'confidence_score': 0.9} for _ in products_data]
+
+def test_identical_pages_are_stored_once(database):
+    first = raw_page_store.pack(PAGE, 'https://shop.example.com/products/lamp')
+    again = raw_page_store.pack(PAGE.encode('utf-8'), 'https://shop.example.com/products/lamp?ref=home')
+    other = raw_page_store.pack(PAGE.replace('249', '199'), 'https://shop.example.com/products/lamp-sale')
+    assert first['content_hash'] == again['content_hash'] != other['content_hash']
+
+    ids = write_queue.run(raw_page_store.save_many, [first, again, other])
+    assert len(set(ids.values())) == 2
+    assert RawPage.query.count() == 2
+
+    # Pages stored by an earlier crawl are reused, not inserted again
+    assert write_queue.run(raw_page_store.save_many, [again]) == {first['content_hash']: ids[first['content_hash']]}
+    assert RawPage.query.count() == 2
+
+    page = db.session.get(RawPage, ids[first['content_hash']])
+    assert page.size == len(PAGE) and page.compressed_size == len(page.data)
+    assert raw_page_store.html(page) == PAGE
+
+def test_products_with_the_same_page_share_it(website):
+    sink = DatabaseSink(ScraperService(AIService(), None))
+    for number in range(2):
+        url = f'https://shop.example.com/products/lamp-{number}'
+        sink.write({'name': f'Basking Lamp {number}', 'description': 'A lamp.', 'price': 249.0, 'currency': 'ZAR',
+                    'url': url, 'sku': None, 'image_url': None, 'raw_page': raw_page_store.pack(PAGE, url)},
+                   website.id)
+    sink.flush(website.id)
+
+    assert {product.raw_page_id for product in Product.query} == {RawPage.query.one().id}
+
+    # Pages no product links to any more are purged
+    Product.query.update({'raw_page_id': None})
+    db.session.commit()
+    assert raw_page_store.purge_unlinked() == 1
+    assert RawPage.query.count() == 0
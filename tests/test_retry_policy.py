@@ -0,0 +1,65 @@
+"""
+Tests for the retry policy of HTTP fetches.
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.retry_policy import RetryBudget, RetryPolicy, parse_retry_after
+
+HOST = 'shop.example.com'
+NOW = datetime(2026, 10, 19, 12, 0, 0, tzinfo=timezone.utc)
+
+@pytest.mark.parametrize('value, seconds', [
+    ('120', 120.0),
+    (' 0 ', 0.0),
+    ('Mon, 19 Oct 2026 12:01:30 GMT', 90.0),
+    # A date in the past means retry now
+    ('Mon, 19 Oct 2026 11:00:00 GMT', 0.0),
+    (None, None),
+    ('', None),
+    ('-5', None),
+    ('soon', None),
+])
+def test_parse_retry_after(value, seconds):
+    assert parse_retry_after(value, now=NOW) == seconds
+
+def test_retry_after_is_used_as_the_delay():
+    policy = RetryPolicy()
+    assert policy.retry_delay(HOST, 0, 503, {'Retry-After': '7'}) == 7.0
+
+def test_retry_after_beyond_the_limit_gives_up():
+    policy = RetryPolicy(max_retry_after=60)
+    assert policy.retry_delay(HOST, 0, 429, {'Retry-After': '3600'}) is None
+
+def test_backoff_stays_within_the_capped_ceiling():
+    policy = RetryPolicy(rules={503: 10}, base=1.0, cap=4.0, budget_minimum=100)
+    for attempt in range(10):
+        assert 0.0 <= policy.retry_delay(HOST, attempt, 503) <= min(4.0, 2 ** attempt)
+
+def test_statuses_are_retried_up_to_their_limit():
+    policy = RetryPolicy(rules={503: 2}, error_retries=1)
+    assert policy.retry_delay(HOST, 1, 503) is not None
+    assert policy.retry_delay(HOST, 2, 503) is None
+    assert policy.retry_delay(HOST, 0, 404) is None
+    assert policy.retry_delay(HOST, 0, error=True) is not None
+    assert policy.retry_delay(HOST, 1, error=True) is None
+
+def test_budget_allows_the_minimum_then_a_share_of_requests():
+    budget = RetryBudget(ratio=0.5, minimum=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    assert (budget.requests, budget.retries, budget.denied) == (2, 3, 2)
+
+def test_used_up_budget_stops_retries_per_host():
+    policy = RetryPolicy(rules={503: 5}, budget_ratio=0.0, budget_minimum=1)
+    assert policy.retry_delay(HOST, 0, 503, {'Retry-After': '1'}) == 1.0
+    assert policy.retry_delay(HOST, 0, 503, {'Retry-After': '1'}) is None
+    # Other hosts have budgets of their own
+    assert policy.retry_delay('other.example.com', 0, 503, {'Retry-After': '1'}) == 1.0
+    assert policy.snapshot()[HOST] == {'requests': 0, 'retries': 1, 'denied': 1, 'tokens': 0.0}
@@ -0,0 +1,49 @@
+"""
+Tests for price filters and offsets on product search.
+"""
+import pytest
+
+from app import db
+from app.models.product import Product
+from app.services import search_service
+
+@pytest.fixture
+def products(website, monkeypatch):
+    # A fresh index, as the shared one may hold another test's database
+    monkeypatch.setattr(search_service, 'local_search_index', search_service.LocalSearchIndex(refresh_interval=0))
+    for index in range(7):
+        db.session.add(Product(name=f"Gecko Hide {index}", website_id=website.id, price=50.0 + index,
+                               url=f"https://shop.example.com/products/hide-{index}"))
+    db.session.commit()
+
+@pytest.mark.parametrize('query', ['', 'q=gecko&'])
+def test_malformed_price_is_ignored(app, products, query):
+    response = app.test_client().get(f"/api/products?{query}min_price=cheap&max_price=1e")
+    assert response.status_code == 200
+    assert len(response.get_json()['products']) == 7
+
+def test_search_applies_an_unaligned_offset_exactly(app, products):
+    client = app.test_client()
+    everything = [p['name'] for p in client.get('/api/products?q=gecko&limit=10').get_json()['products']]
+
+    body = client.get('/api/products?q=gecko&limit=2&offset=3').get_json()
+    assert [p['name'] for p in body['products']] == everything[3:5]
+    assert body['pagination']['offset'] == 3
+    assert body['pagination']['has_more'] is True
+
+    last = client.get('/api/products?q=gecko&limit=2&offset=5').get_json()
+    assert [p['name'] for p in last['products']] == everything[5:7]
+    assert last['pagination']['has_more'] is False
+
+def test_search_price_filter(app, products):
+    body = app.test_client().get('/api/products?q=gecko&min_price=54&max_price=55').get_json()
+    assert sorted(p['price'] for p in body['products']) == [54.0, 55.0]
+
+@pytest.mark.parametrize('query', ['', 'q=gecko&'])
+def test_products_page_ignores_a_malformed_price(app, products, query):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['authenticated'] = True
+    response = client.get(f"/products?{query}min_price=cheap&page=x")
+    assert response.status_code == 200
+    assert b'Gecko Hide 6' in response.data
@@ -0,0 +1,38 @@
+"""
+Tests for the per-host AIMD controller.
+"""
+import pytest
+
+from app.config import CIRCUIT_FAILURE_STATUSES
+from app.utils.throttling import AIMDController
+
+def controller():
+    """A controller with room to grow and to back off."""
+    return AIMDController('shop.example.com', limit=2.0, max_limit=4, overload_statuses=CIRCUIT_FAILURE_STATUSES)
+
+@pytest.mark.parametrize('status_code', [200, 204, 301, 304])
+def test_success_widens_the_window(status_code):
+    aimd = controller()
+    aimd.release(aimd.acquire(), status_code, 0.1)
+    assert aimd.limit > 2.0
+    assert aimd.successes == 1
+
+@pytest.mark.parametrize('status_code', CIRCUIT_FAILURE_STATUSES)
+def test_overload_halves_the_window(status_code):
+    aimd = controller()
+    aimd.release(aimd.acquire(), status_code, 0.1)
+    assert aimd.limit == 1.0
+    assert aimd.overloads == 1
+
+@pytest.mark.parametrize('status_code', [400, 401, 404, 410])
+def test_other_client_errors_leave_the_pace_alone(status_code):
+    aimd = controller()
+    aimd.release(aimd.acquire(), status_code, 0.1)
+    assert aimd.limit == 2.0
+    assert aimd.interval == 0.0
+    assert (aimd.successes, aimd.overloads, aimd.in_flight) == (0, 0, 0)
+
+def test_errors_without_a_response_are_overload():
+    aimd = controller()
+    aimd.release(aimd.acquire(), error=True)
+    assert aimd.limit == 1.0
@@ -0,0 +1,98 @@
+"""
+Tests for WARC capture and offline replay.
+"""
+import gzip
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.utils.http_transport import HttpTransport
+from app.utils.warc import WarcArchive, WarcWriter
+
+PAGE = '<html><body><h1>Leopard Gecko Hide</h1><p>R 149,99</p></body></html>'
+
+class ShopHandler(BaseHTTPRequestHandler):
+    """A product page, a redirect to it and a missing page."""
+    def do_GET(self):
+        if self.path == '/old-gecko-hide':
+            self.send_response(301)
+            self.send_header('Location', '/products/gecko-hide?colour=brown')
+            self.end_headers()
+            return
+        if self.path == '/products/gecko-hide?colour=brown':
+            body = gzip.compress(PAGE.encode('utf-8'))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def shop():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ShopHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_captured_crawl_replays_offline(shop, tmp_path):
+    capture = HttpTransport(http2=False, capture_dir=str(tmp_path), replay_dir=None)
+    live = capture.get(f"{shop}/old-gecko-hide", timeout=5)
+    capture.get(f"{shop}/products/sold-out", timeout=5)
+    # A request and a response record for the redirect, the page and the 404
+    assert capture.report()['capture']['records'] == 6
+    capture.close()
+    assert live.status_code == 200
+
+    replay = HttpTransport(http2=False, capture_dir=None, replay_dir=str(tmp_path))
+    assert replay.replaying
+    # The redirect is followed inside the archive; the body is stored decoded
+    response = replay.get(f"{shop}/old-gecko-hide")
+    assert response.status_code == 200
+    assert response.url == f"{shop}/products/gecko-hide?colour=brown"
+    assert response.text == PAGE
+    assert response.headers['Content-Type'] == 'text/html; charset=utf-8'
+    assert 'Content-Encoding' not in response.headers
+    assert replay.get(f"{shop}/products/sold-out").status_code == 404
+
+    missing = replay.get(f"{shop}/products/never-crawled")
+    assert (missing.status_code, missing.reason) == (404, 'Not In Archive')
+    assert replay.report()['replay']['hits'] == 2
+    assert replay.report()['replay']['misses'] == 1
+
+def test_archives_are_standard_warc_files(tmp_path):
+    writer = WarcWriter(str(tmp_path), max_size=1)
+    writer.write_exchange('GET', 'https://shop.example.com/a', {}, 200, 'OK', {}, b'first')
+    writer.write_exchange('GET', 'https://shop.example.com/b', {}, 200, 'OK', {}, b'second')
+    writer.close()
+
+    # Full files are rotated, and each opens as plain gzip starting with a warcinfo record
+    filenames = sorted(os.listdir(tmp_path))
+    assert len(filenames) == 2
+    with gzip.open(tmp_path / filenames[0]) as archive:
+        content = archive.read()
+    assert content.startswith(b'WARC/1.1\r\nWARC-Type: warcinfo\r\n')
+    assert content.count(b'WARC/1.1\r\n') == 3
+    assert b'WARC-Type: response' in content and b'WARC-Type: request' in content
+
+def test_latest_archived_response_wins(tmp_path):
+    writer = WarcWriter(str(tmp_path))
+    writer.write_exchange('GET', 'https://shop.example.com/a', {}, 503, 'Service Unavailable', {}, b'')
+    writer.write_exchange('GET', 'https://shop.example.com/a', {}, 200, 'OK', {}, b'in stock')
+    writer.close()
+
+    archive = WarcArchive(str(tmp_path))
+    assert len(archive) == 1
+    response = archive.response_for('GET', 'https://shop.example.com/a')
+    assert (response.status_code, response.content) == (200, b'in stock')
+    # Only GET responses are archived
+    assert archive.response_for('POST', 'https://shop.example.com/a').status_code == 404
@@ -0,0 +1,61 @@
+"""
+Tests for the single-writer queue on SQLite.
+"""
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.models.website import Website
+from app.utils.write_queue import write_queue
+
+def add_website(name):
+    db.session.add(Website(name=name, url=f'https://{name}.example.com/'))
+    db.session.flush()
+    return threading.current_thread().name
+
+def test_jobs_run_on_the_writer_thread_and_are_committed(database):
+    assert write_queue.run(add_website, 'geckoshop') == 'db-writer'
+    db.session.rollback()
+    assert Website.query.filter_by(name='geckoshop').count() == 1
+
+def test_failed_job_is_rolled_back_as_a_whole(database):
+    def add_two_then_fail():
+        add_website('first')
+        add_website('second')
+        raise RuntimeError('disk full')
+
+    with pytest.raises(RuntimeError):
+        write_queue.run(add_two_then_fail)
+    assert Website.query.filter(Website.name.in_(['first', 'second'])).count() == 0
+
+def test_nested_jobs_join_the_outer_transaction(database):
+    def outer():
+        write_queue.run(add_website, 'inner')
+        assert write_queue.submit(add_website, 'queued').result() == 'db-writer'
+        raise RuntimeError('abort')
+
+    with pytest.raises(RuntimeError):
+        write_queue.run(outer)
+    assert Website.query.filter(Website.name.in_(['inner', 'queued'])).count() == 0
+
+def test_concurrent_writers_do_not_lock_each_other_out(app, database):
+    errors = []
+
+    def write(number):
+        with app.app_context():
+            try:
+                for batch in range(5):
+                    write_queue.run(add_website, f'shop-{number}-{batch}')
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert db.session.execute(text("SELECT count(*) FROM websites WHERE name LIKE 'shop-%'")).scalar() == 40
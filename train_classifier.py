@@ -0,0 +1,146 @@
+"""
+Train, evaluate and inspect the local product category classifier.
+
+The classifier learns from products whose category was confirmed manually
+on the products page and is used by AIService as a fast tier before the LLM.
+
+Usage:
+    python train_classifier.py train [--output PATH] [--holdout 0.2]
+    python train_classifier.py evaluate [--model PATH] [--threshold 0.75]
+    python train_classifier.py info [--model PATH]
+"""
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+from app import app
+from app.config import LOCAL_CLASSIFIER_PATH, LOCAL_CLASSIFIER_THRESHOLD
+from app.models import Product
+from app.services.local_classifier import LocalClassifier, product_text
+
+def load_examples():
+    """Load texts and labels for all manually confirmed products."""
+    with app.app_context():
+        products = Product.find_confirmed()
+        texts = [
+            product_text({'name': product.name, 'description': product.description})
+            for product in products
+        ]
+        labels = [product.category.name for product in products]
+    return texts, labels
+
+def split_examples(texts, labels, holdout, seed=42):
+    """Split examples into a training set and a holdout set."""
+    indices = list(range(len(texts)))
+    random.Random(seed).shuffle(indices)
+    cut = int(len(indices) * (1 - holdout))
+    train = indices[:cut]
+    test = indices[cut:]
+    return (
+        [texts[i] for i in train], [labels[i] for i in train],
+        [texts[i] for i in test], [labels[i] for i in test]
+    )
+
+def print_report(report):
+    """Print an evaluation report."""
+    print(f"Examples:          {report['examples']}")
+    print(f"Accuracy:          {report['accuracy'] * 100:.1f}%")
+    print(f"Coverage @ {report['threshold']:.2f}:  {report['coverage'] * 100:.1f}% "
+          f"(accuracy {report['covered_accuracy'] * 100:.1f}%)")
+    print()
+    print(f"{'Category':<30} {'Precision':>9} {'Recall':>7} {'Support':>8}")
+    for name, stats in report['classes'].items():
+        print(f"{str(name):<30} {stats['precision']:>9.2f} {stats['recall']:>7.2f} {stats['support']:>8}")
+
+def train(args):
+    """Train a classifier and serialize it."""
+    texts, labels = load_examples()
+    if len(set(labels)) < 2:
+        logging.error(f"Need confirmed products in at least 2 categories, found {len(texts)} products "
+                      f"in {len(set(labels))} categories")
+        return 1
+
+    if args.holdout > 0:
+        train_texts, train_labels, test_texts, test_labels = split_examples(texts, labels, args.holdout)
+    else:
+        train_texts, train_labels, test_texts, test_labels = texts, labels, [], []
+
+    logging.info(f"Training on {len(train_texts)} confirmed products ({len(set(train_labels))} categories)")
+    start_time = time.time()
+    classifier = LocalClassifier().fit(train_texts, train_labels, epochs=args.epochs)
+    logging.info(f"Training finished in {time.time() - start_time:.2f} seconds")
+
+    if test_texts:
+        print_report(classifier.evaluate(test_texts, test_labels, threshold=args.threshold))
+
+    classifier.save(args.output)
+    return 0
+
+def evaluate(args):
+    """Evaluate a serialized classifier against the confirmed products."""
+    classifier = LocalClassifier.load(args.model)
+    texts, labels = load_examples()
+    if not texts:
+        logging.error("No confirmed products to evaluate against")
+        return 1
+
+    start_time = time.time()
+    report = classifier.evaluate(texts, labels, threshold=args.threshold)
+    elapsed = time.time() - start_time
+
+    print_report(report)
+    print()
+    print(f"Throughput:        {len(texts) / elapsed:,.0f} products/s")
+    return 0
+
+def info(args):
+    """Print metadata for a serialized classifier."""
+    classifier = LocalClassifier.load(args.model)
+    print(json.dumps({
+        'path': args.model,
+        'classes': classifier.classes,
+        'features': len(classifier.weights),
+        'hash_buckets': classifier.n_features,
+        'metadata': classifier.metadata
+    }, indent=2))
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Local category classifier')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subparsers.add_parser('train', help='Train from manually confirmed products')
+    train_parser.add_argument('--output', default=LOCAL_CLASSIFIER_PATH, help='Model output path')
+    train_parser.add_argument('--holdout', type=float, default=0.2, help='Fraction held out for evaluation')
+    train_parser.add_argument('--epochs', type=int, default=15, help='Training epochs')
+    train_parser.add_argument('--threshold', type=float, default=LOCAL_CLASSIFIER_THRESHOLD,
+                              help='Confidence threshold for the coverage report')
+    train_parser.set_defaults(func=train)
+
+    evaluate_parser = subparsers.add_parser('evaluate', help='Evaluate a trained model')
+    evaluate_parser.add_argument('--model', default=LOCAL_CLASSIFIER_PATH, help='Model path')
+    evaluate_parser.add_argument('--threshold', type=float, default=LOCAL_CLASSIFIER_THRESHOLD,
+                                 help='Confidence threshold for the coverage report')
+    evaluate_parser.set_defaults(func=evaluate)
+
+    info_parser = subparsers.add_parser('info', help='Show model metadata')
+    info_parser.add_argument('--model', default=LOCAL_CLASSIFIER_PATH, help='Model path')
+    info_parser.set_defaults(func=info)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())